@@ -16,6 +16,15 @@ class AccountHolder:
     :param last_name: Last name of account holder.
     """
 
+    __slots__ = (
+        "bank",
+        "accountholder_id",
+        "first_name",
+        "last_name",
+        "accounts",
+        "cards",
+    )
+
     def __init__(self, bank, accountholder_id: str, first_name: str, last_name: str):
         self.bank = bank
         self.accountholder_id = accountholder_id
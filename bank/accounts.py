@@ -4,11 +4,93 @@ bank.accounts
 This module contains code for managing accounts.
 """
 
+from .billing import next_statement_date, CYCLE_DAYS
 from .cards import Card
 from .exceptions import InsufficientBalance, AccountError, ExceedsLimit
+from .money import (
+    check_cents,
+    to_cents,
+    CREDIT_LIMIT,
+    MAX_CENTS,
+    MIN_CENTS,
+    WITHDRAWAL_LIMIT,
+)
+from .status import TransactionResult, TransactionStatus
 import time, datetime
 
 
+class AccountRegistry(dict):
+    """
+    Dict of account_id -> Account that keeps the running balance totals of an
+    Accounts() class in step as accounts are opened (added) or closed (removed).
+    :param holder_accounts: An AccountHolder.Accounts() class the totals belong to.
+    :param kind: Account type bucket the registry totals into (checking, savings, credit).
+    """
+
+    __slots__ = ("holder_accounts", "kind")
+
+    def __init__(self, holder_accounts, kind: str):
+        super().__init__()
+        self.holder_accounts = holder_accounts
+        self.kind = kind
+
+    def __setitem__(self, account_id, account):
+        old = self.get(account_id)
+        if old is not None:
+            self._detach(old)
+        super().__setitem__(account_id, account)
+        self._attach(account)
+
+    def __delitem__(self, account_id):
+        self._detach(self[account_id])
+        super().__delitem__(account_id)
+
+    def pop(self, account_id, *default):
+        if account_id not in self:
+            if default:
+                return default[0]
+            raise KeyError(account_id)
+        account = self[account_id]
+        del self[account_id]
+        return account
+
+    def popitem(self):
+        account_id, account = super().popitem()
+        self._detach(account)
+        return account_id, account
+
+    def setdefault(self, account_id, account=None):
+        if account_id not in self:
+            self[account_id] = account
+        return self[account_id]
+
+    def update(self, *args, **kwargs):
+        for account_id, account in dict(*args, **kwargs).items():
+            self[account_id] = account
+
+    def clear(self):
+        for account in self.values():
+            self._detach(account)
+        super().clear()
+
+    def _attach(self, account):
+        account._ledger = self.holder_accounts
+        account._ledger_kind = self.kind
+        self.holder_accounts._apply_delta(self.kind, account.balance)
+        if self.holder_accounts._bank is not None:
+            self.holder_accounts._bank._account_opened(
+                self.holder_accounts, self.kind, account
+            )
+
+    def _detach(self, account):
+        if account._ledger is self.holder_accounts:
+            if self.holder_accounts._bank is not None:
+                self.holder_accounts._bank._account_closed(account)
+            self.holder_accounts._apply_delta(self.kind, -account.balance)
+            account._ledger = None
+            account._ledger_kind = None
+
+
 class Account:
     """
     Base class for accounts, handles balances & transactions.
@@ -19,8 +101,26 @@ class Account:
     :param opening_balance: When account is created the opening amount of $.
     :param open_date: Date the account was opened. 
     :param status: Status of the account (open, closed, locked).
+    When the bank is in cents mode balances, amounts and limits are integer cents.
     """
 
+    __slots__ = (
+        "account_id",
+        "account_type",
+        "holder_accounts",
+        "accountholder_id",
+        "_ledger",
+        "_ledger_kind",
+        "_balance",
+        "open_date",
+        "_status",
+        "linked_cards",
+        "_withdrawal_limit",
+        "cents",
+    )
+    # Amount the balance may be drawn below $0, only credit accounts extend credit.
+    credit_limit = 0
+
     def __init__(
         self,
         account_id: int,
@@ -35,26 +135,96 @@ class Account:
         self.account_type = account_type
         self.holder_accounts = holder_accounts
         self.accountholder_id = account_id
-        self.balance = opening_balance if opening_balance >= 0 else 0
+        self._ledger = None
+        self._ledger_kind = None
+        self.cents = holder_accounts.holder.bank.cents
+        if self.cents:
+            check_cents(opening_balance)
+        self._balance = opening_balance if opening_balance >= 0 else 0
         self.open_date = open_date
-        self.status = status
+        self._status = status
         self.linked_cards = {}
-        self.withdrawal_limit = 5000
+        self._withdrawal_limit = (
+            to_cents(WITHDRAWAL_LIMIT) if self.cents else WITHDRAWAL_LIMIT
+        )
+
+    @property
+    def status(self) -> str:
+        """
+        Status of the account (open, closed, locked).
+        """
+        return self._status
+
+    @status.setter
+    def status(self, status: str):
+        ledger = self._ledger
+        if ledger is not None and ledger._bank is not None:
+            ledger._bank._account_status_changed(self, self._status, status)
+        self._status = status
+
+    @property
+    def withdrawal_limit(self):
+        """
+        Most that can be withdrawn in a single transaction.
+        """
+        return self._withdrawal_limit
+
+    @withdrawal_limit.setter
+    def withdrawal_limit(self, limit):
+        ledger = self._ledger
+        if ledger is not None and ledger._bank is not None:
+            ledger._bank._account_limit_changed(self, limit)
+        self._withdrawal_limit = limit
+
+    @property
+    def balance(self):
+        """
+        Current balance of the account.
+        """
+        return self._balance
+
+    @balance.setter
+    def balance(self, value):
+        self._set_balance(value)
+
+    def _set_balance(self, value):
+        """
+        Replace the balance and move the running totals by the difference, O(1).
+        :param value: New balance.
+        """
+        amount = value - self._balance
+        self._balance = value
+        if self._ledger is not None:
+            self._ledger._apply_delta(self._ledger_kind, amount, self)
+
+    def _post(self, amount):
+        """
+        Apply a signed amount to the balance and to the running totals the
+        account is registered under, O(1).
+        :param amount: Signed amount (negative for debits).
+        """
+        self._balance += amount
+        if self._ledger is not None:
+            self._ledger._apply_delta(self._ledger_kind, amount, self)
 
     def withdraw(self, amount: float) -> dict:
         """'
         Method to withdraw funds from account.
         :param amount: Transaction amount.
         """
+        if self.cents:
+            check_cents(amount)
         # Assuming there can be $0.
         if self.status != "open":
             raise AccountError(self.account_id, self.status)
         elif amount > self.withdrawal_limit:
-            raise ExceedsLimit(self.withdrawal_limit)
-        elif amount > self.balance:
-            raise InsufficientBalance(self.balance, amount)
+            raise ExceedsLimit(self.withdrawal_limit, self.cents)
+        elif amount > self.balance + self.credit_limit:
+            raise InsufficientBalance(
+                self.balance + self.credit_limit, amount, self.cents
+            )
         else:
-            self.balance -= amount
+            self._post(-amount)
             return {
                 "status": True,
                 "new_balance": self.balance,
@@ -66,15 +236,61 @@ class Account:
         Method to deposit funds to an account.
         :param amount: Transaction amount.
         """
+        if self.cents:
+            check_cents(amount)
         if self.status != "open":
             raise AccountError(self.account_id, self.status)
-        self.balance += amount
+        self._post(amount)
         return {
             "status": True,
             "new_balance": self.balance,
             "transaction_time": time.time(),
         }
 
+    def try_withdraw(self, amount: float, result: TransactionResult = None):
+        """
+        Same as withdraw() but declines are returned as a status code instead
+        of raised, returns a TransactionResult.
+        :param amount: Transaction amount.
+        :param result: TransactionResult to overwrite rather than allocating one.
+        """
+        if self.cents and (
+            amount.__class__ is not int or not MIN_CENTS <= amount <= MAX_CENTS
+        ):
+            code = TransactionStatus.INVALID_AMOUNT
+        elif self.status != "open":
+            code = TransactionStatus.ACCOUNT_ERROR
+        elif amount > self.withdrawal_limit:
+            code = TransactionStatus.EXCEEDS_LIMIT
+        elif amount > self.balance + self.credit_limit:
+            code = TransactionStatus.INSUFFICIENT_BALANCE
+        else:
+            self._post(-amount)
+            code = TransactionStatus.OK
+        if result is None:
+            result = TransactionResult()
+        return result.set(code, self, amount)
+
+    def try_deposit(self, amount: float, result: TransactionResult = None):
+        """
+        Same as deposit() but declines are returned as a status code instead
+        of raised, returns a TransactionResult.
+        :param amount: Transaction amount.
+        :param result: TransactionResult to overwrite rather than allocating one.
+        """
+        if self.cents and (
+            amount.__class__ is not int or not MIN_CENTS <= amount <= MAX_CENTS
+        ):
+            code = TransactionStatus.INVALID_AMOUNT
+        elif self.status != "open":
+            code = TransactionStatus.ACCOUNT_ERROR
+        else:
+            self._post(amount)
+            code = TransactionStatus.OK
+        if result is None:
+            result = TransactionResult()
+        return result.set(code, self, amount)
+
 
 class CheckingAccount(Account):
     """
@@ -88,6 +304,8 @@ class CheckingAccount(Account):
     :param status: Status of the account (open, closed, frozen).
     """
 
+    __slots__ = ()
+
     def __init__(
         self,
         account_id: int,
@@ -124,6 +342,8 @@ class SavingsAccount(Account):
     :kwarg interest: The interest of the savings account.
     """
 
+    __slots__ = ("interest_rate",)
+
     def __init__(
         self,
         account_id: int,
@@ -151,7 +371,10 @@ class SavingsAccount(Account):
 
 class CreditAccount(Account):
     """
-    Class for credit accounts, inherits base account class.
+    Class for credit accounts, inherits base account class. Statements close
+    monthly on the cycle day (see bank.billing), with the owed balance as the
+    statement balance and a minimum due by the due date. Every credit to the
+    account (deposits, incoming transfers) is a payment toward it.
     :param account_id: Unique ID associated with the account.
     :param account_type: Type of account (savings, checkings, credit).
     :param holder_accounts: An AccountHolder.Accounts() class.
@@ -160,8 +383,24 @@ class CreditAccount(Account):
     :param open_date: Date the account was opened. 
     :param status: Status of the account (open, closed, frozen).
     :kwarg apr: the APR charged on outstanding balance.  
+    :kwarg credit_limit: How far below $0 the balance may be drawn, a negative balance is owed,
+        defaults to $5000.
+    :kwarg cycle_day: Day of the month (1 to 28) statements close on, defaults
+        to the day of the month the account was opened (28 past the 28th).
     """
 
+    __slots__ = (
+        "apr_rate",
+        "credit_limit",
+        "cycle_day",
+        "billing_end",
+        "statement_balance",
+        "minimum_due",
+        "due_date",
+        "paid",
+        "late_fees",
+    )
+
     def __init__(
         self,
         account_id: int,
@@ -172,10 +411,13 @@ class CreditAccount(Account):
         open_date=datetime.date.today(),
         status: str = "open",
         apr_rate=0.15,
+        credit_limit=None,
+        cycle_day: int = None,
     ):
         super().__init__(
             account_id,
             account_type,
+            holder_accounts,
             accountholder_id,
             opening_balance,
             open_date,
@@ -183,12 +425,80 @@ class CreditAccount(Account):
         )
         self.account_type = account_type
         self.apr_rate = apr_rate
-        self.holderaccounts.credit_accounts[self.account_id] = self
-        # self.billing_end =
-        # self.balance_due =
-        # .
-        # .
-        # etc etc.
+        if credit_limit is None:
+            credit_limit = to_cents(CREDIT_LIMIT) if self.cents else CREDIT_LIMIT
+        elif self.cents:
+            check_cents(credit_limit)
+        self.credit_limit = credit_limit
+        self._start_billing(cycle_day)
+        self.holder_accounts.credit_accounts[self.account_id] = self
+
+    def _start_billing(self, cycle_day: int = None):
+        """
+        Set the billing cycle of a new account, its first statement closes on
+        the first cycle day after it was opened.
+        :param cycle_day: Day of the month statements close on, see CreditAccount.
+        """
+        if cycle_day is None:
+            cycle_day = min(self.open_date.day, CYCLE_DAYS)
+        elif not 1 <= cycle_day <= CYCLE_DAYS:
+            raise ValueError(f"cycle_day must be from 1 to {CYCLE_DAYS}, got {cycle_day}.")
+        zero = 0 if self.cents else 0.0
+        self.cycle_day = cycle_day
+        # Date the current cycle's statement closes on.
+        self.billing_end = next_statement_date(self.open_date, cycle_day)
+        # Owed when the last statement closed, and the least to pay by due_date.
+        self.statement_balance = zero
+        self.minimum_due = zero
+        self.due_date = None
+        # Payments since the last statement closed.
+        self.paid = zero
+        # Number of late fees charged.
+        self.late_fees = 0
+
+    @property
+    def balance_due(self):
+        """
+        What is left to pay of the minimum due, a late fee is charged if
+        anything is left on the due date.
+        """
+        return self.minimum_due - self.paid if self.paid < self.minimum_due else 0
+
+    def _billing_state(self) -> tuple:
+        """
+        The billing cycle as a plain tuple, dates as ordinals: (cycle_day,
+        billing_end, statement_balance, minimum_due, due_date, paid, late_fees).
+        """
+        return (
+            self.cycle_day,
+            self.billing_end.toordinal(),
+            self.statement_balance,
+            self.minimum_due,
+            self.due_date.toordinal() if self.due_date is not None else None,
+            self.paid,
+            self.late_fees,
+        )
+
+    def _restore_billing(self, state):
+        """
+        Set the billing cycle from a _billing_state() tuple.
+        """
+        (
+            self.cycle_day,
+            billing_end,
+            self.statement_balance,
+            self.minimum_due,
+            due_date,
+            self.paid,
+            self.late_fees,
+        ) = state
+        self.billing_end = datetime.date.fromordinal(billing_end)
+        self.due_date = datetime.date.fromordinal(due_date) if due_date is not None else None
+
+    def _post(self, amount):
+        if amount > 0:
+            self.paid += amount
+        super()._post(amount)
 
 
 class Accounts:
@@ -198,14 +508,41 @@ class Accounts:
     :param accountholder_id: ID of account holder.
     """
 
+    __slots__ = (
+        "holder",
+        "accountholder_id",
+        "_totals",
+        "_bank",
+        "checking_accounts",
+        "saving_accounts",
+        "credit_accounts",
+        "issued_cards",
+    )
+
     def __init__(self, holder, accountholder_id: str):
         self.holder = holder
         self.accountholder_id = accountholder_id
-        self.checking_accounts = {}
-        self.saving_accounts = {}
-        self.credit_accounts = {}
+        # Running totals per account type, maintained by the registries below.
+        self._totals = {"checking": 0, "savings": 0, "credit": 0}
+        # Bank the totals roll up into, set while the holder is registered.
+        self._bank = None
+        self.checking_accounts = AccountRegistry(self, "checking")
+        self.saving_accounts = AccountRegistry(self, "savings")
+        self.credit_accounts = AccountRegistry(self, "credit")
         self.issued_cards = {}
 
+    def _apply_delta(self, kind: str, amount, account=None):
+        """
+        Update the running totals by a signed amount and pass it on to the
+        bank the account holder is registered with.
+        :param kind: Account type bucket (checking, savings, credit).
+        :param amount: Signed change in balance.
+        :param account: Account whose balance changed, if it was a single account.
+        """
+        self._totals[kind] += amount
+        if self._bank is not None:
+            self._bank._apply_delta(kind, amount, account)
+
     @property
     def holder_info(self):
         """
@@ -229,7 +566,7 @@ class Accounts:
     @property
     def total_balance(self) -> int:
         """
-        Total balance of all accounts.
+        Total balance of all accounts, read from running totals in O(1).
         """
         return self._checking_balance + self._savings_balance + self._credit_balance
 
@@ -238,27 +575,28 @@ class Accounts:
         """
         Total balance of all checking accounts.
         """
-        bal = 0
-        for id, obj in self.checking_accounts.items():
-            bal += obj.balance
-        return bal
+        return self._totals["checking"]
 
     @property
     def _savings_balance(self) -> int:
         """
         Total balance of all savings accounts.
         """
-        bal = 0
-        for id, obj in self.saving_accounts.items():
-            bal += obj.balance
-        return bal
+        return self._totals["savings"]
 
     @property
     def _credit_balance(self) -> int:
         """
         Total balance of all credit accounts.
         """
-        bal = 0
-        for id, obj in self.credit_accounts.items():
-            bal += obj.balance
-        return bal
+        return self._totals["credit"]
+
+    def _recompute_totals(self) -> dict:
+        """
+        Recompute the per account type totals from scratch, O(a).
+        """
+        return {
+            "checking": sum(obj.balance for obj in self.checking_accounts.values()),
+            "savings": sum(obj.balance for obj in self.saving_accounts.values()),
+            "credit": sum(obj.balance for obj in self.credit_accounts.values()),
+        }
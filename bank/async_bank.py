@@ -0,0 +1,292 @@
+"""
+bank.async_bank
+~~~~~~~~~~~~~~~
+This module contains an asyncio front-end for card transaction traffic.
+"""
+
+from .batch import WITHDRAW, DEPOSIT
+from .status import TransactionStatus
+import asyncio, math, random, time
+
+AUTHORIZE = "authorize"
+
+
+class AsyncBank:
+    """
+    asyncio facade over a Bank. Requests wait in a bounded queue that a single
+    worker drains, coalescing whatever is queued into one Bank.process_batch()
+    call (which groups rows per account) instead of one call per request.
+    Every coroutine returns {"status", "code", "transaction_time"} where code
+    is a TransactionStatus.
+    :param bank: Bank object the requests are applied to.
+    :param max_in_flight: Max requests queued, once full callers wait (backpressure).
+    :param max_batch: Max requests coalesced into one batch.
+    :param timeout: Default seconds a request may wait for its result.
+    :param reject_when_full: Answer OVERLOADED instead of waiting when the queue is full.
+    """
+
+    def __init__(
+        self,
+        bank,
+        max_in_flight: int = 10000,
+        max_batch: int = 512,
+        timeout: float = 1.0,
+        reject_when_full: bool = False,
+    ):
+        self.bank = bank
+        self.max_in_flight = max_in_flight
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self.reject_when_full = reject_when_full
+        self.batches = 0
+        self.requests = 0
+        self._queue = None
+        self._worker = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def start(self):
+        """
+        Start the worker on the running event loop.
+        """
+        self._queue = asyncio.Queue(self.max_in_flight)
+        self._worker = asyncio.ensure_future(self._run())
+
+    async def close(self):
+        """
+        Finish the queued requests and stop the worker.
+        """
+        await self._queue.join()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+
+    @property
+    def in_flight(self) -> int:
+        """
+        Number of requests waiting to be processed.
+        """
+        return self._queue.qsize()
+
+    @property
+    def mean_batch(self) -> float:
+        """
+        Average number of requests coalesced per batch.
+        """
+        return self.requests / self.batches if self.batches else 0.0
+
+    async def withdraw(self, card_number: str, amount: float, timeout=None) -> dict:
+        """
+        Withdraw funds from the account linked with a card.
+        :param card_number: Card number of the card attempting to withdraw funds.
+        :param amount: The amount of money the card holder wishes to withdraw.
+        :param timeout: Seconds to wait for the result, defaults to AsyncBank.timeout.
+        """
+        return await self._submit(WITHDRAW, card_number, amount, timeout)
+
+    async def deposit(self, card_number: str, amount: float, timeout=None) -> dict:
+        """
+        Deposit funds into the account linked with a card.
+        :param card_number: Card number of the card depositing funds.
+        :param amount: The amount of money the card holder wishes to deposit.
+        :param timeout: Seconds to wait for the result, defaults to AsyncBank.timeout.
+        """
+        return await self._submit(DEPOSIT, card_number, amount, timeout)
+
+    async def authorize(self, card_number: str, amount: float, timeout=None) -> dict:
+        """
+        Check a withdrawal would be approved without making it.
+        :param card_number: Card number of the card to authorize.
+        :param amount: The amount of money to authorize.
+        :param timeout: Seconds to wait for the result, defaults to AsyncBank.timeout.
+        """
+        return await self._submit(AUTHORIZE, card_number, amount, timeout)
+
+    async def _submit(self, kind: str, card_number: str, amount: float, timeout) -> dict:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        request = (kind, card_number, amount, future)
+        timeout = self.timeout if timeout is None else timeout
+        deadline = None if timeout is None else loop.time() + timeout
+        if self.reject_when_full:
+            try:
+                self._queue.put_nowait(request)
+            except asyncio.QueueFull:
+                return _result(TransactionStatus.OVERLOADED, time.time())
+        else:
+            # Waiting for room counts towards the timeout, a cancelled put queues nothing.
+            try:
+                await asyncio.wait_for(self._queue.put(request), timeout)
+            except asyncio.TimeoutError:
+                return _result(TransactionStatus.TIMED_OUT, time.time())
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(future),
+                None if deadline is None else max(deadline - loop.time(), 0),
+            )
+        except asyncio.TimeoutError:
+            if future.done():
+                return future.result()
+            # Not applied yet, the worker skips cancelled requests.
+            future.cancel()
+            return _result(TransactionStatus.TIMED_OUT, time.time())
+
+    async def _run(self):
+        queue = self._queue
+        while True:
+            requests = [await queue.get()]
+            while len(requests) < self.max_batch and not queue.empty():
+                requests.append(queue.get_nowait())
+            try:
+                self._process(requests)
+            finally:
+                for _ in requests:
+                    queue.task_done()
+            # Let the callers whose futures were just resolved run.
+            await asyncio.sleep(0)
+
+    def _process(self, requests: list):
+        self.batches += 1
+        self.requests += len(requests)
+        rows = []
+        futures = []
+        for kind, card_number, amount, future in requests:
+            if future.cancelled():
+                continue
+            if kind == AUTHORIZE:
+                # Keep order with the requests queued before it.
+                self._flush(rows, futures)
+                try:
+                    code = self._authorize(card_number, amount)
+                except Exception as e:
+                    # Answer the caller, the worker keeps running.
+                    future.set_exception(e)
+                else:
+                    future.set_result(_result(code, time.time()))
+            else:
+                rows.append((card_number, amount, kind))
+                futures.append(future)
+        self._flush(rows, futures)
+
+    def _flush(self, rows: list, futures: list):
+        if not rows:
+            return
+        try:
+            result = self.bank.process_batch(rows)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+        else:
+            for future, code in zip(futures, result.statuses):
+                future.set_result(_result(code, result.transaction_time))
+        rows.clear()
+        futures.clear()
+
+    def _authorize(self, card_number: str, amount: float) -> TransactionStatus:
+        """
+        The status a withdrawal would get from Bank.process_batch(), in the
+        same order of checks, without making it or counting it towards the
+        velocity limits.
+        """
+        bank = self.bank
+        account = bank._resolve_card(card_number)
+        if account.__class__ is TransactionStatus:
+            return account
+        velocity = bank.velocity
+        if (bank.cents and amount.__class__ is not int) or not 0 < amount < math.inf:
+            return TransactionStatus.INVALID_AMOUNT
+        elif account.status != "open":
+            return TransactionStatus.ACCOUNT_ERROR
+        elif (
+            velocity is not None
+            and velocity.allow(card_number, account, amount, velocity.clock(), count=False)
+            is not None
+        ):
+            return TransactionStatus.VELOCITY_LIMIT
+        elif amount > account.withdrawal_limit:
+            return TransactionStatus.EXCEEDS_LIMIT
+        elif amount > account.balance + account.credit_limit:
+            return TransactionStatus.INSUFFICIENT_BALANCE
+        return TransactionStatus.OK
+
+
+def _result(code: int, transaction_time: float) -> dict:
+    return {
+        "status": code == TransactionStatus.OK,
+        "code": TransactionStatus(code),
+        "transaction_time": transaction_time,
+    }
+
+
+def percentile(samples: list, p: float) -> float:
+    """
+    Nearest-rank percentile of a list of samples.
+    """
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = math.ceil(p / 100 * len(ordered))
+    return ordered[min(len(ordered), max(rank, 1)) - 1]
+
+
+async def generate_load(
+    async_bank: AsyncBank,
+    card_numbers: list,
+    rate: float,
+    duration: float,
+    withdraw_ratio: float = 0.6,
+    seed: int = 0,
+) -> dict:
+    """
+    Local open-loop load generator, issues requests at a target rate regardless
+    of how fast they complete and reports latency percentiles in seconds.
+    :param async_bank: Started AsyncBank to send requests to.
+    :param card_numbers: Cards to pick requests from.
+    :param rate: Target requests per second.
+    :param duration: Seconds to generate load for.
+    :param withdraw_ratio: Share of requests that are withdrawals, the rest deposits.
+    """
+    loop = asyncio.get_running_loop()
+    rng = random.Random(seed)
+    latencies = []
+    codes = {}
+
+    async def one(coro, sent):
+        result = await coro
+        latencies.append(loop.time() - sent)
+        codes[result["code"]] = codes.get(result["code"], 0) + 1
+
+    tasks = []
+    start = loop.time()
+    total = int(rate * duration)
+    for i in range(total):
+        # Sleep until this request is due, then send everything that is due.
+        delay = start + i / rate - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        card_number = rng.choice(card_numbers)
+        amount = float(rng.randrange(1, 100))
+        if rng.random() < withdraw_ratio:
+            coro = async_bank.withdraw(card_number, amount)
+        else:
+            coro = async_bank.deposit(card_number, amount)
+        tasks.append(asyncio.ensure_future(one(coro, loop.time())))
+    await asyncio.gather(*tasks)
+    elapsed = loop.time() - start
+    return {
+        "requests": total,
+        "target_rate": rate,
+        "achieved_rate": total / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+        "max": max(latencies) if latencies else 0.0,
+        "codes": codes,
+        "mean_batch": async_bank.mean_batch,
+    }
@@ -5,8 +5,402 @@ This module contains code for managing banks.
 """
 
 from .account_holder import AccountHolder
-from .accounts import Account, Accounts, CheckingAccount, SavingsAccount
-from .exceptions import AccountNotExists, AccountError, InsufficientBalance
+from .accounts import Account, Accounts, CheckingAccount, CreditAccount, SavingsAccount
+from .batch import BatchResult, WITHDRAW, DEPOSIT
+from .indexes import AccountIndexes
+from .exceptions import (
+    AccountNotExists,
+    AccountError,
+    InsufficientBalance,
+    ExceedsLimit,
+    VelocityExceeded,
+)
+from .status import TransactionResult, TransactionStatus
+from . import interest, journal as journaling, onboarding, snapshot as snapshots
+from array import array
+from collections import OrderedDict
+from contextlib import ExitStack, contextmanager
+import math, threading, time
+
+
+# Status journaled for each exception a single card transaction can return.
+_ERROR_STATUS = {
+    InsufficientBalance: TransactionStatus.INSUFFICIENT_BALANCE,
+    ExceedsLimit: TransactionStatus.EXCEEDS_LIMIT,
+    AccountError: TransactionStatus.ACCOUNT_ERROR,
+    AccountNotExists: TransactionStatus.ACCOUNT_NOT_EXISTS,
+    KeyError: TransactionStatus.CARD_NOT_EXISTS,
+    # Raised by money.check_cents() for amounts that aren't 64-bit integer cents.
+    TypeError: TransactionStatus.INVALID_AMOUNT,
+    OverflowError: TransactionStatus.INVALID_AMOUNT,
+    VelocityExceeded: TransactionStatus.VELOCITY_LIMIT,
+}
+
+
+class AccountHolderRegistry(dict):
+    """
+    Dict of accountholder_id -> AccountHolder that rolls each registered holder's
+    running balance totals into the bank's totals, and backs them out again
+    when a holder is replaced or removed.
+    :param bank: Bank object the registry belongs to.
+    """
+
+    def __init__(self, bank):
+        super().__init__()
+        self.bank = bank
+
+    def __setitem__(self, accountholder_id, holder):
+        old = self.get(accountholder_id)
+        if old is not None and old is not holder:
+            self._detach(old)
+        super().__setitem__(accountholder_id, holder)
+        self._attach(holder)
+
+    def __delitem__(self, accountholder_id):
+        self._detach(self[accountholder_id])
+        super().__delitem__(accountholder_id)
+
+    def pop(self, accountholder_id, *default):
+        if accountholder_id not in self:
+            if default:
+                return default[0]
+            raise KeyError(accountholder_id)
+        holder = self[accountholder_id]
+        del self[accountholder_id]
+        return holder
+
+    def popitem(self):
+        accountholder_id, holder = super().popitem()
+        self._detach(holder)
+        return accountholder_id, holder
+
+    def setdefault(self, accountholder_id, holder=None):
+        if accountholder_id not in self:
+            self[accountholder_id] = holder
+        return self[accountholder_id]
+
+    def update(self, *args, **kwargs):
+        for accountholder_id, holder in dict(*args, **kwargs).items():
+            self[accountholder_id] = holder
+
+    def clear(self):
+        for holder in self.values():
+            self._detach(holder)
+        super().clear()
+
+    def _attach(self, holder):
+        accounts = holder.accounts
+        if accounts._bank is self.bank:
+            return
+        accounts._bank = self.bank
+        for kind, amount in accounts._totals.items():
+            self.bank._apply_delta(kind, amount)
+        self.bank._holder_registered(holder)
+
+    def _detach(self, holder):
+        accounts = holder.accounts
+        if accounts._bank is self.bank:
+            for kind, amount in accounts._totals.items():
+                self.bank._apply_delta(kind, -amount)
+            accounts._bank = None
+            self.bank._holder_removed(holder)
+
+
+class LazyAccountHolderRegistry(AccountHolderRegistry):
+    """
+    AccountHolderRegistry whose holders are only constructed when first touched.
+    Holders still pending count towards the bank's totals, so bank_balance
+    stays O(1) without materializing them. Iterating the registry materializes
+    every pending holder.
+    :param bank: Bank object the registry belongs to.
+    :param source: Object with a pending dict of accountholder_id -> (..., per type
+        totals) and a materialize(bank, accountholder_id) method, e.g. SnapshotReader.
+    """
+
+    def __init__(self, bank, source):
+        super().__init__(bank)
+        self.source = source
+        # Materializing registers the holder, which faults again, hence re-entrant.
+        self._fault_lock = threading.RLock()
+
+    def _fault(self, accountholder_id):
+        if accountholder_id in self.source.pending:
+            with self._fault_lock:
+                if accountholder_id in self.source.pending and not dict.__contains__(
+                    self, accountholder_id
+                ):
+                    self.source.materialize(self.bank, accountholder_id)
+
+    def materialize_all(self):
+        for accountholder_id in list(self.source.pending):
+            self._fault(accountholder_id)
+
+    def __getitem__(self, accountholder_id):
+        self._fault(accountholder_id)
+        return super().__getitem__(accountholder_id)
+
+    def get(self, accountholder_id, default=None):
+        self._fault(accountholder_id)
+        return super().get(accountholder_id, default)
+
+    def __contains__(self, accountholder_id):
+        return (
+            dict.__contains__(self, accountholder_id)
+            or accountholder_id in self.source.pending
+        )
+
+    def __len__(self):
+        return dict.__len__(self) + len(self.source.pending)
+
+    def __iter__(self):
+        self.materialize_all()
+        return super().__iter__()
+
+    def keys(self):
+        self.materialize_all()
+        return super().keys()
+
+    def values(self):
+        self.materialize_all()
+        return super().values()
+
+    def items(self):
+        self.materialize_all()
+        return super().items()
+
+    def __setitem__(self, accountholder_id, holder):
+        # A pending holder is replaced (or materialized), back out its totals first.
+        pending = self.source.pending.pop(accountholder_id, None)
+        if pending is not None and not dict.__contains__(self, accountholder_id):
+            for kind, amount in zip(snapshots.KINDS, pending[-1]):
+                self.bank._apply_delta(kind, -amount)
+        super().__setitem__(accountholder_id, holder)
+
+class WorkingSetRegistry(AccountHolderRegistry):
+    """
+    AccountHolderRegistry backed by a store (e.g. storage.SQLiteStore) that
+    keeps at most capacity account holders in memory. Holders are faulted in
+    from the store on first access. Holders whose balances, accounts, cards
+    or account statuses change through the bank are marked dirty, and when
+    over capacity the least recently used holders are evicted, the dirty ones
+    written back in one batch first. Holders in the store still count towards
+    the bank's totals. Iterating the registry walks the store, faulting
+    holders in one at a time. References kept to an evicted holder, its
+    accounts or cards are stale, changes made through them are lost.
+    :param bank: Bank object the registry belongs to.
+    :param store: Store of account holders, e.g. storage.SQLiteStore.
+    :param capacity: Most account holders kept in memory.
+    :param evict_batch: Holders evicted at once when over capacity, 1% of capacity by default.
+    Bank operations touching many holders (process_batch(), process_transfers(),
+    accrue_interest(), close_cycles()) pin the holders they fault in, so
+    capacity can be exceeded for their length.
+    """
+
+    def __init__(self, bank, store, capacity: int = 100000, evict_batch: int = None):
+        if capacity < 1:
+            raise ValueError("A working set needs a capacity of at least one holder.")
+        super().__init__(bank)
+        self.store = store
+        self.capacity = capacity
+        self.evict_batch = evict_batch or max(1, capacity // 100)
+        # Resident accountholder_ids, least recently used first.
+        self._recent = OrderedDict()
+        self.dirty = set()
+        # Resident holders that aren't in the store yet.
+        self._unstored = set()
+        self._loading = False
+        # Open pinned() blocks, no holder is evicted while any is open.
+        self._pins = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.writebacks = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Share of accesses (lookups and changes) that found the holder in memory.
+        """
+        accesses = self.hits + self.misses
+        return self.hits / accesses if accesses else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "resident": dict.__len__(self),
+            "dirty": len(self.dirty),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "evictions": self.evictions,
+            "writebacks": self.writebacks,
+        }
+
+    def touch(self, accountholder_id):
+        """
+        Mark a resident holder as changed and most recently used.
+        """
+        if self._loading:
+            return
+        try:
+            self._recent.move_to_end(accountholder_id)
+        except KeyError:
+            return
+        self.hits += 1
+        self.dirty.add(accountholder_id)
+
+    def _back_out(self, totals: dict):
+        for kind, amount in totals.items():
+            self.bank._apply_delta(kind, -amount)
+
+    def _fault(self, accountholder_id):
+        if dict.__contains__(self, accountholder_id):
+            self.hits += 1
+            self._recent.move_to_end(accountholder_id)
+            return
+        record = self.store.read(accountholder_id)
+        if record is None:
+            return
+        self.misses += 1
+        # Stored holders are already in the bank's totals, restoring adds them again.
+        for fields in record[3]:
+            self.bank._apply_delta(fields[0], -fields[5])
+        self._loading = True
+        try:
+            snapshots.restore_holder(self.bank, record)
+        finally:
+            self._loading = False
+
+    @contextmanager
+    def pinned(self):
+        """
+        Keep every holder faulted in resident until the block ends, for
+        operations that resolve many holders before changing them (batches,
+        accruals), which would otherwise change holders already evicted.
+        The holders over capacity are evicted when the outermost block ends.
+        """
+        self._pins += 1
+        try:
+            yield
+        finally:
+            self._pins -= 1
+            if not self._pins:
+                self._evict()
+
+    def _evict(self):
+        resident = len(self._recent)
+        if resident <= self.capacity or self._pins:
+            return
+        # Never the most recent holder, it's the one being registered or faulted in.
+        count = min(resident - 1, max(resident - self.capacity, self.evict_batch))
+        victims = [accountholder_id for accountholder_id, _ in zip(self._recent, range(count))]
+        self._write_back([v for v in victims if v in self.dirty])
+        for accountholder_id in victims:
+            holder = dict.pop(self, accountholder_id)
+            del self._recent[accountholder_id]
+            # Its totals stay counted, the holder now lives in the store.
+            holder.accounts._bank = None
+            self.bank._holder_removed(holder, evicted=True)
+        self.evictions += len(victims)
+
+    def _write_back(self, ids: list):
+        if not ids:
+            return
+        self.store.write([snapshots.dump_holder(dict.__getitem__(self, i)) for i in ids])
+        self.writebacks += len(ids)
+        self.dirty.difference_update(ids)
+        self._unstored.difference_update(ids)
+
+    def flush(self):
+        """
+        Write every dirty holder back to the store, in one batch.
+        """
+        self._write_back(list(self.dirty))
+
+    def loaded(self, holders: dict):
+        """
+        Track holders registered in bulk (Bank.bulk_load()), bypassing __setitem__.
+        """
+        for accountholder_id in holders:
+            self._recent[accountholder_id] = None
+        self.dirty.update(holders)
+        self._unstored.update(holders)
+        self._evict()
+
+    def __getitem__(self, accountholder_id):
+        self._fault(accountholder_id)
+        return dict.__getitem__(self, accountholder_id)
+
+    def get(self, accountholder_id, default=None):
+        self._fault(accountholder_id)
+        return dict.get(self, accountholder_id, default)
+
+    def __contains__(self, accountholder_id):
+        return dict.__contains__(self, accountholder_id) or accountholder_id in self.store
+
+    def __len__(self):
+        return len(self.store) + len(self._unstored)
+
+    def __iter__(self):
+        self.flush()
+        return iter(self.store.ids())
+
+    def keys(self):
+        return list(self)
+
+    def values(self):
+        return (self[accountholder_id] for accountholder_id in self)
+
+    def items(self):
+        return ((accountholder_id, self[accountholder_id]) for accountholder_id in self)
+
+    def __setitem__(self, accountholder_id, holder):
+        if not self._loading:
+            if not dict.__contains__(self, accountholder_id):
+                if accountholder_id in self.store:
+                    # Replacing a stored holder, back out its stored totals.
+                    self._back_out(self.store.totals(accountholder_id))
+                else:
+                    self._unstored.add(accountholder_id)
+            self.dirty.add(accountholder_id)
+        # As AccountHolderRegistry.__setitem__, without faulting the old holder in.
+        old = dict.get(self, accountholder_id)
+        if old is not None and old is not holder:
+            self._detach(old)
+        dict.__setitem__(self, accountholder_id, holder)
+        self._attach(holder)
+        self._recent[accountholder_id] = None
+        self._recent.move_to_end(accountholder_id)
+        self._evict()
+
+    def __delitem__(self, accountholder_id):
+        if dict.__contains__(self, accountholder_id):
+            self._detach(dict.pop(self, accountholder_id))
+            del self._recent[accountholder_id]
+            self.dirty.discard(accountholder_id)
+            self._unstored.discard(accountholder_id)
+        elif accountholder_id in self.store:
+            self._back_out(self.store.totals(accountholder_id))
+        else:
+            raise KeyError(accountholder_id)
+        self.store.delete([accountholder_id])
+
+    def popitem(self):
+        for accountholder_id in reversed(self._recent):
+            break
+        else:
+            ids = self.store.ids()
+            if not ids:
+                raise KeyError("popitem(): registry is empty")
+            accountholder_id = ids[-1]
+        holder = self[accountholder_id]
+        del self[accountholder_id]
+        return accountholder_id, holder
+
+    def clear(self):
+        for accountholder_id in list(self._recent):
+            del self[accountholder_id]
+        self._back_out(self.store.totals())
+        self.store.delete(self.store.ids())
 
 
 class Bank:
@@ -14,21 +408,431 @@ class Bank:
     Class that maintains bank infornations and provides the interface
     between transaction requests and bank accounts.
     :param institution: Name of the financial institution.
+    :param ledger: Optional LedgerStore, required to open AccountView accounts.
+    :param journal: Optional Journal that definitions and transactions are appended to.
+    :param concurrent: Allow transactions to be made from many threads at once.
+    :param lock_stripes: Number of locks account holders are striped across when concurrent.
+    :param cents: Keep balances and take amounts as integer cents (see bank/money.py)
+        instead of floats, so totals are exact. A ledger must be a LedgerStore(cents=True).
+    :param indexed: Maintain secondary indexes over all accounts, see bank.indexes.
+    :param velocity: Optional VelocityLimits every withdrawal is checked against,
+        before the account's own checks, see bank.velocity.
+    :param metrics: Optional Metrics that card transactions are timed and counted
+        into, see bank.metrics.
+    :param persistence: Optional storage.Persistence that balance changes and
+        definitions are written behind to.
+    :param billing: Optional billing.BillingScheduler the credit accounts'
+        statement cycles are scheduled with, run by close_cycles().
     """
 
-    def __init__(self, institution="Square"):
+    def __init__(
+        self,
+        institution="Square",
+        ledger=None,
+        journal=None,
+        concurrent: bool = False,
+        lock_stripes: int = 64,
+        cents: bool = False,
+        indexed: bool = False,
+        velocity=None,
+        metrics=None,
+        persistence=None,
+        billing=None,
+    ):
+        if ledger is not None and ledger.cents != cents:
+            raise ValueError("The ledger and the bank must agree on cents mode.")
         self.institution = institution
-        self.account_holders = {}
+        self.cents = cents
+        self.ledger = ledger
+        self.journal = journal
+        self.concurrent = concurrent
+        # All accounts of a holder share a stripe, so it also guards the holder's totals.
+        self._locks = (
+            [threading.Lock() for _ in range(lock_stripes)] if concurrent else None
+        )
+        self._totals_lock = threading.Lock() if concurrent else None
+        # card_number -> Card of every card issued to a registered holder, so a
+        # transaction finds its account (card.account) in one lookup.
+        self.card_index = {}
+        self.indexes = AccountIndexes() if indexed else None
+        self.velocity = velocity
+        self.metrics = metrics
+        self.persistence = persistence
+        self.billing = billing
+        # WorkingSetRegistry of a bank opened from a store, see Bank.open().
+        self.working_set = None
+        # Running totals, updated in O(1) by every balance change.
+        self._balance = 0
+        self._totals = {"checking": 0, "savings": 0, "credit": 0}
+        self.account_holders = AccountHolderRegistry(self)
+
+    def _apply_delta(self, kind: str, amount, account=None):
+        """
+        Update the bank's running totals by a signed amount.
+        :param kind: Account type bucket (checking, savings, credit).
+        :param amount: Signed change in balance.
+        :param account: Account whose balance changed, moved in the balance index.
+        """
+        if self.working_set is not None and account is not None:
+            self.working_set.touch(account._ledger.accountholder_id)
+        if self.persistence is not None and account is not None:
+            self.persistence.balance_changed(account)
+        if self._totals_lock is None:
+            self._balance += amount
+            self._totals[kind] += amount
+            if account is not None and self.indexes is not None:
+                self.indexes.balance_changed(account)
+        else:
+            with self._totals_lock:
+                self._balance += amount
+                self._totals[kind] += amount
+                if account is not None and self.indexes is not None:
+                    self.indexes.balance_changed(account)
+
+    def _pinned(self):
+        """
+        Keep the holders an operation faults in resident until it ends, see
+        WorkingSetRegistry.pinned(), a no-op without a working set.
+        """
+        if self.working_set is None:
+            return ExitStack()
+        return self.working_set.pinned()
+
+    def _account_lock(self, account) -> threading.Lock:
+        """
+        Lock stripe guarding an account (and its holder's totals) when concurrent.
+        :param account: Account object.
+        """
+        return self._locks[self._stripe(account)]
+
+    def _stripe(self, account) -> int:
+        """
+        Index of the lock stripe of an account.
+        """
+        ledger = account._ledger
+        key = ledger.accountholder_id if ledger is not None else account.account_id
+        return hash(key) % len(self._locks)
+
+    def _ordered_locks(self, accounts) -> ExitStack:
+        """
+        Acquire the lock stripes of several accounts, always in stripe order so
+        two operations locking the same accounts can't deadlock.
+        :param accounts: Iterable of Account objects.
+        """
+        stack = ExitStack()
+        if self._locks is not None:
+            for stripe in sorted({self._stripe(account) for account in accounts}):
+                stack.enter_context(self._locks[stripe])
+        return stack
+
+    def _all_locks(self) -> ExitStack:
+        """
+        Acquire every lock stripe in order, for operations touching all accounts.
+        """
+        stack = ExitStack()
+        for lock in self._locks or ():
+            stack.enter_context(lock)
+        return stack
+
+    def snapshot(self, path: str):
+        """
+        Write a binary snapshot of every account holder, account and card. With
+        a journal attached the snapshot records the journal position it covers.
+        Every lock stripe is held while it's written, so no transaction lands
+        between the balances read and the position recorded.
+        :param path: File to write the snapshot to.
+        """
+        with self._pinned(), self._all_locks():
+            snapshots.write(self, path)
+
+    @classmethod
+    def load(cls, path: str, journal=None, ledger=None, lazy: bool = True):
+        """
+        Load a Bank from a snapshot. Account holders are materialized when first
+        touched unless lazy is False. Given the journal the snapshot was taken
+        with, records appended after the snapshot are replayed on top of it.
+        :param path: Snapshot file written by Bank.snapshot().
+        :param journal: Journal to replay the tail of and keep appending to.
+        :param ledger: LedgerStore, required if the snapshot holds AccountView accounts.
+        :param lazy: Materialize account holders on first access.
+        """
+        reader = snapshots.SnapshotReader(path)
+        meta = reader.meta
+        bank = cls(meta["institution"], ledger=ledger, cents=meta.get("cents", False))
+        bank._balance = meta["balance"]
+        bank._totals = dict(meta["totals"])
+        bank.account_holders = LazyAccountHolderRegistry(bank, reader)
+        if journal is not None:
+            if not reader.journaled and journal.records:
+                raise ValueError("Snapshot was not taken with a journal to replay.")
+            if journal.records < reader.position:
+                raise ValueError("Journal is older than the snapshot.")
+            journal.slots = {}
+            journal.store_slots = {}
+            journal.slot_holders = meta["slot_holders"]
+            journal.accounts = [None] * len(journal.slot_holders)
+            journal.replay(bank, start=reader.position)
+        if not lazy:
+            bank.account_holders.materialize_all()
+        return bank
+
+    @classmethod
+    def open(cls, store, capacity: int = 100000, evict_batch: int = None):
+        """
+        Open a Bank over a store of account holders (e.g. storage.SQLiteStore)
+        keeping at most capacity of them in memory, see WorkingSetRegistry.
+        The running totals start from the store's, so bank_balance stays O(1).
+        Call bank.account_holders.flush() to write every change back.
+        :param store: Store written by store.save(bank) or by an earlier open().
+        :param capacity: Most account holders kept in memory.
+        :param evict_batch: Holders evicted at once when over capacity.
+        """
+        meta = store.meta
+        bank = cls(meta.get("institution", "Square"), cents=bool(meta.get("cents", 0)))
+        totals = store.totals()
+        bank._totals = dict(totals)
+        bank._balance = sum(totals.values())
+        bank.account_holders = bank.working_set = WorkingSetRegistry(
+            bank, store, capacity, evict_batch
+        )
+        return bank
+
+    def bulk_load(self, holders: dict, accounts: dict, cards: dict = None) -> dict:
+        """
+        Onboard many account holders with their accounts and cards from columnar
+        input, skipping the per object constructors and registration. The input
+        is validated (references and uniqueness) in one pass and loaded all or
+        nothing, see onboarding.bulk_load() for the columns. Returns the number
+        of holders, accounts and cards loaded.
+        :param holders: Columnar dict of account holders.
+        :param accounts: Columnar dict of accounts, referencing holders by accountholder_id.
+        :param cards: Columnar dict of cards, referencing accounts by
+            (accountholder_id, account_id).
+        """
+        return onboarding.bulk_load(self, holders, accounts, cards)
+
+    def _holder_registered(self, holder):
+        """
+        Called when an account holder is registered with the bank.
+        """
+        self.card_index.update(holder.cards)
+        if self.indexes is not None:
+            for registry in (
+                holder.accounts.checking_accounts,
+                holder.accounts.saving_accounts,
+                holder.accounts.credit_accounts,
+            ):
+                for account in registry.values():
+                    self.indexes.add(account)
+        if self.billing is not None:
+            for account in holder.accounts.credit_accounts.values():
+                self.billing.add(account)
+        if self.journal is not None:
+            self.journal.define_holder(holder)
+        if self.persistence is not None:
+            self.persistence.holder_changed(holder)
+
+    def _holder_removed(self, holder, evicted: bool = False):
+        """
+        Called when an account holder is replaced or removed, drops their cards
+        from the card index.
+        :param evicted: Whether the holder was only evicted from a working set to its store.
+        """
+        if self.persistence is not None:
+            self.persistence.holder_removed(holder)
+        if self.journal is not None and not evicted:
+            self.journal.remove_holder(holder)
+        for card_number, card in holder.cards.items():
+            if self.card_index.get(card_number) is card:
+                del self.card_index[card_number]
+        if self.indexes is not None:
+            for registry in (
+                holder.accounts.checking_accounts,
+                holder.accounts.saving_accounts,
+                holder.accounts.credit_accounts,
+            ):
+                for account in registry.values():
+                    self.indexes.remove(account)
+        if self.billing is not None:
+            for account in holder.accounts.credit_accounts.values():
+                self.billing.remove(account)
+
+    def _account_opened(self, holder_accounts, kind: str, account):
+        """
+        Called when an account is registered to one of the bank's account holders.
+        """
+        if self.working_set is not None:
+            self.working_set.touch(holder_accounts.accountholder_id)
+        if self.persistence is not None:
+            self.persistence.holder_changed(holder_accounts.holder)
+        if self.indexes is not None:
+            self.indexes.add(account)
+        if self.billing is not None:
+            self.billing.add(account)
+        if self.journal is not None:
+            self.journal.define_account(holder_accounts, kind, account)
+
+    def _account_closed(self, account):
+        """
+        Called when an account is removed from one of the bank's account holders.
+        """
+        if self.working_set is not None:
+            self.working_set.touch(account._ledger.accountholder_id)
+        if self.persistence is not None:
+            self.persistence.holder_changed(account._ledger.holder)
+        if self.indexes is not None:
+            self.indexes.remove(account)
+        if self.billing is not None:
+            self.billing.remove(account)
+        if self.journal is not None:
+            self.journal.close_account(account)
+
+    def _account_status_changed(self, account, old: str, new: str):
+        """
+        Called when the status of one of the bank's accounts changes.
+        """
+        if self.working_set is not None:
+            self.working_set.touch(account._ledger.accountholder_id)
+        if self.persistence is not None:
+            self.persistence.holder_changed(account._ledger.holder)
+        if self.indexes is not None:
+            self.indexes.status_changed(account, old, new)
+        if self.journal is not None:
+            self.journal.status_changed(account, new)
+
+    def _account_limit_changed(self, account, limit):
+        """
+        Called when the withdrawal limit of one of the bank's accounts changes.
+        """
+        if self.working_set is not None:
+            self.working_set.touch(account._ledger.accountholder_id)
+        if self.persistence is not None:
+            self.persistence.holder_changed(account._ledger.holder)
+        if self.journal is not None:
+            self.journal.limit_changed(account, limit)
+
+    def _card_issued(self, card):
+        """
+        Called when a card is issued to one of the bank's account holders.
+        """
+        if card.account_holder.accounts._bank is self:
+            self.card_index[card.card_number] = card
+            if self.working_set is not None:
+                self.working_set.touch(card.account_holder.accountholder_id)
+            if self.persistence is not None:
+                self.persistence.holder_changed(card.account_holder)
+        if self.journal is not None:
+            self.journal.define_card(card)
+
+    def _billing_changed(self, account):
+        """
+        Called when a statement closes or a late fee is charged on one of the
+        bank's credit accounts.
+        """
+        if self.working_set is not None:
+            self.working_set.touch(account._ledger.accountholder_id)
+        if self.persistence is not None:
+            self.persistence.balance_changed(account)
+        if self.journal is not None:
+            self.journal.billing_changed(account)
+
+    def _card_pin_changed(self, card):
+        """
+        Called when the stored PIN of one of the bank's cards is replaced, e.g. by its hash.
+        """
+        if card.account_holder.accounts._bank is self:
+            if self.working_set is not None:
+                self.working_set.touch(card.account_holder.accountholder_id)
+            if self.persistence is not None:
+                self.persistence.holder_changed(card.account_holder)
+        if self.journal is not None:
+            self.journal.pin_changed(card)
+
+    def _journal_transaction(self, kind: int, account, card_number: str, amount, trans):
+        """
+        Append a single card transaction and its outcome to the journal.
+        """
+        if trans["status"]:
+            result = TransactionStatus.OK
+            timestamp = trans["transaction_time"]
+        else:
+            result = _ERROR_STATUS.get(
+                type(trans["error"]), TransactionStatus.CARD_NOT_EXISTS
+            )
+            timestamp = time.time()
+        self.journal.transaction(
+            kind,
+            result,
+            account,
+            amount,
+            timestamp,
+            card_number,
+        )
 
     @property
     def bank_balance(self) -> int:
         """
-        Total balance of the bank.
+        Total balance of the bank, read from running totals in O(1).
+        """
+        return self._balance
+
+    @property
+    def account_type_balances(self) -> dict:
+        """
+        Total balance of the bank per account type (checking, savings, credit).
         """
-        tmp = 0
-        for k, v in self.account_holders.items():
-            tmp += v.accounts.total_balance
-        return tmp
+        return dict(self._totals)
+
+    def audit_balances(self, tolerance: float = 1e-6, repair: bool = False) -> list:
+        """
+        Opt-in consistency check, recomputes every total from scratch, O(A), and
+        reports any drift from the running totals.
+        :param tolerance: Largest absolute difference that is not reported as drift.
+        :param repair: Reset drifted running totals to the recomputed values.
+        """
+        drift = []
+        bank_totals = {"checking": 0, "savings": 0, "credit": 0}
+        for accountholder_id, holder in self.account_holders.items():
+            accounts = holder.accounts
+            recomputed = accounts._recompute_totals()
+            for kind, amount in recomputed.items():
+                bank_totals[kind] += amount
+                if abs(accounts._totals[kind] - amount) > tolerance:
+                    drift.append(
+                        {
+                            "level": "holder",
+                            "key": (accountholder_id, kind),
+                            "maintained": accounts._totals[kind],
+                            "recomputed": amount,
+                        }
+                    )
+                    if repair:
+                        accounts._totals[kind] = amount
+        for kind, amount in bank_totals.items():
+            if abs(self._totals[kind] - amount) > tolerance:
+                drift.append(
+                    {
+                        "level": "account_type",
+                        "key": kind,
+                        "maintained": self._totals[kind],
+                        "recomputed": amount,
+                    }
+                )
+                if repair:
+                    self._totals[kind] = amount
+        recomputed = sum(bank_totals.values())
+        if abs(self._balance - recomputed) > tolerance:
+            drift.append(
+                {
+                    "level": "bank",
+                    "key": self.institution,
+                    "maintained": self._balance,
+                    "recomputed": recomputed,
+                }
+            )
+            if repair:
+                self._balance = recomputed
+        return drift
 
     def withdrawal_transaction(
         self, card_number: str, amount: float, via_teller=False
@@ -38,19 +842,36 @@ class Bank:
         :param card_number: Card number of the card attempting to withdraw funds.
         :param amount: The amount of money the card holder wishes to withdraw. 
         """
-        account = self.account_holders.get(
-            # Exaggeration of getting account number from a card number.
-            card_number.split("|")[1].split("-")[0],
-            False,
-        )
-        if account:
-            # Will throw insufficient funds exception, exceed withdraw limit or account errors.
-            try:
-                return account.cards[card_number]["account"].withdraw(amount)
-            except Exception as e:
-                return {"status": False, "error": e}
-        else:
-            raise AccountNotExists("Account associated with that card does not exist.")
+        if self.metrics is not None:
+            return self._measured_transaction(journaling.WITHDRAW, card_number, amount)
+        card = self.card_index.get(card_number)
+        if card is None:
+            card = self._find_card(card_number)
+            if card.__class__ is TransactionStatus:
+                return self._card_not_found(
+                    journaling.WITHDRAW, card_number, amount, card
+                )
+        target = card.account
+        # Will throw insufficient funds exception, exceed withdraw limit or account errors.
+        try:
+            if self._locks is None:
+                if self.velocity is None:
+                    trans = target.withdraw(amount)
+                else:
+                    trans = self._velocity_withdraw(card_number, target, amount)
+            else:
+                with self._account_lock(target):
+                    if self.velocity is None:
+                        trans = target.withdraw(amount)
+                    else:
+                        trans = self._velocity_withdraw(card_number, target, amount)
+        except Exception as e:
+            trans = {"status": False, "error": e}
+        if self.journal is not None:
+            self._journal_transaction(
+                journaling.WITHDRAW, target, card_number, amount, trans
+            )
+        return trans
 
     def deposit_transaction(
         self, card_number: str, amount: float, via_teller=False
@@ -60,17 +881,412 @@ class Bank:
         :param card_number: Card number of the card attempting to withdraw funds.
         :param amount: The amount of money the card holder wishes to withdraw. 
         """
-        account = self.account_holders.get(
-            card_number.split("|")[1].split("-")[0], False
-        )
-        if account:
-            # Will raise account error if account is not open.
-            try:
-                return account.cards[card_number]["account"].deposit(amount)
-            except Exception as e:
-                return {"status": False, "error": e}
+        if self.metrics is not None:
+            return self._measured_transaction(journaling.DEPOSIT, card_number, amount)
+        card = self.card_index.get(card_number)
+        if card is None:
+            card = self._find_card(card_number)
+            if card.__class__ is TransactionStatus:
+                return self._card_not_found(
+                    journaling.DEPOSIT, card_number, amount, card
+                )
+        target = card.account
+        # Will raise account error if account is not open.
+        try:
+            if self._locks is None:
+                trans = target.deposit(amount)
+            else:
+                with self._account_lock(target):
+                    trans = target.deposit(amount)
+        except Exception as e:
+            trans = {"status": False, "error": e}
+        if self.journal is not None:
+            self._journal_transaction(
+                journaling.DEPOSIT, target, card_number, amount, trans
+            )
+        return trans
+
+    def _measured_transaction(self, kind: int, card_number: str, amount) -> dict:
+        """
+        withdrawal_transaction()/deposit_transaction() with every stage timed
+        and the outcome counted into self.metrics, only used while metrics are on.
+        :param kind: journal.WITHDRAW or journal.DEPOSIT.
+        """
+        metrics = self.metrics
+        label = "withdraw" if kind == journaling.WITHDRAW else "deposit"
+        stages = metrics.stages(label)
+        clock = time.perf_counter
+        start = clock()
+        card = self.card_index.get(card_number)
+        stages["card_lookup"].record(clock() - start)
+        if card is None:
+            then = clock()
+            card = self._find_card(card_number)
+            stages["holder_lookup"].record(clock() - then)
+            if card.__class__ is TransactionStatus:
+                try:
+                    trans = self._card_not_found(kind, card_number, amount, card)
+                except AccountNotExists as e:
+                    metrics.transaction(label, None, e)
+                    stages["total"].record(clock() - start)
+                    raise
+                metrics.transaction(label, None, trans["error"])
+                stages["total"].record(clock() - start)
+                return trans
+        target = card.account
+        stage = "account"
+        then = clock()
+        try:
+            if self._locks is None:
+                trans = self._apply_card_transaction(kind, card_number, target, amount)
+            else:
+                with self._account_lock(target):
+                    trans = self._apply_card_transaction(
+                        kind, card_number, target, amount
+                    )
+        except Exception as e:
+            trans = {"status": False, "error": e}
+            stage = "account_declined"
+        stages[stage].record(clock() - then)
+        if self.journal is not None:
+            then = clock()
+            self._journal_transaction(kind, target, card_number, amount, trans)
+            stages["journal"].record(clock() - then)
+        metrics.transaction(label, target, trans.get("error"))
+        stages["total"].record(clock() - start)
+        return trans
+
+    def _apply_card_transaction(self, kind: int, card_number: str, account, amount):
+        """
+        The account call of a card transaction, raises the decline.
+        """
+        if kind == journaling.DEPOSIT:
+            return account.deposit(amount)
+        if self.velocity is None:
+            return account.withdraw(amount)
+        return self._velocity_withdraw(card_number, account, amount)
+
+    def _velocity_withdraw(self, card_number: str, account, amount) -> dict:
+        """
+        Account.withdraw() behind the bank's velocity limits, raises VelocityExceeded.
+        """
+        velocity = self.velocity
+        breach = velocity.allow(card_number, account, amount, velocity.clock())
+        if breach is not None:
+            raise VelocityExceeded(breach[0], breach[1], self.cents)
+        try:
+            return account.withdraw(amount)
+        except Exception:
+            velocity.release(card_number, account, amount)
+            raise
+
+    def _velocity_try_withdraw(
+        self, card_number: str, account, amount, result: TransactionResult = None
+    ) -> TransactionResult:
+        """
+        Account.try_withdraw() behind the bank's velocity limits.
+        """
+        velocity = self.velocity
+        if velocity.allow(card_number, account, amount, velocity.clock()) is not None:
+            if result is None:
+                result = TransactionResult()
+            return result.set(TransactionStatus.VELOCITY_LIMIT, account, amount)
+        result = account.try_withdraw(amount, result)
+        if result.code != TransactionStatus.OK:
+            velocity.release(card_number, account, amount)
+        return result
+
+    def withdrawal_result(
+        self, card_number: str, amount: float, result: TransactionResult = None
+    ) -> TransactionResult:
+        """
+        Exception-free withdrawal_transaction(), a decline (or an unknown card) is
+        returned as a TransactionResult status code rather than raised, which
+        keeps declines as cheap as approvals.
+        :param card_number: Card number of the card attempting to withdraw funds.
+        :param amount: The amount of money the card holder wishes to withdraw.
+        :param result: TransactionResult to overwrite rather than allocating one.
+        """
+        card = self.card_index.get(card_number)
+        if card is None:
+            card = self._find_card(card_number)
+            if card.__class__ is TransactionStatus:
+                if result is None:
+                    result = TransactionResult()
+                result.set(card, None, amount, card_number)
+                if self.journal is not None:
+                    self.journal.transaction(
+                        journaling.WITHDRAW,
+                        card,
+                        None,
+                        amount,
+                        time.time(),
+                        card_number,
+                    )
+                return result
+        target = card.account
+        if self._locks is None:
+            if self.velocity is None:
+                result = target.try_withdraw(amount, result)
+            else:
+                result = self._velocity_try_withdraw(card_number, target, amount, result)
         else:
-            raise AccountNotExists("Account associated with that card does not exist.")
+            with self._account_lock(target):
+                if self.velocity is None:
+                    result = target.try_withdraw(amount, result)
+                else:
+                    result = self._velocity_try_withdraw(
+                        card_number, target, amount, result
+                    )
+        result.card_number = card_number
+        if self.journal is not None:
+            self.journal.transaction(
+                journaling.WITHDRAW,
+                result.code,
+                target,
+                amount,
+                result.transaction_time or time.time(),
+                card_number,
+            )
+        return result
+
+    def deposit_result(
+        self, card_number: str, amount: float, result: TransactionResult = None
+    ) -> TransactionResult:
+        """
+        Exception-free deposit_transaction(), see withdrawal_result().
+        :param card_number: Card number of the card depositing funds.
+        :param amount: The amount of money the card holder wishes to deposit.
+        :param result: TransactionResult to overwrite rather than allocating one.
+        """
+        card = self.card_index.get(card_number)
+        if card is None:
+            card = self._find_card(card_number)
+            if card.__class__ is TransactionStatus:
+                if result is None:
+                    result = TransactionResult()
+                result.set(card, None, amount, card_number)
+                if self.journal is not None:
+                    self.journal.transaction(
+                        journaling.DEPOSIT,
+                        card,
+                        None,
+                        amount,
+                        time.time(),
+                        card_number,
+                    )
+                return result
+        target = card.account
+        if self._locks is None:
+            result = target.try_deposit(amount, result)
+        else:
+            with self._account_lock(target):
+                result = target.try_deposit(amount, result)
+        result.card_number = card_number
+        if self.journal is not None:
+            self.journal.transaction(
+                journaling.DEPOSIT,
+                result.code,
+                target,
+                amount,
+                result.transaction_time or time.time(),
+                card_number,
+            )
+        return result
+
+    def _find_card(self, card_number: str):
+        """
+        Slow path for a card number missing from the card index, looks the
+        account holder up from the card number, which loads them if they are
+        still pending in a snapshot. Returns the Card or a TransactionStatus
+        code if it can't be found.
+        :param card_number: Card number of the card making the transaction.
+        """
+        try:
+            # Exaggeration of getting account number from a card number.
+            accountholder_id = card_number.split("|")[1].split("-")[0]
+        except (AttributeError, IndexError):
+            return TransactionStatus.ACCOUNT_NOT_EXISTS
+        holder = self.account_holders.get(accountholder_id)
+        if holder is None:
+            return TransactionStatus.ACCOUNT_NOT_EXISTS
+        card = holder.cards.get(card_number)
+        if card is None:
+            return TransactionStatus.CARD_NOT_EXISTS
+        return card
+
+    def _card_not_found(self, kind: int, card_number: str, amount, code) -> dict:
+        """
+        Outcome of a single card transaction whose card can't be found, raises
+        AccountNotExists if there is no account holder for the card number,
+        otherwise returns the failed transaction.
+        """
+        if code == TransactionStatus.ACCOUNT_NOT_EXISTS:
+            error = AccountNotExists("Account associated with that card does not exist.")
+        else:
+            error = KeyError(card_number)
+        if self.journal is not None:
+            self._journal_transaction(
+                kind, None, card_number, amount, {"status": False, "error": error}
+            )
+        if code == TransactionStatus.ACCOUNT_NOT_EXISTS:
+            raise error
+        return {"status": False, "error": error}
+
+    def _resolve_card(self, card_number: str):
+        """
+        Find the account a card number is linked to, returns the account or a
+        TransactionStatus code if it can't be found.
+        :param card_number: Card number of the card making the transaction.
+        """
+        card = self.card_index.get(card_number)
+        if card is None:
+            card = self._find_card(card_number)
+            if card.__class__ is TransactionStatus:
+                return card
+        return card.account
+
+    def process_batch(self, transactions) -> BatchResult:
+        """
+        Method for applying many card transactions in one call.
+        Rows are grouped by account and applied in their original order within
+        each account, each distinct card number is resolved once and each account
+        posts its net change to the running totals once.
+        :param transactions: Iterable of (card_number, amount, kind) rows, or a
+            columnar dict {"card_number": [...], "amount": [...], "kind": [...]}
+            where kind is "withdraw" or "deposit".
+        """
+        with self._pinned():
+            start = time.perf_counter()
+            if isinstance(transactions, dict):
+                card_numbers = transactions["card_number"]
+                amounts = transactions["amount"]
+                kinds = transactions["kind"]
+            else:
+                card_numbers, amounts, kinds = [], [], []
+                for card_number, amount, kind in transactions:
+                    card_numbers.append(card_number)
+                    amounts.append(amount)
+                    kinds.append(kind)
+            n = len(card_numbers)
+            statuses = array("B", bytes(n))
+            # Resolve cards once and group row indices by account.
+            resolved = {}
+            groups = {}
+            for row in range(n):
+                card_number = card_numbers[row]
+                account = resolved.get(card_number)
+                if account is None:
+                    account = resolved[card_number] = self._resolve_card(card_number)
+                if account.__class__ is TransactionStatus:
+                    statuses[row] = account
+                    continue
+                rows = groups.get(account)
+                if rows is None:
+                    groups[account] = [row]
+                else:
+                    rows.append(row)
+            for account, rows in groups.items():
+                if self._locks is None:
+                    self._apply_rows(account, rows, amounts, kinds, statuses, card_numbers)
+                else:
+                    with self._account_lock(account):
+                        self._apply_rows(
+                            account, rows, amounts, kinds, statuses, card_numbers
+                        )
+            transaction_time = time.time()
+            if self.journal is not None:
+                record = self.journal.transaction
+                for row in range(n):
+                    account = resolved[card_numbers[row]]
+                    record(
+                        journaling.KINDS.get(kinds[row], journaling.UNKNOWN),
+                        statuses[row],
+                        None if account.__class__ is TransactionStatus else account,
+                        amounts[row],
+                        transaction_time,
+                        card_numbers[row],
+                    )
+            return BatchResult(statuses, transaction_time, time.perf_counter() - start)
+
+    def accrue_interest(
+        self, end, start=None, convention: str = "actual/365"
+    ) -> dict:
+        """
+        Nightly accrual, posts interest to savings accounts and APR charges to
+        owed credit balances for every open account in one pass.
+        :param end: Last day of the accrual period (exclusive), a datetime.date.
+        :param start: First day of the accrual period, defaults to the day before end.
+        :param convention: Day count convention (actual/365, actual/360, actual/actual, 30/360).
+        """
+        with self._pinned(), self._all_locks():
+            return interest.accrue(self, end, start, convention)
+
+    def close_cycles(self, today) -> dict:
+        """
+        Daily billing run of the credit accounts, charges late fees on the
+        statements due and closes the statements of the accounts whose cycle
+        ends, for every day since the last run through today. See
+        billing.BillingScheduler.run() for the summary returned.
+        :param today: Day of the run, a datetime.date.
+        """
+        if self.billing is None:
+            raise ValueError("The bank has no billing scheduler, see Bank(billing=...).")
+        with self._pinned(), self._all_locks():
+            return self.billing.run(self, today)
+
+    def _apply_rows(
+        self, account, rows: list, amounts, kinds, statuses: array, card_numbers=None
+    ):
+        """
+        Apply one account's rows of a batch in order, posting the net change once.
+        """
+        if account.status != "open":
+            for row in rows:
+                statuses[row] = TransactionStatus.ACCOUNT_ERROR
+            return
+        limit = account.withdrawal_limit
+        credit_limit = account.credit_limit
+        balance = account.balance
+        credited = 0
+        cents = self.cents
+        velocity = self.velocity
+        if velocity is not None:
+            now = velocity.clock()
+        inf = math.inf
+        for row in rows:
+            amount = amounts[row]
+            kind = kinds[row]
+            # nan fails every comparison, so it would pass the limit and balance checks.
+            if (cents and amount.__class__ is not int) or not 0 < amount < inf:
+                statuses[row] = TransactionStatus.INVALID_AMOUNT
+            elif kind == WITHDRAW:
+                if (
+                    velocity is not None
+                    and velocity.allow(card_numbers[row], account, amount, now)
+                    is not None
+                ):
+                    statuses[row] = TransactionStatus.VELOCITY_LIMIT
+                    continue
+                if amount > limit:
+                    statuses[row] = TransactionStatus.EXCEEDS_LIMIT
+                elif amount > balance + credit_limit:
+                    statuses[row] = TransactionStatus.INSUFFICIENT_BALANCE
+                else:
+                    balance -= amount
+                    continue
+                # Declined after allow() counted it.
+                if velocity is not None:
+                    velocity.release(card_numbers[row], account, amount)
+            elif kind == DEPOSIT:
+                balance += amount
+                credited += amount
+            else:
+                statuses[row] = TransactionStatus.INVALID_KIND
+        account._set_balance(balance)
+        if credited and isinstance(account, CreditAccount):
+            # Posted net through _set_balance(), so the deposits count as payments here.
+            account.paid += credited
 
     # def create_account(self, account_holder: AccountHolder, account: Account, account_holder_id: int=False):
     #     if account_holder_id and account_holder_id in self.accounts:
@@ -79,7 +1295,121 @@ class Bank:
     # .
     # etc etc.
 
-    # def electronic_transfer(self, account_1, account_2, amount):
-    # .
-    # .
-    # etc etc.
+    def electronic_transfer(self, account_1, account_2, amount: float) -> dict:
+        """
+        Method for moving money between two accounts of this bank atomically,
+        either both balances change or neither does. Returns the same dicts as
+        withdrawal_transaction(), new_balance is the balance of account_1.
+        :param account_1: Account object to debit.
+        :param account_2: Account object to credit.
+        :param amount: The amount of money to transfer.
+        """
+        with self._ordered_locks((account_1, account_2)):
+            code, account = self._transfer_status(
+                account_1, account_2, amount, account_1.balance
+            )
+            if code == TransactionStatus.OK:
+                account_1._post(-amount)
+                account_2._post(amount)
+                trans = {
+                    "status": True,
+                    "new_balance": account_1.balance,
+                    "transaction_time": time.time(),
+                }
+            else:
+                trans = {
+                    "status": False,
+                    "error": TransactionResult().set(code, account, amount).error(),
+                }
+        if self.journal is not None:
+            self.journal.transfer(
+                code,
+                account_1,
+                account_2,
+                amount,
+                trans.get("transaction_time") or time.time(),
+            )
+        return trans
+
+    def process_transfers(self, transfers) -> BatchResult:
+        """
+        Method for applying many transfers in one call with netting. Rows are
+        checked in order against running balances, then every account touched
+        posts its net change once, all under the locks of every account touched.
+        :param transfers: Iterable of (account_1, account_2, amount) rows, or a
+            columnar dict {"from_account": [...], "to_account": [...], "amount": [...]}.
+        """
+        with self._pinned():
+            start = time.perf_counter()
+            if isinstance(transfers, dict):
+                sources = transfers["from_account"]
+                targets = transfers["to_account"]
+                amounts = transfers["amount"]
+            else:
+                sources, targets, amounts = [], [], []
+                for source, target, amount in transfers:
+                    sources.append(source)
+                    targets.append(target)
+                    amounts.append(amount)
+            n = len(sources)
+            statuses = array("B", bytes(n))
+            ok = TransactionStatus.OK
+            with self._ordered_locks(set(sources).union(targets)):
+                balances = {}
+                credited = {}
+                for row in range(n):
+                    source = sources[row]
+                    target = targets[row]
+                    amount = amounts[row]
+                    balance = balances.get(source)
+                    if balance is None:
+                        balance = source.balance
+                    code, _ = self._transfer_status(source, target, amount, balance)
+                    if code != ok:
+                        statuses[row] = code
+                        continue
+                    balances[source] = balance - amount
+                    balance = balances.get(target)
+                    balances[target] = (
+                        target.balance + amount if balance is None else balance + amount
+                    )
+                    if isinstance(target, CreditAccount):
+                        credited[target] = credited.get(target, 0) + amount
+                for account, balance in balances.items():
+                    account._set_balance(balance)
+                # Posted net through _set_balance(), so the credits count as payments here.
+                for account, amount in credited.items():
+                    account.paid += amount
+            transaction_time = time.time()
+            if self.journal is not None:
+                for row in range(n):
+                    self.journal.transfer(
+                        statuses[row],
+                        sources[row],
+                        targets[row],
+                        amounts[row],
+                        transaction_time,
+                    )
+            return BatchResult(statuses, transaction_time, time.perf_counter() - start)
+
+    def _transfer_status(self, source, target, amount, balance) -> tuple:
+        """
+        Whether amount can move from source to target, returns a TransactionStatus
+        and the account it applies to.
+        :param balance: Balance of source to check against.
+        """
+        if self.cents and amount.__class__ is not int:
+            return TransactionStatus.INVALID_AMOUNT, source
+        elif source is target or not amount > 0:
+            return TransactionStatus.INVALID_TRANSFER, source
+        for account in (source, target):
+            ledger = account._ledger
+            if ledger is None or ledger._bank is not self:
+                return TransactionStatus.ACCOUNT_NOT_EXISTS, account
+            elif account.status != "open":
+                return TransactionStatus.ACCOUNT_ERROR, account
+        if amount > source.withdrawal_limit:
+            return TransactionStatus.EXCEEDS_LIMIT, source
+        elif amount > balance + source.credit_limit:
+            return TransactionStatus.INSUFFICIENT_BALANCE, source
+        return TransactionStatus.OK, source
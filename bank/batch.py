@@ -0,0 +1,76 @@
+"""
+bank.batch
+~~~~~~~~~~
+This module contains code for describing the results of batched transactions.
+"""
+
+from array import array
+from .status import TransactionStatus
+
+WITHDRAW = "withdraw"
+DEPOSIT = "deposit"
+
+
+class BatchResult:
+    """
+    Compact result of a batch of transactions processed by Bank.process_batch().
+    :param statuses: array of TransactionStatus codes, one per input row.
+    :param transaction_time: Time stamp shared by every row in the batch.
+    :param elapsed: Wall clock seconds spent processing the batch.
+    """
+
+    def __init__(self, statuses: array, transaction_time: float, elapsed: float):
+        self.statuses = statuses
+        self.transaction_time = transaction_time
+        self.elapsed = elapsed
+
+    def __len__(self):
+        return len(self.statuses)
+
+    def __getitem__(self, row: int) -> TransactionStatus:
+        return TransactionStatus(self.statuses[row])
+
+    def __repr__(self):
+        return (
+            f"BatchResult(rows={self.rows}, applied={self.applied}, "
+            f"declined={self.declined}, rows_per_second={self.rows_per_second:.0f})"
+        )
+
+    @property
+    def rows(self) -> int:
+        """
+        Number of rows in the batch.
+        """
+        return len(self.statuses)
+
+    @property
+    def applied(self) -> int:
+        """
+        Number of rows that were applied to an account.
+        """
+        return self.statuses.count(TransactionStatus.OK)
+
+    @property
+    def declined(self) -> int:
+        """
+        Number of rows that were not applied.
+        """
+        return self.rows - self.applied
+
+    @property
+    def counts(self) -> dict:
+        """
+        Number of rows per TransactionStatus.
+        """
+        return {
+            status: self.statuses.count(status)
+            for status in TransactionStatus
+            if status in self.statuses
+        }
+
+    @property
+    def rows_per_second(self) -> float:
+        """
+        Throughput of the batch.
+        """
+        return self.rows / self.elapsed if self.elapsed else float("inf")
@@ -0,0 +1,241 @@
+"""
+bank.billing
+~~~~~~~~~~~~
+This module contains code for credit account statement cycles, minimum payments and late fees.
+"""
+
+from array import array
+from .money import to_cents
+from .status import FEE, TransactionStatus
+import datetime, time
+
+# Statements close on a day of the month every month has.
+CYCLE_DAYS = 28
+# Default card terms, amounts in dollars.
+GRACE_DAYS = 25
+MINIMUM_RATE = 0.01
+MINIMUM_PAYMENT = 25.00
+LATE_FEE = 35.00
+
+
+def next_statement_date(after: datetime.date, cycle_day: int) -> datetime.date:
+    """
+    First date after a date that falls on a cycle day.
+    :param after: Date to start from (exclusive).
+    :param cycle_day: Day of the month statements close on, 1 to CYCLE_DAYS.
+    """
+    if after.day < cycle_day:
+        return after.replace(day=cycle_day)
+    if after.month == 12:
+        return datetime.date(after.year + 1, 1, cycle_day)
+    return datetime.date(after.year, after.month + 1, cycle_day)
+
+
+def statement(
+    account, minimum_rate: float = MINIMUM_RATE, minimum_payment=MINIMUM_PAYMENT
+) -> tuple:
+    """
+    Scalar reference, the (statement balance, minimum due) a credit account
+    closes its cycle with. The statement balance is what is owed, the minimum
+    due is minimum_rate of it but at least minimum_payment, and never more
+    than is owed. In cents mode the minimum is rounded half to even to whole cents.
+    :param account: CreditAccount to close.
+    :param minimum_rate: Share of the statement balance due.
+    :param minimum_payment: Smallest minimum due, in the account's units.
+    """
+    owed = -account.balance if account.balance < 0 else 0
+    if owed <= 0:
+        return owed, 0
+    minimum = min(owed, max(owed * minimum_rate, minimum_payment))
+    return owed, round(minimum) if account.cents else minimum
+
+
+def _close_columns(balances, minimum_rate: float, minimum_payment, cents: bool = False) -> tuple:
+    """
+    Statement balances and minimums for a column of balances in one pass. Plain
+    comprehensions (no numpy, the package is stdlib only), batched per bucket.
+    """
+    typecode = "q" if cents else "d"
+    owed = array(typecode, [-b if b < 0 else 0 for b in balances])
+    minimums = [
+        min(o, max(o * minimum_rate, minimum_payment)) if o > 0 else 0 for o in owed
+    ]
+    if cents:
+        # round() is half to even, the same rounding as money.to_cents().
+        return owed, array("q", map(round, minimums))
+    return owed, array("d", minimums)
+
+
+def _late_columns(minimums, paid, open_mask, late_fee, cents: bool = False) -> array:
+    """
+    The late fee of every account of a column that paid less than its minimum
+    due, in one comprehension. Accounts that aren't open are not charged.
+    """
+    return array(
+        "q" if cents else "d",
+        [
+            late_fee if o and m > 0 and p < m else 0
+            for m, p, o in zip(minimums, paid, open_mask)
+        ],
+    )
+
+
+class BillingScheduler:
+    """
+    Statement cycles of a bank's credit accounts, set with
+    Bank(billing=BillingScheduler()) and run daily with bank.close_cycles(today).
+    Accounts are bucketed by cycle day as they are opened, and by payment due
+    date as their statements close, so a day's run only touches the accounts
+    whose statement closes or whose payment falls due that day, each bucket
+    as one columnar batch. On its due date a statement with less than its
+    minimum due paid since it closed is charged a late fee, before the
+    day's statements close.
+    :param grace_days: Days from a statement's close to its payment due date.
+    :param minimum_rate: Share of the statement balance due as the minimum payment.
+    :param minimum_payment: Smallest minimum payment in dollars, capped at the statement balance.
+    :param late_fee: Fee in dollars charged when the minimum due isn't paid by the due date.
+    """
+
+    def __init__(
+        self,
+        grace_days: int = GRACE_DAYS,
+        minimum_rate: float = MINIMUM_RATE,
+        minimum_payment: float = MINIMUM_PAYMENT,
+        late_fee: float = LATE_FEE,
+    ):
+        self.grace_days = grace_days
+        self.minimum_rate = minimum_rate
+        self.minimum_payment = minimum_payment
+        self.late_fee = late_fee
+        # cycle day -> {CreditAccount: None}, dicts keep the order accounts opened in.
+        self.cycles = {day: {} for day in range(1, CYCLE_DAYS + 1)}
+        # due date -> {CreditAccount: None} of statements with a minimum due.
+        self.due = {}
+        # Last day run, the next run catches up every day since.
+        self.last_run = None
+
+    def __len__(self):
+        return sum(len(bucket) for bucket in self.cycles.values())
+
+    def add(self, account):
+        """
+        Schedule a credit account, other accounts are ignored.
+        """
+        cycle_day = getattr(account, "cycle_day", None)
+        if cycle_day is None:
+            return
+        self.cycles[cycle_day][account] = None
+        if account.due_date is not None and account.balance_due:
+            self.due.setdefault(account.due_date, {})[account] = None
+
+    def remove(self, account):
+        """
+        Stop scheduling an account.
+        """
+        cycle_day = getattr(account, "cycle_day", None)
+        if cycle_day is None:
+            return
+        self.cycles[cycle_day].pop(account, None)
+        bucket = self.due.get(account.due_date)
+        if bucket is not None:
+            bucket.pop(account, None)
+
+    def track(self, bank):
+        """
+        Schedule every credit account a bank holds, for a scheduler set after
+        accounts were opened.
+        """
+        for holder in bank.account_holders.values():
+            for account in holder.accounts.credit_accounts.values():
+                self.add(account)
+
+    def run(self, bank, today: datetime.date) -> dict:
+        """
+        Charge the late fees and close the statements of every day since the
+        last run through today, only today on the first run. Returns the
+        number of statements closed with the total owed and minimum due, and
+        the number and total of late fees charged.
+        :param bank: Bank object the accounts belong to.
+        :param today: Last day to run, a datetime.date.
+        """
+        zero = 0 if bank.cents else 0.0
+        summary = {
+            "statements": 0,
+            "owed": zero,
+            "minimum_due": zero,
+            "late_fees": 0,
+            "fees": zero,
+        }
+        day = today if self.last_run is None else self.last_run + datetime.timedelta(days=1)
+        while day <= today:
+            self._charge_late_fees(bank, day, summary)
+            if day.day <= CYCLE_DAYS:
+                self._close(bank, day, summary)
+            day += datetime.timedelta(days=1)
+        if self.last_run is None or today > self.last_run:
+            self.last_run = today
+        return summary
+
+    def _close(self, bank, day: datetime.date, summary: dict):
+        # Accounts opened since the bucket's last close wait for their first cycle.
+        accounts = [
+            account for account in self.cycles[day.day] if account.billing_end <= day
+        ]
+        if not accounts:
+            return
+        cents = bank.cents
+        owed, minimums = _close_columns(
+            [account.balance for account in accounts],
+            self.minimum_rate,
+            to_cents(self.minimum_payment) if cents else self.minimum_payment,
+            cents,
+        )
+        due_date = day + datetime.timedelta(days=self.grace_days)
+        due = self.due.setdefault(due_date, {})
+        zero = 0 if cents else 0.0
+        for account, statement_balance, minimum in zip(accounts, owed, minimums):
+            if account.due_date is not None and account.due_date != due_date:
+                bucket = self.due.get(account.due_date)
+                if bucket is not None:
+                    bucket.pop(account, None)
+            account.statement_balance = statement_balance
+            account.minimum_due = minimum
+            account.paid = zero
+            account.billing_end = next_statement_date(day, account.cycle_day)
+            if minimum:
+                account.due_date = due_date
+                due[account] = None
+            else:
+                account.due_date = None
+            bank._billing_changed(account)
+        if not due:
+            del self.due[due_date]
+        summary["statements"] += len(accounts)
+        summary["owed"] += sum(owed)
+        summary["minimum_due"] += sum(minimums)
+
+    def _charge_late_fees(self, bank, day: datetime.date, summary: dict):
+        bucket = self.due.pop(day, None)
+        if not bucket:
+            return
+        accounts = list(bucket)
+        cents = bank.cents
+        fees = _late_columns(
+            [account.minimum_due for account in accounts],
+            [account.paid for account in accounts],
+            [account.status == "open" for account in accounts],
+            to_cents(self.late_fee) if cents else self.late_fee,
+            cents,
+        )
+        journal = bank.journal
+        timestamp = time.time()
+        for account, fee in zip(accounts, fees):
+            if not fee:
+                continue
+            account._post(-fee)
+            account.late_fees += 1
+            summary["late_fees"] += 1
+            summary["fees"] += fee
+            if journal is not None and account in journal.slots:
+                journal.transaction(FEE, TransactionStatus.OK, account, -fee, timestamp)
+            bank._billing_changed(account)
@@ -4,6 +4,8 @@ bank.cards
 This module contains code for managing cards.
 """
 
+from .verification import check_pin
+
 
 class Card:
     """
@@ -13,13 +15,25 @@ class Card:
     :param holder_firstname: First name of cardholder.
     :param holder_lastname: Last name of cardholder.
     :param card_number: Unique card number/id tied to the card.
-    :param __pin: Pin associated with the card.
+    :param __pin: Pin associated with the card, plaintext or a verification.hash_pin() hash.
     :param expiry_date: Date the card expires.
     :param cvv: CVV associated with the card.
     :param status: Status of the card (active, locked, expired)
     :param withdrawal_limit: Maximum amount account is able to withdraw with a single transaction.
     """
 
+    __slots__ = (
+        "account_holder",
+        "account",
+        "holder_firstname",
+        "holder_lastname",
+        "card_number",
+        "__pin",
+        "expiry_date",
+        "cvv",
+        "status",
+    )
+
     def __init__(
         self,
         account_holder,
@@ -42,18 +56,27 @@ class Card:
         self.cvv = cvv
         self.status = status
         self.account.linked_cards[self.card_number] = self
-        self.account_holder.cards[self.card_number] = {
-            "account": self.account,
-            "card": self,
-        }
+        self.account_holder.cards[self.card_number] = self
+        self.account_holder.bank._card_issued(self)
+
+    def __getitem__(self, key: str):
+        # account_holder.cards used to hold {"account": ..., "card": ...} per card.
+        if key == "account":
+            return self.account
+        elif key == "card":
+            return self
+        raise KeyError(key)
 
     def verify(self, pin: str, expiry: str, cvv: str) -> bool:
         """
-        Method for validating card information.
+        Method for validating card information. A hashed PIN is checked with
+        the KDF, which is slow by design, see verification.CardVerifier.
         :param pin: Pin sent in with the request.
         :param expiry: Expiry date sent in with the request.
         :param cvv: CVV sent in with the request.
         """
         if self.status != "active":
             return False
-        return pin == self.__pin and expiry == self.expiry_date and cvv == self.cvv
+        if expiry != self.expiry_date or cvv != self.cvv:
+            return False
+        return check_pin(pin, self.__pin)
@@ -4,14 +4,24 @@ bank.exceptions
 This module contains custom exceptions.
 """
 
+from .money import format_amount
+
 
 class InsufficientBalance(Exception):
     """
     Exception for when a cardholder attempts to overdraw an account.
+    :param cents: Whether balance and amount are integer cents.
     """
 
-    def __init__(self, balance, amount):
-        self.message = f"Overdrawing account is prohibited, short ${float(balance - amount)}, deposit funds or withdraw less."
+    def __init__(self, balance, amount, cents: bool = False):
+        super().__init__(balance, amount, cents)
+
+    @property
+    def message(self) -> str:
+        # Formatted on access, declines are often never shown to anyone.
+        balance, amount, cents = self.args
+        short = balance - amount if cents else float(balance - amount)
+        return f"Overdrawing account is prohibited, short ${format_amount(short, cents)}, deposit funds or withdraw less."
 
     def __str__(self):
         return repr(self.message)
@@ -23,7 +33,12 @@ class AccountError(Exception):
     """
 
     def __init__(self, account_id, status):
-        self.message = f"Account {account_id} is unable to withdraw funds because it maintains the status: {status}"
+        super().__init__(account_id, status)
+
+    @property
+    def message(self) -> str:
+        account_id, status = self.args
+        return f"Account {account_id} is unable to withdraw funds because it maintains the status: {status}"
 
     def __str__(self):
         return repr(self.message)
@@ -35,6 +50,7 @@ class AccountNotExists(Exception):
     """
 
     def __init__(self, message):
+        super().__init__(message)
         self.message = message
 
     def __str__(self):
@@ -44,11 +60,82 @@ class AccountNotExists(Exception):
 class ExceedsLimit(Exception):
     """
     Exception that is raised if awithdrawal exceeds limit.
+    :param cents: Whether the limit is integer cents.
     """
 
-    def __init__(self, withdraw_limit):
+    def __init__(self, withdraw_limit, cents: bool = False):
+        super().__init__(withdraw_limit, cents)
         self.withdraw_limit = withdraw_limit
-        self.message = f"Overdrawing account limit is prohibited, limited to {self.withdraw_limit} per transaction."
+
+    @property
+    def message(self) -> str:
+        return f"Overdrawing account limit is prohibited, limited to {format_amount(self.withdraw_limit, self.args[1])} per transaction."
+
+    def __str__(self):
+        return repr(self.message)
+
+
+class VelocityExceeded(Exception):
+    """
+    Exception that is raised if a withdrawal would breach a velocity limit of its card or account.
+    :param scope: "card" or "account".
+    :param limit: The VelocityLimit that would be breached.
+    :param cents: Whether the limit's max_amount is integer cents.
+    """
+
+    def __init__(self, scope: str, limit, cents: bool = False):
+        super().__init__(scope, limit, cents)
+
+    @property
+    def message(self) -> str:
+        scope, limit, cents = self.args
+        if limit is None:
+            return "Velocity limit reached, try again later."
+        caps = []
+        if limit.max_amount is not None:
+            caps.append(f"${format_amount(limit.max_amount, cents)}")
+        if limit.max_count is not None:
+            caps.append(f"{limit.max_count} withdrawals")
+        return f"{scope.capitalize()} velocity limit reached, limited to {' or '.join(caps)} per {limit.window:g} seconds."
+
+    def __str__(self):
+        return repr(self.message)
+
+
+class VerificationFailed(Exception):
+    """
+    Exception that is raised if a card's PIN, expiry date or CVV don't match,
+    or the card isn't active.
+    """
+
+    def __init__(self, card_number):
+        super().__init__(card_number)
+
+    @property
+    def message(self) -> str:
+        return f"Card {self.args[0]} could not be verified."
+
+    def __str__(self):
+        return repr(self.message)
+
+
+class ShardError(Exception):
+    """
+    Exception that is raised if a request sent to every shard of a ShardedBank
+    fails on some of them. The shards that succeeded have applied their part.
+    :param errors: {shard: exception} of the shards that failed.
+    :param results: {shard: result} of the shards that succeeded.
+    """
+
+    def __init__(self, errors: dict, results: dict):
+        super().__init__(errors, results)
+        self.errors = errors
+        self.results = results
+
+    @property
+    def message(self) -> str:
+        failed = ", ".join(f"{shard}: {error!r}" for shard, error in sorted(self.errors.items()))
+        return f"Shards failed ({failed}), shards {sorted(self.results)} applied their part."
 
     def __str__(self):
         return repr(self.message)
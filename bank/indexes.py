@@ -0,0 +1,281 @@
+"""
+bank.indexes
+~~~~~~~~~~~~
+This module contains maintained secondary indexes over a bank's accounts.
+"""
+
+from bisect import bisect_left, insort
+from heapq import merge
+from .ledger import ACCOUNT_TYPES
+import datetime, math
+
+
+class SortedKeyList:
+    """
+    Sorted list split into buckets of at most 2 * load keys, so adding or
+    removing a key moves at most one bucket's worth of memory instead of the
+    whole list. Keys are tuples that must be unique.
+    :param load: Target number of keys per bucket.
+    """
+
+    def __init__(self, load: int = 512):
+        self._load = load
+        self._lists = []
+        # Last (largest) key of each bucket.
+        self._maxes = []
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        for keys in self._lists:
+            yield from keys
+
+    def __reversed__(self):
+        for keys in reversed(self._lists):
+            yield from reversed(keys)
+
+    def add(self, key):
+        maxes = self._maxes
+        if not maxes:
+            self._lists.append([key])
+            maxes.append(key)
+        else:
+            i = bisect_left(maxes, key)
+            if i == len(maxes):
+                i -= 1
+                self._lists[i].append(key)
+                maxes[i] = key
+            else:
+                insort(self._lists[i], key)
+            keys = self._lists[i]
+            if len(keys) > 2 * self._load:
+                half = keys[self._load :]
+                del keys[self._load :]
+                maxes[i] = keys[-1]
+                self._lists.insert(i + 1, half)
+                maxes.insert(i + 1, half[-1])
+        self._len += 1
+
+    def remove(self, key):
+        maxes = self._maxes
+        i = bisect_left(maxes, key)
+        if i < len(maxes):
+            keys = self._lists[i]
+            j = bisect_left(keys, key)
+            if j < len(keys) and keys[j] == key:
+                del keys[j]
+                self._len -= 1
+                if not keys:
+                    del self._lists[i]
+                    del maxes[i]
+                elif j == len(keys):
+                    maxes[i] = keys[-1]
+                return
+        raise ValueError(f"{key!r} not in list.")
+
+    def irange(self, low=None, high=None):
+        """
+        Iterate the keys with low <= key <= high, None is unbounded.
+        """
+        maxes = self._maxes
+        if low is None:
+            i = j = 0
+        else:
+            i = bisect_left(maxes, low)
+            if i == len(maxes):
+                return
+            j = bisect_left(self._lists[i], low)
+        for keys in self._lists[i:]:
+            for key in keys[j:]:
+                if high is not None and key > high:
+                    return
+                yield key
+            j = 0
+
+    def position(self, key) -> int:
+        """
+        Number of keys smaller than key, O(buckets).
+        """
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            return self._len
+        return sum(map(len, self._lists[:i])) + bisect_left(self._lists[i], key)
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("SortedKeyList index out of range.")
+        for keys in self._lists:
+            if index < len(keys):
+                return keys[index]
+            index -= len(keys)
+
+
+class AccountIndexes:
+    """
+    Secondary indexes over every account registered to a bank's account holders,
+    kept up to date as accounts are opened/closed, balances move and statuses
+    change, so queries take time proportional to their result. Hash indexes on
+    status and account type (the Accounts registry the account is in), and
+    sorted indexes on open date and, per account type, on balance.
+    Created by Bank(indexed=True) as bank.indexes.
+    """
+
+    def __init__(self):
+        self._by_status = {}
+        self._by_type = {kind: set() for kind in ACCOUNT_TYPES}
+        self._by_open_date = SortedKeyList()
+        self._by_balance = {kind: SortedKeyList() for kind in ACCOUNT_TYPES}
+        # account -> [account type, balance key, open date key]
+        self._entries = {}
+        # Tie breaker making every key unique, accounts themselves aren't orderable.
+        self._seq = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, account):
+        return account in self._entries
+
+    def add(self, account):
+        """
+        Index an account registered under one of the bank's account holders.
+        """
+        if account in self._entries:
+            self.remove(account)
+        kind = account._ledger_kind
+        seq = self._seq
+        self._seq += 1
+        balance_key = (account.balance, seq, account)
+        date_key = (account.open_date.toordinal(), seq, account)
+        self._entries[account] = [kind, balance_key, date_key]
+        self._by_balance[kind].add(balance_key)
+        self._by_open_date.add(date_key)
+        self._by_type[kind].add(account)
+        accounts = self._by_status.get(account.status)
+        if accounts is None:
+            accounts = self._by_status[account.status] = set()
+        accounts.add(account)
+
+    def remove(self, account):
+        """
+        Drop an account from every index.
+        """
+        entry = self._entries.pop(account, None)
+        if entry is None:
+            return
+        kind, balance_key, date_key = entry
+        self._by_balance[kind].remove(balance_key)
+        self._by_open_date.remove(date_key)
+        self._by_type[kind].discard(account)
+        accounts = self._by_status.get(account.status)
+        if accounts is not None:
+            accounts.discard(account)
+
+    def balance_changed(self, account):
+        """
+        Move an account to its new position in the balance index.
+        """
+        entry = self._entries.get(account)
+        if entry is None:
+            return
+        balance_key = entry[1]
+        balance = account.balance
+        if balance != balance_key[0]:
+            index = self._by_balance[entry[0]]
+            index.remove(balance_key)
+            entry[1] = (balance, balance_key[1], account)
+            index.add(entry[1])
+
+    def status_changed(self, account, old: str, new: str):
+        """
+        Move an account between status buckets.
+        """
+        if account not in self._entries:
+            return
+        accounts = self._by_status.get(old)
+        if accounts is not None:
+            accounts.discard(account)
+        accounts = self._by_status.get(new)
+        if accounts is None:
+            accounts = self._by_status[new] = set()
+        accounts.add(account)
+
+    def reindex_balances(self):
+        """
+        Re-key every account whose balance moved without passing through
+        balance_changed(), e.g. LedgerStore columns rewritten in bulk. O(A).
+        """
+        for account in self._entries:
+            self.balance_changed(account)
+
+    def by_status(self, status: str) -> list:
+        """
+        Accounts with a status, e.g. "frozen".
+        """
+        return list(self._by_status.get(status, ()))
+
+    def by_type(self, account_type: str) -> list:
+        """
+        Accounts of a type (checking, savings, credit).
+        """
+        return list(self._by_type[account_type])
+
+    def opened_between(
+        self, start: datetime.date = None, end: datetime.date = None
+    ) -> list:
+        """
+        Accounts opened from start (inclusive) to end (exclusive), oldest first.
+        :param start: First open date, unbounded if None.
+        :param end: Open date after the last one, unbounded if None.
+        """
+        low = (start.toordinal(),) if start is not None else None
+        high = (end.toordinal() - 1, math.inf) if end is not None else None
+        return [key[2] for key in self._by_open_date.irange(low, high)]
+
+    def _balance_keys(self, low, high, account_type: str):
+        low = (low,) if low is not None else None
+        high = (high, math.inf) if high is not None else None
+        if account_type is not None:
+            return self._by_balance[account_type].irange(low, high)
+        return merge(*(index.irange(low, high) for index in self._by_balance.values()))
+
+    def balance_between(self, low=None, high=None, account_type: str = None) -> list:
+        """
+        Accounts with low <= balance <= high, smallest balance first.
+        :param low: Smallest balance, unbounded if None.
+        :param high: Largest balance, unbounded if None.
+        :param account_type: Only accounts of this type.
+        """
+        return [key[2] for key in self._balance_keys(low, high, account_type)]
+
+    def count_balance_between(self, low=None, high=None, account_type: str = None) -> int:
+        """
+        Number of accounts with low <= balance <= high, without listing them.
+        """
+        indexes = (
+            [self._by_balance[account_type]]
+            if account_type is not None
+            else self._by_balance.values()
+        )
+        count = 0
+        for index in indexes:
+            end = index.position((high, math.inf)) if high is not None else len(index)
+            start = index.position((low,)) if low is not None else 0
+            count += max(end - start, 0)
+        return count
+
+    def largest_balances(self, n: int, account_type: str = None) -> list:
+        """
+        The n accounts with the largest balances, largest first.
+        """
+        indexes = (
+            [self._by_balance[account_type]]
+            if account_type is not None
+            else self._by_balance.values()
+        )
+        keys = merge(*(reversed(index) for index in indexes), reverse=True)
+        return [key[2] for key, _ in zip(keys, range(n))]
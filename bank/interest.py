@@ -0,0 +1,234 @@
+"""
+bank.interest
+~~~~~~~~~~~~~
+This module contains code for accruing savings interest and credit APR charges.
+"""
+
+from array import array
+from .ledger import AccountView, ACCOUNT_TYPES
+import calendar, datetime, time
+
+SAVINGS = ACCOUNT_TYPES.index("savings")
+CREDIT = ACCOUNT_TYPES.index("credit")
+DAY_COUNT_CONVENTIONS = ("actual/365", "actual/360", "actual/actual", "30/360")
+
+
+def year_fraction(
+    start: datetime.date, end: datetime.date, convention: str = "actual/365"
+) -> float:
+    """
+    Fraction of a year between two dates under a day count convention.
+    :param start: First day of the accrual period (inclusive).
+    :param end: Last day of the accrual period (exclusive).
+    :param convention: One of actual/365, actual/360, actual/actual, 30/360.
+    """
+    if convention == "actual/365":
+        return (end - start).days / 365
+    elif convention == "actual/360":
+        return (end - start).days / 360
+    elif convention == "actual/actual":
+        # ISDA: days falling in each calendar year over the length of that year.
+        fraction = 0.0
+        while start.year < end.year:
+            year_end = datetime.date(start.year + 1, 1, 1)
+            fraction += (year_end - start).days / (366 if calendar.isleap(start.year) else 365)
+            start = year_end
+        return fraction + (end - start).days / (
+            366 if calendar.isleap(end.year) else 365
+        )
+    elif convention == "30/360":
+        d1 = min(start.day, 30)
+        d2 = min(end.day, 30) if d1 == 30 else end.day
+        return (
+            360 * (end.year - start.year) + 30 * (end.month - start.month) + d2 - d1
+        ) / 360
+    raise ValueError(
+        f"Unknown day count convention {convention}, use one of {DAY_COUNT_CONVENTIONS}."
+    )
+
+
+def accrual(account, fraction: float) -> float:
+    """
+    Scalar reference, the signed amount one account accrues over a year fraction.
+    Savings accounts earn interest on a positive balance and credit accounts are
+    charged APR on a negative (owed) balance, accounts that aren't open accrue nothing.
+    In cents mode the amount is rounded half to even to whole cents.
+    :param account: Account to accrue.
+    :param fraction: Year fraction from year_fraction().
+    """
+    if account.status != "open":
+        return 0 if account.cents else 0.0
+    balance = account.balance
+    if hasattr(account, "interest_rate") and balance > 0:
+        amount = balance * account.interest_rate * fraction
+    elif hasattr(account, "apr_rate") and balance < 0:
+        amount = balance * account.apr_rate * fraction
+    else:
+        amount = 0.0
+    return round(amount) if account.cents else amount
+
+
+def _accrue_columns(
+    balances, rates, type_codes, open_mask, fraction: float, cents: bool = False
+) -> array:
+    """
+    Postings for whole columns of accounts in one pass, computed before any is
+    applied. The package is stdlib only, so this is a comprehension over the
+    columns rather than a SIMD kernel: it batches the work and keeps the
+    postings in a typed array, each element still costs a Python step.
+    """
+    postings = array(
+        "d",
+        [
+            b * r * fraction
+            if o and ((t == SAVINGS and b > 0) or (t == CREDIT and b < 0))
+            else 0.0
+            for b, r, t, o in zip(balances, rates, type_codes, open_mask)
+        ],
+    )
+    if cents:
+        # round() is half to even, the same rounding as money.to_cents().
+        return array("q", map(round, postings))
+    return postings
+
+
+def _accrue_store(store, fraction: float) -> array:
+    """
+    Postings for every slot of a LedgerStore.
+    """
+    open_code = store.status_code("open")
+    return _accrue_columns(
+        store.balances,
+        store.rates,
+        store.type_codes,
+        [code == open_code for code in store.status_codes],
+        fraction,
+        store.cents,
+    )
+
+
+def _store_view(store, slot: int) -> AccountView:
+    """
+    The AccountView registered for a LedgerStore slot.
+    """
+    holder_accounts = store.ledgers[slot]
+    registry = (
+        holder_accounts.checking_accounts,
+        holder_accounts.saving_accounts,
+        holder_accounts.credit_accounts,
+    )[store.ledger_codes[slot]]
+    return registry[store.account_ids[slot]]
+
+
+def _gather_accounts(bank) -> tuple:
+    """
+    Collect the savings and credit accounts that aren't LedgerStore views into
+    columns. With bank.indexes they come from the account type index, without
+    it (or over a working set, whose index only has resident holders) every
+    holder is walked.
+    """
+    if bank.indexes is not None and bank.working_set is None:
+        registries = [
+            (SAVINGS, bank.indexes.by_type("savings"), "interest_rate"),
+            (CREDIT, bank.indexes.by_type("credit"), "apr_rate"),
+        ]
+    else:
+        registries = []
+        for holder in bank.account_holders.values():
+            registries.append(
+                (SAVINGS, holder.accounts.saving_accounts.values(), "interest_rate")
+            )
+            registries.append(
+                (CREDIT, holder.accounts.credit_accounts.values(), "apr_rate")
+            )
+    accounts, balances, rates, type_codes, open_mask = [], [], [], [], []
+    for kind, registry, rate_attr in registries:
+        for account in registry:
+            if isinstance(account, AccountView):
+                continue
+            accounts.append(account)
+            balances.append(account.balance)
+            rates.append(getattr(account, rate_attr))
+            type_codes.append(kind)
+            open_mask.append(account.status == "open")
+    return accounts, balances, rates, type_codes, open_mask
+
+
+def accrue(
+    bank,
+    end: datetime.date,
+    start: datetime.date = None,
+    convention: str = "actual/365",
+) -> dict:
+    """
+    Accrue interest and APR charges for every savings and credit account of a bank.
+    Every posting is computed before any is applied, LedgerStore balances are
+    swapped in as one new column.
+    :param bank: Bank object to accrue.
+    :param end: Last day of the accrual period (exclusive).
+    :param start: First day of the accrual period, defaults to the day before end.
+    :param convention: Day count convention, see year_fraction().
+    """
+    start = start or end - datetime.timedelta(days=1)
+    fraction = year_fraction(start, end, convention)
+    accounts, balances, rates, type_codes, open_mask = _gather_accounts(bank)
+    postings = _accrue_columns(
+        balances, rates, type_codes, open_mask, fraction, bank.cents
+    )
+    store = bank.ledger
+    if store is not None:
+        store_postings = _accrue_store(store, fraction)
+        store_balances = array(
+            store.balances.typecode,
+            [b + p for b, p in zip(store.balances, store_postings)],
+        )
+    else:
+        store_postings = array("d")
+
+    # Apply.
+    for account, posting in zip(accounts, postings):
+        if posting:
+            account._post(posting)
+    if store is not None:
+        store.balances = store_balances
+        # Persistence and the working set are told of a change through its account.
+        notify = bank.persistence is not None or bank.working_set is not None
+        for slot, (ledger, code, posting) in enumerate(
+            zip(store.ledgers, store.ledger_codes, store_postings)
+        ):
+            if posting and ledger is not None:
+                ledger._apply_delta(
+                    ACCOUNT_TYPES[code], posting, _store_view(store, slot) if notify else None
+                )
+        if bank.indexes is not None:
+            bank.indexes.reindex_balances()
+
+    journal = bank.journal
+    if journal is not None:
+        timestamp = time.time()
+        for account, posting in zip(accounts, postings):
+            if posting and account in journal.slots:
+                journal.accrual(journal.slots[account], posting, timestamp)
+        for store_slot, posting in enumerate(store_postings):
+            if posting and store_slot in journal.store_slots:
+                journal.accrual(journal.store_slots[store_slot], posting, timestamp)
+
+    interest = 0 if bank.cents else 0.0
+    charges = 0 if bank.cents else 0.0
+    for column in (postings, store_postings):
+        for posting in column:
+            if posting > 0:
+                interest += posting
+            elif posting < 0:
+                charges -= posting
+    accrued = len(postings)
+    if store is not None:
+        accrued += sum(1 for code in store.type_codes if code in (SAVINGS, CREDIT))
+    return {
+        "start": start,
+        "end": end,
+        "fraction": fraction,
+        "accounts": accrued,
+        "interest": interest,
+        "charges": charges,
+    }
@@ -0,0 +1,560 @@
+"""
+bank.journal
+~~~~~~~~~~~~
+This module contains an append-only, write-ahead transaction journal.
+"""
+
+from .account_holder import AccountHolder
+from .accounts import CheckingAccount, SavingsAccount, CreditAccount
+from .cards import Card
+from .ledger import CheckingAccountView, SavingsAccountView
+from .status import (
+    ACCOUNT,
+    ACCRUAL,
+    BILLING,
+    CARD,
+    CLOSE,
+    DEPOSIT,
+    FEE,
+    HOLDER,
+    LIMIT,
+    PIN,
+    REMOVE,
+    STATUS,
+    TRANSFER_CREDIT,
+    TRANSFER_DEBIT,
+    UNKNOWN,
+    WITHDRAW,
+    TransactionStatus,
+)
+import datetime, json, mmap, os, struct, threading, time
+
+# kind, result code, payload length, account slot, amount, timestamp, card number.
+RECORD = struct.Struct("<BBHIdd40s")
+RECORD_SIZE = RECORD.size
+NO_SLOT = 0xFFFFFFFF
+
+KINDS = {"withdraw": WITHDRAW, "deposit": DEPOSIT}
+
+
+class Journal:
+    """
+    Write-ahead journal of fixed-width binary records. Transactions are one
+    record each, definitions of account holders, accounts and cards, and
+    changes to them (account status, withdrawal limit, closed accounts,
+    removed holders, card PINs and billing cycles) are a header record followed by ceil(n / RECORD_SIZE)
+    raw records holding a JSON payload of n bytes. Records are buffered and written + fsync'd as a group.
+    :param path: File the journal is appended to.
+    :param group_size: Records to buffer before a group commit.
+    :param group_interval: Max seconds a record waits in the buffer, checked on append.
+    """
+
+    def __init__(self, path: str, group_size: int = 512, group_interval: float = 0.05):
+        self.path = path
+        self.group_size = group_size
+        self.group_interval = group_interval
+        self.file = open(path, "ab")
+        self.records = self.file.tell() // RECORD_SIZE
+        if self.file.tell() % RECORD_SIZE:
+            # Drop a torn record from a crash mid write.
+            self.file.truncate(self.records * RECORD_SIZE)
+            self.file.seek(0, os.SEEK_END)
+        self.slots = {}
+        self.accounts = []
+        # Journal slot of each LedgerStore slot, for accounts that are views.
+        self.store_slots = {}
+        # Holder id owning each slot, for slots whose holder is still in a snapshot.
+        self.slot_holders = []
+        # Set while replaying or restoring, definitions are then not appended.
+        self.suspended = False
+        self._buffer = []
+        self._buffered_at = None
+        self._lock = threading.RLock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _append(self, record: bytes, count: int = 1):
+        with self._lock:
+            if not self._buffer:
+                self._buffered_at = time.monotonic()
+            self._buffer.append(record)
+            self.records += count
+            if (
+                len(self._buffer) >= self.group_size
+                or time.monotonic() - self._buffered_at >= self.group_interval
+            ):
+                self.commit()
+
+    def commit(self):
+        """
+        Group commit, write all buffered records and fsync them.
+        """
+        with self._lock:
+            if self._buffer:
+                self.file.write(b"".join(self._buffer))
+                self._buffer.clear()
+                self.file.flush()
+                os.fsync(self.file.fileno())
+
+    def close(self):
+        self.commit()
+        self.file.close()
+
+    def transaction(
+        self, kind: int, result: int, account, amount, timestamp, card_number=""
+    ):
+        """
+        Append a transaction record.
+        :param kind: WITHDRAW, DEPOSIT, ACCRUAL, FEE or UNKNOWN.
+        :param result: TransactionStatus of the transaction.
+        :param account: Account the transaction was made against, or None.
+        :param amount: Transaction amount.
+        :param timestamp: Time of the transaction.
+        :param card_number: Card number that made the transaction.
+        """
+        self._append(
+            RECORD.pack(
+                kind,
+                result,
+                0,
+                self.slots.get(account, NO_SLOT),
+                amount,
+                timestamp,
+                card_number.encode()[:40],
+            )
+        )
+
+    def transfer(self, result: int, source, target, amount, timestamp):
+        """
+        Append a transfer, the debit and credit records are appended together
+        and replayed only as a pair. A declined transfer is only a debit record.
+        :param result: TransactionStatus of the transfer.
+        :param source: Account debited.
+        :param target: Account credited.
+        """
+        debit = RECORD.pack(
+            TRANSFER_DEBIT,
+            result,
+            0,
+            self.slots.get(source, NO_SLOT),
+            amount,
+            timestamp,
+            b"",
+        )
+        if result != TransactionStatus.OK:
+            self._append(debit)
+            return
+        credit = RECORD.pack(
+            TRANSFER_CREDIT,
+            result,
+            0,
+            self.slots.get(target, NO_SLOT),
+            amount,
+            timestamp,
+            b"",
+        )
+        self._append(debit + credit, 2)
+
+    def accrual(self, slot: int, amount, timestamp):
+        """
+        Append an interest/APR posting for a journal slot.
+        """
+        self._append(
+            RECORD.pack(ACCRUAL, TransactionStatus.OK, 0, slot, amount, timestamp, b"")
+        )
+
+    def _define(self, kind: int, payload: dict):
+        data = json.dumps(payload, separators=(",", ":")).encode()
+        count = -(-len(data) // RECORD_SIZE)
+        header = RECORD.pack(kind, 0, len(data), 0, 0.0, time.time(), b"")
+        self._append(header + data.ljust(count * RECORD_SIZE, b"\0"), count + 1)
+
+    def define_holder(self, holder):
+        """
+        Append the definition of an account holder.
+        """
+        if self.suspended:
+            return
+        self._define(
+            HOLDER,
+            {
+                "id": holder.accountholder_id,
+                "first_name": holder.first_name,
+                "last_name": holder.last_name,
+            },
+        )
+
+    def define_account(self, holder_accounts, kind: str, account):
+        """
+        Append the definition of an account and assign it the next dense slot.
+        :param holder_accounts: Accounts() class the account was registered into.
+        :param kind: Registry the account was registered into (checking, savings, credit).
+        :param account: Account (or AccountView) object.
+        """
+        with self._lock:
+            if self.suspended or account in self.slots:
+                return
+            slot = len(self.accounts)
+            self.bind(slot, account)
+        self._define(
+            ACCOUNT,
+            {
+                "slot": slot,
+                "holder": holder_accounts.accountholder_id,
+                "kind": kind,
+                "view": hasattr(account, "_slot"),
+                "account_id": account.account_id,
+                "account_type": account.account_type,
+                "accountholder_id": account.accountholder_id,
+                "balance": account.balance,
+                "open_date": account.open_date.toordinal(),
+                "status": account.status,
+                "withdrawal_limit": account.withdrawal_limit,
+                "interest_rate": getattr(account, "interest_rate", None),
+                "apr_rate": getattr(account, "apr_rate", None),
+                "credit_limit": account.credit_limit,
+                "billing": account._billing_state()
+                if hasattr(account, "_billing_state")
+                else None,
+            },
+        )
+
+    def define_card(self, card):
+        """
+        Append the definition of a card issued against a journaled account.
+        """
+        slot = self.slots.get(card.account)
+        if self.suspended or slot is None:
+            return
+        self._define(
+            CARD,
+            {
+                "holder": card.account_holder.accountholder_id,
+                "slot": slot,
+                "first_name": card.holder_firstname,
+                "last_name": card.holder_lastname,
+                "card_number": card.card_number,
+                "pin": card._Card__pin,
+                "expiry_date": card.expiry_date,
+                "cvv": card.cvv,
+                "status": card.status,
+            },
+        )
+
+    def status_changed(self, account, status: str):
+        """
+        Append the new status of a journaled account.
+        """
+        slot = self.slots.get(account)
+        if self.suspended or slot is None:
+            return
+        self._define(STATUS, {"slot": slot, "status": status})
+
+    def limit_changed(self, account, withdrawal_limit):
+        """
+        Append the new withdrawal limit of a journaled account.
+        """
+        slot = self.slots.get(account)
+        if self.suspended or slot is None:
+            return
+        self._define(LIMIT, {"slot": slot, "withdrawal_limit": withdrawal_limit})
+
+    def close_account(self, account):
+        """
+        Append the removal of a journaled account from its holder.
+        """
+        slot = self.slots.get(account)
+        if self.suspended or slot is None:
+            return
+        self._define(CLOSE, {"slot": slot})
+
+    def remove_holder(self, holder):
+        """
+        Append the removal of an account holder from the bank.
+        """
+        if self.suspended:
+            return
+        self._define(REMOVE, {"id": holder.accountholder_id})
+
+    def billing_changed(self, account):
+        """
+        Append the billing cycle of a journaled credit account, after its
+        statement closed or a late fee was charged.
+        """
+        slot = self.slots.get(account)
+        if self.suspended or slot is None:
+            return
+        self._define(BILLING, {"slot": slot, "billing": account._billing_state()})
+
+    def pin_changed(self, card):
+        """
+        Append the new stored PIN (e.g. its hash) of a journaled card.
+        """
+        if self.suspended or card.account not in self.slots:
+            return
+        self._define(
+            PIN,
+            {
+                "holder": card.account_holder.accountholder_id,
+                "card_number": card.card_number,
+                "pin": card._Card__pin,
+            },
+        )
+
+    def bind(self, slot: int, account):
+        """
+        Bind an existing account to a journal slot without appending a record,
+        used when accounts are restored from a snapshot or replayed.
+        """
+        if slot >= len(self.accounts):
+            self.accounts.extend([None] * (slot + 1 - len(self.accounts)))
+        self.accounts[slot] = account
+        self.slots[account] = slot
+        if hasattr(account, "_slot"):
+            self.store_slots[account._slot] = slot
+
+    def replay(self, bank=None, start: int = 0):
+        """
+        Rebuild a Bank from the journal through mmap, then attach the journal
+        to it so new transactions keep being appended.
+        Returns the Bank and sets replay stats on the journal
+        (replayed_records, replay_seconds).
+        :param bank: Bank object to rebuild into, a new Bank by default. Pass
+            Bank(ledger=LedgerStore()) if the journal holds AccountView accounts.
+        :param start: Record to start from, non zero when replaying the tail of
+            the journal over a snapshot (see Bank.load()).
+        """
+        from .banks import Bank
+
+        began = time.perf_counter()
+        self.commit()
+        bank = bank if bank is not None else Bank()
+        if not start:
+            self.slots = {}
+            self.accounts = []
+            self.store_slots = {}
+        bank.journal = self
+        self.suspended = True
+        size = self.records * RECORD_SIZE
+        try:
+            if size > start * RECORD_SIZE:
+                with open(self.path, "rb") as f, mmap.mmap(
+                    f.fileno(), 0, access=mmap.ACCESS_READ
+                ) as mm:
+                    view = memoryview(mm)[:size]
+                    try:
+                        self._replay(bank, view, start)
+                    finally:
+                        view.release()
+        finally:
+            self.suspended = False
+        self.replayed_records = self.records - start
+        self.replay_seconds = time.perf_counter() - began
+        return bank
+
+    def _account(self, bank, slot: int):
+        """
+        Account bound to a slot, faulting its holder in from a snapshot if needed.
+        """
+        account = self.accounts[slot] if slot < len(self.accounts) else None
+        if (
+            account is None
+            and slot < len(self.slot_holders)
+            and self.slot_holders[slot] is not None
+        ):
+            bank.account_holders.get(self.slot_holders[slot])
+            account = self.accounts[slot]
+        return account
+
+    def _replay(self, bank, view: memoryview, start: int):
+        balances = {}
+        # Credits since each slot's last billing record, payments if it's a credit account.
+        payments = {}
+        skip = 0
+        # Debit record of a transfer waiting for its credit record.
+        debit = None
+        ok = TransactionStatus.OK
+        # Amounts are stored as doubles, exact for cents up to 2 ** 53.
+        cents = bank.cents
+        for index, (kind, result, length, slot, amount, _, _) in enumerate(
+            RECORD.iter_unpack(view[start * RECORD_SIZE :]), start
+        ):
+            if skip:
+                skip -= 1
+            elif kind == TRANSFER_DEBIT or kind == TRANSFER_CREDIT:
+                if result != ok:
+                    continue
+                if cents:
+                    amount = int(amount)
+                if kind == TRANSFER_DEBIT:
+                    debit = (slot, amount)
+                    continue
+                if debit is None or debit[1] != amount:
+                    continue
+                for posted_slot, posting in ((debit[0], -amount), (slot, amount)):
+                    balance = balances.get(posted_slot)
+                    if balance is None:
+                        account = self._account(bank, posted_slot)
+                        if account is None:
+                            continue
+                        balance = account.balance
+                    balances[posted_slot] = balance + posting
+                payments[slot] = payments.get(slot, 0) + amount
+                debit = None
+            elif kind <= ACCRUAL or kind == FEE:
+                if result != ok or kind == UNKNOWN:
+                    continue
+                if cents:
+                    amount = int(amount)
+                balance = balances.get(slot)
+                if balance is None:
+                    account = self._account(bank, slot)
+                    if account is None:
+                        continue
+                    balance = account.balance
+                balances[slot] = balance - amount if kind == WITHDRAW else balance + amount
+                if kind == DEPOSIT:
+                    payments[slot] = payments.get(slot, 0) + amount
+            else:
+                skip = -(-length // RECORD_SIZE)
+                offset = (index + 1) * RECORD_SIZE
+                payload = json.loads(bytes(view[offset : offset + length]))
+                if kind == HOLDER:
+                    AccountHolder(
+                        bank, payload["id"], payload["first_name"], payload["last_name"]
+                    )
+                elif kind == ACCOUNT:
+                    account = restore_account(
+                        bank.account_holders[payload["holder"]].accounts,
+                        payload["kind"],
+                        payload["view"],
+                        payload["account_id"],
+                        payload["account_type"],
+                        payload["accountholder_id"],
+                        payload["balance"],
+                        payload["open_date"],
+                        payload["status"],
+                        payload["withdrawal_limit"],
+                        payload["interest_rate"],
+                        payload["apr_rate"],
+                        payload["credit_limit"],
+                        payload.get("billing"),
+                    )
+                    self.bind(payload["slot"], account)
+                    balances[payload["slot"]] = account.balance
+                elif kind == CARD:
+                    Card(
+                        bank.account_holders[payload["holder"]],
+                        self._account(bank, payload["slot"]),
+                        payload["first_name"],
+                        payload["last_name"],
+                        payload["card_number"],
+                        payload["pin"],
+                        payload["expiry_date"],
+                        payload["cvv"],
+                        payload["status"],
+                    )
+                elif kind == STATUS:
+                    self._account(bank, payload["slot"]).status = payload["status"]
+                elif kind == LIMIT:
+                    account = self._account(bank, payload["slot"])
+                    account.withdrawal_limit = payload["withdrawal_limit"]
+                elif kind == CLOSE:
+                    account = self._account(bank, payload["slot"])
+                    holder_accounts = account._ledger
+                    if holder_accounts is not None:
+                        registry = (
+                            holder_accounts.checking_accounts
+                            if account._ledger_kind == "checking"
+                            else holder_accounts.saving_accounts
+                            if account._ledger_kind == "savings"
+                            else holder_accounts.credit_accounts
+                        )
+                        if registry.get(account.account_id) is account:
+                            del registry[account.account_id]
+                elif kind == REMOVE:
+                    bank.account_holders.pop(payload["id"], None)
+                elif kind == BILLING:
+                    slot = payload["slot"]
+                    restore_billing(self._account(bank, slot), payload["billing"])
+                    payments.pop(slot, None)
+                elif kind == PIN:
+                    card = bank.account_holders[payload["holder"]].cards[payload["card_number"]]
+                    card._Card__pin = payload["pin"]
+        for slot, balance in balances.items():
+            account = self.accounts[slot]
+            if account.balance != balance:
+                account._set_balance(balance)
+        for slot, paid in payments.items():
+            account = self.accounts[slot] if slot < len(self.accounts) else None
+            if hasattr(account, "paid"):
+                account.paid += paid
+
+
+def restore_account(
+    holder_accounts,
+    kind: str,
+    view: bool,
+    account_id,
+    account_type: str,
+    accountholder_id,
+    balance,
+    open_date: int,
+    status: str,
+    withdrawal_limit,
+    interest_rate=None,
+    apr_rate=None,
+    credit_limit=0,
+    billing=None,
+):
+    """
+    Re-create a journaled or snapshotted account and register it with its holder.
+    :param holder_accounts: Accounts() class to register the account into.
+    :param kind: Registry of the account (checking, savings, credit).
+    :param view: Whether the account is a LedgerStore AccountView.
+    :param open_date: Ordinal of the date the account was opened.
+    :param billing: CreditAccount._billing_state() of a credit account, its
+        cycle starts afresh if None.
+    """
+    args = (
+        account_id,
+        account_type,
+        holder_accounts,
+        accountholder_id,
+        balance if balance >= 0 else 0,
+        datetime.date.fromordinal(open_date),
+        status,
+    )
+    if kind == "checking":
+        account = (CheckingAccountView if view else CheckingAccount)(*args)
+    elif kind == "savings":
+        account = (SavingsAccountView if view else SavingsAccount)(
+            *args, interest_rate=interest_rate
+        )
+    else:
+        account = CreditAccount(*args, apr_rate=apr_rate, credit_limit=credit_limit)
+        restore_billing(account, billing)
+    account.withdrawal_limit = withdrawal_limit
+    if account.balance != balance:
+        account._set_balance(balance)
+    return account
+
+
+def restore_billing(account, billing):
+    """
+    Set a credit account's billing cycle from a CreditAccount._billing_state()
+    tuple (or list, from JSON) and reschedule it with the bank's billing.
+    """
+    if not billing or billing[0] is None:
+        return
+    bank = account._ledger._bank if account._ledger is not None else None
+    scheduler = bank.billing if bank is not None else None
+    if scheduler is not None:
+        scheduler.remove(account)
+    account._restore_billing(billing)
+    if scheduler is not None:
+        scheduler.add(account)
@@ -0,0 +1,336 @@
+"""
+bank.ledger
+~~~~~~~~~~~
+This module contains an optional columnar storage engine for accounts.
+"""
+
+from array import array
+from .accounts import Account
+from .money import check_cents, to_cents, WITHDRAWAL_LIMIT
+import datetime
+
+ACCOUNT_TYPES = ("checking", "savings", "credit")
+
+
+class LedgerStore:
+    """
+    Columnar store that keeps account fields in contiguous typed arrays indexed
+    by a dense integer slot, instead of one instance __dict__ per account.
+    Accounts backed by the store are lightweight AccountView objects.
+    :param cents: Store balances and limits as 64-bit integer cents, for a Bank in cents mode.
+    """
+
+    def __init__(self, cents: bool = False):
+        self.cents = cents
+        self.balances = array("q" if cents else "d")
+        self.withdrawal_limits = array("q" if cents else "d")
+        self.rates = array("d")
+        self.open_dates = array("i")
+        self.status_codes = array("B")
+        self.type_codes = array("B")
+        # Account type bucket of the Accounts() totals the slot is registered in, -1 if none.
+        self.ledger_codes = array("b")
+        self.account_ids = []
+        self.accountholder_ids = []
+        self.holder_accounts = []
+        self.ledgers = []
+        # Only accounts that actually have cards get a linked_cards dict.
+        self.linked_cards = {}
+        self.status_names = []
+        self._status_lookup = {}
+
+    def __len__(self):
+        return len(self.balances)
+
+    def status_code(self, status: str) -> int:
+        """
+        Small integer code for a status string, new statuses are added on first use.
+        :param status: Status of an account (open, closed, locked etc.).
+        """
+        code = self._status_lookup.get(status)
+        if code is None:
+            code = self._status_lookup[status] = len(self.status_names)
+            self.status_names.append(status)
+        return code
+
+    def allocate(
+        self,
+        account_id,
+        account_type: str,
+        holder_accounts,
+        accountholder_id,
+        opening_balance,
+        open_date: datetime.date,
+        status: str,
+        rate: float = 0.0,
+        withdrawal_limit=None,
+    ) -> int:
+        """
+        Append a new account to the store and return its slot.
+        """
+        if withdrawal_limit is None:
+            withdrawal_limit = (
+                to_cents(WITHDRAWAL_LIMIT) if self.cents else WITHDRAWAL_LIMIT
+            )
+        slot = len(self.balances)
+        self.balances.append(opening_balance)
+        self.withdrawal_limits.append(withdrawal_limit)
+        self.rates.append(rate)
+        self.open_dates.append(open_date.toordinal())
+        self.status_codes.append(self.status_code(status))
+        self.type_codes.append(ACCOUNT_TYPES.index(account_type))
+        self.ledger_codes.append(-1)
+        self.account_ids.append(account_id)
+        self.accountholder_ids.append(accountholder_id)
+        self.holder_accounts.append(holder_accounts)
+        self.ledgers.append(None)
+        return slot
+
+    def nbytes(self) -> int:
+        """
+        Bytes held by the typed array and list columns (not the objects they reference).
+        """
+        total = 0
+        for column in (
+            self.balances,
+            self.withdrawal_limits,
+            self.rates,
+            self.open_dates,
+            self.status_codes,
+            self.type_codes,
+            self.ledger_codes,
+        ):
+            total += column.buffer_info()[1] * column.itemsize
+        for column in (
+            self.account_ids,
+            self.accountholder_ids,
+            self.holder_accounts,
+            self.ledgers,
+        ):
+            total += len(column) * 8
+        return total
+
+
+class AccountView:
+    """
+    Base class for accounts stored in a LedgerStore, a view over one slot.
+    Offers the same attributes and withdraw/deposit behaviour as Account.
+    :param account_id: Unique ID associated with the account.
+    :param account_type: Type of account (savings, checkings, credit).
+    :param holder_accounts: An AccountHolder.Accounts() class, its bank must have a ledger.
+    :param accountholder_id: Unique ID of the account holder.
+    :param opening_balance: When account is created the opening amount of $.
+    :param open_date: Date the account was opened.
+    :param status: Status of the account (open, closed, locked).
+    """
+
+    __slots__ = ("_store", "_slot")
+    _account_type = "checking"
+    credit_limit = 0
+
+    def __init__(
+        self,
+        account_id,
+        account_type: str,
+        holder_accounts,
+        accountholder_id: str,
+        opening_balance=0,
+        open_date=None,
+        status: str = "open",
+        rate: float = 0.0,
+    ):
+        store = holder_accounts.holder.bank.ledger
+        if store is None:
+            raise ValueError("AccountView requires a Bank created with a LedgerStore.")
+        if store.cents:
+            check_cents(opening_balance)
+        self._store = store
+        self._slot = store.allocate(
+            account_id,
+            self._account_type,
+            holder_accounts,
+            accountholder_id,
+            opening_balance if opening_balance >= 0 else 0,
+            open_date or datetime.date.today(),
+            status,
+            rate,
+        )
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.account_id!r}, slot={self._slot})"
+
+    withdraw = Account.withdraw
+    deposit = Account.deposit
+    try_withdraw = Account.try_withdraw
+    try_deposit = Account.try_deposit
+
+    @property
+    def slot(self) -> int:
+        return self._slot
+
+    @property
+    def cents(self) -> bool:
+        return self._store.cents
+
+    @property
+    def account_id(self):
+        return self._store.account_ids[self._slot]
+
+    @property
+    def account_type(self) -> str:
+        return ACCOUNT_TYPES[self._store.type_codes[self._slot]]
+
+    @property
+    def holder_accounts(self):
+        return self._store.holder_accounts[self._slot]
+
+    @property
+    def accountholder_id(self):
+        return self._store.accountholder_ids[self._slot]
+
+    @property
+    def open_date(self) -> datetime.date:
+        return datetime.date.fromordinal(self._store.open_dates[self._slot])
+
+    @property
+    def status(self) -> str:
+        return self._store.status_names[self._store.status_codes[self._slot]]
+
+    @status.setter
+    def status(self, value: str):
+        ledger = self._store.ledgers[self._slot]
+        if ledger is not None and ledger._bank is not None:
+            ledger._bank._account_status_changed(self, self.status, value)
+        self._store.status_codes[self._slot] = self._store.status_code(value)
+
+    @property
+    def withdrawal_limit(self):
+        return self._store.withdrawal_limits[self._slot]
+
+    @withdrawal_limit.setter
+    def withdrawal_limit(self, value):
+        ledger = self._store.ledgers[self._slot]
+        if ledger is not None and ledger._bank is not None:
+            ledger._bank._account_limit_changed(self, value)
+        self._store.withdrawal_limits[self._slot] = value
+
+    @property
+    def linked_cards(self) -> dict:
+        cards = self._store.linked_cards.get(self._slot)
+        if cards is None:
+            cards = self._store.linked_cards[self._slot] = {}
+        return cards
+
+    @property
+    def _ledger(self):
+        return self._store.ledgers[self._slot]
+
+    @_ledger.setter
+    def _ledger(self, value):
+        self._store.ledgers[self._slot] = value
+
+    @property
+    def _ledger_kind(self):
+        code = self._store.ledger_codes[self._slot]
+        return ACCOUNT_TYPES[code] if code >= 0 else None
+
+    @_ledger_kind.setter
+    def _ledger_kind(self, value):
+        self._store.ledger_codes[self._slot] = (
+            ACCOUNT_TYPES.index(value) if value is not None else -1
+        )
+
+    @property
+    def balance(self):
+        return self._store.balances[self._slot]
+
+    @balance.setter
+    def balance(self, value):
+        self._set_balance(value)
+
+    def _post(self, amount):
+        store = self._store
+        slot = self._slot
+        store.balances[slot] += amount
+        ledger = store.ledgers[slot]
+        if ledger is not None:
+            ledger._apply_delta(ACCOUNT_TYPES[store.ledger_codes[slot]], amount, self)
+
+    def _set_balance(self, value):
+        store = self._store
+        slot = self._slot
+        amount = value - store.balances[slot]
+        store.balances[slot] = value
+        ledger = store.ledgers[slot]
+        if ledger is not None:
+            ledger._apply_delta(ACCOUNT_TYPES[store.ledger_codes[slot]], amount, self)
+
+
+class CheckingAccountView(AccountView):
+    """
+    Checking account stored in a LedgerStore, takes the same arguments as CheckingAccount.
+    """
+
+    __slots__ = ()
+    _account_type = "checking"
+
+    def __init__(
+        self,
+        account_id,
+        account_type: str,
+        holder_accounts,
+        accountholder_id: str,
+        opening_balance=0,
+        open_date=None,
+        status: str = "open",
+    ):
+        super().__init__(
+            account_id,
+            account_type,
+            holder_accounts,
+            accountholder_id,
+            opening_balance,
+            open_date,
+            status,
+        )
+        holder_accounts.checking_accounts[account_id] = self
+
+
+class SavingsAccountView(AccountView):
+    """
+    Savings account stored in a LedgerStore, takes the same arguments as SavingsAccount.
+    """
+
+    __slots__ = ()
+    _account_type = "savings"
+
+    def __init__(
+        self,
+        account_id,
+        account_type: str,
+        holder_accounts,
+        accountholder_id: str,
+        opening_balance=0,
+        open_date=None,
+        status: str = "open",
+        interest_rate=0.001,
+    ):
+        super().__init__(
+            account_id,
+            account_type,
+            holder_accounts,
+            accountholder_id,
+            opening_balance,
+            open_date,
+            status,
+            interest_rate,
+        )
+        holder_accounts.saving_accounts[account_id] = self
+
+    @property
+    def interest_rate(self) -> float:
+        return self._store.rates[self._slot]
+
+    @interest_rate.setter
+    def interest_rate(self, value: float):
+        self._store.rates[self._slot] = value
@@ -0,0 +1,319 @@
+"""
+bank.metrics
+~~~~~~~~~~~~
+This module contains code for instrumenting card transactions and exporting metrics.
+"""
+
+from heapq import nlargest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import os, threading
+
+# Stages of a card transaction that are timed, see Bank._measured_transaction().
+STAGES = (
+    "card_lookup",  # Card index lookup.
+    "holder_lookup",  # Slow path for cards missing from the index.
+    "account",  # Account.withdraw()/deposit() checks and posting, approved.
+    "account_declined",  # Same but declined, includes raising and catching.
+    "journal",  # Appending the transaction to the journal.
+    "total",
+)
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+class LatencyHistogram:
+    """
+    HDR style histogram of latencies in nanoseconds. Buckets are exact below
+    2 ** sub_bits ns and log-linear above, 2 ** (sub_bits - 1) buckets per
+    power of two, so any recorded value is reported within 1 / 2 ** (sub_bits - 1)
+    of itself with constant memory and O(1) recording.
+    :param sub_bits: Precision, 5 keeps values within ~6%.
+    :param max_bits: Values from 2 ** max_bits ns (~18 minutes at 40) land in the last bucket.
+    """
+
+    __slots__ = ("sub_bits", "half", "counts", "count", "total", "min", "max")
+
+    def __init__(self, sub_bits: int = 5, max_bits: int = 40):
+        self.sub_bits = sub_bits
+        self.half = 1 << (sub_bits - 1)
+        self.counts = [0] * self._index(2 ** max_bits)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def _index(self, ns: int) -> int:
+        shift = ns.bit_length() - self.sub_bits
+        if shift <= 0:
+            return ns
+        # ns >> shift keeps the top sub_bits bits, the leading one of which
+        # is always set, so each shift adds half as many buckets.
+        return shift * self.half + (ns >> shift)
+
+    def _upper(self, index: int) -> int:
+        """
+        Largest value (ns) that lands in a bucket.
+        """
+        sub_count = 1 << self.sub_bits
+        if index < sub_count:
+            return index
+        half = sub_count >> 1
+        shift = (index - sub_count) // half + 1
+        return (((index - sub_count) % half + half + 1) << shift) - 1
+
+    def record(self, seconds: float):
+        ns = int(seconds * 1e9)
+        if ns < 0:
+            ns = 0
+        shift = ns.bit_length() - self.sub_bits
+        index = shift * self.half + (ns >> shift) if shift > 0 else ns
+        counts = self.counts
+        if index >= len(counts):
+            index = len(counts) - 1
+        counts[index] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+        if self.min is None or ns < self.min:
+            self.min = ns
+
+    def percentile(self, q: float) -> float:
+        """
+        Latency in seconds at or below which a fraction q of the values fall.
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, int(q * self.count + 0.5))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self._upper(index), self.max) / 1e9
+        return self.max / 1e9
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.total / 1e9,
+            "min": (self.min or 0) / 1e9,
+            "max": self.max / 1e9,
+            **{f"p{q * 100:g}": self.percentile(q) for q in QUANTILES},
+        }
+
+
+def _label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    """
+    Metrics of a Bank's card transactions, collected while set as bank.metrics
+    (Bank(metrics=Metrics())) and switched off by setting it back to None,
+    which leaves one attribute check on the transaction path. Keeps a latency
+    histogram per stage and transaction kind, counts of transactions per
+    outcome, declines per reason (the exception type) and transactions per
+    account for finding hot spots. Counts are taken under a lock which exports
+    also copy them under, latency recordings aren't locked, with a concurrent
+    bank an occasional one can be lost.
+    Accounts are counted with the space-saving algorithm: at most tracked_accounts
+    are kept, a new account replaces the least counted one and inherits its
+    count, so the busiest accounts are found in constant memory and a count
+    is over by at most the count it inherited.
+    :param namespace: Prefix of the exported metric names.
+    :param hot_spots: Number of busiest accounts exported.
+    :param tracked_accounts: Accounts counted at once, defaults to 10 * hot_spots.
+    """
+
+    def __init__(self, namespace: str = "bank", hot_spots: int = 10, tracked_accounts: int = None):
+        self.namespace = namespace
+        self.hot_spot_count = hot_spots
+        self.tracked_accounts = tracked_accounts or 10 * hot_spots
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Clear every metric.
+        """
+        with self._lock:
+            self._reset()
+
+    def _reset(self):
+        # (stage, kind) -> LatencyHistogram
+        self.histograms = {}
+        # kind -> {stage: LatencyHistogram}, the same histograms by kind.
+        self._stages = {}
+        # (kind, outcome) -> count
+        self.transactions = {}
+        # (kind, reason) -> count
+        self.declines = {}
+        # (accountholder_id, account_id) -> number of transactions, see transaction().
+        self.accounts = {}
+
+    def stages(self, kind: str) -> dict:
+        """
+        The latency histograms of every stage of a transaction kind, {stage: LatencyHistogram}.
+        """
+        stages = self._stages.get(kind)
+        if stages is None:
+            with self._lock:
+                stages = {}
+                for stage in STAGES:
+                    histogram = self.histograms.get((stage, kind))
+                    if histogram is None:
+                        histogram = self.histograms[stage, kind] = LatencyHistogram()
+                    stages[stage] = histogram
+                self._stages[kind] = stages
+        return stages
+
+    def observe(self, stage: str, kind: str, seconds: float):
+        """
+        Record the latency of a stage of a transaction.
+        """
+        self.stages(kind)[stage].record(seconds)
+
+    def transaction(self, kind: str, account, error: Exception = None):
+        """
+        Count a transaction, its decline reason and the account it hit.
+        :param kind: withdraw or deposit.
+        :param account: Account the transaction was made against, None if not found.
+        :param error: Exception the transaction was declined with, None if approved.
+        """
+        key = (kind, "approved" if error is None else "declined")
+        with self._lock:
+            self.transactions[key] = self.transactions.get(key, 0) + 1
+            if error is not None:
+                key = (kind, type(error).__name__)
+                self.declines[key] = self.declines.get(key, 0) + 1
+            if account is not None:
+                accounts = self.accounts
+                key = (account.holder_accounts.accountholder_id, account.account_id)
+                count = accounts.get(key)
+                if count is not None:
+                    accounts[key] = count + 1
+                elif len(accounts) < self.tracked_accounts:
+                    accounts[key] = 1
+                else:
+                    least = min(accounts, key=accounts.__getitem__)
+                    accounts[key] = accounts.pop(least) + 1
+
+    def hot_spots(self, n: int = None) -> list:
+        """
+        The n accounts with the most transactions, as
+        [((accountholder_id, account_id), count), ...].
+        """
+        with self._lock:
+            accounts = list(self.accounts.items())
+        return nlargest(n or self.hot_spot_count, accounts, key=lambda item: item[1])
+
+    def _copy(self) -> tuple:
+        """
+        The histograms, transactions and declines copied under the lock.
+        """
+        with self._lock:
+            return (
+                list(self.histograms.items()),
+                list(self.transactions.items()),
+                list(self.declines.items()),
+            )
+
+    def snapshot(self) -> dict:
+        """
+        Plain dict of every metric.
+        """
+        histograms, transactions, declines = self._copy()
+        return {
+            "stages": {
+                f"{stage}:{kind}": histogram.summary()
+                for (stage, kind), histogram in histograms
+                if histogram.count
+            },
+            "transactions": {
+                f"{kind}:{outcome}": count for (kind, outcome), count in transactions
+            },
+            "declines": {f"{kind}:{reason}": count for (kind, reason), count in declines},
+            "hot_spots": self.hot_spots(),
+        }
+
+    def prometheus(self) -> str:
+        """
+        Every metric in the Prometheus text exposition format.
+        """
+        ns = self.namespace
+        histograms, transactions, declines = self._copy()
+        lines = [
+            f"# HELP {ns}_stage_latency_seconds Latency of each stage of a card transaction.",
+            f"# TYPE {ns}_stage_latency_seconds summary",
+        ]
+        for (stage, kind), histogram in sorted(histograms, key=lambda item: item[0]):
+            if not histogram.count:
+                continue
+            labels = f'stage="{_label(stage)}",kind="{_label(kind)}"'
+            for q in QUANTILES:
+                lines.append(
+                    f'{ns}_stage_latency_seconds{{{labels},quantile="{q}"}} '
+                    f"{histogram.percentile(q):.9f}"
+                )
+            lines.append(
+                f"{ns}_stage_latency_seconds_sum{{{labels}}} {histogram.total / 1e9:.9f}"
+            )
+            lines.append(f"{ns}_stage_latency_seconds_count{{{labels}}} {histogram.count}")
+        lines += [
+            f"# HELP {ns}_transactions_total Card transactions by kind and outcome.",
+            f"# TYPE {ns}_transactions_total counter",
+        ]
+        for (kind, outcome), count in sorted(transactions):
+            lines.append(
+                f'{ns}_transactions_total{{kind="{_label(kind)}",outcome="{_label(outcome)}"}} {count}'
+            )
+        lines += [
+            f"# HELP {ns}_declines_total Declined card transactions by kind and reason.",
+            f"# TYPE {ns}_declines_total counter",
+        ]
+        for (kind, reason), count in sorted(declines):
+            lines.append(
+                f'{ns}_declines_total{{kind="{_label(kind)}",reason="{_label(reason)}"}} {count}'
+            )
+        lines += [
+            f"# HELP {ns}_hot_account_transactions Transactions of the busiest accounts.",
+            f"# TYPE {ns}_hot_account_transactions gauge",
+        ]
+        for (holder_id, account_id), count in self.hot_spots():
+            lines.append(
+                f'{ns}_hot_account_transactions{{accountholder_id="{_label(holder_id)}",'
+                f'account_id="{_label(account_id)}"}} {count}'
+            )
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """
+        Write prometheus() to a file, e.g. for the node exporter's textfile
+        collector. The file is replaced atomically so it's never read half written.
+        """
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(self.prometheus())
+        os.replace(tmp, path)
+
+    def serve(self, port: int = 0, host: str = "127.0.0.1") -> HTTPServer:
+        """
+        Serve prometheus() over HTTP from a daemon thread. Returns the server,
+        server.server_address has the bound port, server.shutdown() stops it.
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = HTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
@@ -0,0 +1,64 @@
+"""
+bank.money
+~~~~~~~~~~
+This module contains code for the optional integer cents money mode.
+"""
+
+from decimal import Decimal, ROUND_HALF_EVEN
+
+# Minor units (cents) per dollar.
+MINOR_UNITS = 100
+# Balances and amounts must fit a signed 64-bit integer, e.g. an array("q") column.
+MIN_CENTS = -(2 ** 63)
+MAX_CENTS = 2 ** 63 - 1
+# Default per transaction withdrawal limit in dollars.
+WITHDRAWAL_LIMIT = 5000
+# Default credit limit of a credit account in dollars.
+CREDIT_LIMIT = 5000
+
+
+def to_cents(amount) -> int:
+    """
+    Convert an amount of dollars to integer cents, rounding half to even.
+    :param amount: Dollars as an int, float, str or Decimal.
+    """
+    if amount.__class__ is int:
+        return amount * MINOR_UNITS
+    return int(
+        (Decimal(str(amount)) * MINOR_UNITS).quantize(Decimal(1), ROUND_HALF_EVEN)
+    )
+
+
+def from_cents(cents: int) -> Decimal:
+    """
+    Convert integer cents to an exact Decimal amount of dollars.
+    :param cents: Amount in cents.
+    """
+    return Decimal(cents).scaleb(-2)
+
+
+def format_amount(amount, cents: bool = False) -> str:
+    """
+    Format an amount for messages, cents are shown as dollars (123450 -> "1234.50")
+    and any other amount as it is.
+    :param amount: Amount in dollars, or in cents when cents is True.
+    :param cents: Whether the amount is in cents.
+    """
+    if cents:
+        return f"{from_cents(amount):.2f}"
+    return str(amount)
+
+
+def check_cents(amount) -> int:
+    """
+    Validate an amount given in cents mode, returns it unchanged.
+    Raises TypeError for anything but an int and OverflowError outside 64 bits.
+    :param amount: Amount in cents.
+    """
+    if amount.__class__ is not int:
+        raise TypeError(
+            f"Amounts are integer cents in cents mode, got {amount!r}, see money.to_cents()."
+        )
+    if not MIN_CENTS <= amount <= MAX_CENTS:
+        raise OverflowError(f"{amount} cents does not fit in 64 bits.")
+    return amount
@@ -0,0 +1,304 @@
+"""
+bank.onboarding
+~~~~~~~~~~~~~~~
+This module contains code for bulk loading account holders, accounts and cards.
+"""
+
+from .account_holder import AccountHolder
+from .accounts import (
+    Accounts,
+    AccountRegistry,
+    CheckingAccount,
+    CreditAccount,
+    SavingsAccount,
+)
+from .cards import Card
+from .money import check_cents, to_cents, CREDIT_LIMIT, WITHDRAWAL_LIMIT
+import datetime, gc
+
+ACCOUNT_CLASSES = {
+    "checking": CheckingAccount,
+    "savings": SavingsAccount,
+    "credit": CreditAccount,
+}
+# Rejected rows quoted in the error message, the rest are counted.
+MAX_REPORTED = 10
+
+
+def _columns(table: dict, name: str, required: tuple, optional: dict) -> tuple:
+    """
+    Check a columnar table and return its number of rows and its columns in
+    the order of required + optional, missing optional columns filled with
+    their default.
+    """
+    missing = [column for column in required if column not in table]
+    if missing:
+        raise ValueError(f"{name} is missing columns {missing}.")
+    n = len(table[required[0]])
+    columns = [table[column] for column in required]
+    for column, default in optional.items():
+        columns.append(table[column] if column in table else [default] * n)
+    if any(len(column) != n for column in columns):
+        raise ValueError(f"Columns of {name} must all have the same length.")
+    return n, columns
+
+
+def _registry(holder_accounts, kind: str) -> AccountRegistry:
+    registry = AccountRegistry.__new__(AccountRegistry)
+    registry.holder_accounts = holder_accounts
+    registry.kind = kind
+    return registry
+
+
+def _accounts(holder, accountholder_id: str) -> Accounts:
+    """
+    Same as Accounts(holder, accountholder_id) without the constructor calls.
+    """
+    accounts = Accounts.__new__(Accounts)
+    accounts.holder = holder
+    accounts.accountholder_id = accountholder_id
+    accounts._totals = {"checking": 0, "savings": 0, "credit": 0}
+    accounts._bank = None
+    accounts.checking_accounts = _registry(accounts, "checking")
+    accounts.saving_accounts = _registry(accounts, "savings")
+    accounts.credit_accounts = _registry(accounts, "credit")
+    accounts.issued_cards = {}
+    return accounts
+
+
+def bulk_load(bank, holders: dict, accounts: dict, cards: dict = None) -> dict:
+    """
+    Load account holders with their accounts and cards from columnar input,
+    all or nothing. Objects are built directly rather than through their
+    constructors, registries are filled without their per object bookkeeping
+    and the bank's dicts grow once per call. References (account -> holder,
+    card -> account) and uniqueness are checked in the same pass, any
+    problem raises ValueError before anything is registered with the bank.
+    :param bank: Bank object to load into.
+    :param holders: {"accountholder_id": [...], "first_name": [...], "last_name": [...]}
+    :param accounts: {"accountholder_id", "account_id", "kind"} columns, kind being
+        checking, savings or credit, and optionally "balance", "open_date", "status",
+        "withdrawal_limit", "interest_rate", "apr_rate" and "credit_limit".
+    :param cards: {"accountholder_id", "account_id", "card_number", "holder_firstname",
+        "holder_lastname", "pin", "expiry_date", "cvv"} columns and optionally "status".
+    """
+    # Everything allocated here stays alive, so cyclic collections triggered
+    # by the allocation count would only rescan the new objects over and over.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _bulk_load(bank, holders, accounts, cards)
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _bulk_load(bank, holders: dict, accounts: dict, cards: dict) -> dict:
+    cents = bank.cents
+    errors = []
+    n_holders, (holder_ids, first_names, last_names) = _columns(
+        holders, "holders", ("accountholder_id", "first_name", "last_name"), {}
+    )
+    n_accounts, account_columns = _columns(
+        accounts,
+        "accounts",
+        ("accountholder_id", "account_id", "kind"),
+        {
+            "balance": 0,
+            "open_date": datetime.date.today(),
+            "status": "open",
+            "withdrawal_limit": to_cents(WITHDRAWAL_LIMIT) if cents else WITHDRAWAL_LIMIT,
+            "interest_rate": 0.001,
+            "apr_rate": 0.15,
+            "credit_limit": to_cents(CREDIT_LIMIT) if cents else CREDIT_LIMIT,
+        },
+    )
+    card_fields = (
+        "accountholder_id",
+        "account_id",
+        "card_number",
+        "holder_firstname",
+        "holder_lastname",
+        "pin",
+        "expiry_date",
+        "cvv",
+    )
+    n_cards, card_columns = _columns(
+        cards if cards is not None else {column: [] for column in card_fields},
+        "cards",
+        card_fields,
+        {"status": "active"},
+    )
+
+    new_holders = {}
+    for row, accountholder_id in enumerate(holder_ids):
+        if accountholder_id in new_holders or accountholder_id in bank.account_holders:
+            errors.append(f"holders[{row}]: duplicate account holder {accountholder_id!r}")
+            continue
+        holder = AccountHolder.__new__(AccountHolder)
+        holder.bank = bank
+        holder.accountholder_id = accountholder_id
+        holder.first_name = first_names[row]
+        holder.last_name = last_names[row]
+        holder.accounts = _accounts(holder, accountholder_id)
+        holder.cards = holder.accounts.issued_cards
+        new_holders[accountholder_id] = holder
+
+    # (accountholder_id, account_id) -> Account, ids must be unique per holder.
+    new_accounts = {}
+    totals = {"checking": 0, "savings": 0, "credit": 0}
+    for row, (
+        accountholder_id,
+        account_id,
+        kind,
+        balance,
+        open_date,
+        status,
+        withdrawal_limit,
+        interest_rate,
+        apr_rate,
+        credit_limit,
+    ) in enumerate(zip(*account_columns)):
+        holder = new_holders.get(accountholder_id)
+        cls = ACCOUNT_CLASSES.get(kind)
+        if holder is None:
+            errors.append(f"accounts[{row}]: unknown account holder {accountholder_id!r}")
+            continue
+        if cls is None:
+            errors.append(f"accounts[{row}]: unknown account kind {kind!r}")
+            continue
+        key = (accountholder_id, account_id)
+        if key in new_accounts:
+            errors.append(f"accounts[{row}]: duplicate account {account_id!r}")
+            continue
+        if cents:
+            try:
+                check_cents(balance)
+                check_cents(withdrawal_limit)
+                check_cents(credit_limit)
+            except (TypeError, OverflowError) as e:
+                errors.append(f"accounts[{row}]: {e}")
+                continue
+        # As Account.__init__ clamps it.
+        balance = balance if balance >= 0 else 0
+        holder_accounts = holder.accounts
+        account = cls.__new__(cls)
+        account.account_id = account_id
+        account.account_type = kind
+        account.holder_accounts = holder_accounts
+        # As Account.__init__ sets it.
+        account.accountholder_id = account_id
+        account._ledger = holder_accounts
+        account._ledger_kind = kind
+        account._balance = balance
+        account.open_date = open_date
+        account._status = status
+        account.linked_cards = {}
+        account._withdrawal_limit = withdrawal_limit
+        account.cents = cents
+        if kind == "savings":
+            account.interest_rate = interest_rate
+        elif kind == "credit":
+            account.apr_rate = apr_rate
+            account.credit_limit = credit_limit
+            account._start_billing()
+        registry = (
+            holder_accounts.checking_accounts
+            if kind == "checking"
+            else holder_accounts.saving_accounts
+            if kind == "savings"
+            else holder_accounts.credit_accounts
+        )
+        dict.__setitem__(registry, account_id, account)
+        holder_accounts._totals[kind] += balance
+        totals[kind] += balance
+        new_accounts[key] = account
+
+    # Cards of holders in the backing store but not in memory aren't in the card index.
+    stored_cards = (
+        bank.working_set.store.existing_cards(card_columns[2])
+        if bank.working_set is not None
+        else ()
+    )
+    new_cards = {}
+    for row, (
+        accountholder_id,
+        account_id,
+        card_number,
+        holder_firstname,
+        holder_lastname,
+        pin,
+        expiry_date,
+        cvv,
+        status,
+    ) in enumerate(zip(*card_columns)):
+        account = new_accounts.get((accountholder_id, account_id))
+        if account is None:
+            errors.append(
+                f"cards[{row}]: unknown account {account_id!r} of {accountholder_id!r}"
+            )
+            continue
+        if (
+            card_number in new_cards
+            or card_number in bank.card_index
+            or card_number in stored_cards
+        ):
+            errors.append(f"cards[{row}]: duplicate card {card_number!r}")
+            continue
+        card = Card.__new__(Card)
+        card.account_holder = account.holder_accounts.holder
+        card.account = account
+        card.holder_firstname = holder_firstname
+        card.holder_lastname = holder_lastname
+        card.card_number = card_number
+        card._Card__pin = pin
+        card.expiry_date = expiry_date
+        card.cvv = cvv
+        card.status = status
+        account.linked_cards[card_number] = card
+        account.holder_accounts.issued_cards[card_number] = card
+        new_cards[card_number] = card
+
+    if errors:
+        shown = "; ".join(errors[:MAX_REPORTED])
+        more = len(errors) - MAX_REPORTED
+        raise ValueError(
+            f"bulk_load rejected {len(errors)} rows, nothing was loaded: {shown}"
+            + (f" (and {more} more)" if more > 0 else "")
+        )
+
+    with bank._all_locks():
+        for holder in new_holders.values():
+            holder.accounts._bank = bank
+        # One resize each rather than one per insert.
+        dict.update(bank.account_holders, new_holders)
+        bank.card_index.update(new_cards)
+        for kind, amount in totals.items():
+            bank._apply_delta(kind, amount)
+        if bank.indexes is not None:
+            for account in new_accounts.values():
+                bank.indexes.add(account)
+        if bank.billing is not None:
+            for account in new_accounts.values():
+                bank.billing.add(account)
+        journal = bank.journal
+        if journal is not None:
+            for holder in new_holders.values():
+                journal.define_holder(holder)
+                holder_accounts = holder.accounts
+                for kind, registry in (
+                    ("checking", holder_accounts.checking_accounts),
+                    ("savings", holder_accounts.saving_accounts),
+                    ("credit", holder_accounts.credit_accounts),
+                ):
+                    for account in registry.values():
+                        journal.define_account(holder_accounts, kind, account)
+                for card in holder.cards.values():
+                    journal.define_card(card)
+        if bank.persistence is not None:
+            for holder in new_holders.values():
+                bank.persistence.holder_changed(holder)
+        if bank.working_set is not None:
+            # Last, eviction drops holders from the card index and indexes.
+            bank.working_set.loaded(new_holders)
+    return {"holders": n_holders, "accounts": n_accounts, "cards": n_cards}
@@ -0,0 +1,440 @@
+"""
+bank.reconciliation
+~~~~~~~~~~~~~~~~~~~
+This module contains an end of day reconciliation of account balances against the journal.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from .journal import NO_SLOT, RECORD, RECORD_SIZE
+from .snapshot import KINDS
+from .status import (
+    ACCOUNT,
+    ACCRUAL,
+    FEE,
+    HOLDER,
+    TRANSFER_CREDIT,
+    TRANSFER_DEBIT,
+    UNKNOWN,
+    WITHDRAW,
+    TransactionStatus,
+)
+import json, mmap, os, pickle, time
+
+# History totals of a slot: withdrawals, withdrawn, deposits, deposited,
+# interest, transferred in, transferred out, declined, fees.
+HISTORY_FIELDS = (
+    "withdrawals",
+    "withdrawn",
+    "deposits",
+    "deposited",
+    "interest",
+    "transferred_in",
+    "transferred_out",
+    "declined",
+    "fees",
+)
+
+
+class ReconciliationReport:
+    """
+    Outcome of reconcile().
+    :param holders: Number of account holders reconciled.
+    :param accounts: Number of accounts reconciled.
+    :param mismatches: (accountholder_id, account_id) of every account whose
+        balance doesn't match its history, account_id is None when only the
+        holder's running total is off.
+    :param records: Journal records the history was recomputed from.
+    :param scan_seconds: Wall clock seconds spent recomputing the history.
+    :param statement_seconds: Wall clock seconds spent comparing and writing statements.
+    :param resumed_chunks: Chunks of holders done by an earlier run, skipped on resume.
+    """
+
+    def __init__(
+        self,
+        holders: int,
+        accounts: int,
+        mismatches: list,
+        records: int,
+        scan_seconds: float,
+        statement_seconds: float,
+        resumed_chunks: int = 0,
+    ):
+        self.holders = holders
+        self.accounts = accounts
+        self.mismatches = mismatches
+        self.records = records
+        self.scan_seconds = scan_seconds
+        self.statement_seconds = statement_seconds
+        self.resumed_chunks = resumed_chunks
+
+    def __repr__(self):
+        return (
+            f"ReconciliationReport(holders={self.holders}, accounts={self.accounts}, "
+            f"mismatches={len(self.mismatches)}, elapsed={self.elapsed:.2f})"
+        )
+
+    @property
+    def elapsed(self) -> float:
+        """
+        Wall clock seconds of the run, an earlier run's scan included when resumed.
+        """
+        return self.scan_seconds + self.statement_seconds
+
+    @property
+    def balanced(self) -> bool:
+        """
+        True when every account matches its history.
+        """
+        return not self.mismatches
+
+
+def _scan(task: tuple) -> tuple:
+    """
+    History totals of every slot with records in a segment of the journal.
+    Returns the opening balance of the accounts defined in the segment and
+    a list of HISTORY_FIELDS per slot.
+    :param task: (journal path, first record, record after the last, records
+        in the journal, cents mode).
+    """
+    path, start, stop, end, cents = task
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        # A segment can start inside a definition's payload, whose records
+        # start with a printable JSON byte where a record kind is below 32,
+        # or on the credit of a transfer. Both belong to the previous segment.
+        while start < stop and mm[start * RECORD_SIZE] >= 32:
+            start += 1
+        if start < stop and mm[start * RECORD_SIZE] == TRANSFER_CREDIT:
+            start += 1
+        if start >= stop:
+            return {}, {}
+        view = memoryview(mm)[start * RECORD_SIZE : end * RECORD_SIZE]
+        try:
+            return _scan_view(view, start, stop, cents)
+        finally:
+            view.release()
+
+
+def _scan_view(view: memoryview, start: int, stop: int, cents: bool) -> tuple:
+    openings = {}
+    totals = {}
+    ok = TransactionStatus.OK
+    skip = 0
+    # OK debit record of a transfer, its credit record comes right after it.
+    debit = None
+    for index, (kind, result, length, slot, amount, _, _) in enumerate(
+        RECORD.iter_unpack(view), start
+    ):
+        if skip:
+            skip -= 1
+            continue
+        # Past the segment, only the credit of a transfer debited in it is read.
+        if index >= stop and (kind != TRANSFER_CREDIT or debit is None):
+            break
+        if kind >= HOLDER:
+            debit = None
+            skip = -(-length // RECORD_SIZE)
+            if kind == ACCOUNT:
+                offset = (index - start + 1) * RECORD_SIZE
+                payload = json.loads(bytes(view[offset : offset + length]))
+                openings[payload["slot"]] = payload["balance"]
+            continue
+        if cents:
+            amount = int(amount)
+        if kind == TRANSFER_CREDIT:
+            if debit is not None and result == ok and debit[1] == amount:
+                for posted_slot, field in ((debit[0], 6), (slot, 5)):
+                    row = totals.get(posted_slot)
+                    if row is None:
+                        row = totals[posted_slot] = [0] * len(HISTORY_FIELDS)
+                    row[field] += amount
+            debit = None
+            continue
+        debit = None
+        if kind == UNKNOWN or slot == NO_SLOT:
+            continue
+        row = totals.get(slot)
+        if row is None:
+            row = totals[slot] = [0] * len(HISTORY_FIELDS)
+        if result != ok:
+            row[7] += 1
+        elif kind == TRANSFER_DEBIT:
+            debit = (slot, amount)
+        elif kind == WITHDRAW:
+            row[0] += 1
+            row[1] += amount
+        elif kind == ACCRUAL:
+            row[4] += amount
+        elif kind == FEE:
+            row[8] += amount
+        else:
+            row[2] += 1
+            row[3] += amount
+    return openings, totals
+
+
+def _statements(task: tuple) -> tuple:
+    """
+    Statements of a chunk of holders, recomputed balances compared with the
+    balances the bank holds. Returns the statements as JSON lines, the
+    mismatches and the number of accounts.
+    :param task: (holders, opening balance per slot, history totals per slot, tolerance).
+        Holders are (accountholder_id, first_name, last_name, total_balance,
+        accounts), accounts (kind, account_id, balance, journal slot).
+    """
+    holders, openings, totals, tolerance = task
+    lines = []
+    mismatches = []
+    count = 0
+    empty = [0] * len(HISTORY_FIELDS)
+    for accountholder_id, first_name, last_name, total_balance, accounts in holders:
+        statements = []
+        recomputed_total = 0
+        holder_mismatch = False
+        for kind, account_id, balance, slot in accounts:
+            row = totals.get(slot, empty)
+            opening = openings.get(slot)
+            if opening is None:
+                # Not journaled, there is no history to recompute it from.
+                recomputed = None
+                mismatch = True
+            else:
+                recomputed = (
+                    opening - row[1] + row[3] + row[4] + row[5] - row[6] + row[8]
+                )
+                mismatch = abs(recomputed - balance) > tolerance
+                recomputed_total += recomputed
+            statement = {"kind": kind, "account_id": account_id, "opening": opening}
+            statement.update(zip(HISTORY_FIELDS, row))
+            statement.update(recomputed=recomputed, balance=balance, mismatch=mismatch)
+            statements.append(statement)
+            if mismatch:
+                holder_mismatch = True
+                mismatches.append((accountholder_id, account_id))
+            count += 1
+        if not holder_mismatch and abs(recomputed_total - total_balance) > tolerance:
+            holder_mismatch = True
+            mismatches.append((accountholder_id, None))
+        lines.append(
+            json.dumps(
+                {
+                    "accountholder_id": accountholder_id,
+                    "first_name": first_name,
+                    "last_name": last_name,
+                    "accounts": statements,
+                    "recomputed": recomputed_total,
+                    "balance": total_balance,
+                    "mismatch": holder_mismatch,
+                },
+                separators=(",", ":"),
+            )
+        )
+    return "".join(line + "\n" for line in lines), mismatches, count
+
+
+def _ordered(submit, fn, tasks, window: int):
+    """
+    Results of fn over tasks in order, with at most window tasks in flight so
+    tasks are only built as the pool gets through them.
+    :param submit: Executor.submit(), or _inline() to run without a pool.
+    """
+    pending = deque()
+    for task in tasks:
+        pending.append(submit(fn, task))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _write_atomic(path: str, data: bytes):
+    temp = path + ".tmp"
+    with open(temp, "wb") as f:
+        f.write(data)
+    os.replace(temp, path)
+
+
+def reconcile(
+    bank,
+    output: str = None,
+    workers: int = None,
+    chunk_size: int = 1000,
+    segments: int = None,
+    checkpoint: str = None,
+    tolerance: float = 1e-6,
+) -> ReconciliationReport:
+    """
+    End of day reconciliation, recomputes the balance of every account from
+    its transaction history in the bank's journal and compares it with the
+    balance the bank holds. The journal is split into segments scanned in a
+    process pool, then the holders are partitioned into chunks the pool turns
+    into per-holder statements, written to output as JSON lines chunk by chunk
+    in accountholder_id order. Run it while no transactions are made.
+    With a checkpoint, progress is saved after each chunk and a run that was
+    interrupted picks up at the next chunk when called again with the same
+    checkpoint, output and chunk_size. The checkpoint is removed once done.
+    :param bank: Bank object with a journal.
+    :param output: File the statements are streamed to, None to only report mismatches.
+    :param workers: Size of the process pool, None for one per core, 0 to run inline.
+    :param chunk_size: Holders per chunk of statements.
+    :param segments: Journal segments scanned, four per worker by default.
+    :param checkpoint: File progress is saved to and resumed from.
+    :param tolerance: Largest absolute difference that is not reported as a mismatch.
+    """
+    journal = bank.journal
+    if journal is None:
+        raise ValueError("Reconciliation needs a bank with a journal.")
+    journal.commit()
+    records = journal.records
+    holders = sorted(bank.account_holders.values(), key=lambda h: str(h.accountholder_id))
+    state = {
+        "records": records,
+        "holders": len(holders),
+        "chunk_size": chunk_size,
+        "done": 0,
+        "output_size": 0,
+        "accounts": 0,
+        "mismatches": [],
+        "scan_seconds": 0.0,
+        "statement_seconds": 0.0,
+    }
+    history = None
+    if checkpoint is not None and os.path.exists(checkpoint):
+        with open(checkpoint) as f:
+            saved = json.load(f)
+        for key in ("records", "holders", "chunk_size"):
+            if saved[key] != state[key]:
+                raise ValueError(
+                    f"Checkpoint {checkpoint} was taken with {key}={saved[key]}, "
+                    f"not {state[key]}."
+                )
+        state = saved
+        with open(checkpoint + ".history", "rb") as f:
+            history = pickle.load(f)
+    resumed = state["done"]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    pool = ProcessPoolExecutor(workers) if workers else None
+    try:
+        submit = pool.submit if pool is not None else _inline
+        window = 2 * workers or 1
+        if history is None:
+            start = time.perf_counter()
+            count = segments or 4 * max(workers, 1)
+            bounds = [records * i // count for i in range(count + 1)]
+            tasks = [
+                (journal.path, bounds[i], bounds[i + 1], records, bank.cents)
+                for i in range(count)
+                if bounds[i] < bounds[i + 1]
+            ]
+            openings = {}
+            totals = {}
+            for segment_openings, segment_totals in _ordered(submit, _scan, tasks, window):
+                openings.update(segment_openings)
+                for slot, row in segment_totals.items():
+                    merged = totals.get(slot)
+                    if merged is None:
+                        totals[slot] = row
+                    else:
+                        totals[slot] = [a + b for a, b in zip(merged, row)]
+            history = (openings, totals)
+            state["scan_seconds"] = time.perf_counter() - start
+            if checkpoint is not None:
+                _write_atomic(checkpoint + ".history", pickle.dumps(history, protocol=4))
+        openings, totals = history
+
+        def chunks():
+            journal_slots = journal.slots
+            for offset in range(resumed * chunk_size, len(holders), chunk_size):
+                rows = []
+                slots = []
+                for holder in holders[offset : offset + chunk_size]:
+                    holder_accounts = holder.accounts
+                    accounts = [
+                        (kind, account.account_id, account.balance, journal_slots.get(account))
+                        for kind, registry in zip(
+                            KINDS,
+                            (
+                                holder_accounts.checking_accounts,
+                                holder_accounts.saving_accounts,
+                                holder_accounts.credit_accounts,
+                            ),
+                        )
+                        for account in registry.values()
+                    ]
+                    rows.append(
+                        (
+                            holder.accountholder_id,
+                            holder.first_name,
+                            holder.last_name,
+                            holder_accounts.total_balance,
+                            accounts,
+                        )
+                    )
+                    slots.extend(account[3] for account in accounts)
+                yield (
+                    rows,
+                    {slot: openings[slot] for slot in slots if slot in openings},
+                    {slot: totals[slot] for slot in slots if slot in totals},
+                    tolerance,
+                )
+
+        stream = None
+        if output is not None:
+            if resumed:
+                # Drop statements written after the last checkpoint.
+                stream = open(output, "r+b")
+                stream.truncate(state["output_size"])
+                stream.seek(state["output_size"])
+            else:
+                stream = open(output, "wb")
+        try:
+            start = time.perf_counter() - state["statement_seconds"]
+            for lines, mismatches, count in _ordered(
+                submit, _statements, chunks(), window
+            ):
+                if stream is not None:
+                    stream.write(lines.encode())
+                    stream.flush()
+                    state["output_size"] = stream.tell()
+                state["done"] += 1
+                state["accounts"] += count
+                state["mismatches"].extend(mismatches)
+                state["statement_seconds"] = time.perf_counter() - start
+                if checkpoint is not None:
+                    _write_atomic(checkpoint, json.dumps(state).encode())
+        finally:
+            if stream is not None:
+                stream.close()
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    if checkpoint is not None:
+        for path in (checkpoint, checkpoint + ".history"):
+            if os.path.exists(path):
+                os.remove(path)
+    return ReconciliationReport(
+        len(holders),
+        state["accounts"],
+        [tuple(mismatch) for mismatch in state["mismatches"]],
+        records,
+        state["scan_seconds"],
+        state["statement_seconds"],
+        resumed,
+    )
+
+
+class _Done:
+    """
+    Result of a task run inline, in place of a Future.
+    """
+
+    def __init__(self, result):
+        self._result = result
+
+    def result(self):
+        return self._result
+
+
+def _inline(fn, task) -> _Done:
+    return _Done(fn(task))
@@ -0,0 +1,201 @@
+"""
+bank.settlement
+~~~~~~~~~~~~~~~
+This module contains a streaming ingester for settlement files.
+"""
+
+from .money import to_cents
+from .status import TransactionStatus
+import csv, json, math, sys, time
+
+try:
+    import resource
+except ImportError:  # Not available on Windows.
+    resource = None
+
+FORMATS = ("csv", "jsonl")
+FIELDS = ("card_number", "amount", "kind")
+
+
+class SettlementReport:
+    """
+    Outcome of settling a file with settle().
+    :param counts: Number of rows per TransactionStatus.
+    :param elapsed: Wall clock seconds spent settling.
+    :param peak_rss: Peak resident set size of the process in bytes, None if unknown.
+    """
+
+    def __init__(self, counts: dict, elapsed: float, peak_rss: int = None):
+        self.counts = counts
+        self.elapsed = elapsed
+        self.peak_rss = peak_rss
+
+    def __repr__(self):
+        return (
+            f"SettlementReport(rows={self.rows}, applied={self.applied}, "
+            f"declined={self.declined}, rows_per_second={self.rows_per_second:.0f})"
+        )
+
+    @property
+    def rows(self) -> int:
+        """
+        Number of rows in the file.
+        """
+        return sum(self.counts.values())
+
+    @property
+    def applied(self) -> int:
+        """
+        Number of rows that were applied to an account.
+        """
+        return self.counts.get(TransactionStatus.OK, 0)
+
+    @property
+    def declined(self) -> int:
+        """
+        Number of rows that were not applied, malformed rows included.
+        """
+        return self.rows - self.applied
+
+    @property
+    def rows_per_second(self) -> float:
+        """
+        Throughput of the settlement.
+        """
+        return self.rows / self.elapsed if self.elapsed else float("inf")
+
+
+def peak_rss():
+    """
+    Peak resident set size of this process in bytes, None where it isn't available.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def read_chunks(f, format: str = "csv", chunk_size: int = 10000, cents: bool = False):
+    """
+    Parse a settlement file a chunk at a time, so memory is bounded by the
+    chunk size rather than the file size. Yields (card_numbers, amounts, kinds,
+    malformed) where malformed lists the positions in the chunk of rows that
+    couldn't be parsed or whose amount isn't a finite positive number (their
+    other columns hold placeholders).
+    :param f: Text file object of (card_number, amount, kind) rows, a CSV header row is skipped.
+    :param format: csv or jsonl.
+    :param chunk_size: Rows per chunk.
+    :param cents: Parse amounts (in dollars) to integer cents, for a Bank in cents mode.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown settlement format {format}, use one of {FORMATS}.")
+    parse_amount = to_cents if cents else float
+    if format == "csv":
+        rows = csv.reader(f)
+    else:
+        rows = (
+            [row.get(field) for field in FIELDS]
+            for row in (_json_row(line) for line in f if line.strip())
+        )
+    card_numbers, amounts, kinds, malformed = [], [], [], []
+    first = True
+    for row in rows:
+        if first:
+            first = False
+            if format == "csv" and row and row[0] == FIELDS[0]:
+                continue
+        try:
+            card_number, amount, kind = row
+            if card_number.__class__ is not str:
+                raise TypeError(card_number)
+            amount = parse_amount(amount)
+            if not (amount > 0 and math.isfinite(amount)):
+                raise ValueError(amount)
+        except (TypeError, ValueError, ArithmeticError):
+            malformed.append(len(card_numbers))
+            card_number = row[0] if row and row[0].__class__ is str else ""
+            amount, kind = 0, None
+        card_numbers.append(card_number)
+        amounts.append(amount)
+        kinds.append(kind)
+        if len(card_numbers) == chunk_size:
+            yield card_numbers, amounts, kinds, malformed
+            card_numbers, amounts, kinds, malformed = [], [], [], []
+    if card_numbers:
+        yield card_numbers, amounts, kinds, malformed
+
+
+def _json_row(line: str) -> dict:
+    try:
+        row = json.loads(line)
+    except ValueError:
+        return {}
+    return row if isinstance(row, dict) else {}
+
+
+def settle(
+    bank,
+    f,
+    output=None,
+    format: str = "csv",
+    chunk_size: int = 10000,
+) -> SettlementReport:
+    """
+    Stream a settlement file through Bank.process_batch() one chunk at a time.
+    Cards are resolved through the bank's card index and rows are applied in
+    file order per account. A result line per row (row number, card number,
+    status name) is written to output in the same format as the input.
+    :param bank: Bank object to settle against.
+    :param f: Text file object to read, see read_chunks().
+    :param output: Text file object the per row results are written to, if any.
+    :param format: csv or jsonl.
+    :param chunk_size: Rows per process_batch() call.
+    """
+    start = time.perf_counter()
+    counts = {}
+    row = 0
+    writer = csv.writer(output) if output is not None and format == "csv" else None
+    if writer is not None:
+        writer.writerow(("row", "card_number", "status"))
+    for card_numbers, amounts, kinds, malformed in read_chunks(
+        f, format, chunk_size, bank.cents
+    ):
+        if malformed:
+            valid = sorted(set(range(len(card_numbers))) - set(malformed))
+            result = bank.process_batch(
+                {
+                    "card_number": [card_numbers[i] for i in valid],
+                    "amount": [amounts[i] for i in valid],
+                    "kind": [kinds[i] for i in valid],
+                }
+            )
+            statuses = [TransactionStatus.MALFORMED] * len(card_numbers)
+            for i, status in zip(valid, result.statuses):
+                statuses[i] = status
+        else:
+            statuses = bank.process_batch(
+                {"card_number": card_numbers, "amount": amounts, "kind": kinds}
+            ).statuses
+        for status in statuses:
+            counts[status] = counts.get(status, 0) + 1
+        if output is not None:
+            names = [TransactionStatus(status).name for status in statuses]
+            if writer is not None:
+                writer.writerows(
+                    zip(range(row, row + len(card_numbers)), card_numbers, names)
+                )
+            else:
+                output.writelines(
+                    json.dumps({"row": n, "card_number": card_number, "status": name})
+                    + "\n"
+                    for n, card_number, name in zip(
+                        range(row, row + len(card_numbers)), card_numbers, names
+                    )
+                )
+        row += len(card_numbers)
+    return SettlementReport(
+        {TransactionStatus(status): count for status, count in counts.items()},
+        time.perf_counter() - start,
+        peak_rss(),
+    )
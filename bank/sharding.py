@@ -0,0 +1,388 @@
+"""
+bank.sharding
+~~~~~~~~~~~~~
+This module contains code for partitioning a bank across worker processes.
+"""
+
+from array import array
+from bisect import bisect
+from .batch import BatchResult
+from .exceptions import AccountNotExists, ShardError
+from .money import to_cents, CREDIT_LIMIT, WITHDRAWAL_LIMIT
+from .status import TransactionStatus
+from . import snapshot as snapshots
+import datetime, multiprocessing, os, time, zlib
+
+
+class HashRing:
+    """
+    Consistent hash ring mapping keys (account holder ids) to shards. Each
+    shard owns `replicas` points on the ring so keys spread evenly and adding
+    a shard only moves the keys that land on its points.
+    :param shards: Number of shards.
+    :param replicas: Points on the ring per shard.
+    """
+
+    def __init__(self, shards: int, replicas: int = 64):
+        points = sorted(
+            (zlib.crc32(f"shard-{shard}-{replica}".encode()), shard)
+            for shard in range(shards)
+            for replica in range(replicas)
+        )
+        self.points = [point for point, _ in points]
+        self.shards = [shard for _, shard in points]
+
+    def shard(self, key: str) -> int:
+        """
+        Shard owning a key.
+        """
+        index = bisect(self.points, zlib.crc32(key.encode()))
+        return self.shards[index % len(self.shards)]
+
+
+def _accountholder_id(card_number: str) -> str:
+    # Same exaggeration Bank uses of getting the account holder from a card number.
+    return card_number.split("|")[1].split("-")[0]
+
+
+def _serve(conn, institution: str, cents: bool = False):
+    """
+    Shard worker, owns one Bank and answers (method, args) requests until None.
+    """
+    from .account_holder import AccountHolder
+    from .banks import Bank
+    from .cards import Card
+    from .journal import restore_account
+
+    bank = Bank(institution, cents=cents)
+
+    def load_holders(records):
+        for record in records:
+            snapshots.restore_holder(bank, record)
+        return len(records)
+
+    def open_holder(accountholder_id, first_name, last_name):
+        AccountHolder(bank, accountholder_id, first_name, last_name)
+
+    def open_account(accountholder_id, *fields):
+        restore_account(bank.account_holders[accountholder_id].accounts, *fields)
+
+    def issue_card(accountholder_id, kind, account_id, *fields):
+        holder = bank.account_holders[accountholder_id]
+        registry = {
+            "checking": holder.accounts.checking_accounts,
+            "savings": holder.accounts.saving_accounts,
+            "credit": holder.accounts.credit_accounts,
+        }[kind]
+        Card(holder, registry[account_id], *fields)
+
+    handlers = {
+        "load_holders": load_holders,
+        "open_holder": open_holder,
+        "open_account": open_account,
+        "issue_card": issue_card,
+        "withdraw": bank.withdrawal_transaction,
+        "deposit": bank.deposit_transaction,
+        "batch": bank.process_batch,
+        "balance": lambda: (bank.bank_balance, bank.account_type_balances),
+        "holders": lambda: len(bank.account_holders),
+        "audit": bank.audit_balances,
+    }
+    while True:
+        request = conn.recv()
+        if request is None:
+            break
+        method, args = request
+        try:
+            conn.send((True, handlers[method](*args)))
+        except Exception as e:
+            conn.send((False, e))
+    conn.close()
+
+
+class ShardedBank:
+    """
+    Bank partitioned across worker processes by consistent hash of the account
+    holder id, so transactions for different holders run on different cores.
+    Offers the same transaction interface as Bank, process_batch() splits a
+    batch into one sub-batch per shard which the shards apply in parallel.
+    :param shards: Number of worker processes, defaults to the number of CPUs.
+    :param institution: Name of the financial institution.
+    :param replicas: Points per shard on the consistent hash ring.
+    :param cents: Run the shard banks in cents mode, see Bank.
+    """
+
+    def __init__(
+        self,
+        shards: int = None,
+        institution="Square",
+        replicas: int = 64,
+        cents: bool = False,
+    ):
+        self.institution = institution
+        self.cents = cents
+        self.shard_count = shards or os.cpu_count() or 1
+        self.ring = HashRing(self.shard_count, replicas)
+        self._conns = []
+        self._processes = []
+        for _ in range(self.shard_count):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_serve, args=(child, institution, cents), daemon=True
+            )
+            process.start()
+            child.close()
+            self._conns.append(parent)
+            self._processes.append(process)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """
+        Stop the shard processes.
+        """
+        for conn, process in zip(self._conns, self._processes):
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            process.join()
+            conn.close()
+        self._conns = []
+        self._processes = []
+
+    @classmethod
+    def from_bank(cls, bank, shards: int = None, replicas: int = 64):
+        """
+        Partition the account holders of an existing Bank across new shards.
+        :param bank: Bank object to partition.
+        :param shards: Number of worker processes.
+        """
+        sharded = cls(shards, bank.institution, replicas, bank.cents)
+        sharded.load_holders(bank.account_holders.values())
+        return sharded
+
+    def load_holders(self, holders):
+        """
+        Ship account holders (with their accounts and cards) to their shards,
+        one message per shard.
+        :param holders: Iterable of AccountHolder objects.
+        """
+        records = [[] for _ in range(self.shard_count)]
+        for holder in holders:
+            records[self.shard(holder.accountholder_id)].append(
+                snapshots.dump_holder(holder)
+            )
+        self._scatter([("load_holders", (shard_records,)) for shard_records in records])
+
+    def shard(self, accountholder_id: str) -> int:
+        """
+        Shard owning an account holder.
+        """
+        return self.ring.shard(accountholder_id)
+
+    def _route(self, card_number: str) -> int:
+        # Not cached, a ring lookup is a crc32 and a bisect.
+        return self.ring.shard(_accountholder_id(card_number))
+
+    def _call(self, shard: int, method: str, *args):
+        conn = self._conns[shard]
+        conn.send((method, args))
+        ok, result = conn.recv()
+        if not ok:
+            raise result
+        return result
+
+    def _scatter(self, requests: list) -> list:
+        """
+        Send one request to every shard, then collect the replies so the
+        shards work in parallel. Shards don't roll back when another fails,
+        a ShardError reports which shards failed and the results of the rest.
+        """
+        for conn, request in zip(self._conns, requests):
+            conn.send(request)
+        replies = [conn.recv() for conn in self._conns]
+        errors = {shard: result for shard, (ok, result) in enumerate(replies) if not ok}
+        if errors:
+            raise ShardError(
+                errors, {shard: result for shard, (ok, result) in enumerate(replies) if ok}
+            )
+        return [result for _, result in replies]
+
+    def open_holder(self, accountholder_id: str, first_name: str, last_name: str):
+        """
+        Register a new account holder on its shard.
+        """
+        self._call(
+            self.shard(accountholder_id),
+            "open_holder",
+            accountholder_id,
+            first_name,
+            last_name,
+        )
+
+    def open_account(
+        self,
+        accountholder_id: str,
+        kind: str,
+        account_id,
+        opening_balance=0,
+        status: str = "open",
+        **kwargs
+    ):
+        """
+        Open an account for an account holder on its shard.
+        :param kind: Type of account (checking, savings, credit).
+        :kwarg interest_rate: Interest of a savings account.
+        :kwarg apr_rate: APR of a credit account.
+        :kwarg credit_limit: Credit limit of a credit account.
+        """
+        if self.cents:
+            withdrawal_limit, credit_limit = (
+                to_cents(WITHDRAWAL_LIMIT),
+                to_cents(CREDIT_LIMIT),
+            )
+        else:
+            withdrawal_limit, credit_limit = WITHDRAWAL_LIMIT, CREDIT_LIMIT
+        self._call(
+            self.shard(accountholder_id),
+            "open_account",
+            accountholder_id,
+            kind,
+            False,
+            account_id,
+            kind,
+            accountholder_id,
+            opening_balance,
+            kwargs.get("open_date", datetime.date.today()).toordinal(),
+            status,
+            kwargs.get("withdrawal_limit", withdrawal_limit),
+            kwargs.get("interest_rate", 0.001),
+            kwargs.get("apr_rate", 0.15),
+            kwargs.get("credit_limit", credit_limit),
+        )
+
+    def issue_card(
+        self,
+        accountholder_id: str,
+        kind: str,
+        account_id,
+        holder_firstname: str,
+        holder_lastname: str,
+        card_number: str,
+        pin: str,
+        expiry_date: str,
+        cvv: str,
+        status: str,
+    ):
+        """
+        Issue a card against an account holder's account on its shard.
+        """
+        self._call(
+            self.shard(accountholder_id),
+            "issue_card",
+            accountholder_id,
+            kind,
+            account_id,
+            holder_firstname,
+            holder_lastname,
+            card_number,
+            pin,
+            expiry_date,
+            cvv,
+            status,
+        )
+
+    def withdrawal_transaction(self, card_number: str, amount: float) -> dict:
+        """
+        Withdraw money from the account linked with a card, on its shard.
+        """
+        try:
+            shard = self._route(card_number)
+        except (AttributeError, IndexError):
+            raise AccountNotExists("Account associated with that card does not exist.")
+        return self._call(shard, "withdraw", card_number, amount)
+
+    def deposit_transaction(self, card_number: str, amount: float) -> dict:
+        """
+        Deposit money into the account linked with a card, on its shard.
+        """
+        try:
+            shard = self._route(card_number)
+        except (AttributeError, IndexError):
+            raise AccountNotExists("Account associated with that card does not exist.")
+        return self._call(shard, "deposit", card_number, amount)
+
+    def process_batch(self, transactions) -> BatchResult:
+        """
+        Split a batch by shard, apply the sub-batches in parallel and merge the
+        per row statuses back into the original order. A sub-batch that raises
+        raises a ShardError, the other shards' sub-batches stay applied, see
+        ShardError.results for their BatchResults.
+        :param transactions: Iterable of (card_number, amount, kind) rows, or a
+            columnar dict as accepted by Bank.process_batch().
+        """
+        start = time.perf_counter()
+        if isinstance(transactions, dict):
+            transactions = zip(
+                transactions["card_number"], transactions["amount"], transactions["kind"]
+            )
+        rows = [[] for _ in range(self.shard_count)]
+        positions = [[] for _ in range(self.shard_count)]
+        unroutable = []
+        for position, row in enumerate(transactions):
+            try:
+                shard = self._route(row[0])
+            except (AttributeError, IndexError):
+                unroutable.append(position)
+                continue
+            rows[shard].append(row)
+            positions[shard].append(position)
+        n = sum(map(len, positions)) + len(unroutable)
+        statuses = array("B", bytes(n))
+        for position in unroutable:
+            statuses[position] = TransactionStatus.ACCOUNT_NOT_EXISTS
+        results = self._scatter([("batch", (shard_rows,)) for shard_rows in rows])
+        for shard_positions, result in zip(positions, results):
+            for position, code in zip(shard_positions, result.statuses):
+                statuses[position] = code
+        return BatchResult(statuses, time.time(), time.perf_counter() - start)
+
+    @property
+    def bank_balance(self):
+        """
+        Total balance of the bank, summed over the shards' running totals.
+        """
+        replies = self._scatter([("balance", ())] * self.shard_count)
+        return sum(balance for balance, _ in replies)
+
+    @property
+    def account_type_balances(self) -> dict:
+        """
+        Total balance per account type, summed over the shards.
+        """
+        totals = {"checking": 0, "savings": 0, "credit": 0}
+        for _, shard_totals in self._scatter([("balance", ())] * self.shard_count):
+            for kind, amount in shard_totals.items():
+                totals[kind] += amount
+        return totals
+
+    @property
+    def holders_per_shard(self) -> list:
+        """
+        Number of account holders owned by each shard.
+        """
+        return self._scatter([("holders", ())] * self.shard_count)
+
+    def audit_balances(self, tolerance: float = 1e-6) -> list:
+        """
+        Run Bank.audit_balances() on every shard, returns the drift of all shards.
+        """
+        drift = []
+        for shard_drift in self._scatter([("audit", (tolerance,))] * self.shard_count):
+            drift.extend(shard_drift)
+        return drift
@@ -0,0 +1,221 @@
+"""
+bank.snapshot
+~~~~~~~~~~~~~
+This module contains code for writing and lazily loading binary snapshots of a Bank.
+"""
+
+from .account_holder import AccountHolder
+from .cards import Card
+from .journal import restore_account
+import mmap, os, pickle, struct
+
+MAGIC = b"BANKSNAP"
+# 2 added the billing fields of credit accounts, version 1 snapshots are
+# read with accounts padded with NO_BILLING.
+VERSION = 2
+# magic, version, journal position, journaled flag, index offset, index length.
+HEADER = struct.Struct("<8sHQ?QQ")
+KINDS = ("checking", "savings", "credit")
+# Billing fields of accounts without a billing cycle (not credit accounts).
+NO_BILLING = (None,) * 7
+
+
+def write(bank, path: str):
+    """
+    Write a snapshot of every account holder, account and card of a bank.
+    Each holder is one pickled blob of plain tuples, an index of blob offsets
+    at the end of the file lets holders be loaded one at a time. The file is
+    written next to path and moved into place once complete.
+    :param bank: Bank object to snapshot.
+    :param path: File to write the snapshot to.
+    """
+    journal = bank.journal
+    if journal is not None:
+        journal.commit()
+        # The position the holders are dumped at, Bank.snapshot() holds every
+        # lock stripe so transactions can't append past it meanwhile.
+        position = journal.records
+        slot_holders = [None] * len(journal.accounts)
+    else:
+        position = 0
+        slot_holders = []
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(bytes(HEADER.size))
+        index = {}
+        for accountholder_id, holder in bank.account_holders.items():
+            record = dump_holder(holder, journal)
+            for fields in record[3]:
+                if fields[12] >= 0:
+                    slot_holders[fields[12]] = accountholder_id
+            blob = pickle.dumps(record, 4)
+            index[accountholder_id] = (
+                f.tell(),
+                len(blob),
+                tuple(holder.accounts._totals[kind] for kind in KINDS),
+            )
+            f.write(blob)
+        meta = pickle.dumps(
+            {
+                "institution": bank.institution,
+                "cents": bank.cents,
+                "balance": bank._balance,
+                "totals": dict(bank._totals),
+                "index": index,
+                "slot_holders": slot_holders,
+            },
+            4,
+        )
+        index_offset = f.tell()
+        f.write(meta)
+        f.seek(0)
+        f.write(
+            HEADER.pack(
+                MAGIC,
+                VERSION,
+                position,
+                journal is not None,
+                index_offset,
+                len(meta),
+            )
+        )
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def billing_fields(account) -> tuple:
+    """
+    CreditAccount._billing_state() of an account, NO_BILLING for other accounts.
+    """
+    state = getattr(account, "_billing_state", None)
+    return state() if state is not None else NO_BILLING
+
+
+def dump_holder(holder, journal=None) -> tuple:
+    """
+    Plain tuple of an account holder with their accounts and cards, the form
+    holders are stored in snapshots and shipped to shards in.
+    :param holder: AccountHolder object.
+    :param journal: Journal whose account slots are recorded, if any.
+    """
+    accounts = []
+    positions = {}
+    for kind, registry in zip(
+        KINDS,
+        (
+            holder.accounts.checking_accounts,
+            holder.accounts.saving_accounts,
+            holder.accounts.credit_accounts,
+        ),
+    ):
+        for account in registry.values():
+            positions[account] = len(accounts)
+            accounts.append(
+                (
+                    kind,
+                    hasattr(account, "_slot"),
+                    account.account_id,
+                    account.account_type,
+                    account.accountholder_id,
+                    account.balance,
+                    account.open_date.toordinal(),
+                    account.status,
+                    account.withdrawal_limit,
+                    getattr(account, "interest_rate", None),
+                    getattr(account, "apr_rate", None),
+                    account.credit_limit,
+                    journal.slots.get(account, -1) if journal is not None else -1,
+                    *billing_fields(account),
+                )
+            )
+    cards = [
+        (
+            positions[card.account],
+            card.holder_firstname,
+            card.holder_lastname,
+            card.card_number,
+            card._Card__pin,
+            card.expiry_date,
+            card.cvv,
+            card.status,
+        )
+        for card in holder.cards.values()
+        if card.account in positions
+    ]
+    return (
+        holder.accountholder_id,
+        holder.first_name,
+        holder.last_name,
+        accounts,
+        cards,
+    )
+
+
+def restore_holder(bank, record: tuple):
+    """
+    Construct an account holder with their accounts and cards from a
+    dump_holder() tuple and register it with the bank. Definitions are not
+    journaled again, journaled accounts are bound back to their slots.
+    :param bank: Bank object to register the holder with.
+    :param record: Tuple from dump_holder().
+    """
+    accountholder_id, first_name, last_name, accounts, cards = record
+    journal = bank.journal
+    if journal is not None:
+        suspended = journal.suspended
+        journal.suspended = True
+    try:
+        holder = AccountHolder(bank, accountholder_id, first_name, last_name)
+        restored = []
+        for fields in accounts:
+            account = restore_account(holder.accounts, *fields[:12], billing=fields[13:])
+            if journal is not None and fields[12] >= 0:
+                journal.bind(fields[12], account)
+            restored.append(account)
+        for position, *card in cards:
+            Card(holder, restored[position], *card)
+    finally:
+        if journal is not None:
+            journal.suspended = suspended
+    return holder
+
+
+class SnapshotReader:
+    """
+    Memory maps a snapshot and materializes account holders from it on demand.
+    Only trusted snapshots should be loaded, holders are stored with pickle.
+    :param path: Snapshot file written by write().
+    """
+
+    def __init__(self, path: str):
+        self.file = open(path, "rb")
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, position, journaled, index_offset, index_length = HEADER.unpack(
+            self.mm[: HEADER.size]
+        )
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a bank snapshot.")
+        if version not in (1, VERSION):
+            raise ValueError(f"Unsupported snapshot version {version}.")
+        self.version = version
+        self.position = position
+        self.journaled = journaled
+        self.meta = pickle.loads(self.mm[index_offset : index_offset + index_length])
+        # accountholder_id -> (offset, length, totals) of holders not yet materialized.
+        self.pending = self.meta["index"]
+
+    def close(self):
+        self.mm.close()
+        self.file.close()
+
+    def materialize(self, bank, accountholder_id):
+        """
+        Construct one account holder with its accounts and cards, registering
+        it with the bank (which removes it from pending).
+        """
+        offset, length, _ = self.pending[accountholder_id]
+        record = pickle.loads(self.mm[offset : offset + length])
+        if self.version == 1:
+            record = (*record[:3], [(*fields, *NO_BILLING) for fields in record[3]], record[4])
+        return restore_holder(bank, record)
@@ -0,0 +1,172 @@
+"""
+bank.status
+~~~~~~~~~~~
+This module contains compact status codes for transaction results and journal record kinds.
+"""
+
+from enum import IntEnum
+from .exceptions import (
+    AccountError,
+    AccountNotExists,
+    ExceedsLimit,
+    InsufficientBalance,
+    VelocityExceeded,
+)
+from .money import MAX_CENTS, MIN_CENTS
+import time
+
+# Journal record kinds, see bank.journal.
+UNKNOWN = 0
+WITHDRAW = 1
+DEPOSIT = 2
+ACCRUAL = 3
+# A transfer is a debit record immediately followed by its credit record.
+TRANSFER_DEBIT = 4
+TRANSFER_CREDIT = 5
+# A fee charged by the bank, its amount is signed like an accrual's.
+FEE = 6
+HOLDER = 10
+ACCOUNT = 11
+CARD = 12
+# Changes to journaled accounts and holders, payload records like definitions.
+STATUS = 13
+LIMIT = 14
+CLOSE = 15
+REMOVE = 16
+PIN = 17
+# Billing cycle of a credit account after a statement closes or a late fee.
+BILLING = 18
+
+
+class TransactionStatus(IntEnum):
+    """
+    Status code of a processed transaction, small enough to be stored per row
+    in a typed array.
+    """
+
+    OK = 0
+    INSUFFICIENT_BALANCE = 1
+    EXCEEDS_LIMIT = 2
+    ACCOUNT_ERROR = 3
+    ACCOUNT_NOT_EXISTS = 4
+    CARD_NOT_EXISTS = 5
+    INVALID_KIND = 6
+    TIMED_OUT = 7
+    OVERLOADED = 8
+    INVALID_AMOUNT = 9
+    INVALID_TRANSFER = 10
+    MALFORMED = 11
+    VELOCITY_LIMIT = 12
+
+
+class TransactionResult:
+    """
+    Outcome of a transaction made through the exception-free path
+    (Account.try_withdraw(), Bank.withdrawal_result() etc.). Declines are
+    returned as a status code instead of being raised, the message and the
+    equivalent exception are only built when asked for. Pass a result back in
+    to have it overwritten instead of allocating a new one.
+    """
+
+    __slots__ = (
+        "code",
+        "account",
+        "amount",
+        "balance",
+        "card_number",
+        "transaction_time",
+    )
+
+    def __init__(self):
+        self.code = TransactionStatus.OK
+        self.account = None
+        self.amount = 0
+        self.balance = None
+        self.card_number = None
+        self.transaction_time = None
+
+    def set(self, code: int, account, amount, card_number: str = None):
+        """
+        Overwrite the result, returns itself.
+        :param code: TransactionStatus of the transaction.
+        :param account: Account the transaction was made against, None if not found.
+        :param amount: Transaction amount.
+        :param card_number: Card number that made the transaction.
+        """
+        self.code = code
+        self.account = account
+        self.amount = amount
+        self.balance = account.balance if account is not None else None
+        self.card_number = card_number
+        self.transaction_time = time.time() if code == TransactionStatus.OK else None
+        return self
+
+    @property
+    def status(self) -> bool:
+        return self.code == TransactionStatus.OK
+
+    def error(self):
+        """
+        Exception the raising API would have given for this result, None if it was approved.
+        """
+        code = self.code
+        account = self.account
+        if code == TransactionStatus.OK:
+            return None
+        elif code == TransactionStatus.INSUFFICIENT_BALANCE:
+            return InsufficientBalance(
+                self.balance + account.credit_limit, self.amount, account.cents
+            )
+        elif code == TransactionStatus.EXCEEDS_LIMIT:
+            return ExceedsLimit(account.withdrawal_limit, account.cents)
+        elif code == TransactionStatus.ACCOUNT_ERROR:
+            return AccountError(account.account_id, account.status)
+        elif code == TransactionStatus.ACCOUNT_NOT_EXISTS:
+            return AccountNotExists("Account associated with that card does not exist.")
+        elif code == TransactionStatus.CARD_NOT_EXISTS:
+            return KeyError(self.card_number)
+        elif code == TransactionStatus.INVALID_AMOUNT:
+            amount = self.amount
+            if account is not None and account.cents:
+                if amount.__class__ is not int:
+                    return TypeError(
+                        f"Amounts are integer cents in cents mode, got {amount!r}."
+                    )
+                elif not MIN_CENTS <= amount <= MAX_CENTS:
+                    return OverflowError(f"{amount} cents does not fit in 64 bits.")
+            return ValueError(f"Amounts must be positive finite numbers, got {amount!r}.")
+        elif code == TransactionStatus.INVALID_TRANSFER:
+            return ValueError(
+                "Transfers need two different accounts and a positive amount."
+            )
+        elif code == TransactionStatus.VELOCITY_LIMIT:
+            return VelocityExceeded(None, None, account.cents)
+        elif code == TransactionStatus.MALFORMED:
+            return ValueError("Malformed settlement row.")
+        return ValueError(TransactionStatus(code).name)
+
+    @property
+    def message(self) -> str:
+        """
+        Human readable outcome, formatted on access.
+        """
+        error = self.error()
+        if error is None:
+            return "Approved."
+        return getattr(error, "message", str(error))
+
+    def as_dict(self) -> dict:
+        """
+        The dict withdrawal_transaction()/deposit_transaction() return.
+        """
+        if self.code == TransactionStatus.OK:
+            return {
+                "status": True,
+                "new_balance": self.balance,
+                "transaction_time": self.transaction_time,
+            }
+        return {"status": False, "error": self.error()}
+
+    def __repr__(self):
+        name = TransactionStatus(self.code).name
+        return f"TransactionResult({name}, balance={self.balance!r})"
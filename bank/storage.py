@@ -0,0 +1,487 @@
+"""
+bank.storage
+~~~~~~~~~~~~
+This module contains code for storing account holders, accounts and cards in SQLite.
+"""
+
+from .snapshot import billing_fields, dump_holder
+from operator import itemgetter
+import sqlite3, threading, time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+CREATE TABLE IF NOT EXISTS holders (
+    accountholder_id PRIMARY KEY,
+    first_name TEXT,
+    last_name TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS accounts (
+    accountholder_id NOT NULL,
+    kind TEXT NOT NULL,
+    account_id NOT NULL,
+    position INTEGER NOT NULL,
+    view INTEGER NOT NULL,
+    account_type TEXT,
+    owner_id,
+    balance,
+    open_date INTEGER,
+    status TEXT,
+    withdrawal_limit,
+    interest_rate REAL,
+    apr_rate REAL,
+    credit_limit,
+    cycle_day INTEGER,
+    billing_end INTEGER,
+    statement_balance,
+    minimum_due,
+    due_date INTEGER,
+    paid,
+    late_fees INTEGER,
+    PRIMARY KEY (accountholder_id, kind, account_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS cards (
+    card_number PRIMARY KEY,
+    accountholder_id NOT NULL,
+    kind TEXT NOT NULL,
+    account_id NOT NULL,
+    holder_firstname TEXT,
+    holder_lastname TEXT,
+    pin,
+    expiry_date,
+    cvv,
+    status TEXT
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cards_holder ON cards (accountholder_id);
+CREATE INDEX IF NOT EXISTS accounts_kind ON accounts (kind, balance);
+"""
+
+# Billing cycle of credit accounts, NULL for other accounts.
+_BILLING_COLUMNS = (
+    ("cycle_day", "INTEGER"),
+    ("billing_end", "INTEGER"),
+    ("statement_balance", ""),
+    ("minimum_due", ""),
+    ("due_date", "INTEGER"),
+    ("paid", ""),
+    ("late_fees", "INTEGER"),
+)
+_BILLING = ", ".join(column for column, _ in _BILLING_COLUMNS)
+_ACCOUNT_COLUMNS = (
+    "accountholder_id, kind, account_id, position, view, account_type, owner_id, "
+    "balance, open_date, status, withdrawal_limit, interest_rate, apr_rate, credit_limit, "
+    + _BILLING
+)
+_BILLING_UPDATE = (
+    "UPDATE accounts SET balance = ?, "
+    + ", ".join(f"{column} = ?" for column, _ in _BILLING_COLUMNS)
+    + " WHERE accountholder_id = ? AND kind = ? AND account_id = ?"
+)
+_CARD_COLUMNS = (
+    "card_number, accountholder_id, kind, account_id, holder_firstname, "
+    "holder_lastname, pin, expiry_date, cvv, status"
+)
+
+
+class SQLiteStore:
+    """
+    SQLite store of account holders with their accounts and cards, one row
+    per holder, account and card, written and read as snapshot.dump_holder()
+    records. The database runs in WAL mode, so readers don't block the writer.
+    Calls are serialized by a lock, the store can be shared between threads.
+    :param path: Database file, created if missing.
+    :param synchronous: SQLite synchronous pragma, NORMAL only syncs at WAL checkpoints.
+    :param cache_mb: Page cache size, the accounts table should fit for fast balance updates.
+    """
+
+    def __init__(self, path: str, synchronous: str = "NORMAL", cache_mb: int = 64):
+        self.path = path
+        # Autocommit, writes open their own transactions.
+        self.db = sqlite3.connect(
+            path, isolation_level=None, check_same_thread=False, cached_statements=256
+        )
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(f"PRAGMA synchronous={synchronous}")
+        self.db.execute(f"PRAGMA cache_size={-cache_mb * 1024}")
+        self.db.executescript(SCHEMA)
+        # Stores written before credit accounts kept their billing cycle.
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(accounts)")}
+        for column, affinity in _BILLING_COLUMNS:
+            if column not in columns:
+                self.db.execute(f"ALTER TABLE accounts ADD COLUMN {column} {affinity}")
+        self._lock = threading.RLock()
+
+    def close(self):
+        with self._lock:
+            self.db.close()
+
+    def __len__(self):
+        with self._lock:
+            return self.db.execute("SELECT COUNT(*) FROM holders").fetchone()[0]
+
+    def __contains__(self, accountholder_id):
+        with self._lock:
+            return (
+                self.db.execute(
+                    "SELECT 1 FROM holders WHERE accountholder_id = ?", (accountholder_id,)
+                ).fetchone()
+                is not None
+            )
+
+    def ids(self) -> list:
+        """
+        Every stored accountholder_id.
+        """
+        with self._lock:
+            return [row[0] for row in self.db.execute("SELECT accountholder_id FROM holders")]
+
+    def existing_cards(self, card_numbers) -> set:
+        """
+        The card numbers of an iterable that are stored already.
+        """
+        card_numbers = list(card_numbers)
+        found = set()
+        with self._lock:
+            # Chunked below SQLite's default limit of 999 bound parameters.
+            for start in range(0, len(card_numbers), 500):
+                chunk = card_numbers[start : start + 500]
+                found.update(
+                    row[0]
+                    for row in self.db.execute(
+                        "SELECT card_number FROM cards WHERE card_number IN "
+                        f"({', '.join('?' * len(chunk))})",
+                        chunk,
+                    )
+                )
+        return found
+
+    @property
+    def meta(self) -> dict:
+        with self._lock:
+            return dict(self.db.execute("SELECT key, value FROM meta"))
+
+    def totals(self, accountholder_id=None) -> dict:
+        """
+        Sum of the stored balances per account type, of one holder or of all.
+        """
+        totals = {"checking": 0, "savings": 0, "credit": 0}
+        query = "SELECT kind, SUM(balance) FROM accounts"
+        args = ()
+        if accountholder_id is not None:
+            query += " WHERE accountholder_id = ?"
+            args = (accountholder_id,)
+        with self._lock:
+            for kind, amount in self.db.execute(query + " GROUP BY kind", args):
+                totals[kind] = amount
+        return totals
+
+    def read(self, accountholder_id):
+        """
+        The snapshot.dump_holder() record of a stored holder, None if it isn't stored.
+        """
+        with self._lock:
+            holder = self.db.execute(
+                "SELECT first_name, last_name FROM holders WHERE accountholder_id = ?",
+                (accountholder_id,),
+            ).fetchone()
+            if holder is None:
+                return None
+            accounts = self.db.execute(
+                "SELECT kind, view, account_id, account_type, owner_id, balance, "
+                "open_date, status, withdrawal_limit, interest_rate, apr_rate, "
+                f"credit_limit, {_BILLING} FROM accounts "
+                "WHERE accountholder_id = ? ORDER BY position",
+                (accountholder_id,),
+            ).fetchall()
+            cards = self.db.execute(
+                "SELECT kind, account_id, holder_firstname, holder_lastname, "
+                "card_number, pin, expiry_date, cvv, status FROM cards "
+                "WHERE accountholder_id = ?",
+                (accountholder_id,),
+            ).fetchall()
+        positions = {(row[0], row[2]): position for position, row in enumerate(accounts)}
+        return (
+            accountholder_id,
+            holder[0],
+            holder[1],
+            [
+                (kind, bool(view), *rest[:10], -1, *rest[10:])
+                for kind, view, *rest in accounts
+            ],
+            [(positions[card[0], card[1]], *card[2:]) for card in cards],
+        )
+
+    def write(self, records):
+        """
+        Insert or replace holders with all of their accounts and cards, in one transaction.
+        :param records: snapshot.dump_holder() records.
+        """
+        self.commit(records=records)
+
+    def delete(self, ids):
+        """
+        Delete holders with their accounts and cards.
+        """
+        self.commit(deleted=ids)
+
+    def commit(self, records=(), balances=(), deleted=()):
+        """
+        Write holders, balance updates and deletions in one transaction. Each
+        kind of row goes through executemany(), one prepared statement per
+        kind (kept in the connection's statement cache) bound once per row.
+        :param records: snapshot.dump_holder() records to insert or replace.
+        :param balances: (balance, accountholder_id, kind, account_id) rows,
+            credit accounts with their billing fields (see
+            snapshot.billing_fields()) after the balance.
+        :param deleted: accountholder_ids to delete.
+        """
+        with self._lock:
+            db = self.db
+            db.execute("BEGIN")
+            try:
+                self._execute(records, balances, deleted)
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+    def _execute(self, records=(), balances=(), deleted=()):
+        """
+        The statements of commit(), run inside the caller's transaction.
+        """
+        holders = []
+        accounts = []
+        cards = []
+        for accountholder_id, first_name, last_name, holder_accounts, holder_cards in records:
+            holders.append((accountholder_id, first_name, last_name))
+            for position, fields in enumerate(holder_accounts):
+                accounts.append(
+                    (
+                        accountholder_id,
+                        fields[0],
+                        fields[2],
+                        position,
+                        fields[1],
+                        *fields[3:12],
+                        *fields[13:],
+                    )
+                )
+            for position, *card in holder_cards:
+                account = holder_accounts[position]
+                cards.append(
+                    (card[2], accountholder_id, account[0], account[2], card[0], card[1], *card[3:])
+                )
+        ids = [(row[0],) for row in holders] + [(i,) for i in deleted]
+        db = self.db
+        db.executemany("DELETE FROM accounts WHERE accountholder_id = ?", ids)
+        db.executemany("DELETE FROM cards WHERE accountholder_id = ?", ids)
+        db.executemany(
+            "DELETE FROM holders WHERE accountholder_id = ?", [(i,) for i in deleted]
+        )
+        db.executemany("INSERT OR REPLACE INTO holders VALUES (?, ?, ?)", holders)
+        db.executemany(
+            f"INSERT INTO accounts ({_ACCOUNT_COLUMNS}) VALUES ({', '.join('?' * 21)})",
+            accounts,
+        )
+        db.executemany(
+            f"INSERT OR REPLACE INTO cards ({_CARD_COLUMNS}) VALUES ({', '.join('?' * 10)})",
+            cards,
+        )
+        db.executemany(
+            "UPDATE accounts SET balance = ? "
+            "WHERE accountholder_id = ? AND kind = ? AND account_id = ?",
+            [row for row in balances if len(row) == 4],
+        )
+        db.executemany(_BILLING_UPDATE, [row for row in balances if len(row) > 4])
+
+    def save(self, bank, batch: int = 10000):
+        """
+        Write every account holder of a bank, along with its institution and
+        cents mode, replacing what the store held in one transaction, a failed
+        save leaves the store as it was.
+        :param bank: Bank object to save, not one opened from this store.
+        :param batch: Holders dumped per executemany() batch.
+        """
+        if bank.working_set is not None and bank.working_set.store is self:
+            raise ValueError("Can't save a bank onto the store it was opened from.")
+        with self._lock:
+            db = self.db
+            db.execute("BEGIN")
+            try:
+                db.execute("DELETE FROM holders")
+                db.execute("DELETE FROM accounts")
+                db.execute("DELETE FROM cards")
+                db.executemany(
+                    "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                    [("institution", bank.institution), ("cents", int(bank.cents))],
+                )
+                records = []
+                for holder in bank.account_holders.values():
+                    records.append(dump_holder(holder))
+                    if len(records) == batch:
+                        self._execute(records)
+                        records = []
+                self._execute(records)
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+
+class Persistence:
+    """
+    Write-behind persistence of a Bank into a SQLiteStore, set as
+    bank.persistence (Bank(persistence=Persistence(store))) on a bank whose
+    holders are in the store already (store.save(bank)). Balance changes are
+    coalesced per account, an account changed many times between flushes is
+    written once with its latest balance (and billing cycle). New holders, accounts and cards,
+    closed accounts and status changes rewrite the holder's record, and
+    removed holders are deleted. Everything pending is written in one
+    transaction once batch_size accounts and holders are pending, or on the
+    first change interval seconds after the previous flush, and on flush().
+    Triggered flushes run on a background thread so transactions don't wait
+    for SQLite, a failed one keeps its changes pending and is kept in
+    self.error. Changes made since the last flush are lost if the process dies,
+    close() flushes and stops the thread.
+    :param store: SQLiteStore to write to.
+    :param batch_size: Pending accounts and holders that trigger a flush.
+    :param interval: Longest time in seconds a change waits for a flush, None for no limit.
+    :param clock: Function returning the time in seconds.
+    :param background: False to flush on the thread making the change that triggers it.
+    """
+
+    def __init__(
+        self,
+        store: SQLiteStore,
+        batch_size: int = 10000,
+        interval: float = 1.0,
+        clock=time.monotonic,
+        background: bool = True,
+    ):
+        self.store = store
+        self.batch_size = batch_size
+        self.interval = interval
+        self.clock = clock
+        # Account -> None, dicts keep the order accounts changed in.
+        self._balances = {}
+        # accountholder_id -> AccountHolder to rewrite.
+        self._holders = {}
+        # accountholder_id -> Bank the holder was removed from.
+        self._removed = {}
+        self._deadline = clock() + interval if interval is not None else None
+        # Guards the pending changes, _flush_lock keeps flushes in order.
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.flushes = 0
+        self.rows = 0
+        self.error = None
+        self._closed = False
+        self._wake = self._flusher = None
+        if background:
+            self._wake = threading.Event()
+            self._flusher = threading.Thread(target=self._run, daemon=True)
+            self._flusher.start()
+
+    def _check(self):
+        if len(self._balances) + len(self._holders) >= self.batch_size or (
+            self._deadline is not None and self.clock() >= self._deadline
+        ):
+            if self._wake is None:
+                self.flush()
+            else:
+                self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            if self._closed:
+                return
+            try:
+                self.flush()
+            except Exception as e:
+                self.error = e
+
+    def balance_changed(self, account):
+        with self._lock:
+            self._balances[account] = None
+        self._check()
+
+    def holder_changed(self, holder):
+        with self._lock:
+            self._holders[holder.accountholder_id] = holder
+        self._check()
+
+    def holder_removed(self, holder):
+        with self._lock:
+            self._removed[holder.accountholder_id] = holder.bank
+        self._check()
+
+    def close(self):
+        """
+        Stop the background thread and write every pending change.
+        """
+        self._closed = True
+        if self._flusher is not None:
+            self._wake.set()
+            self._flusher.join()
+        self.flush()
+
+    def flush(self):
+        """
+        Write every pending change in one transaction.
+        """
+        with self._flush_lock:
+            with self._lock:
+                balances, self._balances = self._balances, {}
+                holders, self._holders = self._holders, {}
+                removed, self._removed = self._removed, {}
+                if self.interval is not None:
+                    self._deadline = self.clock() + self.interval
+            # Replaced holders were removed and registered again, keep those.
+            deleted = [
+                accountholder_id
+                for accountholder_id, bank in removed.items()
+                if accountholder_id not in holders
+                and accountholder_id not in bank.account_holders
+            ]
+            rows = []
+            for account in balances:
+                kind = account._ledger_kind
+                holder_accounts = account._ledger
+                # Closed since, or its holder is rewritten whole anyway.
+                if kind is None or holder_accounts.accountholder_id in holders:
+                    continue
+                key = (holder_accounts.accountholder_id, kind, account.account_id)
+                if kind == "credit":
+                    rows.append((account.balance, *billing_fields(account), *key))
+                else:
+                    rows.append((account.balance, *key))
+            if not (rows or holders or deleted):
+                return
+            try:
+                # In primary key order the updates walk the table's B-tree
+                # once instead of seeking a random page per row.
+                rows.sort(key=itemgetter(-3, -2, -1))
+            except TypeError:
+                pass
+            try:
+                self.store.commit(
+                    [dump_holder(holder) for holder in holders.values()], rows, deleted
+                )
+            except BaseException:
+                # Keep everything pending for the next flush.
+                with self._lock:
+                    balances.update(self._balances)
+                    holders.update(self._holders)
+                    removed.update(self._removed)
+                    self._balances, self._holders, self._removed = (
+                        balances,
+                        holders,
+                        removed,
+                    )
+                raise
+            self.flushes += 1
+            self.rows += len(rows) + len(holders) + len(deleted)
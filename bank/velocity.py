@@ -0,0 +1,294 @@
+"""
+bank.velocity
+~~~~~~~~~~~~~
+This module contains code for per card and per account velocity limits.
+"""
+
+from collections import OrderedDict
+import threading, time
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+
+class VelocityLimit:
+    """
+    Cap on the amount withdrawn and/or the number of withdrawals within a
+    sliding window. The window is tracked in buckets, so it slides one bucket
+    (window / buckets seconds) at a time.
+    :param window: Length of the window in seconds, e.g. velocity.DAY.
+    :param max_amount: Largest total amount withdrawn within the window, None for no cap.
+    :param max_count: Largest number of withdrawals within the window, None for no cap.
+    :param buckets: Number of buckets the window is split into.
+    """
+
+    __slots__ = ("window", "max_amount", "max_count", "buckets", "width")
+
+    def __init__(
+        self, window: float, max_amount=None, max_count: int = None, buckets: int = 24
+    ):
+        if max_amount is None and max_count is None:
+            raise ValueError("A velocity limit needs a max_amount or a max_count.")
+        self.window = window
+        self.max_amount = max_amount
+        self.max_count = max_count
+        self.buckets = buckets
+        self.width = window / buckets
+
+    def __repr__(self):
+        return (
+            f"VelocityLimit(window={self.window}, max_amount={self.max_amount}, "
+            f"max_count={self.max_count})"
+        )
+
+
+class _Window:
+    """
+    Ring of per bucket totals of one key under one limit, with running sums.
+    """
+
+    __slots__ = (
+        "limit",
+        "width",
+        "max_amount",
+        "max_count",
+        "amounts",
+        "counts",
+        "epoch",
+        "index",
+        "until",
+        "amount",
+        "count",
+    )
+
+    def __init__(self, limit: VelocityLimit, now: float):
+        self.limit = limit
+        self.width = limit.width
+        self.max_amount = limit.max_amount
+        self.max_count = limit.max_count
+        self.amounts = [0] * limit.buckets
+        self.counts = [0] * limit.buckets
+        self.amount = 0
+        self.count = 0
+        # Number of the current bucket since the clock's epoch, its position
+        # in the ring and the time the next bucket starts.
+        self.epoch = int(now // self.width)
+        self.index = self.epoch % limit.buckets
+        self.until = (self.epoch + 1) * self.width
+
+    def advance(self, now: float):
+        """
+        Expire the buckets that slid out of the window, each bucket is cleared
+        at most once per pass of the ring so this is O(1) amortized.
+        """
+        amounts = self.amounts
+        counts = self.counts
+        n = len(amounts)
+        epoch = int(now // self.width)
+        steps = epoch - self.epoch
+        if steps >= n:
+            for i in range(n):
+                amounts[i] = 0
+                counts[i] = 0
+        else:
+            for step in range(1, steps + 1):
+                i = (self.epoch + step) % n
+                amounts[i] = 0
+                counts[i] = 0
+        self.epoch = epoch
+        self.index = epoch % n
+        self.until = (epoch + 1) * self.width
+        # Re-summed rather than decremented so float amounts can't drift.
+        self.amount = sum(amounts)
+        self.count = sum(counts)
+
+
+def _add(windows: list, amount, count: int):
+    for window in windows:
+        i = window.index
+        window.amounts[i] += amount
+        window.counts[i] += count
+        window.amount += amount
+        window.count += count
+
+
+class _Entry:
+    __slots__ = ("last_seen", "windows")
+
+    def __init__(self, limits: tuple, now: float):
+        self.last_seen = now
+        self.windows = [_Window(limit, now) for limit in limits]
+
+
+def _account_key(account) -> tuple:
+    """
+    Key an account's counters are kept under, (accountholder_id, account_id),
+    so they follow the account across working set reloads and replays.
+    """
+    return account.holder_accounts.accountholder_id, account.account_id
+
+
+class VelocityLimits:
+    """
+    Velocity limits checked by Bank withdrawals (withdrawal_transaction,
+    withdrawal_result and process_batch) when set as bank.velocity. Counters
+    are kept per card number and per (accountholder_id, account_id), checking and counting a
+    withdrawal is O(limits) amortized. Entries are kept least recently used
+    first, ones idle for longer than the longest window hold nothing and are
+    dropped from the front as new keys arrive (see expire() for a full sweep).
+    At most max_entries keys per scope are kept. An entry still inside its
+    window is never dropped, it may be what holds a card at its cap, so when
+    every entry is live a new key fails closed: its withdrawals are declined
+    with no limit named until an entry goes idle.
+    Each window costs about 2 * buckets * 8 bytes per key.
+    :param card: VelocityLimit objects applied to each card.
+    :param account: VelocityLimit objects applied to each account.
+    :param max_entries: Most cards (and most accounts) tracked at once.
+    :param clock: Function returning the time in seconds.
+    """
+
+    def __init__(
+        self,
+        card=(),
+        account=(),
+        max_entries: int = 1000000,
+        clock=time.monotonic,
+    ):
+        self.card_limits = tuple(card)
+        self.account_limits = tuple(account)
+        self.max_entries = max_entries
+        self.clock = clock
+        self._cards = OrderedDict()
+        self._accounts = OrderedDict()
+        # Entries idle for this long have every bucket expired.
+        self._idle = max(
+            [limit.window for limit in self.card_limits + self.account_limits] or [0]
+        )
+        # Guards inserts and evictions, a key's counters are guarded by the
+        # bank's lock stripe of its account.
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._cards) + len(self._accounts)
+
+    def _entry(self, entries: OrderedDict, key, limits: tuple, now: float) -> _Entry:
+        """
+        Entry of a key marked most recently used, created if needed. None
+        when the key is new and every entry is still inside its window.
+        """
+        entry = entries.get(key)
+        if entry is not None:
+            entry.last_seen = now
+            try:
+                entries.move_to_end(key)
+                return entry
+            except KeyError:
+                # Dropped as idle since the lookup, so it held nothing.
+                pass
+        return self._insert(entries, key, limits, now)
+
+    def _insert(self, entries: OrderedDict, key, limits: tuple, now: float) -> _Entry:
+        with self._lock:
+            entry = entries.get(key)
+            if entry is not None:
+                entry.last_seen = now
+                entries.move_to_end(key)
+                return entry
+            while entries and now - next(iter(entries.values())).last_seen >= self._idle:
+                entries.popitem(last=False)
+            if len(entries) >= self.max_entries:
+                return None
+            entry = entries[key] = _Entry(limits, now)
+            return entry
+
+    def allow(self, card_number: str, account, amount, now: float, count: bool = True):
+        """
+        Count a withdrawal if it fits every limit of its card and account.
+        Returns None if it was counted, otherwise the ("card" or "account",
+        VelocityLimit) it would breach, with None for the limit when the
+        card or account is new and its table is full.
+        :param card_number: Card number making the withdrawal.
+        :param account: Account being withdrawn from.
+        :param amount: Amount to withdraw.
+        :param now: Time from clock().
+        :param count: False to only check the withdrawal, e.g. for an authorization.
+        """
+        windows = []
+        if self.card_limits:
+            entry = self._entry(self._cards, card_number, self.card_limits, now)
+            if entry is None:
+                return "card", None
+            windows += entry.windows
+        card_windows = len(windows)
+        if self.account_limits:
+            entry = self._entry(
+                self._accounts, _account_key(account), self.account_limits, now
+            )
+            if entry is None:
+                return "account", None
+            windows += entry.windows
+        # Inlined, this runs on every withdrawal.
+        for position, window in enumerate(windows):
+            if now >= window.until:
+                window.advance(now)
+            if (
+                window.max_amount is not None
+                and window.amount + amount > window.max_amount
+            ) or (window.max_count is not None and window.count >= window.max_count):
+                return "card" if position < card_windows else "account", window.limit
+        if not count:
+            return None
+        for window in windows:
+            i = window.index
+            window.amounts[i] += amount
+            window.counts[i] += 1
+            window.amount += amount
+            window.count += 1
+        return None
+
+    def release(self, card_number: str, account, amount):
+        """
+        Take back a withdrawal counted by allow() that was then declined.
+        """
+        entry = self._cards.get(card_number)
+        if entry is not None:
+            _add(entry.windows, -amount, -1)
+        if self.account_limits:
+            entry = self._accounts.get(_account_key(account))
+            if entry is not None:
+                _add(entry.windows, -amount, -1)
+
+    def usage(self, card_number: str = None, account=None) -> list:
+        """
+        Amount and count used in each window of a card or an account, as
+        [(VelocityLimit, amount, count), ...].
+        """
+        if card_number is not None:
+            entries, key, limits = self._cards, card_number, self.card_limits
+        else:
+            entries, key, limits = self._accounts, _account_key(account), self.account_limits
+        entry = entries.get(key)
+        if entry is None:
+            return [(limit, 0, 0) for limit in limits]
+        now = self.clock()
+        usage = []
+        for window in entry.windows:
+            if now >= window.until:
+                window.advance(now)
+            usage.append((window.limit, window.amount, window.count))
+        return usage
+
+    def expire(self):
+        """
+        Drop every entry that has been idle for longer than the longest window, O(entries).
+        """
+        now = self.clock()
+        with self._lock:
+            for entries in (self._cards, self._accounts):
+                for key in [
+                    key
+                    for key, entry in entries.items()
+                    if now - entry.last_seen >= self._idle
+                ]:
+                    del entries[key]
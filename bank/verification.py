@@ -0,0 +1,315 @@
+"""
+bank.verification
+~~~~~~~~~~~~~~~~~
+This module contains code for hashing card PINs and verifying cards.
+"""
+
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from .exceptions import VerificationFailed
+from .status import TransactionStatus
+import hashlib, hmac, os, threading, time
+
+ALGORITHM = "pbkdf2_sha256"
+# About 50ms per PIN on a current core, see benchmarks/verification_benchmark.py.
+ITERATIONS = 100000
+SALT_BYTES = 16
+
+
+def hash_pin(pin, iterations: int = ITERATIONS, salt: bytes = None) -> str:
+    """
+    Salted PBKDF2-SHA256 hash of a PIN, as "pbkdf2_sha256$iterations$salt$hash"
+    so it can be stored as a card's pin in place of the plaintext.
+    :param pin: PIN to hash.
+    :param iterations: KDF iterations, the cost of every check.
+    :param salt: Salt, random if not given.
+    """
+    if salt is None:
+        salt = os.urandom(SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac("sha256", str(pin).encode(), salt, iterations)
+    return f"{ALGORITHM}${iterations}${salt.hex()}${digest.hex()}"
+
+
+def is_pin_hash(value) -> bool:
+    return isinstance(value, str) and value.startswith(ALGORITHM + "$")
+
+
+def check_pin(pin, stored) -> bool:
+    """
+    Whether a PIN matches a stored hash_pin() hash, in constant time. A
+    stored plaintext PIN (a card that hasn't been enrolled) is compared directly.
+    :param pin: PIN sent in with the request.
+    :param stored: The card's stored PIN.
+    """
+    if not is_pin_hash(stored):
+        return hmac.compare_digest(str(pin).encode(), str(stored).encode())
+    try:
+        _, iterations, salt, digest = stored.split("$")
+        iterations = int(iterations)
+        salt = bytes.fromhex(salt)
+        digest = bytes.fromhex(digest)
+    except ValueError:
+        return False
+    return hmac.compare_digest(
+        hashlib.pbkdf2_hmac("sha256", str(pin).encode(), salt, iterations), digest
+    )
+
+
+def hash_pins(pins: list, iterations: int = ITERATIONS) -> list:
+    """
+    hash_pin() of each PIN, e.g. for the pin column of Bank.bulk_load().
+    """
+    return [hash_pin(pin, iterations) for pin in pins]
+
+
+class SessionCache:
+    """
+    Verified card sessions, (card_number, terminal) -> tag of the PIN they were
+    verified with. A session expires ttl seconds after its verification and
+    the least recently used one is evicted beyond max_sessions.
+    :param ttl: Lifetime of a session in seconds.
+    :param max_sessions: Most sessions kept at once.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_sessions: int = 100000):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        # key -> (expires, tag), least recently used first.
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def get(self, key: tuple, now: float):
+        """
+        Tag of a live session, None if there is none or it has expired.
+        """
+        with self._lock:
+            entry = self._sessions.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._sessions[key]
+                return None
+            self._sessions.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: tuple, tag: bytes, now: float):
+        with self._lock:
+            self._sessions[key] = (now + self.ttl, tag)
+            self._sessions.move_to_end(key)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def discard(self, key: tuple):
+        with self._lock:
+            self._sessions.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+
+class CardVerifier:
+    """
+    Verifies the PIN, expiry date and CVV of a bank's cards on every
+    authorization. PINs are kept only as salted hashes (see enroll()) and the
+    KDF runs in a process pool, so a slow check doesn't hold the GIL of the
+    process running transactions. Successful verifications are cached per
+    (card, terminal) session, a later authorization in the session with the
+    same PIN skips the KDF. The card's status, expiry and CVV are checked every
+    time, so locking a card ends its sessions. Sessions store an HMAC of the
+    PIN under a per verifier random key, never the PIN.
+    :param bank: Bank object whose cards are verified.
+    :param processes: Size of the KDF process pool, None for one per core, 0
+        to run the KDF in the calling thread.
+    :param ttl: Lifetime of a verified session in seconds.
+    :param max_sessions: Most sessions cached at once, least recently used evicted first.
+    :param iterations: KDF iterations of PINs hashed by enroll().
+    :param clock: Function returning the time in seconds.
+    """
+
+    def __init__(
+        self,
+        bank,
+        processes: int = None,
+        ttl: float = 300.0,
+        max_sessions: int = 100000,
+        iterations: int = ITERATIONS,
+        clock=time.monotonic,
+    ):
+        self.bank = bank
+        self.processes = processes
+        self.iterations = iterations
+        self.clock = clock
+        self.sessions = SessionCache(ttl, max_sessions)
+        self._key = os.urandom(32)
+        self._pool = None
+        # Verifications settled by a session, and PINs checked with the KDF.
+        self.hits = 0
+        self.kdf_checks = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """
+        Shut the process pool down.
+        """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.processes)
+        return self._pool
+
+    def enroll(self, cards=None, chunk_size: int = 1000) -> int:
+        """
+        Replace plaintext PINs with hash_pin() hashes, hashed in the process
+        pool. Returns the number of cards enrolled. The bank is told of every
+        new hash, so it is journaled and written to its store, and a replayed
+        or reopened bank keeps it. Journal records and snapshots written
+        before enrolling still hold the plaintext, pass hashes as the pin when
+        issuing cards to never store one.
+        :param cards: Card objects, every card of the bank by default (those in
+            a working set's store included, faulted in and kept until done).
+        :param chunk_size: PINs hashed per pool task.
+        """
+        bank = self.bank
+        with bank._pinned():
+            if cards is None:
+                cards = [
+                    card
+                    for holder in bank.account_holders.values()
+                    for card in holder.cards.values()
+                ]
+            cards = [card for card in cards if not is_pin_hash(card._Card__pin)]
+            pins = [card._Card__pin for card in cards]
+            if self.processes == 0:
+                hashed = hash_pins(pins, self.iterations)
+            else:
+                chunks = [pins[i : i + chunk_size] for i in range(0, len(pins), chunk_size)]
+                hashed = [
+                    pin
+                    for chunk in self._executor().map(
+                        hash_pins, chunks, [self.iterations] * len(chunks)
+                    )
+                    for pin in chunk
+                ]
+            for card, pin in zip(cards, hashed):
+                card._Card__pin = pin
+                bank._card_pin_changed(card)
+        return len(cards)
+
+    def _begin(self, card_number: str, pin, expiry: str, cvv: str, terminal):
+        """
+        The checks that don't need the KDF. Returns True or False if they
+        settle the verification, otherwise (stored pin, session key, pin tag).
+        """
+        card = self.bank.card_index.get(card_number)
+        if card is None:
+            card = self.bank._find_card(card_number)
+            if card.__class__ is TransactionStatus:
+                return False
+        if card.status != "active" or expiry != card.expiry_date or cvv != card.cvv:
+            return False
+        key = (card_number, terminal)
+        tag = hmac.new(self._key, str(pin).encode(), hashlib.sha256).digest()
+        cached = self.sessions.get(key, self.clock())
+        if cached is not None and hmac.compare_digest(cached, tag):
+            self.hits += 1
+            return True
+        self.kdf_checks += 1
+        return card._Card__pin, key, tag
+
+    def _finish(self, key: tuple, tag: bytes, verified: bool) -> bool:
+        if verified:
+            self.sessions.put(key, tag, self.clock())
+        else:
+            # A wrong PIN ends the session.
+            self.sessions.discard(key)
+        return verified
+
+    def verify(self, card_number: str, pin, expiry: str, cvv: str, terminal=None) -> bool:
+        """
+        Verify a card for an authorization, blocking until the KDF is done.
+        :param card_number: Card number of the card.
+        :param pin: Pin sent in with the request.
+        :param expiry: Expiry date sent in with the request.
+        :param cvv: CVV sent in with the request.
+        :param terminal: Terminal (or any session id) the card is used at.
+        """
+        state = self._begin(card_number, pin, expiry, cvv, terminal)
+        if state is True or state is False:
+            return state
+        stored, key, tag = state
+        if self.processes == 0 or not is_pin_hash(stored):
+            return self._finish(key, tag, check_pin(pin, stored))
+        return self._finish(key, tag, self._executor().submit(check_pin, pin, stored).result())
+
+    def submit(self, card_number: str, pin, expiry: str, cvv: str, terminal=None) -> Future:
+        """
+        verify() without blocking, returns a Future of its result, e.g. for
+        asyncio.wrap_future(). Cached sessions and failed checks come back done.
+        """
+        result = Future()
+        state = self._begin(card_number, pin, expiry, cvv, terminal)
+        if state is True or state is False:
+            result.set_result(state)
+            return result
+        stored, key, tag = state
+        if self.processes == 0 or not is_pin_hash(stored):
+            result.set_result(self._finish(key, tag, check_pin(pin, stored)))
+            return result
+
+        def done(future):
+            try:
+                result.set_result(self._finish(key, tag, future.result()))
+            except Exception as e:
+                result.set_exception(e)
+
+        self._executor().submit(check_pin, pin, stored).add_done_callback(done)
+        return result
+
+    def verify_many(self, requests) -> list:
+        """
+        verify() many (card_number, pin, expiry, cvv, terminal) requests, the
+        KDF checks running in parallel across the pool. Returns a bool per request.
+        """
+        futures = [self.submit(*request) for request in requests]
+        return [future.result() for future in futures]
+
+    def _authorized(self, transaction, card_number: str, amount, pin, expiry, cvv, terminal):
+        if self.verify(card_number, pin, expiry, cvv, terminal):
+            return transaction(card_number, amount)
+        if self.bank._resolve_card(card_number).__class__ is TransactionStatus:
+            # Unknown cards are reported as the bank reports them.
+            return transaction(card_number, amount)
+        return {"status": False, "error": VerificationFailed(card_number)}
+
+    def withdrawal_transaction(
+        self, card_number: str, amount, pin, expiry: str, cvv: str, terminal=None
+    ) -> dict:
+        """
+        Bank.withdrawal_transaction() after verifying the card, a failed
+        verification returns {"status": False, "error": VerificationFailed}.
+        """
+        return self._authorized(
+            self.bank.withdrawal_transaction, card_number, amount, pin, expiry, cvv, terminal
+        )
+
+    def deposit_transaction(
+        self, card_number: str, amount, pin, expiry: str, cvv: str, terminal=None
+    ) -> dict:
+        """
+        Bank.deposit_transaction() after verifying the card.
+        """
+        return self._authorized(
+            self.bank.deposit_transaction, card_number, amount, pin, expiry, cvv, terminal
+        )
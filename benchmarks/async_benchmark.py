@@ -0,0 +1,44 @@
+"""
+p50/p99 latency of AsyncBank at a target request rate, using the local
+open-loop load generator.
+
+    python benchmarks/async_benchmark.py --rate 20000 --duration 5
+"""
+
+import argparse
+import asyncio
+import os, sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from bank.async_bank import AsyncBank, generate_load
+from batch_benchmark import populate
+
+
+async def run(args):
+    bank = populate(args.holders)
+    cards = [f"40001|{i}1-checking-1" for i in range(args.holders)]
+    async with AsyncBank(bank, max_batch=args.max_batch) as async_bank:
+        return await generate_load(async_bank, cards, args.rate, args.duration)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--holders", type=int, default=10000)
+    parser.add_argument("--rate", type=float, default=10000)
+    parser.add_argument("--duration", type=float, default=3)
+    parser.add_argument("--max-batch", type=int, default=512)
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    report = loop.run_until_complete(run(args))
+    loop.close()
+    print(f"target:     {report['target_rate']:,.0f} req/s")
+    print(f"achieved:   {report['achieved_rate']:,.0f} req/s")
+    print(f"p50:        {report['p50'] * 1e3:.2f} ms")
+    print(f"p99:        {report['p99'] * 1e3:.2f} ms")
+    print(f"mean batch: {report['mean_batch']:.1f} requests")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Throughput of Bank.process_batch() against the single call
+Bank.withdrawal_transaction()/deposit_transaction() path.
+
+    python benchmarks/batch_benchmark.py --holders 10000 --rows 500000
+"""
+
+import argparse
+import os, sys
+import random
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from bank.accounts import CheckingAccount
+from bank.account_holder import AccountHolder
+from bank.banks import Bank
+from bank.cards import Card
+
+
+def populate(holders: int) -> Bank:
+    bank = Bank()
+    for i in range(holders):
+        ah = AccountHolder(bank, f"{i}1", "Mathias", "Cormann")
+        ac = CheckingAccount(
+            f"{i}1-checking-1", "checking", ah.accounts, f"{i}1", opening_balance=1000.00
+        )
+        Card(
+            ah,
+            ac,
+            "Mathias",
+            "Cormann",
+            f"40001|{i}1-checking-1",
+            "0101",
+            "12-12-2024",
+            "432",
+            "active",
+        )
+    return bank
+
+
+def workload(holders: int, rows: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    return [
+        (
+            f"40001|{rng.randrange(holders)}1-checking-1",
+            float(rng.randrange(1, 200)),
+            "withdraw" if rng.random() < 0.6 else "deposit",
+        )
+        for _ in range(rows)
+    ]
+
+
+def single_call(bank: Bank, rows: list) -> float:
+    start = time.perf_counter()
+    for card_number, amount, kind in rows:
+        if kind == "withdraw":
+            bank.withdrawal_transaction(card_number, amount)
+        else:
+            bank.deposit_transaction(card_number, amount)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--holders", type=int, default=10000)
+    parser.add_argument("--rows", type=int, default=200000)
+    args = parser.parse_args()
+
+    rows = workload(args.holders, args.rows)
+    single = single_call(populate(args.holders), rows)
+    batch_bank = populate(args.holders)
+    start = time.perf_counter()
+    result = batch_bank.process_batch(rows)
+    batch = time.perf_counter() - start
+    print(f"rows:        {args.rows}")
+    print(f"single call: {args.rows / single:,.0f} rows/s")
+    print(f"batch:       {args.rows / batch:,.0f} rows/s ({single / batch:.1f}x)")
+    print(result)
+
+
+if __name__ == "__main__":
+    main()
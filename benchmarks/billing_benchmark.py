@@ -0,0 +1,78 @@
+"""
+Daily billing runs of a bank of credit accounts with open dates spread over a
+month: bank.close_cycles() closing one cycle day bucket a day in a columnar
+batch, against scanning every account every day for statements to close.
+
+    python benchmarks/billing_benchmark.py --accounts 1000000 --days 31
+"""
+
+import argparse
+import datetime
+import os, sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from bank.banks import Bank
+from bank.billing import BillingScheduler, next_statement_date, statement
+
+
+def populate(accounts: int) -> Bank:
+    bank = Bank(billing=BillingScheduler())
+    ids = [f"{i}1" for i in range(accounts)]
+    bank.bulk_load(
+        {
+            "accountholder_id": ids,
+            "first_name": ["Mathias"] * accounts,
+            "last_name": ["Cormann"] * accounts,
+        },
+        {
+            "accountholder_id": ids,
+            "account_id": [f"{i}-credit-1" for i in ids],
+            "kind": ["credit"] * accounts,
+            "balance": [-float(i % 5000) for i in range(accounts)],
+            "open_date": [datetime.date(2024, 1, 1 + i % 28) for i in range(accounts)],
+        },
+    )
+    return bank
+
+
+def scan(bank: Bank, day: datetime.date) -> int:
+    closed = 0
+    for holder in bank.account_holders.values():
+        for account in holder.accounts.credit_accounts.values():
+            if account.billing_end <= day:
+                account.statement_balance, account.minimum_due = statement(account)
+                account.billing_end = next_statement_date(day, account.cycle_day)
+                closed += 1
+    return closed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--accounts", type=int, default=1000000)
+    parser.add_argument("--days", type=int, default=31)
+    args = parser.parse_args()
+
+    days = [datetime.date(2024, 2, 1) + datetime.timedelta(days=i) for i in range(args.days)]
+    for name, run in (
+        ("bucketed", lambda bank, day: bank.close_cycles(day)["statements"]),
+        ("full scan", scan),
+    ):
+        bank = populate(args.accounts)
+        statements = 0
+        slowest = 0.0
+        start = time.perf_counter()
+        for day in days:
+            began = time.perf_counter()
+            statements += run(bank, day)
+            slowest = max(slowest, time.perf_counter() - began)
+        seconds = time.perf_counter() - start
+        print(
+            f"{name:>9}: {statements:,} statements over {args.days} days in {seconds:.2f}s, "
+            f"{seconds / args.days * 1000:,.0f} ms/day, slowest day {slowest * 1000:,.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Card lookups per second through the bank-wide card index against parsing the
+account holder id out of the card number and walking holder -> cards -> account.
+
+    python benchmarks/card_index_benchmark.py --holders 100000 --lookups 1000000
+"""
+
+import argparse
+import os, sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from batch_benchmark import populate, workload
+
+
+def parsed_lookup(bank, card_numbers: list) -> float:
+    # How withdrawal_transaction()/deposit_transaction() found the account before the index.
+    account_holders = bank.account_holders
+    start = time.perf_counter()
+    for card_number in card_numbers:
+        account_holders.get(card_number.split("|")[1].split("-")[0], False).cards[
+            card_number
+        ].account
+    return time.perf_counter() - start
+
+
+def indexed_lookup(bank, card_numbers: list) -> float:
+    card_index = bank.card_index
+    start = time.perf_counter()
+    for card_number in card_numbers:
+        card_index[card_number].account
+    return time.perf_counter() - start
+
+
+def transactions(bank, card_numbers: list) -> float:
+    start = time.perf_counter()
+    for card_number in card_numbers:
+        bank.deposit_transaction(card_number, 1.00)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--holders", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=1000000)
+    args = parser.parse_args()
+
+    bank = populate(args.holders)
+    card_numbers = [row[0] for row in workload(args.holders, args.lookups)]
+    parsed = parsed_lookup(bank, card_numbers)
+    indexed = indexed_lookup(bank, card_numbers)
+    elapsed = transactions(bank, card_numbers)
+    print(f"holders:  {args.holders}")
+    print(f"lookups:  {args.lookups}")
+    for name, seconds in (("parsed", parsed), ("indexed", indexed)):
+        print(
+            f"{name + ':':<9} {args.lookups / seconds:,.0f} lookups/s "
+            f"({seconds / args.lookups * 1e9:,.0f} ns each)"
+        )
+    print(f"speedup:  {parsed / indexed:.1f}x")
+    print(f"deposits: {args.lookups / elapsed:,.0f} transactions/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Throughput of the raising withdrawal_transaction() against the exception-free
+withdrawal_result() when most withdrawals are declined, e.g. a fraud storm.
+
+    python benchmarks/decline_benchmark.py --holders 10000 --rows 500000 --decline-ratio 0.9
+"""
+
+import argparse
+import os, sys
+import random
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from batch_benchmark import populate
+from bank.status import TransactionResult
+
+
+def workload(holders: int, rows: int, decline_ratio: float, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    # Balances are 1000.00 and the limit 5000, declines are overdrafts or over the limit.
+    return [
+        (
+            f"40001|{rng.randrange(holders)}1-checking-1",
+            rng.choice((2000.00, 6000.00)) if rng.random() < decline_ratio else 0.01,
+        )
+        for _ in range(rows)
+    ]
+
+
+def raising(bank, rows: list) -> float:
+    start = time.perf_counter()
+    for card_number, amount in rows:
+        bank.withdrawal_transaction(card_number, amount)
+    return time.perf_counter() - start
+
+
+def result_codes(bank, rows: list) -> float:
+    result = TransactionResult()
+    start = time.perf_counter()
+    for card_number, amount in rows:
+        bank.withdrawal_result(card_number, amount, result)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--holders", type=int, default=10000)
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--decline-ratio", type=float, default=0.9)
+    args = parser.parse_args()
+
+    rows = workload(args.holders, args.rows, args.decline_ratio)
+    exceptions = raising(populate(args.holders), rows)
+    codes = result_codes(populate(args.holders), rows)
+    print(f"rows:            {args.rows} ({args.decline_ratio:.0%} declined)")
+    print(f"exceptions:      {args.rows / exceptions:,.0f} tx/s")
+    print(f"result codes:    {args.rows / codes:,.0f} tx/s ({exceptions / codes:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
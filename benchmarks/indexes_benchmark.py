@@ -0,0 +1,138 @@
+"""
+Operational queries through Bank(indexed=True) indexes against scanning every
+account holder, and the cost the indexes add to each transaction.
+
+    python benchmarks/indexes_benchmark.py --holders 100000 --rows 200000
+"""
+
+import argparse
+import os, sys
+import datetime
+import random
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from bank.accounts import CheckingAccount, SavingsAccount
+from bank.account_holder import AccountHolder
+from bank.banks import Bank
+from bank.cards import Card
+from batch_benchmark import workload
+
+
+def populate(holders: int, indexed: bool) -> Bank:
+    rng = random.Random(0)
+    bank = Bank(indexed=indexed)
+    start = datetime.date(2020, 1, 1)
+    for i in range(holders):
+        ah = AccountHolder(bank, f"{i}1", "Mathias", "Cormann")
+        open_date = start + datetime.timedelta(days=rng.randrange(1500))
+        ac = CheckingAccount(
+            f"{i}1-checking-1",
+            "checking",
+            ah.accounts,
+            f"{i}1",
+            opening_balance=1000.00,
+            open_date=open_date,
+        )
+        SavingsAccount(
+            f"{i}1-savings-1",
+            "savings",
+            ah.accounts,
+            f"{i}1",
+            opening_balance=float(rng.randrange(200000)),
+            open_date=open_date,
+            status="frozen" if rng.random() < 0.001 else "open",
+        )
+        Card(
+            ah,
+            ac,
+            "Mathias",
+            "Cormann",
+            f"40001|{i}1-checking-1",
+            "0101",
+            "12-12-2024",
+            "432",
+            "active",
+        )
+    return bank
+
+
+def scan(bank: Bank, predicate) -> list:
+    return [
+        account
+        for holder in bank.account_holders.values()
+        for registry in (
+            holder.accounts.checking_accounts,
+            holder.accounts.saving_accounts,
+            holder.accounts.credit_accounts,
+        )
+        for account in registry.values()
+        if predicate(account)
+    ]
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, len(result)
+
+
+def transactions(bank: Bank, rows: list) -> float:
+    start = time.perf_counter()
+    for card_number, amount, kind in rows:
+        if kind == "withdraw":
+            bank.withdrawal_transaction(card_number, amount)
+        else:
+            bank.deposit_transaction(card_number, amount)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--holders", type=int, default=100000)
+    parser.add_argument("--rows", type=int, default=200000)
+    args = parser.parse_args()
+
+    plain = populate(args.holders, False)
+    indexed = populate(args.holders, True)
+    indexes = indexed.indexes
+    month = (datetime.date(2022, 3, 1), datetime.date(2022, 4, 1))
+    queries = (
+        (
+            "frozen accounts",
+            lambda: scan(plain, lambda a: a.status == "frozen"),
+            lambda: indexes.by_status("frozen"),
+        ),
+        (
+            "savings over $199k",
+            lambda: scan(
+                plain, lambda a: a.account_type == "savings" and a.balance >= 199000
+            ),
+            lambda: indexes.balance_between(199000, account_type="savings"),
+        ),
+        (
+            "opened in a month",
+            lambda: scan(plain, lambda a: month[0] <= a.open_date < month[1]),
+            lambda: indexes.opened_between(*month),
+        ),
+    )
+    print(f"holders: {args.holders} ({len(indexes)} accounts)")
+    for name, scanned, looked_up in queries:
+        scan_seconds, found = timed(scanned)
+        index_seconds, _ = timed(looked_up)
+        print(
+            f"{name:<20} {found:>7} results  scan {scan_seconds * 1000:8.2f} ms  "
+            f"index {index_seconds * 1000:8.3f} ms"
+        )
+    rows = workload(args.holders, args.rows)
+    plain_seconds = transactions(plain, rows)
+    indexed_seconds = transactions(indexed, rows)
+    print(
+        f"transactions: {args.rows / plain_seconds:,.0f} tx/s plain, "
+        f"{args.rows / indexed_seconds:,.0f} tx/s indexed"
+    )
+
+
+if __name__ == "__main__":
+    main()
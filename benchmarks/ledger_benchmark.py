@@ -0,0 +1,49 @@
+"""
+Bytes per account of CheckingAccount objects against LedgerStore backed
+CheckingAccountView objects, measured with tracemalloc.
+
+    python benchmarks/ledger_benchmark.py --accounts 100000
+"""
+
+import argparse
+import os, sys
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from bank.accounts import CheckingAccount
+from bank.account_holder import AccountHolder
+from bank.banks import Bank
+from bank.ledger import LedgerStore, CheckingAccountView
+
+
+def bytes_per_account(account_class, accounts: int, ledger=None) -> float:
+    bank = Bank(ledger=ledger)
+    holder = AccountHolder(bank, "101", "Mathias", "Cormann")
+    # Pre-build the ids so only the accounts themselves are measured.
+    ids = [f"101-checking-{i}" for i in range(accounts)]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for account_id in ids:
+        account_class(
+            account_id, "checking", holder.accounts, "101", opening_balance=1000.00
+        )
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / accounts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--accounts", type=int, default=100000)
+    args = parser.parse_args()
+
+    objects = bytes_per_account(CheckingAccount, args.accounts)
+    views = bytes_per_account(CheckingAccountView, args.accounts, LedgerStore())
+    print(f"accounts:        {args.accounts}")
+    print(f"CheckingAccount: {objects:,.0f} bytes/account")
+    print(f"LedgerStore:     {views:,.0f} bytes/account ({objects / views:.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Memory held per account holder with 3 accounts and 4 cards each, measured with
+tracemalloc.
+
+    python benchmarks/memory_benchmark.py --holders 1000000
+"""
+
+import argparse
+import os, sys
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from bank.accounts import CheckingAccount, SavingsAccount, CreditAccount
+from bank.account_holder import AccountHolder
+from bank.banks import Bank
+from bank.cards import Card
+
+
+def populate(bank: Bank, holders: int):
+    for i in range(holders):
+        accountholder_id = f"{i}1"
+        ah = AccountHolder(bank, accountholder_id, "Mathias", "Cormann")
+        accounts = (
+            CheckingAccount(
+                f"{accountholder_id}-checking-1",
+                "checking",
+                ah.accounts,
+                accountholder_id,
+                opening_balance=1000.00,
+            ),
+            SavingsAccount(
+                f"{accountholder_id}-savings-1",
+                "savings",
+                ah.accounts,
+                accountholder_id,
+                opening_balance=1000.00,
+            ),
+            CreditAccount(
+                f"{accountholder_id}-credit-1", "credit", ah.accounts, accountholder_id
+            ),
+        )
+        for n, account in enumerate(accounts + accounts[:1]):
+            Card(
+                ah,
+                account,
+                "Mathias",
+                "Cormann",
+                f"4000{n}|{account.account_id}",
+                "0101",
+                "12-12-2024",
+                "432",
+                "active",
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--holders", type=int, default=1000000)
+    args = parser.parse_args()
+
+    bank = Bank()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    populate(bank, args.holders)
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    total = after - before
+    print(f"holders:      {args.holders} (3 accounts, 4 cards each)")
+    print(f"traced:       {total / 2 ** 20:,.1f} MiB (peak {peak / 2 ** 20:,.1f} MiB)")
+    print(f"per holder:   {total / args.holders:,.0f} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Cost of transaction metrics: single call throughput with metrics off
+(bank.metrics = None) and on, then the per stage latencies collected.
+
+    python benchmarks/metrics_benchmark.py --holders 10000 --rows 200000
+"""
+
+import argparse
+import os, sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from batch_benchmark import populate, single_call, workload
+from bank.metrics import Metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--holders", type=int, default=10000)
+    parser.add_argument("--rows", type=int, default=200000)
+    args = parser.parse_args()
+
+    rows = workload(args.holders, args.rows)
+    metrics = Metrics()
+    for label, bank_metrics in (("metrics off", None), ("metrics on", metrics)):
+        bank = populate(args.holders)
+        bank.metrics = bank_metrics
+        seconds = single_call(bank, rows)
+        print(f"{label:<12} {args.rows / seconds:>12,.0f} tx/s")
+    print()
+    for key, summary in sorted(metrics.snapshot()["stages"].items()):
+        print(
+            f"{key:<26} n={summary['count']:<8} p50 {summary['p50'] * 1e6:6.2f}us  "
+            f"p99 {summary['p99'] * 1e6:6.2f}us  max {summary['max'] * 1e6:8.2f}us"
+        )
+    print()
+    for key, count in sorted(metrics.snapshot()["declines"].items()):
+        print(f"{key:<40} {count}")
+
+
+if __name__ == "__main__":
+    main()
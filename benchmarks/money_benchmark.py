@@ -0,0 +1,106 @@
+"""
+Transaction throughput and exactness of float balances, Decimal balances and
+integer cents (Bank(cents=True)), plus the cost of summing every balance.
+
+    python benchmarks/money_benchmark.py --holders 10000 --rows 500000
+"""
+
+import argparse
+import os, sys
+import random
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from bank.accounts import CheckingAccount
+from bank.account_holder import AccountHolder
+from bank.banks import Bank
+from bank.cards import Card
+from bank.money import from_cents
+
+
+def populate(holders: int, money, cents: bool = False) -> Bank:
+    bank = Bank(cents=cents)
+    for i in range(holders):
+        ah = AccountHolder(bank, f"{i}1", "Mathias", "Cormann")
+        ac = CheckingAccount(
+            f"{i}1-checking-1", "checking", ah.accounts, f"{i}1", money(100000)
+        )
+        Card(
+            ah,
+            ac,
+            "Mathias",
+            "Cormann",
+            f"40001|{i}1-checking-1",
+            "0101",
+            "12-12-2024",
+            "432",
+            "active",
+        )
+    return bank
+
+
+def run(bank: Bank, card_numbers: list, amounts: list, kinds: list) -> tuple:
+    start = time.perf_counter()
+    for card_number, amount, kind in zip(card_numbers, amounts, kinds):
+        if kind == "withdraw":
+            bank.withdrawal_transaction(card_number, amount)
+        else:
+            bank.deposit_transaction(card_number, amount)
+    single = time.perf_counter() - start
+    start = time.perf_counter()
+    bank.process_batch(
+        {"card_number": card_numbers, "amount": amounts, "kind": kinds}
+    )
+    batch = time.perf_counter() - start
+    start = time.perf_counter()
+    total = sum(
+        holder.accounts._recompute_totals()["checking"]
+        for holder in bank.account_holders.values()
+    )
+    summed = time.perf_counter() - start
+    return single, batch, summed, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--holders", type=int, default=10000)
+    parser.add_argument("--rows", type=int, default=500000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    card_numbers = [
+        f"40001|{rng.randrange(args.holders)}1-checking-1" for _ in range(args.rows)
+    ]
+    # Amounts in cents, so every mode sees the same amounts.
+    cents = [rng.randrange(1, 20000) for _ in range(args.rows)]
+    kinds = ["withdraw" if rng.random() < 0.5 else "deposit" for _ in range(args.rows)]
+
+    modes = (
+        ("float", float, [c / 100 for c in cents], False),
+        ("Decimal", Decimal, [Decimal(c).scaleb(-2) for c in cents], False),
+        ("cents", lambda dollars: dollars * 100, cents, True),
+    )
+    results = {}
+    for name, money, amounts, cents_mode in modes:
+        bank = populate(args.holders, money, cents_mode)
+        single, batch, summed, total = run(bank, card_numbers, amounts, kinds)
+        running = bank.bank_balance
+        if cents_mode:
+            total, running = from_cents(total), from_cents(running)
+        results[name] = (single, batch, summed, total, running)
+
+    exact = Decimal(results["Decimal"][3])
+    print(f"holders: {args.holders}, rows: {args.rows} (x2, single calls then one batch)")
+    print(f"{'mode':<8} {'single tx/s':>12} {'batch tx/s':>12} {'sum ms':>8}  drift")
+    for name, (single, batch, summed, total, running) in results.items():
+        drift = abs(Decimal(running) - exact)
+        print(
+            f"{name:<8} {args.rows / single:>12,.0f} {args.rows / batch:>12,.0f} "
+            f"{summed * 1000:>8.1f}  {drift:.2E}"
+        )
+
+
+if __name__ == "__main__":
+    main()
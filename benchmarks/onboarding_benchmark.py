@@ -0,0 +1,111 @@
+"""
+Onboarding throughput of the per object constructors (AccountHolder,
+CheckingAccount, SavingsAccount, Card) against Bank.bulk_load() of the same
+customers from columnar input.
+
+    python benchmarks/onboarding_benchmark.py --holders 200000
+"""
+
+import argparse
+import os, sys
+import gc
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from bank.accounts import CheckingAccount, SavingsAccount
+from bank.account_holder import AccountHolder
+from bank.banks import Bank
+from bank.cards import Card
+
+
+def columns(holders: int) -> tuple:
+    ids = [f"{i}1" for i in range(holders)]
+    checking = [f"{i}-checking-1" for i in ids]
+    return (
+        {
+            "accountholder_id": ids,
+            "first_name": ["Mathias"] * holders,
+            "last_name": ["Cormann"] * holders,
+        },
+        {
+            "accountholder_id": ids * 2,
+            "account_id": checking + [f"{i}-savings-1" for i in ids],
+            "kind": ["checking"] * holders + ["savings"] * holders,
+            "balance": [1000.00] * (2 * holders),
+        },
+        {
+            "accountholder_id": ids,
+            "account_id": checking,
+            "card_number": [f"40001|{i}" for i in checking],
+            "holder_firstname": ["Mathias"] * holders,
+            "holder_lastname": ["Cormann"] * holders,
+            "pin": ["0101"] * holders,
+            "expiry_date": ["12-12-2024"] * holders,
+            "cvv": ["432"] * holders,
+        },
+    )
+
+
+def constructors(bank: Bank, holders: dict, accounts: dict, cards: dict) -> float:
+    start = time.perf_counter()
+    registered = {}
+    for accountholder_id, first_name, last_name in zip(
+        holders["accountholder_id"], holders["first_name"], holders["last_name"]
+    ):
+        registered[accountholder_id] = AccountHolder(
+            bank, accountholder_id, first_name, last_name
+        )
+    opened = {}
+    for accountholder_id, account_id, kind, balance in zip(
+        accounts["accountholder_id"],
+        accounts["account_id"],
+        accounts["kind"],
+        accounts["balance"],
+    ):
+        cls = CheckingAccount if kind == "checking" else SavingsAccount
+        opened[account_id] = cls(
+            account_id,
+            kind,
+            registered[accountholder_id].accounts,
+            accountholder_id,
+            opening_balance=balance,
+        )
+    for row in zip(
+        cards["accountholder_id"],
+        cards["account_id"],
+        cards["holder_firstname"],
+        cards["holder_lastname"],
+        cards["card_number"],
+        cards["pin"],
+        cards["expiry_date"],
+        cards["cvv"],
+    ):
+        Card(registered[row[0]], opened[row[1]], *row[2:], "active")
+    return time.perf_counter() - start
+
+
+def bulk(bank: Bank, holders: dict, accounts: dict, cards: dict) -> float:
+    start = time.perf_counter()
+    bank.bulk_load(holders, accounts, cards)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--holders", type=int, default=200000)
+    parser.add_argument("--indexed", action="store_true")
+    args = parser.parse_args()
+
+    tables = columns(args.holders)
+    print(f"holders: {args.holders:,} (2 accounts and 1 card each)")
+    for name, load in (("constructors", constructors), ("bulk_load", bulk)):
+        bank = Bank(indexed=args.indexed)
+        gc.collect()
+        seconds = load(bank, *tables)
+        assert bank.bank_balance == 2000.00 * args.holders
+        print(f"{name:<14} {args.holders / seconds:>12,.0f} holders/s ({seconds:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Throughput of single card transactions on a Bank with and without
+storage.Persistence writing balances behind to SQLite, with a reader thread
+polling the database's totals on its own connection meanwhile (WAL lets it
+read while the bank writes).
+
+    python benchmarks/persistence_benchmark.py --holders 100000 --rows 500000 --batch-size 10000
+"""
+
+import argparse
+import os, sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from suite import populate, single_calls, transactions
+from bank.storage import Persistence, SQLiteStore
+
+
+def reader(path: str, poll: float, stop: threading.Event, reads: list):
+    store = SQLiteStore(path)
+    while not stop.wait(poll):
+        store.totals()
+        reads[0] += 1
+    store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--holders", type=int, default=100000)
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--interval", type=float, default=1.0)
+    parser.add_argument("--synchronous", default="NORMAL", help="SQLite synchronous pragma.")
+    parser.add_argument(
+        "--poll", type=float, default=0.1, help="Seconds between the reader's queries."
+    )
+    args = parser.parse_args()
+
+    work = transactions(args.holders, args.rows)
+    seconds = single_calls(populate(args.holders), work)
+    print(f"in memory:    {args.rows / seconds:>10,.0f} tx/s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bank.db")
+        bank = populate(args.holders)
+        store = SQLiteStore(path, synchronous=args.synchronous)
+        start = time.perf_counter()
+        store.save(bank)
+        print(f"saved {args.holders:,} holders in {time.perf_counter() - start:.1f}s")
+        persistence = bank.persistence = Persistence(
+            store, batch_size=args.batch_size, interval=args.interval
+        )
+        stop = threading.Event()
+        reads = [0]
+        thread = threading.Thread(target=reader, args=(path, args.poll, stop, reads))
+        thread.start()
+        start = time.perf_counter()
+        single_calls(bank, work)
+        persistence.close()
+        seconds = time.perf_counter() - start
+        stop.set()
+        thread.join()
+        print(
+            f"persisted:    {args.rows / seconds:>10,.0f} tx/s, {persistence.flushes} "
+            f"flushes, {persistence.rows:,} rows written, {reads[0]} concurrent reads"
+        )
+        stored = store.totals()
+        assert abs(sum(stored.values()) - bank.bank_balance) < 1e-6 * args.holders
+        print("store totals match the bank")
+
+
+if __name__ == "__main__":
+    main()
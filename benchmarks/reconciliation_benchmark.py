@@ -0,0 +1,58 @@
+"""
+Wall clock scaling of reconciliation.reconcile() by worker count: a journaled
+bank is populated and run through single card transactions, then reconciled
+with each pool size, statements streamed to a file. Worker count 0 runs inline.
+
+    python benchmarks/reconciliation_benchmark.py --holders 100000 --rows 1000000 --workers 0 1 2 4 8
+"""
+
+import argparse
+import os, sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from suite import population, single_calls, transactions
+from bank.banks import Bank
+from bank.journal import Journal
+from bank.reconciliation import reconcile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--holders", type=int, default=100000)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4, 8])
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bank = Bank(journal=Journal(os.path.join(tmp, "bank.journal")))
+        start = time.perf_counter()
+        bank.bulk_load(*population(args.holders))
+        single_calls(bank, transactions(args.holders, args.rows))
+        bank.journal.commit()
+        print(
+            f"{args.holders:,} holders, {bank.journal.records:,} journal records "
+            f"built in {time.perf_counter() - start:.1f}s, {os.cpu_count()} cores"
+        )
+        output = os.path.join(tmp, "statements.jsonl")
+        baseline = None
+        for workers in args.workers:
+            start = time.perf_counter()
+            report = reconcile(bank, output, workers=workers, chunk_size=args.chunk_size)
+            seconds = time.perf_counter() - start
+            assert report.balanced, report.mismatches[:10]
+            if baseline is None:
+                baseline = seconds
+            print(
+                f"workers {workers:>3}: {seconds:>7.2f}s (scan {report.scan_seconds:.2f}s, "
+                f"statements {report.statement_seconds:.2f}s), "
+                f"{report.accounts / seconds:>10,.0f} accounts/s, "
+                f"{baseline / seconds:.2f}x, {os.path.getsize(output) / 2 ** 20:,.0f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Rows per second and peak RSS of settling a settlement file with
+settlement.settle(), streamed in chunks so memory stays bounded by the chunk
+size (and the bank) however large the file is.
+
+    python benchmarks/settlement_benchmark.py --holders 10000 --rows 1000000 --format csv
+"""
+
+import argparse
+import os, sys
+import json
+import random
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from batch_benchmark import populate
+from bank.settlement import settle
+
+
+def write_file(f, holders: int, rows: int, format: str, seed: int = 0):
+    # Written row by row so generating a large file doesn't inflate peak RSS.
+    rng = random.Random(seed)
+    if format == "csv":
+        f.write("card_number,amount,kind\n")
+    for _ in range(rows):
+        card_number = f"40001|{rng.randrange(holders)}1-checking-1"
+        amount = f"{rng.randrange(1, 200)}.00"
+        kind = "withdraw" if rng.random() < 0.6 else "deposit"
+        if format == "csv":
+            f.write(f"{card_number},{amount},{kind}\n")
+        else:
+            f.write(
+                json.dumps({"card_number": card_number, "amount": amount, "kind": kind})
+                + "\n"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--holders", type=int, default=10000)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--format", choices=("csv", "jsonl"), default="csv")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"settlement.{args.format}")
+        with open(path, "w", newline="") as f:
+            write_file(f, args.holders, args.rows, args.format)
+        bank = populate(args.holders)
+        with open(path, newline="") as f, open(os.devnull, "w", newline="") as output:
+            report = settle(bank, f, output, args.format, args.chunk_size)
+        size = os.path.getsize(path)
+    print(f"file: {size / 2 ** 20:,.1f} MiB, {report.rows:,} rows ({args.format})")
+    print(f"applied {report.applied:,}, declined {report.declined:,}")
+    print(f"{report.rows_per_second:>12,.0f} rows/s in {report.elapsed:.2f}s")
+    if report.peak_rss is not None:
+        print(f"peak RSS {report.peak_rss / 2 ** 20:,.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Throughput of ShardedBank.process_batch() from 1 to N shards (cores), with the
+single process Bank.process_batch() as the baseline.
+
+    python benchmarks/sharding_benchmark.py --holders 50000 --rows 1000000 --max-shards 8
+"""
+
+import argparse
+import os, sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from bank.sharding import ShardedBank
+from batch_benchmark import populate, workload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--holders", type=int, default=20000)
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--batch", type=int, default=100000)
+    parser.add_argument("--max-shards", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    bank = populate(args.holders)
+    rows = workload(args.holders, args.rows)
+    batches = [rows[i : i + args.batch] for i in range(0, len(rows), args.batch)]
+
+    start = time.perf_counter()
+    for batch in batches:
+        bank.process_batch(batch)
+    baseline = args.rows / (time.perf_counter() - start)
+    print(f"Bank (1 process): {baseline:,.0f} rows/s")
+    shards = 1
+    while shards <= args.max_shards:
+        with ShardedBank.from_bank(populate(args.holders), shards=shards) as sharded:
+            # Warm the card routing cache, as a long running process would be.
+            sharded.process_batch(batches[0])
+            start = time.perf_counter()
+            for batch in batches:
+                sharded.process_batch(batch)
+            rate = args.rows / (time.perf_counter() - start)
+        print(f"{shards:>3} shards: {rate:,.0f} rows/s ({rate / baseline:.2f}x)")
+        shards *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Cold start from a snapshot (lazy and fully materialized) against rebuilding
+a Bank through the constructors.
+
+    python benchmarks/snapshot_benchmark.py --holders 100000
+"""
+
+import argparse
+import os, sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from bank.banks import Bank
+from batch_benchmark import populate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--holders", type=int, default=100000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    bank = populate(args.holders)
+    build = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bank.snapshot")
+        start = time.perf_counter()
+        bank.snapshot(path)
+        write = time.perf_counter() - start
+        size = os.path.getsize(path)
+        start = time.perf_counter()
+        lazy = Bank.load(path)
+        lazy_load = time.perf_counter() - start
+        start = time.perf_counter()
+        lazy.account_holders.materialize_all()
+        materialize = time.perf_counter() - start
+    print(f"holders:            {args.holders}")
+    print(f"constructors:       {build:.2f}s")
+    print(f"snapshot write:     {write:.2f}s ({size / args.holders:.0f} bytes/holder)")
+    print(f"lazy load:          {lazy_load:.3f}s")
+    print(f"materialize all:    {materialize:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
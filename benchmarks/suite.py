@@ -0,0 +1,296 @@
+"""
+Reproducible benchmark suite for the transaction engine. Populations of
+account holders (each with a checking account, a savings account and a card)
+are generated from a seed at each size, then every workload is run and timed:
+
+    mixed       withdraw/deposit mix through the single call API
+    batch       the same mix through Bank.process_batch()
+    declines    decline heavy traffic (overdrafts, over the limit, unknown cards)
+    polling     bank_balance/account_type_balances reads
+    onboarding  per object constructors and Bank.bulk_load()
+
+Results are written as JSON with --save and compared against an earlier run
+with --baseline, exiting with status 1 if any metric regressed by more than
+its threshold.
+
+    python benchmarks/suite.py --sizes 1000 100000 --save results.json
+    python benchmarks/suite.py --sizes 1000 100000 --baseline results.json --threshold 0.1
+    python benchmarks/suite.py --baseline results.json --threshold-for declines=0.25
+"""
+
+import argparse
+import os, sys
+import datetime
+import gc
+import json
+import platform
+import random
+import statistics
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from bank.banks import Bank
+from bank.money import WITHDRAWAL_LIMIT
+from onboarding_benchmark import bulk, constructors
+
+WORKLOADS = ("mixed", "batch", "declines", "polling", "onboarding")
+
+
+def population(holders: int, seed: int = 0) -> tuple:
+    """
+    Columnar holders, accounts and cards for Bank.bulk_load(), balances drawn from seed.
+    """
+    rng = random.Random(seed)
+    ids = [f"{i}1" for i in range(holders)]
+    checking = [f"{i}-checking-1" for i in ids]
+    return (
+        {
+            "accountholder_id": ids,
+            "first_name": ["Mathias"] * holders,
+            "last_name": ["Cormann"] * holders,
+        },
+        {
+            "accountholder_id": ids * 2,
+            "account_id": checking + [f"{i}-savings-1" for i in ids],
+            "kind": ["checking"] * holders + ["savings"] * holders,
+            "balance": [float(rng.randrange(100, 5000)) for _ in range(2 * holders)],
+        },
+        {
+            "accountholder_id": ids,
+            "account_id": checking,
+            "card_number": [f"40001|{i}" for i in checking],
+            "holder_firstname": ["Mathias"] * holders,
+            "holder_lastname": ["Cormann"] * holders,
+            "pin": ["0101"] * holders,
+            "expiry_date": ["12-12-2024"] * holders,
+            "cvv": ["432"] * holders,
+        },
+    )
+
+
+def populate(holders: int, seed: int = 0) -> Bank:
+    bank = Bank()
+    bank.bulk_load(*population(holders, seed))
+    return bank
+
+
+def transactions(holders: int, rows: int, seed: int = 0, declines: bool = False) -> list:
+    """
+    Seeded (card_number, amount, kind) rows. The default mix is 60%
+    withdrawals of small amounts, with declines 90% of the withdrawals
+    overdraw, exceed the withdrawal limit or use a card that doesn't exist.
+    """
+    rng = random.Random(seed)
+    rows_ = []
+    for _ in range(rows):
+        card_number = f"40001|{rng.randrange(holders)}1-checking-1"
+        if not declines:
+            kind = "withdraw" if rng.random() < 0.6 else "deposit"
+            rows_.append((card_number, float(rng.randrange(1, 200)), kind))
+            continue
+        roll = rng.random()
+        if roll < 0.5:
+            # Within the limit, above the largest generated balance.
+            amount = float(WITHDRAWAL_LIMIT)
+        elif roll < 0.8:
+            amount = float(rng.randrange(WITHDRAWAL_LIMIT + 1, 2 * WITHDRAWAL_LIMIT))
+        elif roll < 0.9:
+            card_number = card_number.replace("-checking-1", "-checking-9")
+            amount = 10.0
+        else:
+            amount = float(rng.randrange(1, 200))
+        rows_.append((card_number, amount, "withdraw"))
+    return rows_
+
+
+def single_calls(bank: Bank, rows: list) -> float:
+    withdraw = bank.withdrawal_transaction
+    deposit = bank.deposit_transaction
+    start = time.perf_counter()
+    for card_number, amount, kind in rows:
+        if kind == "withdraw":
+            withdraw(card_number, amount)
+        else:
+            deposit(card_number, amount)
+    return time.perf_counter() - start
+
+
+def run_mixed(holders: int, rows: int, seed: int) -> dict:
+    seconds = single_calls(populate(holders, seed), transactions(holders, rows, seed))
+    return {"tx_per_s": rows / seconds}
+
+
+def run_batch(holders: int, rows: int, seed: int) -> dict:
+    bank = populate(holders, seed)
+    work = transactions(holders, rows, seed)
+    start = time.perf_counter()
+    bank.process_batch(work)
+    return {"tx_per_s": rows / (time.perf_counter() - start)}
+
+
+def run_declines(holders: int, rows: int, seed: int) -> dict:
+    bank = populate(holders, seed)
+    work = transactions(holders, rows, seed, declines=True)
+    declined = 0
+    start = time.perf_counter()
+    for card_number, amount, _ in work:
+        if not bank.withdrawal_result(card_number, amount).status:
+            declined += 1
+    seconds = time.perf_counter() - start
+    return {"tx_per_s": rows / seconds, "decline_rate": declined / rows}
+
+
+def run_polling(holders: int, rows: int, seed: int) -> dict:
+    bank = populate(holders, seed)
+    work = transactions(holders, rows, seed)
+    # One poll of the totals after every transaction.
+    start = time.perf_counter()
+    for card_number, amount, kind in work:
+        if kind == "withdraw":
+            bank.withdrawal_transaction(card_number, amount)
+        else:
+            bank.deposit_transaction(card_number, amount)
+        bank.bank_balance
+        bank.account_type_balances
+    mixed = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(rows):
+        bank.bank_balance
+    return {
+        "polls_per_s": rows / (time.perf_counter() - start),
+        "polled_tx_per_s": rows / mixed,
+    }
+
+
+def run_onboarding(holders: int, rows: int, seed: int) -> dict:
+    tables = population(holders, seed)
+    return {
+        "constructor_holders_per_s": holders / constructors(Bank(), *tables),
+        "bulk_holders_per_s": holders / bulk(Bank(), *tables),
+    }
+
+
+RUNNERS = {
+    "mixed": run_mixed,
+    "batch": run_batch,
+    "declines": run_declines,
+    "polling": run_polling,
+    "onboarding": run_onboarding,
+}
+# Metrics where lower is better, everything else is a rate.
+LOWER_IS_BETTER = set()
+# Metrics describing the workload rather than its speed, never compared.
+INFORMATIONAL = {"decline_rate"}
+
+
+def run(sizes: list, workloads: list, rows: int, repeats: int, seed: int) -> dict:
+    """
+    Run every workload at every size, repeats times, keeping the median of
+    each metric. Returns {"<workload>.<metric>@<size>": value}.
+    """
+    results = {}
+    for size in sizes:
+        for workload in workloads:
+            samples = {}
+            for _ in range(repeats):
+                gc.collect()
+                for metric, value in RUNNERS[workload](size, rows, seed).items():
+                    samples.setdefault(metric, []).append(value)
+            for metric, values in samples.items():
+                key = f"{workload}.{metric}@{size}"
+                results[key] = statistics.median(values)
+                print(f"{key:<48} {results[key]:>16,.2f}", flush=True)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float, thresholds: dict) -> list:
+    """
+    Metrics that regressed against the baseline by more than their threshold,
+    as [(key, baseline value, value, change), ...]. A threshold set for a
+    workload ("declines") or a metric ("declines.tx_per_s") overrides the default.
+    """
+    regressions = []
+    for key, value in sorted(results.items()):
+        before = baseline.get(key)
+        metric = key.split("@")[0]
+        if before is None or not before or metric.split(".")[1] in INFORMATIONAL:
+            continue
+        limit = thresholds.get(metric, thresholds.get(metric.split(".")[0], threshold))
+        change = (value - before) / before
+        if metric.split(".")[1] in LOWER_IS_BETTER:
+            change = -change
+        if change < -limit:
+            regressions.append((key, before, value, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--sizes",
+        type=lambda value: int(float(value)),
+        nargs="+",
+        default=[1000, 10000],
+        help="Population sizes (account holders), e.g. 1e3 1e5 1e7.",
+    )
+    parser.add_argument("--workloads", nargs="+", choices=WORKLOADS, default=WORKLOADS)
+    parser.add_argument("--rows", type=int, default=100000, help="Transactions per workload.")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", help="JSON results to compare against.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Largest tolerated slowdown as a fraction, 0.1 is 10%%.",
+    )
+    parser.add_argument(
+        "--threshold-for",
+        action="append",
+        default=[],
+        metavar="NAME=FRACTION",
+        help="Threshold for a workload or workload.metric, repeatable.",
+    )
+    args = parser.parse_args()
+    thresholds = {}
+    for item in args.threshold_for:
+        name, _, fraction = item.partition("=")
+        thresholds[name] = float(fraction)
+
+    results = run(args.sizes, args.workloads, args.rows, args.repeats, args.seed)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(
+                {
+                    "meta": {
+                        "time": datetime.datetime.now().isoformat(timespec="seconds"),
+                        "python": platform.python_version(),
+                        "platform": platform.platform(),
+                        "sizes": args.sizes,
+                        "rows": args.rows,
+                        "repeats": args.repeats,
+                        "seed": args.seed,
+                    },
+                    "results": results,
+                },
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold, thresholds)
+        for key, before, value, change in regressions:
+            print(f"REGRESSION {key}: {before:,.2f} -> {value:,.2f} ({change:+.1%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}.")
+
+
+if __name__ == "__main__":
+    main()
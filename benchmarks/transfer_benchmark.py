@@ -0,0 +1,90 @@
+"""
+Throughput of transfer heavy workloads: a withdraw + deposit pair of calls
+(not atomic), Bank.electronic_transfer() and netted Bank.process_transfers()
+batches.
+
+    python benchmarks/transfer_benchmark.py --holders 10000 --transfers 200000 --hot 100
+"""
+
+import argparse
+import os, sys
+import random
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from batch_benchmark import populate
+
+
+def accounts(bank) -> list:
+    return [
+        account
+        for holder in bank.account_holders.values()
+        for account in holder.accounts.checking_accounts.values()
+    ]
+
+
+def workload(n_accounts: int, transfers: int, hot: int, seed: int = 0) -> list:
+    # Most transfers move money between a few hot accounts (payroll, merchants).
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(transfers):
+        pool = hot if rng.random() < 0.8 else n_accounts
+        source, target = rng.sample(range(pool), 2)
+        rows.append((source, target, float(rng.randrange(1, 50))))
+    return rows
+
+
+def pairs(bank, rows: list) -> float:
+    by_index = accounts(bank)
+    start = time.perf_counter()
+    for source, target, amount in rows:
+        try:
+            by_index[source].withdraw(amount)
+        except Exception:
+            continue
+        by_index[target].deposit(amount)
+    return time.perf_counter() - start
+
+
+def single(bank, rows: list) -> float:
+    by_index = accounts(bank)
+    start = time.perf_counter()
+    for source, target, amount in rows:
+        bank.electronic_transfer(by_index[source], by_index[target], amount)
+    return time.perf_counter() - start
+
+
+def batches(bank, rows: list, batch_size: int) -> float:
+    by_index = accounts(bank)
+    start = time.perf_counter()
+    for offset in range(0, len(rows), batch_size):
+        bank.process_transfers(
+            [
+                (by_index[source], by_index[target], amount)
+                for source, target, amount in rows[offset : offset + batch_size]
+            ]
+        )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--holders", type=int, default=10000)
+    parser.add_argument("--transfers", type=int, default=200000)
+    parser.add_argument("--hot", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    rows = workload(args.holders, args.transfers, args.hot)
+    print(f"transfers: {args.transfers} over {args.holders} accounts ({args.hot} hot)")
+    for name, seconds in (
+        ("withdraw+deposit", pairs(populate(args.holders), rows)),
+        ("electronic_transfer", single(populate(args.holders), rows)),
+        ("process_transfers", batches(populate(args.holders), rows, args.batch_size)),
+    ):
+        print(f"{name:<20} {args.transfers / seconds:>12,.0f} transfers/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Latency of Bank.withdrawal_transaction() and withdrawal_result() without
+velocity limits and with hourly and daily caps per card and per account.
+
+    python benchmarks/velocity_benchmark.py --holders 10000 --rows 200000
+"""
+
+import argparse
+import os, sys
+import random
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from batch_benchmark import populate
+from bank.velocity import VelocityLimit, VelocityLimits, DAY, HOUR
+
+
+def limits() -> VelocityLimits:
+    # Generous caps, so the benchmark measures the checks rather than declines.
+    return VelocityLimits(
+        card=[
+            VelocityLimit(DAY, max_amount=10 ** 9),
+            VelocityLimit(HOUR, max_count=10 ** 6),
+        ],
+        account=[VelocityLimit(DAY, max_amount=10 ** 9, max_count=10 ** 6)],
+    )
+
+
+def latencies(call, card_numbers: list) -> list:
+    timer = time.perf_counter
+    samples = []
+    for card_number in card_numbers:
+        start = timer()
+        call(card_number, 1.00)
+        samples.append(timer() - start)
+    return samples
+
+
+def report(name: str, samples: list):
+    samples.sort()
+    mean = sum(samples) / len(samples)
+    p50 = samples[len(samples) // 2]
+    p99 = samples[int(len(samples) * 0.99)]
+    print(
+        f"{name:<34} mean {mean * 1e6:6.2f}us  p50 {p50 * 1e6:6.2f}us  p99 {p99 * 1e6:6.2f}us"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--holders", type=int, default=10000)
+    parser.add_argument("--rows", type=int, default=200000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    card_numbers = [
+        f"40001|{rng.randrange(args.holders)}1-checking-1" for _ in range(args.rows)
+    ]
+    for velocity in (None, limits()):
+        label = "velocity limits" if velocity is not None else "no limits"
+        bank = populate(args.holders)
+        bank.velocity = velocity
+        # Create every card's velocity entries first, steady state is measured.
+        latencies(
+            bank.withdrawal_transaction,
+            [f"40001|{i}1-checking-1" for i in range(args.holders)],
+        )
+        report(
+            f"withdrawal_transaction, {label}",
+            latencies(bank.withdrawal_transaction, card_numbers),
+        )
+        report(
+            f"withdrawal_result, {label}",
+            latencies(bank.withdrawal_result, card_numbers),
+        )
+
+
+if __name__ == "__main__":
+    main()
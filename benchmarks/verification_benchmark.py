@@ -0,0 +1,85 @@
+"""
+Throughput of verified withdrawals (CardVerifier.withdrawal_transaction())
+without the session cache, with it, and of KDF checks spread over the process
+pool. Authorizations come from --cards cards at --terminals terminals each,
+so most of them are repeat sessions when the cache is on.
+
+    python benchmarks/verification_benchmark.py --holders 1000 --rows 2000 --processes 4
+"""
+
+import argparse
+import os, sys
+import random
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from batch_benchmark import populate
+from bank.verification import CardVerifier, ITERATIONS
+
+
+def requests(holders: int, cards: int, terminals: int, rows: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    return [
+        (
+            f"40001|{rng.randrange(min(cards, holders))}1-checking-1",
+            "0101",
+            "12-12-2024",
+            "432",
+            rng.randrange(terminals),
+        )
+        for _ in range(rows)
+    ]
+
+
+def withdrawals(verifier: CardVerifier, rows: list) -> float:
+    start = time.perf_counter()
+    for card_number, pin, expiry, cvv, terminal in rows:
+        verifier.withdrawal_transaction(card_number, 1.00, pin, expiry, cvv, terminal)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--holders", type=int, default=1000)
+    parser.add_argument("--cards", type=int, default=100, help="Cards making authorizations.")
+    parser.add_argument("--terminals", type=int, default=3, help="Terminals per card.")
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--iterations", type=int, default=ITERATIONS)
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    bank = populate(args.holders)
+    rows = requests(args.holders, args.cards, args.terminals, args.rows)
+    with CardVerifier(bank, processes=args.processes, iterations=args.iterations) as verifier:
+        start = time.perf_counter()
+        verifier.enroll()
+        print(
+            f"enroll {args.holders} cards, {args.processes} processes: "
+            f"{args.holders / (time.perf_counter() - start):,.0f} cards/s"
+        )
+
+        uncached = CardVerifier(bank, processes=0, max_sessions=0)
+        seconds = withdrawals(uncached, rows)
+        print(f"no cache, inline KDF:   {args.rows / seconds:>12,.0f} tx/s")
+
+        cached = CardVerifier(bank, processes=0)
+        seconds = withdrawals(cached, rows)
+        print(
+            f"session cache:          {args.rows / seconds:>12,.0f} tx/s "
+            f"({cached.hits / args.rows:.0%} hits)"
+        )
+
+        # First authorizations of many sessions at once, KDF checks in parallel.
+        verifier.sessions.clear()
+        start = time.perf_counter()
+        verifier.verify_many(rows)
+        seconds = time.perf_counter() - start
+        print(
+            f"verify_many, pool:      {args.rows / seconds:>12,.0f} verifications/s "
+            f"({verifier.kdf_checks} KDF checks)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Throughput, hit rate, evictions and memory of a Bank opened over a SQLite
+store (Bank.open()) with a bounded working set, under Zipfian card traffic:
+the k-th most popular holder is picked with probability ~ 1 / k ** s.
+Each capacity runs in a fresh process, so peak RSS is per capacity.
+
+    python benchmarks/working_set_benchmark.py --holders 200000 --rows 200000 --capacities 1000 10000 200000
+"""
+
+import argparse
+import os, sys
+import bisect
+import itertools
+import random
+import subprocess
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from suite import populate
+from bank.banks import Bank
+from bank.settlement import peak_rss
+from bank.storage import SQLiteStore
+
+
+def zipf_cards(holders: int, rows: int, s: float = 1.1, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    cumulative = list(itertools.accumulate(1 / k ** s for k in range(1, holders + 1)))
+    # Popularity rank -> holder, so the hot holders aren't the first onboarded.
+    ids = list(range(holders))
+    rng.shuffle(ids)
+    total = cumulative[-1]
+    return [
+        f"40001|{ids[bisect.bisect(cumulative, rng.random() * total)]}1-checking-1"
+        for _ in range(rows)
+    ]
+
+
+def run(path: str, holders: int, rows: int, capacity: int, s: float):
+    cards = zipf_cards(holders, rows, s)
+    bank = Bank.open(SQLiteStore(path), capacity=capacity)
+    start = time.perf_counter()
+    for i, card_number in enumerate(cards):
+        if i % 5 < 3:
+            bank.withdrawal_transaction(card_number, 1.00)
+        else:
+            bank.deposit_transaction(card_number, 1.00)
+    bank.account_holders.flush()
+    seconds = time.perf_counter() - start
+    stats = bank.account_holders.stats()
+    rss = peak_rss()
+    print(
+        f"capacity {capacity:>9,}: {rows / seconds:>10,.0f} tx/s, "
+        f"hit rate {stats['hit_rate']:.1%}, {stats['misses']:,} faults, "
+        f"{stats['evictions']:,} evictions, {stats['writebacks']:,} write-backs"
+        + (f", peak RSS {rss / 2 ** 20:,.0f} MiB" if rss else "")
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--holders", type=int, default=200000)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--capacities", type=int, nargs="+", default=[1000, 10000, 200000])
+    parser.add_argument("--s", type=float, default=1.1, help="Zipf exponent.")
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    parser.add_argument("--capacity", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.capacity == 0:
+        start = time.perf_counter()
+        SQLiteStore(args.db).save(populate(args.holders))
+        print(f"stored {args.holders:,} holders in {time.perf_counter() - start:.1f}s")
+    elif args.capacity is not None:
+        run(args.db, args.holders, args.rows, args.capacity, args.s)
+    else:
+        # Peak RSS is inherited by child processes, so this one stays small
+        # and building the store (capacity 0) gets a process of its own too.
+        with tempfile.TemporaryDirectory() as tmp:
+            for capacity in [0] + args.capacities:
+                subprocess.run(
+                    [
+                        sys.executable,
+                        __file__,
+                        "--db",
+                        os.path.join(tmp, "bank.db"),
+                        "--capacity",
+                        str(capacity),
+                        "--holders",
+                        str(args.holders),
+                        "--rows",
+                        str(args.rows),
+                        "--s",
+                        str(args.s),
+                    ],
+                    check=True,
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import unittest
+import asyncio
+import os, sys
+
+test_dir = os.path.dirname(__file__)
+src_dir = "../"
+sys.path.insert(0, os.path.abspath(os.path.join(test_dir, src_dir)))
+
+from bank.accounts import CheckingAccount
+from bank.account_holder import AccountHolder
+from bank.async_bank import AsyncBank, generate_load, percentile
+from bank.banks import Bank
+from bank.cards import Card
+from bank.status import TransactionStatus
+from bank.velocity import VelocityLimit, VelocityLimits, HOUR
+
+
+def populate(n=3):
+    bank = Bank()
+    for i in range(n):
+        ah = AccountHolder(bank, f"{i}1", "Mathias", "Cormann")
+        ac = CheckingAccount(
+            f"{i}1-checking-1", "checking", ah.accounts, f"{i}1", opening_balance=1000.00
+        )
+        Card(
+            ah,
+            ac,
+            "Mathias",
+            "Cormann",
+            f"40001|{i}1-checking-1",
+            "0101",
+            "12-12-2024",
+            "432",
+            "active",
+        )
+    return bank
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+class BasicTests(unittest.TestCase):
+    def test_a_requests(self):
+        bank = populate()
+
+        async def main():
+            async with AsyncBank(bank) as async_bank:
+                results = await asyncio.gather(
+                    async_bank.withdraw("40001|01-checking-1", 600.00),
+                    async_bank.authorize("40001|01-checking-1", 600.00),
+                    async_bank.withdraw("40001|01-checking-1", 600.00),
+                    async_bank.deposit("40001|11-checking-1", 50.00),
+                    async_bank.deposit("40001|91-checking-1", 50.00),
+                )
+                return results, async_bank.mean_batch
+
+        results, mean_batch = run(main())
+        assert [r["code"] for r in results] == [
+            TransactionStatus.OK,
+            TransactionStatus.INSUFFICIENT_BALANCE,
+            TransactionStatus.INSUFFICIENT_BALANCE,
+            TransactionStatus.OK,
+            TransactionStatus.ACCOUNT_NOT_EXISTS,
+        ]
+        assert results[0]["status"] and not results[1]["status"]
+        # Requests queued together are coalesced into batches.
+        assert mean_batch > 1
+        assert bank.bank_balance == 3000.00 - 600.00 + 50.00
+
+    def test_b_timeout_and_overload(self):
+        bank = populate()
+
+        async def main():
+            async_bank = AsyncBank(bank, max_in_flight=2, reject_when_full=True)
+            await async_bank.start()
+            # Block the worker so requests queue up.
+            async_bank._worker.cancel()
+            await asyncio.sleep(0)
+            first = asyncio.ensure_future(
+                async_bank.deposit("40001|01-checking-1", 10.00, timeout=0.01)
+            )
+            second = asyncio.ensure_future(
+                async_bank.deposit("40001|01-checking-1", 10.00, timeout=0.01)
+            )
+            await asyncio.sleep(0)
+            overloaded = await async_bank.deposit("40001|01-checking-1", 10.00)
+            timed_out = await first, await second
+            # Timed out requests are skipped when the worker catches up.
+            async_bank._worker = asyncio.ensure_future(async_bank._run())
+            await async_bank.close()
+            return overloaded, timed_out
+
+        overloaded, timed_out = run(main())
+        assert overloaded["code"] == TransactionStatus.OVERLOADED
+        assert [r["code"] for r in timed_out] == [TransactionStatus.TIMED_OUT] * 2
+
+        async def blocked():
+            # Waiting for room in a full queue counts towards the timeout.
+            async_bank = AsyncBank(bank, max_in_flight=1)
+            await async_bank.start()
+            async_bank._worker.cancel()
+            await asyncio.sleep(0)
+            first = asyncio.ensure_future(
+                async_bank.deposit("40001|01-checking-1", 10.00, timeout=0.01)
+            )
+            await asyncio.sleep(0)
+            waited = await async_bank.deposit("40001|01-checking-1", 10.00, timeout=0.01)
+            first = await first
+            async_bank._worker = asyncio.ensure_future(async_bank._run())
+            await async_bank.close()
+            return first, waited
+
+        assert [r["code"] for r in run(blocked())] == [TransactionStatus.TIMED_OUT] * 2
+        assert bank.bank_balance == 3000.00
+
+    def test_d_authorize_errors(self):
+        # An authorization that raises is answered with the error, the worker keeps going.
+        bank = populate()
+
+        async def main():
+            async with AsyncBank(bank) as async_bank:
+                with self.assertRaises(TypeError):
+                    await async_bank.authorize("40001|01-checking-1", "5")
+                return await async_bank.deposit("40001|01-checking-1", 10.00)
+
+        assert run(main())["code"] == TransactionStatus.OK
+        assert bank.bank_balance == 3010.00
+
+    def test_e_authorize_checks(self):
+        # Authorize rejects what a withdrawal would, and counts nothing.
+        bank = populate()
+        bank.velocity = VelocityLimits(card=[VelocityLimit(HOUR, max_count=1)])
+        card = "40001|01-checking-1"
+
+        async def main():
+            async with AsyncBank(bank) as async_bank:
+                codes = [
+                    (await async_bank.authorize(card, amount))["code"]
+                    for amount in (-50.00, float("nan"), float("inf"), 10.00, 10.00)
+                ]
+                codes.append((await async_bank.withdraw(card, 10.00))["code"])
+                codes.append((await async_bank.authorize(card, 10.00))["code"])
+                return codes
+
+        assert run(main()) == [TransactionStatus.INVALID_AMOUNT] * 3 + [
+            TransactionStatus.OK,
+            TransactionStatus.OK,
+            TransactionStatus.OK,
+            TransactionStatus.VELOCITY_LIMIT,
+        ]
+
+    def test_c_load_generator(self):
+        bank = populate(10)
+        cards = [f"40001|{i}1-checking-1" for i in range(10)]
+
+        async def main():
+            async with AsyncBank(bank) as async_bank:
+                return await generate_load(async_bank, cards, rate=2000, duration=0.25)
+
+        report = run(main())
+        assert report["requests"] == 500
+        assert 0 < report["p50"] <= report["p99"] <= report["max"]
+        assert sum(report["codes"].values()) == 500
+        assert percentile([3, 1, 2, 4], 50) == 2
+
+
+if __name__ == "__main__":
+    unittest.main()
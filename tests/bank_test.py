@@ -107,6 +107,50 @@ class BasicTests(unittest.TestCase):
         assert trans["status"]
         assert prev_balance != cormo_checking.balance
 
+    def test_d_running_balance(self):
+        # Bank, holder and account type totals follow withdraw/deposit and open/close.
+        bank = Bank()
+        cormo = AccountHolder(bank, "101", "Mathias", "Cormann")
+        cormo_checking = CheckingAccount(
+            "101-checking-1", "checking", cormo.accounts, "101", opening_balance=1000
+        )
+        cormo_savings = SavingsAccount(
+            "101-savings-1", "savings", cormo.accounts, "101", opening_balance=250
+        )
+        assert bank.bank_balance == 1250
+        cormo_checking.withdraw(100)
+        cormo_savings.deposit(50)
+        assert cormo.accounts.total_balance == 1200
+        assert bank.account_type_balances == {
+            "checking": 900,
+            "savings": 300,
+            "credit": 0,
+        }
+        # Closing (removing) an account backs its balance out.
+        del cormo.accounts.saving_accounts[cormo_savings.account_id]
+        assert bank.bank_balance == 900
+        cormo_savings.deposit(50)
+        assert bank.bank_balance == 900
+        # Replacing a registered holder backs out the old holder's totals.
+        AccountHolder(bank, "101", "Mathias", "Cormann")
+        assert bank.bank_balance == 0
+        cormo_checking.deposit(100)
+        assert bank.bank_balance == 0
+        assert bank.audit_balances() == []
+
+    def test_e_audit_balances(self):
+        # The audit recomputes from scratch and reports/repairs drift.
+        bank = Bank()
+        cormo = AccountHolder(bank, "101", "Mathias", "Cormann")
+        cormo_checking = CheckingAccount(
+            "101-checking-1", "checking", cormo.accounts, "101", opening_balance=1000
+        )
+        cormo_checking._balance = 400
+        drift = bank.audit_balances(repair=True)
+        assert {d["level"] for d in drift} == {"holder", "account_type", "bank"}
+        assert bank.bank_balance == 400
+        assert bank.audit_balances() == []
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+import os, sys
+
+test_dir = os.path.dirname(__file__)
+src_dir = "../"
+sys.path.insert(0, os.path.abspath(os.path.join(test_dir, src_dir)))
+
+from bank.accounts import CheckingAccount, SavingsAccount
+from bank.account_holder import AccountHolder
+from bank.banks import Bank
+from bank.cards import Card
+from bank.status import TransactionStatus
+
+
+def populate():
+    bank = Bank()
+    cormo = AccountHolder(bank, "101", "Mathias", "Cormann")
+    cormo_checking = CheckingAccount(
+        "101-checking-1", "checking", cormo.accounts, "101", opening_balance=1000.00
+    )
+    Card(
+        cormo,
+        cormo_checking,
+        "Mathias",
+        "Cormann",
+        "40001|101-checking-1",
+        "0101",
+        "12-12-2024",
+        "432",
+        "active",
+    )
+    frydy = AccountHolder(bank, "202", "Josh", "Frydenberg")
+    frydy_savings = SavingsAccount(
+        "202-savings-1", "savings", frydy.accounts, "202", opening_balance=100.00
+    )
+    Card(
+        frydy,
+        frydy_savings,
+        "Josh",
+        "Frydenberg",
+        "50001|202-savings-1",
+        "4321",
+        "12-12-2024",
+        "342",
+        "active",
+    )
+    return bank, cormo_checking, frydy_savings
+
+
+class BasicTests(unittest.TestCase):
+    def test_a_batch_rows(self):
+        bank, cormo_checking, frydy_savings = populate()
+        result = bank.process_batch(
+            [
+                ("40001|101-checking-1", 500.00, "withdraw"),
+                ("50001|202-savings-1", 200.00, "withdraw"),
+                ("50001|202-savings-1", 150.00, "deposit"),
+                ("50001|202-savings-1", 200.00, "withdraw"),
+                ("40001|101-checking-1", 6000.00, "withdraw"),
+                ("40001|999-checking-1", 1.00, "deposit"),
+                ("40001|101-checking-9", 1.00, "deposit"),
+                ("40001|101-checking-1", 1.00, "refund"),
+            ]
+        )
+        assert list(result) == [
+            TransactionStatus.OK,
+            TransactionStatus.INSUFFICIENT_BALANCE,
+            TransactionStatus.OK,
+            TransactionStatus.OK,
+            TransactionStatus.EXCEEDS_LIMIT,
+            TransactionStatus.ACCOUNT_NOT_EXISTS,
+            TransactionStatus.CARD_NOT_EXISTS,
+            TransactionStatus.INVALID_KIND,
+        ]
+        assert result.applied == 3
+        assert result.declined == 5
+        assert cormo_checking.balance == 500.00
+        assert frydy_savings.balance == 50.00
+        assert bank.bank_balance == 550.00
+        assert bank.audit_balances() == []
+
+    def test_b_batch_columns(self):
+        # Columnar input matches the single call path.
+        bank, cormo_checking, frydy_savings = populate()
+        cormo_checking.status = "locked"
+        result = bank.process_batch(
+            {
+                "card_number": ["40001|101-checking-1", "50001|202-savings-1"],
+                "amount": [10.00, 10.00],
+                "kind": ["deposit", "withdraw"],
+            }
+        )
+        assert result[0] == TransactionStatus.ACCOUNT_ERROR
+        assert result[1] == TransactionStatus.OK
+        assert result.counts == {
+            TransactionStatus.OK: 1,
+            TransactionStatus.ACCOUNT_ERROR: 1,
+        }
+        assert frydy_savings.balance == 90.00
+        assert result.rows_per_second > 0
+
+    def test_c_invalid_amounts(self):
+        # nan fails every comparison, so it must be caught before the limit checks.
+        bank, cormo_checking, frydy_savings = populate()
+        result = bank.process_batch(
+            [
+                ("40001|101-checking-1", float("nan"), "withdraw"),
+                ("40001|101-checking-1", -500.00, "withdraw"),
+                ("40001|101-checking-1", float("inf"), "deposit"),
+                ("50001|202-savings-1", 0.00, "deposit"),
+                ("50001|202-savings-1", float("nan"), "deposit"),
+                ("50001|202-savings-1", 10.00, "deposit"),
+            ]
+        )
+        assert list(result) == [TransactionStatus.INVALID_AMOUNT] * 5 + [
+            TransactionStatus.OK
+        ]
+        assert cormo_checking.balance == 1000.00 and frydy_savings.balance == 110.00
+        assert bank.bank_balance == 1110.00
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+import unittest
+import datetime
+import os, sys
+import tempfile
+
+test_dir = os.path.dirname(__file__)
+src_dir = "../"
+sys.path.insert(0, os.path.abspath(os.path.join(test_dir, src_dir)))
+
+from bank.accounts import CheckingAccount, CreditAccount
+from bank.account_holder import AccountHolder
+from bank.banks import Bank
+from bank.billing import BillingScheduler, next_statement_date, statement
+from bank.cards import Card
+from bank.journal import Journal
+from bank.reconciliation import reconcile
+from bank.storage import Persistence, SQLiteStore
+
+
+def open_card(bank, accountholder_id, open_date, cycle_day=None):
+    ah = AccountHolder(bank, accountholder_id, "Mathias", "Cormann")
+    ac = CreditAccount(
+        f"{accountholder_id}-credit-1",
+        "credit",
+        ah.accounts,
+        accountholder_id,
+        open_date=open_date,
+        cycle_day=cycle_day,
+    )
+    Card(
+        ah,
+        ac,
+        "Mathias",
+        "Cormann",
+        f"40001|{accountholder_id}-credit-1",
+        "0101",
+        "12-12-2024",
+        "432",
+        "active",
+    )
+    return ac
+
+
+class BasicTests(unittest.TestCase):
+    def test_a_cycles(self):
+        assert next_statement_date(datetime.date(2024, 1, 5), 10) == datetime.date(2024, 1, 10)
+        assert next_statement_date(datetime.date(2024, 1, 10), 10) == datetime.date(2024, 2, 10)
+        assert next_statement_date(datetime.date(2024, 12, 31), 1) == datetime.date(2025, 1, 1)
+        bank = Bank()
+        ac = open_card(bank, "101", datetime.date(2024, 1, 31))
+        assert ac.cycle_day == 28 and ac.billing_end == datetime.date(2024, 2, 28)
+        assert ac.balance_due == 0 and ac.due_date is None
+        with self.assertRaises(ValueError):
+            open_card(bank, "102", datetime.date(2024, 1, 5), cycle_day=30)
+
+    def test_b_statement_and_late_fee(self):
+        tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(tmp.name, "bank.journal")
+        bank = Bank(journal=Journal(path), billing=BillingScheduler())
+        ac = open_card(bank, "101", datetime.date(2024, 1, 5))
+        assert bank.withdrawal_transaction("40001|101-credit-1", 1000.00)["status"]
+        # Nothing closes before the account's first cycle ends.
+        assert bank.close_cycles(datetime.date(2024, 1, 5))["statements"] == 0
+        summary = bank.close_cycles(datetime.date(2024, 2, 5))
+        assert summary["statements"] == 1 and summary["owed"] == 1000.00
+        assert ac.statement_balance == 1000.00 and ac.minimum_due == 25.00
+        assert ac.due_date == datetime.date(2024, 3, 1)
+        assert ac.billing_end == datetime.date(2024, 3, 5)
+        # A partial payment leaves part of the minimum due.
+        bank.deposit_transaction("40001|101-credit-1", 10.00)
+        assert ac.paid == 10.00 and ac.balance_due == 15.00
+        summary = bank.close_cycles(datetime.date(2024, 3, 1))
+        assert summary["late_fees"] == 1 and summary["fees"] == 35.00
+        assert ac.balance == -1025.00 and ac.late_fees == 1
+        assert bank.bank_balance == -1025.00
+        # Paid in full by the next due date, no fee.
+        bank.close_cycles(datetime.date(2024, 3, 5))
+        assert ac.minimum_due == 25.00 and ac.statement_balance == 1025.00
+        bank.deposit_transaction("40001|101-credit-1", 1025.00)
+        assert ac.balance_due == 0
+        assert bank.close_cycles(datetime.date(2024, 4, 5))["late_fees"] == 0
+        assert ac.statement_balance == 0 and ac.due_date is None
+        # Fees are journaled, so replayed and reconciled.
+        assert reconcile(bank, workers=0).balanced
+        bank.journal.close()
+        replayed = Journal(path).replay()
+        assert replayed.account_holders["101"].accounts.credit_accounts[
+            "101-credit-1"
+        ].balance == 0
+        replayed.journal.close()
+        tmp.cleanup()
+
+    def test_c_buckets(self):
+        billing = BillingScheduler()
+        bank = Bank(billing=billing)
+        cards = [open_card(bank, f"{i}1", datetime.date(2024, 1, 1 + i)) for i in range(5)]
+        AccountHolder(bank, "91", "Penny", "Wong")
+        checking = CheckingAccount(
+            "91-checking-1", "checking", bank.account_holders["91"].accounts, "91", 100.00
+        )
+        assert len(billing) == 5 and len(billing.cycles[3]) == 1
+        for ac in cards:
+            ac.withdraw(100.00)
+        # One bucket a day, days without a run are caught up.
+        assert bank.close_cycles(datetime.date(2024, 2, 1))["statements"] == 1
+        assert bank.close_cycles(datetime.date(2024, 2, 3))["statements"] == 2
+        assert [ac.statement_balance for ac in cards] == [100.00, 100.00, 100.00, 0, 0]
+        # Removed holders are no longer scheduled.
+        del bank.account_holders["31"]
+        assert len(billing) == 4
+        assert bank.close_cycles(datetime.date(2024, 2, 5))["statements"] == 1
+        # Batched deposits and transfers are payments too.
+        bank.process_batch([("40001|01-credit-1", 30.00, "deposit")])
+        assert bank.process_transfers([(checking, cards[2], 25.00)]).statuses[0] == 0
+        assert cards[0].paid == 30.00 and cards[2].paid == 25.00
+        summary = bank.close_cycles(datetime.date(2024, 2, 28))
+        assert summary["late_fees"] == 1 and cards[1].late_fees == 1
+        assert cards[1].balance == -135.00 and cards[2].balance == -75.00
+
+    def test_d_cents_and_bulk_load(self):
+        billing = BillingScheduler()
+        bank = Bank(cents=True, billing=billing)
+        bank.bulk_load(
+            {"accountholder_id": ["01", "11"], "first_name": ["A", "B"], "last_name": ["C", "D"]},
+            {
+                "accountholder_id": ["01", "11"],
+                "account_id": ["01-credit-1", "11-credit-1"],
+                "kind": ["credit", "credit"],
+                "open_date": [datetime.date(2024, 1, 9)] * 2,
+            },
+        )
+        assert len(billing) == 2
+        accounts = [
+            bank.account_holders[i].accounts.credit_accounts[f"{i}-credit-1"] for i in ("01", "11")
+        ]
+        accounts[0].withdraw(345_650)
+        accounts[1].withdraw(1_000)
+        summary = bank.close_cycles(datetime.date(2024, 2, 9))
+        assert accounts[0].minimum_due == 3_456 and accounts[1].minimum_due == 1_000
+        assert summary["minimum_due"] == 4_456 and summary["owed"] == 346_650
+        for ac in accounts:
+            assert statement(ac, minimum_payment=2_500) == (ac.statement_balance, ac.minimum_due)
+        bank.close_cycles(datetime.date(2024, 3, 5))
+        assert [ac.balance for ac in accounts] == [-349_150, -4_500]
+
+    def test_e_billing_is_kept(self):
+        # Snapshots, the journal and SQLite keep the billing cycle, not just balances.
+        tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(tmp.name, "bank.journal")
+        store = SQLiteStore(os.path.join(tmp.name, "bank.db"))
+        bank = Bank(journal=Journal(path), billing=BillingScheduler())
+        ac = open_card(bank, "101", datetime.date(2024, 1, 5), cycle_day=20)
+        store.save(bank)
+        bank.persistence = Persistence(store, interval=None)
+        bank.withdrawal_transaction("40001|101-credit-1", 1000.00)
+        bank.close_cycles(datetime.date(2024, 1, 20))
+        bank.close_cycles(datetime.date(2024, 2, 20))
+        bank.deposit_transaction("40001|101-credit-1", 10.00)
+        state = ac._billing_state()
+        assert ac.late_fees == 1 and ac.paid == 10.00
+        assert ac.due_date == datetime.date(2024, 3, 16) and ac in bank.billing.due[ac.due_date]
+        bank.persistence.flush()
+        bank.snapshot(os.path.join(tmp.name, "bank.snap"))
+        bank.journal.close()
+        replayed = Journal(path).replay(Bank(billing=BillingScheduler()))
+        loaded = Bank.load(os.path.join(tmp.name, "bank.snap"))
+        loaded.billing = BillingScheduler()
+        loaded.billing.track(loaded)
+        opened = Bank.open(store)
+        opened.billing = BillingScheduler()
+        opened.billing.track(opened)
+        for rebuilt in (replayed, loaded, opened):
+            account = rebuilt.account_holders["101"].accounts.credit_accounts["101-credit-1"]
+            assert account._billing_state() == state
+            assert account.balance == ac.balance
+            # Rescheduled on the cycle day and due date it was saved with.
+            assert account in rebuilt.billing.cycles[20]
+            assert account in rebuilt.billing.due[ac.due_date]
+        replayed.journal.close()
+        store.close()
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import os, sys
+import tempfile
+
+test_dir = os.path.dirname(__file__)
+src_dir = "../"
+sys.path.insert(0, os.path.abspath(os.path.join(test_dir, src_dir)))
+
+from bank.accounts import CheckingAccount
+from bank.account_holder import AccountHolder
+from bank.banks import Bank
+from bank.cards import Card
+from bank.exceptions import AccountNotExists
+from bank.status import TransactionStatus
+
+
+def open_holder(bank, accountholder_id):
+    ah = AccountHolder(bank, accountholder_id, "Mathias", "Cormann")
+    ac = CheckingAccount(
+        f"{accountholder_id}-checking-1",
+        "checking",
+        ah.accounts,
+        accountholder_id,
+        opening_balance=1000.00,
+    )
+    card = Card(
+        ah,
+        ac,
+        "Mathias",
+        "Cormann",
+        f"40001|{accountholder_id}-checking-1",
+        "0101",
+        "12-12-2024",
+        "432",
+        "active",
+    )
+    return ah, ac, card
+
+
+class BasicTests(unittest.TestCase):
+    def test_a_issue_and_status(self):
+        bank = Bank()
+        ah, ac, card = open_holder(bank, "101")
+        assert bank.card_index["40001|101-checking-1"] is card
+        assert card.account is ac
+        # Compact cards still answer the old holder.cards wrapper dict keys.
+        assert ah.cards["40001|101-checking-1"]["account"] is ac
+        assert ah.cards["40001|101-checking-1"]["card"] is card
+        card.status = "locked"
+        assert not card.verify("0101", "12-12-2024", "432")
+        trans = bank.withdrawal_transaction("40001|101-checking-1", 100.00)
+        assert trans["new_balance"] == 900.00
+
+    def test_b_replaced_holder(self):
+        bank = Bank()
+        open_holder(bank, "101")
+        # Re-registering the id drops the old holder's cards from the index.
+        AccountHolder(bank, "101", "Mathias", "Cormann")
+        assert "40001|101-checking-1" not in bank.card_index
+        trans = bank.withdrawal_transaction("40001|101-checking-1", 100.00)
+        assert not trans["status"]
+        assert isinstance(trans["error"], KeyError)
+        with self.assertRaises(AccountNotExists):
+            bank.deposit_transaction("40001|202-checking-1", 100.00)
+        with self.assertRaises(AccountNotExists):
+            bank.deposit_transaction("not a card", 100.00)
+        assert bank._resolve_card("40001|101-checking-1") == TransactionStatus.CARD_NOT_EXISTS
+        assert bank._resolve_card("40001|202-checking-1") == TransactionStatus.ACCOUNT_NOT_EXISTS
+
+    def test_c_lazy_load(self):
+        bank = Bank()
+        for i in range(5):
+            open_holder(bank, f"{i}1")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bank.snapshot")
+            bank.snapshot(path)
+            bank2 = Bank.load(path)
+            # Pending holders aren't indexed until the slow path loads them.
+            assert bank2.card_index == {}
+            trans = bank2.withdrawal_transaction("40001|31-checking-1", 100.00)
+            assert trans["new_balance"] == 900.00
+            assert list(bank2.card_index) == ["40001|31-checking-1"]
+            bank2.account_holders.materialize_all()
+            assert len(bank2.card_index) == 5
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+import os, sys
+import random
+import threading
+
+test_dir = os.path.dirname(__file__)
+src_dir = "../"
+sys.path.insert(0, os.path.abspath(os.path.join(test_dir, src_dir)))
+
+from bank.accounts import CheckingAccount, SavingsAccount
+from bank.account_holder import AccountHolder
+from bank.banks import Bank
+from bank.cards import Card
+from bank.status import TransactionStatus
+
+
+class BasicTests(unittest.TestCase):
+    def setUp(self):
+        self.interval = sys.getswitchinterval()
+        # Switch threads as often as possible to provoke races.
+        sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+        sys.setswitchinterval(self.interval)
+
+    def test_a_stress_shared_accounts(self):
+        bank = Bank(concurrent=True, lock_stripes=4)
+        cards = []
+        accounts = []
+        for i in range(3):
+            ah = AccountHolder(bank, f"{i}1", "Mathias", "Cormann")
+            for cls, kind in ((CheckingAccount, "checking"), (SavingsAccount, "savings")):
+                ac = cls(
+                    f"{i}1-{kind}-1", kind, ah.accounts, f"{i}1", opening_balance=100
+                )
+                card = Card(
+                    ah,
+                    ac,
+                    "Mathias",
+                    "Cormann",
+                    f"40001|{i}1-{kind}-1",
+                    "0101",
+                    "12-12-2024",
+                    "432",
+                    "active",
+                )
+                cards.append(card.card_number)
+                accounts.append(ac)
+        opening = bank.bank_balance
+        n_threads = 16
+        applied = [0] * n_threads
+        overdrawn = []
+        barrier = threading.Barrier(n_threads)
+
+        def worker(t):
+            rng = random.Random(t)
+            barrier.wait()
+            for _ in range(2000):
+                card = rng.choice(cards)
+                amount = rng.randrange(1, 40)
+                if rng.random() < 0.55:
+                    trans = bank.withdrawal_transaction(card, amount)
+                    if trans["status"]:
+                        applied[t] -= amount
+                        if trans["new_balance"] < 0:
+                            overdrawn.append(trans)
+                elif rng.random() < 0.9:
+                    trans = bank.deposit_transaction(card, amount)
+                    applied[t] += amount
+                else:
+                    rows = [(card, amount, "withdraw"), (card, amount, "deposit")]
+                    result = bank.process_batch(rows)
+                    if result.statuses[0] != TransactionStatus.OK:
+                        applied[t] += amount
+
+        threads = [threading.Thread(target=worker, args=(t,)) for t in range(n_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # No overdrafts, no lost updates and the running totals agree.
+        assert not overdrawn
+        assert all(account.balance >= 0 for account in accounts)
+        assert sum(account.balance for account in accounts) == opening + sum(applied)
+        assert bank.bank_balance == opening + sum(applied)
+        assert bank.audit_balances(tolerance=0) == []
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import unittest
+import os, sys
+import datetime
+import random
+
+test_dir = os.path.dirname(__file__)
+src_dir = "../"
+sys.path.insert(0, os.path.abspath(os.path.join(test_dir, src_dir)))
+
+from bank.accounts import CheckingAccount, SavingsAccount, CreditAccount
+from bank.account_holder import AccountHolder
+from bank.banks import Bank
+from bank.cards import Card
+from bank.indexes import SortedKeyList
+from bank.ledger import LedgerStore, SavingsAccountView
+
+
+def open_holder(bank, i, balance, open_date):
+    ah = AccountHolder(bank, f"{i}1", "Mathias", "Cormann")
+    checking = CheckingAccount(
+        f"{i}1-checking-1",
+        "checking",
+        ah.accounts,
+        f"{i}1",
+        opening_balance=balance,
+        open_date=open_date,
+    )
+    savings = SavingsAccount(
+        f"{i}1-savings-1",
+        "savings",
+        ah.accounts,
+        f"{i}1",
+        opening_balance=balance * 100,
+        open_date=open_date,
+    )
+    Card(
+        ah,
+        checking,
+        "Mathias",
+        "Cormann",
+        f"40001|{i}1-checking-1",
+        "0101",
+        "12-12-2024",
+        "432",
+        "active",
+    )
+    return ah, checking, savings
+
+
+class BasicTests(unittest.TestCase):
+    def test_a_sorted_key_list(self):
+        rng = random.Random(0)
+        keys = SortedKeyList(load=4)
+        expected = []
+        for seq in range(200):
+            key = (rng.randrange(50), seq)
+            keys.add(key)
+            expected.append(key)
+        for key in rng.sample(expected, 80):
+            keys.remove(key)
+            expected.remove(key)
+        expected.sort()
+        assert list(keys) == expected
+        assert list(reversed(keys)) == expected[::-1]
+        assert keys[0] == expected[0] and keys[-1] == expected[-1]
+        assert list(keys.irange((10,), (20, 10 ** 9))) == [
+            key for key in expected if 10 <= key[0] <= 20
+        ]
+        assert keys.position((10,)) == sum(1 for key in expected if key[0] < 10)
+        with self.assertRaises(ValueError):
+            keys.remove((100, 0))
+
+    def test_b_queries(self):
+        bank = Bank(indexed=True)
+        start = datetime.date(2024, 1, 1)
+        accounts = [
+            open_holder(bank, i, 1000.00 * i, start + datetime.timedelta(days=i))
+            for i in range(10)
+        ]
+        indexes = bank.indexes
+        assert len(indexes) == 20
+        assert len(indexes.by_type("savings")) == 10
+        assert len(indexes.by_status("open")) == 20
+        # All savings accounts over $500k.
+        rich = indexes.balance_between(500000.00, account_type="savings")
+        assert [a.account_id for a in rich] == [
+            f"{i}1-savings-1" for i in range(5, 10)
+        ]
+        assert indexes.count_balance_between(500000.00, account_type="savings") == 5
+        assert indexes.count_balance_between(2000.00, 4000.00) == 3
+        # Accounts opened in the first week.
+        week = indexes.opened_between(start, start + datetime.timedelta(days=7))
+        assert len(week) == 14
+        assert indexes.largest_balances(1)[0] is accounts[9][2]
+
+    def test_c_incremental(self):
+        bank = Bank(indexed=True)
+        start = datetime.date(2024, 1, 1)
+        ah, checking, savings = open_holder(bank, 1, 1000.00, start)
+        indexes = bank.indexes
+        bank.withdrawal_transaction("40001|11-checking-1", 600.00)
+        assert indexes.balance_between(high=500.00) == [checking]
+        bank.process_batch([("40001|11-checking-1", 1000.00, "deposit")])
+        assert indexes.balance_between(1400.00, 1400.00) == [checking]
+        checking.status = "frozen"
+        assert indexes.by_status("frozen") == [checking]
+        assert checking not in indexes.by_status("open")
+        credit = CreditAccount("11-credit-1", "credit", ah.accounts, "11")
+        credit.withdraw(250.00)
+        assert indexes.balance_between(high=0, account_type="credit") == [credit]
+        del ah.accounts.credit_accounts["11-credit-1"]
+        assert credit not in indexes
+        # Replacing the holder drops their accounts.
+        AccountHolder(bank, "11", "Mathias", "Cormann")
+        assert len(indexes) == 0
+        assert indexes.by_status("frozen") == []
+
+    def test_d_views_and_accrual(self):
+        bank = Bank(ledger=LedgerStore(), indexed=True)
+        ah = AccountHolder(bank, "101", "Mathias", "Cormann")
+        view = SavingsAccountView(
+            "101-savings-1", "savings", ah.accounts, "101", 1000.00, interest_rate=0.365
+        )
+        bank.accrue_interest(datetime.date(2024, 1, 2))
+        assert bank.indexes.balance_between(1001.00, 1001.00) == [view]
+        view.status = "closed"
+        assert bank.indexes.by_status("closed") == [view]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import datetime
+import os, sys
+
+test_dir = os.path.dirname(__file__)
+src_dir = "../"
+sys.path.insert(0, os.path.abspath(os.path.join(test_dir, src_dir)))
+
+from bank.accounts import CheckingAccount, SavingsAccount, CreditAccount
+from bank.account_holder import AccountHolder
+from bank.banks import Bank
+from bank.exceptions import InsufficientBalance
+from bank.interest import year_fraction, accrual
+from bank.ledger import LedgerStore, SavingsAccountView
+
+
+class BasicTests(unittest.TestCase):
+    def test_a_year_fraction(self):
+        d = datetime.date
+        assert year_fraction(d(2023, 1, 1), d(2023, 1, 2)) == 1 / 365
+        assert year_fraction(d(2023, 1, 1), d(2023, 1, 2), "actual/360") == 1 / 360
+        assert year_fraction(d(2024, 1, 1), d(2024, 1, 2), "actual/actual") == 1 / 366
+        assert (
+            year_fraction(d(2023, 12, 31), d(2024, 1, 2), "actual/actual")
+            == 1 / 365 + 1 / 366
+        )
+        assert year_fraction(d(2023, 1, 31), d(2023, 2, 1), "30/360") == 1 / 360
+        assert year_fraction(d(2023, 2, 28), d(2023, 3, 1), "30/360") == 3 / 360
+        with self.assertRaises(ValueError):
+            year_fraction(d(2023, 1, 1), d(2023, 1, 2), "actual/364")
+
+    def test_b_credit_account(self):
+        # Credit accounts may be drawn down to -credit_limit.
+        bank = Bank()
+        cormo = AccountHolder(bank, "101", "Mathias", "Cormann")
+        cormo_credit = CreditAccount(
+            "101-credit-1", "credit", cormo.accounts, "101", credit_limit=1000
+        )
+        assert cormo.accounts.credit_accounts["101-credit-1"] is cormo_credit
+        cormo_credit.withdraw(600)
+        assert cormo_credit.balance == -600
+        assert bank.bank_balance == -600
+        with self.assertRaises(InsufficientBalance):
+            cormo_credit.withdraw(500)
+
+    def test_c_accrue_matches_reference(self):
+        # The same with accounts gathered from the account type index.
+        for indexed in (False, True):
+            with self.subTest(indexed=indexed):
+                bank = Bank(ledger=LedgerStore(), indexed=indexed)
+                accounts = []
+                for i in range(50):
+                    ah = AccountHolder(bank, f"{i}1", "Mathias", "Cormann")
+                    CheckingAccount(
+                        f"{i}1-checking-1",
+                        "checking",
+                        ah.accounts,
+                        f"{i}1",
+                        opening_balance=100,
+                    )
+                    accounts.append(
+                        SavingsAccount(
+                            f"{i}1-savings-1",
+                            "savings",
+                            ah.accounts,
+                            f"{i}1",
+                            opening_balance=1000.0 + i,
+                            interest_rate=0.01 * (i % 5),
+                        )
+                    )
+                    accounts.append(
+                        SavingsAccountView(
+                            f"{i}1-savings-2",
+                            "savings",
+                            ah.accounts,
+                            f"{i}1",
+                            opening_balance=2000.0 + i,
+                            interest_rate=0.02,
+                        )
+                    )
+                    credit = CreditAccount(
+                        f"{i}1-credit-1", "credit", ah.accounts, f"{i}1", apr_rate=0.2
+                    )
+                    credit.withdraw(10.0 * i)
+                    accounts.append(credit)
+                accounts[0].status = "closed"
+                accounts[1].status = "frozen"
+                end = datetime.date(2024, 3, 1)
+                fraction = year_fraction(datetime.date(2024, 2, 29), end, "actual/actual")
+                expected = [a.balance + accrual(a, fraction) for a in accounts]
+                result = bank.accrue_interest(end, convention="actual/actual")
+                assert result["fraction"] == fraction
+                assert result["accounts"] == 150
+                assert [a.balance for a in accounts] == expected
+                # Closed/frozen accounts and the checking accounts accrue nothing.
+                assert accounts[0].balance == 1000.0 and accounts[1].balance == 2000.0
+                assert result["interest"] > 0 and result["charges"] > 0
+                assert bank.audit_balances() == []
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+import unittest
+import datetime
+import os, sys
+import tempfile
+
+test_dir = os.path.dirname(__file__)
+src_dir = "../"
+sys.path.insert(0, os.path.abspath(os.path.join(test_dir, src_dir)))
+
+from bank.accounts import CheckingAccount, CreditAccount
+from bank.account_holder import AccountHolder
+from bank.banks import Bank
+from bank.cards import Card
+from bank.exceptions import AccountNotExists
+from bank.journal import Journal, RECORD_SIZE
+from bank.ledger import LedgerStore, SavingsAccountView
+
+
+def populate(bank, n):
+    for i in range(n):
+        ah = AccountHolder(bank, f"{i}1", "Mathias", "Cormann")
+        ac = CheckingAccount(
+            f"{i}1-checking-1", "checking", ah.accounts, f"{i}1", opening_balance=1000.00
+        )
+        Card(
+            ah,
+            ac,
+            "Mathias",
+            "Cormann",
+            f"40001|{i}1-checking-1",
+            "0101",
+            "12-12-2024",
+            "432",
+            "active",
+        )
+
+
+class BasicTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "bank.journal")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_a_replay(self):
+        # Rebuild holders, accounts, cards and balances from the journal.
+        journal = Journal(self.path)
+        bank = Bank(ledger=LedgerStore(), journal=journal)
+        cormo = AccountHolder(bank, "101", "Mathias", "Cormann")
+        cormo_checking = CheckingAccount(
+            "101-checking-1", "checking", cormo.accounts, "101", opening_balance=1000.00
+        )
+        cormo_savings = SavingsAccountView(
+            "101-savings-1", "savings", cormo.accounts, "101", opening_balance=500.00
+        )
+        cormo_credit = CreditAccount(
+            "101-credit-1", "credit", cormo.accounts, "101", credit_limit=2000
+        )
+        for account, number in (
+            (cormo_checking, "40001|101-checking-1"),
+            (cormo_savings, "40001|101-savings-1"),
+            (cormo_credit, "40001|101-credit-1"),
+        ):
+            Card(
+                cormo,
+                account,
+                "Mathias",
+                "Cormann",
+                number,
+                "0101",
+                "12-12-2024",
+                "432",
+                "active",
+            )
+        bank.withdrawal_transaction("40001|101-checking-1", 100.10)
+        bank.withdrawal_transaction("40001|101-checking-1", 10000.00)
+        bank.deposit_transaction("40001|101-savings-1", 0.3)
+        bank.process_batch(
+            [
+                ("40001|101-credit-1", 750.25, "withdraw"),
+                ("40001|101-checking-1", 25.5, "deposit"),
+                ("40001|101-checking-9", 1.0, "deposit"),
+            ]
+        )
+        with self.assertRaises(AccountNotExists):
+            bank.deposit_transaction("40001|999-checking-1", 1.0)
+        bank.accrue_interest(datetime.date(2024, 1, 2))
+        journal.close()
+
+        replayed = Journal(self.path)
+        bank2 = replayed.replay(Bank(ledger=LedgerStore()))
+        cormo2 = bank2.account_holders["101"]
+        assert cormo2.first_name == "Mathias"
+        assert cormo2.accounts.checking_accounts["101-checking-1"].balance == (
+            cormo_checking.balance
+        )
+        assert cormo2.accounts.saving_accounts["101-savings-1"].balance == (
+            cormo_savings.balance
+        )
+        assert cormo2.accounts.credit_accounts["101-credit-1"].balance == (
+            cormo_credit.balance
+        )
+        assert cormo2.accounts.credit_accounts["101-credit-1"].credit_limit == 2000
+        assert set(cormo2.cards) == set(cormo.cards)
+        assert cormo2.cards["40001|101-checking-1"]["card"].verify(
+            "0101", "12-12-2024", "432"
+        )
+        assert bank2.bank_balance == bank.bank_balance
+        # The replayed bank keeps journaling.
+        bank2.deposit_transaction("40001|101-checking-1", 1.0)
+        replayed.close()
+        bank3 = Journal(self.path).replay(Bank(ledger=LedgerStore()))
+        assert bank3.bank_balance == bank.bank_balance + 1.0
+
+    def test_b_torn_record(self):
+        journal = Journal(self.path)
+        bank = Bank(journal=journal)
+        populate(bank, 2)
+        bank.withdrawal_transaction("40001|01-checking-1", 100.00)
+        journal.close()
+        with open(self.path, "ab") as f:
+            f.write(b"\x01" * (RECORD_SIZE // 2))
+        bank2 = Journal(self.path).replay()
+        assert bank2.bank_balance == 1900.00
+
+    def test_c_replay_speed(self):
+        # Records per second replayed through mmap.
+        journal = Journal(self.path, group_size=4096)
+        bank = Bank(journal=journal)
+        n = 100
+        populate(bank, n)
+        rows = [(f"40001|{i % n}1-checking-1", 1.0, "deposit") for i in range(50000)]
+        bank.process_batch(rows)
+        journal.close()
+        replayed = Journal(self.path)
+        bank2 = replayed.replay()
+        assert bank2.bank_balance == bank.bank_balance
+        rate = replayed.replayed_records / replayed.replay_seconds
+        print(f"journal replay: {rate:,.0f} records/s")
+        assert rate > 50000
+
+    def test_d_account_changes(self):
+        # Statuses, withdrawal limits, closed accounts and removed holders replay.
+        journal = Journal(self.path)
+        bank = Bank(journal=journal)
+        populate(bank, 4)
+        bank.account_holders["01"].accounts.checking_accounts["01-checking-1"].status = "frozen"
+        bank.account_holders["11"].accounts.checking_accounts["11-checking-1"].withdrawal_limit = 10
+        del bank.account_holders["21"].accounts.checking_accounts["21-checking-1"]
+        del bank.account_holders["31"]
+        journal.close()
+        replayed = Journal(self.path)
+        bank2 = replayed.replay()
+        frozen = bank2.account_holders["01"].accounts.checking_accounts["01-checking-1"]
+        assert frozen.status == "frozen"
+        assert not bank2.withdrawal_transaction("40001|01-checking-1", 50.00)["status"]
+        limited = bank2.account_holders["11"].accounts.checking_accounts["11-checking-1"]
+        assert limited.withdrawal_limit == 10
+        assert not bank2.withdrawal_transaction("40001|11-checking-1", 50.00)["status"]
+        assert not bank2.account_holders["21"].accounts.checking_accounts
+        assert "31" not in bank2.account_holders
+        assert bank2.bank_balance == bank.bank_balance == 2000.00
+        # Changes made after a replay are journaled too.
+        frozen.status = "open"
+        replayed.close()
+        bank3 = Journal(self.path).replay()
+        assert bank3.account_holders["01"].accounts.checking_accounts["01-checking-1"].status == (
+            "open"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import os, sys
+
+test_dir = os.path.dirname(__file__)
+src_dir = "../"
+sys.path.insert(0, os.path.abspath(os.path.join(test_dir, src_dir)))
+
+from bank.account_holder import AccountHolder
+from bank.banks import Bank
+from bank.cards import Card
+from bank.exceptions import InsufficientBalance, AccountError
+from bank.ledger import LedgerStore, CheckingAccountView, SavingsAccountView
+
+
+class BasicTests(unittest.TestCase):
+    def test_a_views(self):
+        # Views register with Accounts() and behave like accounts.
+        bank = Bank(ledger=LedgerStore())
+        cormo = AccountHolder(bank, "101", "Mathias", "Cormann")
+        cormo_checking = CheckingAccountView(
+            "101-checking-1", "checking", cormo.accounts, "101", opening_balance=1000
+        )
+        cormo_savings = SavingsAccountView(
+            "101-savings-1", "savings", cormo.accounts, "101", opening_balance=500
+        )
+        assert cormo.accounts.checking_accounts["101-checking-1"] is cormo_checking
+        assert cormo.accounts.saving_accounts["101-savings-1"] is cormo_savings
+        assert not hasattr(cormo_checking, "__dict__")
+        assert cormo_checking.slot == 0 and cormo_savings.slot == 1
+        assert cormo_savings.account_type == "savings"
+        assert cormo_savings.interest_rate == 0.001
+        assert bank.bank_balance == 1500
+        cormo_checking.withdraw(250)
+        cormo_savings.deposit(100)
+        assert bank.ledger.balances.tolist() == [750, 600]
+        assert cormo.accounts.total_balance == 1350
+        with self.assertRaises(InsufficientBalance):
+            cormo_checking.withdraw(800)
+        cormo_checking.status = "locked"
+        with self.assertRaises(AccountError):
+            cormo_checking.deposit(1)
+        assert bank.ledger.status_names == ["open", "locked"]
+        assert bank.audit_balances() == []
+
+    def test_b_bank_transactions(self):
+        # Cards and bank transactions work against views.
+        bank = Bank(ledger=LedgerStore())
+        cormo = AccountHolder(bank, "101", "Mathias", "Cormann")
+        cormo_checking = CheckingAccountView(
+            "101-checking-1", "checking", cormo.accounts, "101", opening_balance=1000
+        )
+        card = Card(
+            cormo,
+            cormo_checking,
+            "Mathias",
+            "Cormann",
+            "40001|101-checking-1",
+            "0101",
+            "12-12-2024",
+            "432",
+            "active",
+        )
+        assert cormo_checking.linked_cards[card.card_number] is card
+        trans = bank.withdrawal_transaction(card.card_number, 100)
+        assert trans["status"] and trans["new_balance"] == 900
+        result = bank.process_batch([(card.card_number, 100, "deposit")])
+        assert result.applied == 1
+        assert cormo_checking.balance == 1000
+        assert bank.bank_balance == 1000
+
+    def test_c_requires_ledger(self):
+        bank = Bank()
+        cormo = AccountHolder(bank, "101", "Mathias", "Cormann")
+        with self.assertRaises(ValueError):
+            CheckingAccountView("101-checking-1", "checking", cormo.accounts, "101")
+
+
+if __name__ == "__main__":
+    unittest.main()
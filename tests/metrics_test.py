@@ -0,0 +1,152 @@
+import unittest
+import os, sys
+import random
+import tempfile
+import threading
+import urllib.request
+
+test_dir = os.path.dirname(__file__)
+src_dir = "../"
+sys.path.insert(0, os.path.abspath(os.path.join(test_dir, src_dir)))
+
+from bank.accounts import CheckingAccount
+from bank.account_holder import AccountHolder
+from bank.banks import Bank
+from bank.cards import Card
+from bank.exceptions import AccountNotExists
+from bank.metrics import LatencyHistogram, Metrics
+
+
+def open_bank(metrics):
+    bank = Bank(metrics=metrics)
+    for i in range(3):
+        ah = AccountHolder(bank, f"{i}1", "Mathias", "Cormann")
+        ac = CheckingAccount(
+            f"{i}1-checking-1", "checking", ah.accounts, f"{i}1", opening_balance=100.00
+        )
+        Card(
+            ah,
+            ac,
+            "Mathias",
+            "Cormann",
+            f"40001|{i}1-checking-1",
+            "0101",
+            "12-12-2024",
+            "432",
+            "active",
+        )
+    return bank
+
+
+class BasicTests(unittest.TestCase):
+    def test_a_histogram(self):
+        histogram = LatencyHistogram()
+        rng = random.Random(0)
+        values = sorted(rng.randrange(1, 10 ** 7) for _ in range(10000))
+        for ns in values:
+            histogram.record(ns / 1e9)
+        assert histogram.count == 10000
+        for q in (0.5, 0.9, 0.99):
+            exact = values[int(q * len(values)) - 1] / 1e9
+            assert abs(histogram.percentile(q) - exact) <= exact * 0.07
+        assert histogram.percentile(1.0) == values[-1] / 1e9
+        # Every bucket holds the values that index into it.
+        for ns in (0, 31, 32, 33, 63, 64, 1000, 123456789):
+            index = histogram._index(ns)
+            assert histogram._upper(index - 1) < ns <= histogram._upper(index) or (
+                index == 0
+            )
+
+    def test_b_bank_metrics(self):
+        metrics = Metrics()
+        bank = open_bank(metrics)
+        for _ in range(3):
+            bank.withdrawal_transaction("40001|01-checking-1", 10.00)
+        bank.withdrawal_transaction("40001|11-checking-1", 500.00)
+        bank.withdrawal_transaction("40001|11-checking-1", 6000.00)
+        bank.deposit_transaction("40001|21-checking-1", 10.00)
+        bank.deposit_transaction("40001|01-checking-9", 10.00)
+        with self.assertRaises(AccountNotExists):
+            bank.withdrawal_transaction("40001|99-checking-1", 10.00)
+        snapshot = metrics.snapshot()
+        assert snapshot["transactions"] == {
+            "withdraw:approved": 3,
+            "withdraw:declined": 3,
+            "deposit:approved": 1,
+            "deposit:declined": 1,
+        }
+        assert snapshot["declines"] == {
+            "withdraw:InsufficientBalance": 1,
+            "withdraw:ExceedsLimit": 1,
+            "withdraw:AccountNotExists": 1,
+            "deposit:KeyError": 1,
+        }
+        assert snapshot["hot_spots"][0] == (("01", "01-checking-1"), 3)
+        assert snapshot["stages"]["total:withdraw"]["count"] == 6
+        assert snapshot["stages"]["account:withdraw"]["count"] == 3
+        assert snapshot["stages"]["account_declined:withdraw"]["count"] == 2
+        assert snapshot["stages"]["holder_lookup:deposit"]["count"] == 1
+        assert bank.account_holders["01"].accounts.total_balance == 70.00
+        # Switched off, nothing more is collected.
+        bank.metrics = None
+        bank.withdrawal_transaction("40001|01-checking-1", 10.00)
+        assert metrics.snapshot()["transactions"]["withdraw:approved"] == 3
+
+    def test_c_prometheus(self):
+        metrics = Metrics(namespace="square")
+        bank = open_bank(metrics)
+        bank.withdrawal_transaction("40001|01-checking-1", 10.00)
+        bank.withdrawal_transaction("40001|01-checking-1", 1000.00)
+        text = metrics.prometheus()
+        assert "# TYPE square_stage_latency_seconds summary" in text
+        assert 'square_stage_latency_seconds_count{stage="total",kind="withdraw"} 2' in text
+        assert 'square_transactions_total{kind="withdraw",outcome="approved"} 1' in text
+        assert (
+            'square_declines_total{kind="withdraw",reason="InsufficientBalance"} 1' in text
+        )
+        assert (
+            'square_hot_account_transactions{accountholder_id="01",account_id="01-checking-1"} 2'
+            in text
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bank.prom")
+            metrics.write(path)
+            with open(path) as f:
+                assert f.read() == text
+        server = metrics.serve()
+        try:
+            host, port = server.server_address
+            with urllib.request.urlopen(f"http://{host}:{port}/metrics") as response:
+                assert response.read().decode() == text
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_d_hot_spots_bounded(self):
+        # At most tracked_accounts are counted, scrapes run while transactions insert.
+        metrics = Metrics(hot_spots=2, tracked_accounts=5)
+        bank = open_bank(metrics)
+        holder = bank.account_holders["01"]
+        accounts = [
+            CheckingAccount(f"01-checking-{i}", "checking", holder.accounts, "01")
+            for i in range(2, 200)
+        ]
+        hot = holder.accounts.checking_accounts["01-checking-1"]
+
+        def transactions():
+            for account in accounts:
+                metrics.transaction("deposit", hot)
+                metrics.transaction("deposit", account)
+
+        thread = threading.Thread(target=transactions)
+        thread.start()
+        while thread.is_alive():
+            metrics.prometheus()
+            metrics.snapshot()
+        thread.join()
+        assert len(metrics.accounts) == 5
+        assert metrics.hot_spots(1) == [(("01", "01-checking-1"), len(accounts))]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+import unittest
+import os, sys
+import datetime
+import tempfile
+from decimal import Decimal
+
+test_dir = os.path.dirname(__file__)
+src_dir = "../"
+sys.path.insert(0, os.path.abspath(os.path.join(test_dir, src_dir)))
+
+from bank.accounts import CheckingAccount, SavingsAccount, CreditAccount
+from bank.account_holder import AccountHolder
+from bank.banks import Bank
+from bank.cards import Card
+from bank.exceptions import InsufficientBalance, ExceedsLimit
+from bank.journal import Journal
+from bank.ledger import LedgerStore, CheckingAccountView
+from bank.money import to_cents, from_cents, check_cents
+from bank.status import TransactionStatus
+
+
+def open_holder(bank, accountholder_id, opening_balance):
+    ah = AccountHolder(bank, accountholder_id, "Mathias", "Cormann")
+    ac = CheckingAccount(
+        f"{accountholder_id}-checking-1",
+        "checking",
+        ah.accounts,
+        accountholder_id,
+        opening_balance=opening_balance,
+    )
+    Card(
+        ah,
+        ac,
+        "Mathias",
+        "Cormann",
+        f"40001|{accountholder_id}-checking-1",
+        "0101",
+        "12-12-2024",
+        "432",
+        "active",
+    )
+    return ah, ac
+
+
+class BasicTests(unittest.TestCase):
+    def test_a_conversions(self):
+        assert to_cents(12) == 1200
+        assert to_cents(0.1) == 10
+        assert to_cents("19.995") == 2000
+        assert to_cents("19.985") == 1998
+        assert to_cents(Decimal("-3.50")) == -350
+        assert from_cents(1999) == Decimal("19.99")
+        with self.assertRaises(TypeError):
+            check_cents(10.0)
+        with self.assertRaises(OverflowError):
+            check_cents(2 ** 63)
+
+    def test_b_transactions(self):
+        bank = Bank(cents=True)
+        ah, ac = open_holder(bank, "101", to_cents(1000))
+        assert ac.withdrawal_limit == 500000
+        trans = bank.withdrawal_transaction("40001|101-checking-1", to_cents("0.10"))
+        assert trans["new_balance"] == 99990
+        trans = bank.withdrawal_transaction("40001|101-checking-1", 99991)
+        assert isinstance(trans["error"], InsufficientBalance)
+        assert "short $-0.01," in trans["error"].message
+        trans = bank.withdrawal_transaction("40001|101-checking-1", 500001)
+        assert isinstance(trans["error"], ExceedsLimit)
+        assert "limited to 5000.00 per" in trans["error"].message
+        # Floats are refused rather than silently mixed into integer balances.
+        trans = bank.deposit_transaction("40001|101-checking-1", 0.1)
+        assert isinstance(trans["error"], TypeError)
+        credit = CreditAccount("101-credit-1", "credit", ah.accounts, "101")
+        assert credit.credit_limit == 500000
+        credit.withdraw(250)
+        assert bank.account_type_balances == {
+            "checking": 99990,
+            "savings": 0,
+            "credit": -250,
+        }
+        with self.assertRaises(TypeError):
+            SavingsAccount("101-savings-1", "savings", ah.accounts, "101", 10.50)
+
+    def test_c_exact_totals(self):
+        floats, cents = Bank(), Bank(cents=True)
+        open_holder(floats, "101", 0)
+        open_holder(cents, "101", 0)
+        for _ in range(1000):
+            floats.deposit_transaction("40001|101-checking-1", 0.10)
+            cents.deposit_transaction("40001|101-checking-1", 10)
+        assert floats.bank_balance != 100.00
+        assert cents.bank_balance == 10000
+        assert isinstance(cents.bank_balance, int)
+
+    def test_d_batch_and_ledger(self):
+        with self.assertRaises(ValueError):
+            Bank(ledger=LedgerStore(), cents=True)
+        store = LedgerStore(cents=True)
+        bank = Bank(ledger=store, cents=True)
+        ah = AccountHolder(bank, "101", "Mathias", "Cormann")
+        view = CheckingAccountView(
+            "101-checking-1", "checking", ah.accounts, "101", 1000
+        )
+        Card(
+            ah,
+            view,
+            "Mathias",
+            "Cormann",
+            "40001|101-checking-1",
+            "0101",
+            "12-12-2024",
+            "432",
+            "active",
+        )
+        assert store.balances.typecode == "q"
+        result = bank.process_batch(
+            [
+                ("40001|101-checking-1", 250, "withdraw"),
+                ("40001|101-checking-1", 2.50, "withdraw"),
+                ("40001|101-checking-1", 100, "deposit"),
+            ]
+        )
+        assert list(result.statuses) == [0, TransactionStatus.INVALID_AMOUNT, 0]
+        assert view.balance == 850
+        assert bank.bank_balance == 850
+
+    def test_e_interest_and_persistence(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            journal = Journal(os.path.join(tmp, "bank.journal"))
+            bank = Bank(journal=journal, cents=True)
+            ah, ac = open_holder(bank, "101", 1000)
+            SavingsAccount(
+                "101-savings-1",
+                "savings",
+                ah.accounts,
+                "101",
+                123457,
+                interest_rate=0.05,
+            )
+            summary = bank.accrue_interest(datetime.date(2024, 1, 2))
+            # 123457 * 0.05 / 365 = 16.91 cents.
+            assert summary["interest"] == 17
+            assert ah.accounts.saving_accounts["101-savings-1"].balance == 123474
+            bank.withdrawal_transaction("40001|101-checking-1", 1)
+            bank.snapshot(os.path.join(tmp, "bank.snapshot"))
+            journal.close()
+            bank2 = Journal(os.path.join(tmp, "bank.journal")).replay(Bank(cents=True))
+            assert bank2.bank_balance == bank.bank_balance == 124473
+            assert isinstance(bank2.bank_balance, int)
+            bank3 = Bank.load(os.path.join(tmp, "bank.snapshot"), lazy=False)
+            assert bank3.cents
+            assert bank3.bank_balance == 124473
+            bank2.journal.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
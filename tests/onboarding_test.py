@@ -0,0 +1,141 @@
+import unittest
+import os, sys
+import datetime
+import tempfile
+
+test_dir = os.path.dirname(__file__)
+src_dir = "../"
+sys.path.insert(0, os.path.abspath(os.path.join(test_dir, src_dir)))
+
+from bank.accounts import SavingsAccount, CreditAccount
+from bank.account_holder import AccountHolder
+from bank.banks import Bank
+from bank.journal import Journal
+from bank.storage import SQLiteStore
+
+
+def columns(n):
+    holders = {
+        "accountholder_id": [f"{i}1" for i in range(n)],
+        "first_name": ["Mathias"] * n,
+        "last_name": ["Cormann"] * n,
+    }
+    accounts = {
+        "accountholder_id": [f"{i}1" for i in range(n)] * 2,
+        "account_id": [f"{i}1-checking-1" for i in range(n)]
+        + [f"{i}1-savings-1" for i in range(n)],
+        "kind": ["checking"] * n + ["savings"] * n,
+        "balance": [1000.00] * n + [500.00] * n,
+    }
+    cards = {
+        "accountholder_id": [f"{i}1" for i in range(n)],
+        "account_id": [f"{i}1-checking-1" for i in range(n)],
+        "card_number": [f"40001|{i}1-checking-1" for i in range(n)],
+        "holder_firstname": ["Mathias"] * n,
+        "holder_lastname": ["Cormann"] * n,
+        "pin": ["0101"] * n,
+        "expiry_date": ["12-12-2024"] * n,
+        "cvv": ["432"] * n,
+    }
+    return holders, accounts, cards
+
+
+class BasicTests(unittest.TestCase):
+    def test_a_bulk_load(self):
+        bank = Bank(indexed=True)
+        loaded = bank.bulk_load(*columns(3))
+        assert loaded == {"holders": 3, "accounts": 6, "cards": 3}
+        assert bank.bank_balance == 4500.00
+        assert bank.account_type_balances["savings"] == 1500.00
+        assert bank.audit_balances() == []
+        holder = bank.account_holders["11"]
+        assert holder.accounts.total_balance == 1500.00
+        savings = holder.accounts.saving_accounts["11-savings-1"]
+        assert isinstance(savings, SavingsAccount) and savings.interest_rate == 0.001
+        assert len(bank.card_index) == 3
+        assert holder.cards["40001|11-checking-1"].verify("0101", "12-12-2024", "432")
+        # Loaded objects behave like constructed ones.
+        trans = bank.withdrawal_transaction("40001|11-checking-1", 100.00)
+        assert trans["status"] and trans["new_balance"] == 900.00
+        assert bank.bank_balance == 4400.00
+        assert len(bank.indexes.balance_between(800.00, 950.00)) == 1
+        ah = AccountHolder(bank, "91", "Mathias", "Cormann")
+        CreditAccount("91-credit-1", "credit", ah.accounts, "91")
+        assert len(bank.indexes.by_type("credit")) == 1
+
+    def test_b_integrity(self):
+        bank = Bank()
+        holders, accounts, cards = columns(3)
+        accounts["accountholder_id"][4] = "99"
+        accounts["kind"][5] = "brokerage"
+        cards["card_number"][2] = cards["card_number"][1]
+        with self.assertRaises(ValueError) as e:
+            bank.bulk_load(holders, accounts, cards)
+        message = str(e.exception)
+        assert "rejected 3 rows" in message
+        assert "accounts[4]: unknown account holder '99'" in message
+        assert "accounts[5]: unknown account kind 'brokerage'" in message
+        assert "cards[2]: duplicate card '40001|11-checking-1'" in message
+        # Nothing was loaded.
+        assert len(bank.account_holders) == 0 and bank.bank_balance == 0
+        AccountHolder(bank, "01", "Mathias", "Cormann")
+        with self.assertRaises(ValueError) as e:
+            bank.bulk_load(*columns(1))
+        assert "holders[0]: duplicate account holder '01'" in str(e.exception)
+        with self.assertRaises(ValueError):
+            bank.bulk_load(holders, {"accountholder_id": []})
+        cents = Bank(cents=True)
+        with self.assertRaises(ValueError):
+            cents.bulk_load(*columns(1))
+        holders, accounts, cards = columns(1)
+        accounts["balance"] = [100000, 50000]
+        cents.bulk_load(holders, accounts, cards)
+        assert cents.bank_balance == 150000
+        assert cents.account_holders["01"].accounts.checking_accounts[
+            "01-checking-1"
+        ].withdrawal_limit == 500000
+
+    def test_c_journal(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bank.journal")
+            bank = Bank(journal=Journal(path))
+            holders, accounts, cards = columns(2)
+            accounts["open_date"] = [datetime.date(2020, 1, 1)] * 4
+            bank.bulk_load(holders, accounts, cards)
+            bank.deposit_transaction("40001|11-checking-1", 50.00)
+            bank.journal.close()
+            journal = Journal(path)
+            replayed = journal.replay()
+            assert replayed.bank_balance == 3050.00
+            account = replayed.account_holders["11"].cards["40001|11-checking-1"].account
+            assert account.open_date == datetime.date(2020, 1, 1)
+            journal.close()
+
+    def test_d_balances_and_stored_cards(self):
+        # Negative balances are clamped as the constructors do.
+        bank = Bank()
+        holders, accounts, cards = columns(1)
+        accounts["balance"] = [-100.00, 500.00]
+        bank.bulk_load(holders, accounts, cards)
+        assert bank.account_holders["01"].accounts.checking_accounts[
+            "01-checking-1"
+        ].balance == 0
+        assert bank.bank_balance == 500.00 and bank.audit_balances() == []
+        # Cards of holders only in the backing store are duplicates too.
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SQLiteStore(os.path.join(tmp, "bank.db"))
+            store.save(bank)
+            opened = Bank.open(store, capacity=1)
+            holders, accounts, cards = columns(2)
+            holders = {column: values[1:] for column, values in holders.items()}
+            accounts = {column: values[1::2] for column, values in accounts.items()}
+            cards = {column: values[1:] for column, values in cards.items()}
+            cards["card_number"] = ["40001|01-checking-1"]
+            with self.assertRaises(ValueError) as e:
+                opened.bulk_load(holders, accounts, cards)
+            assert "cards[0]: duplicate card '40001|01-checking-1'" in str(e.exception)
+            store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
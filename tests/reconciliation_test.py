@@ -0,0 +1,147 @@
+import unittest
+import datetime
+import json
+import os, sys
+import tempfile
+
+test_dir = os.path.dirname(__file__)
+src_dir = "../"
+sys.path.insert(0, os.path.abspath(os.path.join(test_dir, src_dir)))
+
+from bank import reconciliation
+from bank.accounts import CheckingAccount, SavingsAccount
+from bank.account_holder import AccountHolder
+from bank.banks import Bank
+from bank.cards import Card
+from bank.journal import Journal
+from bank.reconciliation import reconcile
+
+
+def populate(bank, holders=6):
+    for i in range(holders):
+        ah = AccountHolder(bank, f"{i}1", "Mathias", "Cormann")
+        ac = CheckingAccount(
+            f"{i}1-checking-1", "checking", ah.accounts, f"{i}1", opening_balance=1000.00
+        )
+        SavingsAccount(
+            f"{i}1-savings-1",
+            "savings",
+            ah.accounts,
+            f"{i}1",
+            opening_balance=500.00,
+            interest_rate=0.05,
+        )
+        Card(
+            ah,
+            ac,
+            "Mathias",
+            "Cormann",
+            f"40001|{i}1-checking-1",
+            "0101",
+            "12-12-2024",
+            "432",
+            "active",
+        )
+    return bank
+
+
+def transact(bank, holders=6):
+    for i in range(holders):
+        bank.withdrawal_transaction(f"40001|{i}1-checking-1", 10.00 * (i + 1))
+        bank.withdrawal_transaction(f"40001|{i}1-checking-1", 10000.00)
+        bank.deposit_transaction(f"40001|{i}1-checking-1", 0.10)
+        accounts = bank.account_holders[f"{i}1"].accounts
+        bank.electronic_transfer(
+            accounts.checking_accounts[f"{i}1-checking-1"],
+            accounts.saving_accounts[f"{i}1-savings-1"],
+            25.00,
+        )
+    bank.accrue_interest(datetime.date(2024, 1, 2))
+
+
+class BasicTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "bank.journal")
+        self.output = os.path.join(self.tmp.name, "statements.jsonl")
+        self.checkpoint = os.path.join(self.tmp.name, "reconcile.checkpoint")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_a_balanced(self):
+        bank = populate(Bank(journal=Journal(self.path)))
+        transact(bank)
+        # Segment boundaries land inside definitions and between transfer records.
+        for segments in (1, 7, 40):
+            report = reconcile(bank, self.output, workers=0, chunk_size=4, segments=segments)
+            assert report.balanced, report.mismatches
+            assert report.holders == 6 and report.accounts == 12
+        with open(self.output) as f:
+            statements = [json.loads(line) for line in f]
+        assert [s["accountholder_id"] for s in statements] == [f"{i}1" for i in range(6)]
+        checking, savings = statements[1]["accounts"]
+        assert checking["opening"] == 1000.00
+        assert checking["withdrawals"] == 1 and checking["withdrawn"] == 20.00
+        assert checking["declined"] == 1 and checking["transferred_out"] == 25.00
+        assert abs(checking["recomputed"] - 955.10) < 1e-9
+        assert savings["transferred_in"] == 25.00 and savings["interest"] > 0
+        assert not statements[1]["mismatch"]
+        assert abs(statements[1]["balance"] - statements[1]["recomputed"]) < 1e-9
+
+    def test_b_mismatches(self):
+        bank = populate(Bank(journal=Journal(self.path)))
+        transact(bank)
+        accounts = bank.account_holders["21"].accounts
+        # Not made through the bank, so never journaled.
+        accounts.checking_accounts["21-checking-1"].withdraw(5.00)
+        bank.account_holders["41"].accounts._totals["savings"] += 1.00
+        AccountHolder(bank, "91", "Penny", "Wong")
+        report = reconcile(bank, workers=0)
+        assert report.mismatches == [("21", "21-checking-1"), ("41", None)]
+        assert not report.balanced and report.holders == 7
+
+    def test_c_resume(self):
+        bank = populate(Bank(journal=Journal(self.path)))
+        transact(bank)
+        statements = reconciliation._statements
+        calls = []
+
+        def interrupted(task):
+            calls.append(task)
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            return statements(task)
+
+        reconciliation._statements = interrupted
+        try:
+            with self.assertRaises(KeyboardInterrupt):
+                reconcile(bank, self.output, workers=0, chunk_size=2, checkpoint=self.checkpoint)
+        finally:
+            reconciliation._statements = statements
+        assert os.path.exists(self.checkpoint)
+        with self.assertRaises(ValueError):
+            reconcile(bank, self.output, workers=0, chunk_size=3, checkpoint=self.checkpoint)
+        report = reconcile(bank, self.output, workers=0, chunk_size=2, checkpoint=self.checkpoint)
+        assert report.resumed_chunks == 1 and report.accounts == 12 and report.balanced
+        assert not os.path.exists(self.checkpoint)
+        with open(self.output) as f:
+            ids = [json.loads(line)["accountholder_id"] for line in f]
+        assert ids == [f"{i}1" for i in range(6)]
+
+    def test_d_process_pool(self):
+        bank = populate(Bank(journal=Journal(self.path)), holders=20)
+        transact(bank, holders=20)
+        bank.account_holders["51"].accounts.checking_accounts["51-checking-1"].deposit(1.00)
+        inline = reconcile(bank, workers=0, chunk_size=3)
+        pooled = reconcile(bank, self.output, workers=2, chunk_size=3)
+        assert inline.mismatches == pooled.mismatches == [("51", "51-checking-1")]
+        assert pooled.accounts == 40
+
+    def test_e_no_journal(self):
+        with self.assertRaises(ValueError):
+            reconcile(populate(Bank()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+import os, sys
+
+test_dir = os.path.dirname(__file__)
+src_dir = "../"
+sys.path.insert(0, os.path.abspath(os.path.join(test_dir, src_dir)))
+
+from bank.accounts import CheckingAccount
+from bank.account_holder import AccountHolder
+from bank.banks import Bank
+from bank.cards import Card
+from bank.exceptions import (
+    AccountError,
+    AccountNotExists,
+    ExceedsLimit,
+    InsufficientBalance,
+)
+from bank.ledger import LedgerStore, CheckingAccountView
+from bank.status import TransactionResult, TransactionStatus
+
+
+def open_holder(bank, account_class=CheckingAccount):
+    ah = AccountHolder(bank, "101", "Mathias", "Cormann")
+    ac = account_class(
+        "101-checking-1", "checking", ah.accounts, "101", opening_balance=1000.00
+    )
+    Card(
+        ah,
+        ac,
+        "Mathias",
+        "Cormann",
+        "40001|101-checking-1",
+        "0101",
+        "12-12-2024",
+        "432",
+        "active",
+    )
+    return ah, ac
+
+
+class BasicTests(unittest.TestCase):
+    def test_a_codes(self):
+        bank = Bank()
+        ah, ac = open_holder(bank)
+        result = bank.withdrawal_result("40001|101-checking-1", 100.00)
+        assert result.status and result.code == TransactionStatus.OK
+        assert result.balance == 900.00
+        assert result.transaction_time is not None
+        assert bank.bank_balance == 900.00
+        # Declines come back as codes on the same, reused result object.
+        same = bank.withdrawal_result("40001|101-checking-1", 1000.00, result)
+        assert same is result
+        assert result.code == TransactionStatus.INSUFFICIENT_BALANCE
+        assert result.transaction_time is None
+        assert bank.withdrawal_result("40001|101-checking-1", 6000.00, result).code == (
+            TransactionStatus.EXCEEDS_LIMIT
+        )
+        assert bank.withdrawal_result("40001|202-checking-1", 1.00, result).code == (
+            TransactionStatus.ACCOUNT_NOT_EXISTS
+        )
+        assert bank.deposit_result("40001|101-savings-1", 1.00, result).code == (
+            TransactionStatus.CARD_NOT_EXISTS
+        )
+        ac.status = "locked"
+        assert bank.deposit_result("40001|101-checking-1", 1.00, result).code == (
+            TransactionStatus.ACCOUNT_ERROR
+        )
+        assert bank.bank_balance == 900.00
+
+    def test_b_lazy_errors(self):
+        bank = Bank()
+        ah, ac = open_holder(bank)
+        result = ac.try_withdraw(1000.01)
+        error = result.error()
+        assert isinstance(error, InsufficientBalance)
+        legacy = bank.withdrawal_transaction("40001|101-checking-1", 1000.01)
+        assert result.message == legacy["error"].message
+        assert isinstance(
+            bank.withdrawal_result("40001|101-checking-1", 6000.00).error(), ExceedsLimit
+        )
+        ac.status = "closed"
+        assert isinstance(ac.try_deposit(1.00).error(), AccountError)
+        assert isinstance(
+            bank.withdrawal_result("40001|202-checking-1", 1.00).error(),
+            AccountNotExists,
+        )
+        assert TransactionResult().set(
+            TransactionStatus.OK, ac, 1.00
+        ).as_dict()["status"]
+        assert bank.withdrawal_result("40001|101-checking-1", 1.00).as_dict()[
+            "error"
+        ].args == ("101-checking-1", "closed")
+
+    def test_c_views_and_cents(self):
+        bank = Bank(ledger=LedgerStore())
+        ah, view = open_holder(bank, CheckingAccountView)
+        assert bank.withdrawal_result("40001|101-checking-1", 250.00).balance == 750.00
+        bank = Bank(cents=True)
+        ah = AccountHolder(bank, "101", "Mathias", "Cormann")
+        ac = CheckingAccount("101-checking-1", "checking", ah.accounts, "101", 1000)
+        assert ac.try_withdraw(2.50).code == TransactionStatus.INVALID_AMOUNT
+        assert ac.try_withdraw(2 ** 64).code == TransactionStatus.INVALID_AMOUNT
+        assert ac.try_withdraw(250).balance == 750
+        # The error names what was wrong with the amount in the account's mode.
+        assert isinstance(ac.try_withdraw(2.50).error(), TypeError)
+        assert isinstance(ac.try_withdraw(2 ** 64).error(), OverflowError)
+        result = TransactionResult().set(TransactionStatus.INVALID_AMOUNT, view, -5.00)
+        assert result.message == "Amounts must be positive finite numbers, got -5.0."
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import unittest
+import os, sys
+import io
+import json
+
+test_dir = os.path.dirname(__file__)
+src_dir = "../"
+sys.path.insert(0, os.path.abspath(os.path.join(test_dir, src_dir)))
+
+from bank.accounts import CheckingAccount
+from bank.account_holder import AccountHolder
+from bank.banks import Bank
+from bank.cards import Card
+from bank.settlement import read_chunks, settle
+from bank.status import TransactionStatus
+
+
+def open_bank(cents=False):
+    bank = Bank(cents=cents)
+    for i in range(2):
+        ah = AccountHolder(bank, f"{i}1", "Mathias", "Cormann")
+        ac = CheckingAccount(
+            f"{i}1-checking-1",
+            "checking",
+            ah.accounts,
+            f"{i}1",
+            opening_balance=100000 if cents else 1000.00,
+        )
+        Card(
+            ah,
+            ac,
+            "Mathias",
+            "Cormann",
+            f"40001|{i}1-checking-1",
+            "0101",
+            "12-12-2024",
+            "432",
+            "active",
+        )
+    return bank
+
+
+ROWS = (
+    "card_number,amount,kind\n"
+    "40001|01-checking-1,600.00,withdraw\n"
+    "40001|01-checking-1,600.00,withdraw\n"
+    "40001|11-checking-1,not a number,deposit\n"
+    "40001|11-checking-1,250.50,deposit\n"
+    "40001|99-checking-1,1.00,deposit\n"
+    "40001|01-checking-1,300.00,deposit\n"
+    "40001|01-checking-1,600.00,withdraw\n"
+)
+
+
+class BasicTests(unittest.TestCase):
+    def test_a_read_chunks(self):
+        chunks = list(read_chunks(io.StringIO(ROWS), chunk_size=3))
+        assert [len(chunk[0]) for chunk in chunks] == [3, 3, 1]
+        card_numbers, amounts, kinds, malformed = chunks[0]
+        assert card_numbers[0] == "40001|01-checking-1"
+        assert amounts[:2] == [600.00, 600.00] and kinds[0] == "withdraw"
+        assert malformed == [2]
+        (chunk,) = read_chunks(io.StringIO(ROWS), cents=True)
+        assert chunk[1][3] == 25050
+        with self.assertRaises(ValueError):
+            list(read_chunks(io.StringIO(ROWS), format="xml"))
+
+    def test_b_settle_csv(self):
+        bank = open_bank()
+        output = io.StringIO()
+        report = settle(bank, io.StringIO(ROWS), output, chunk_size=2)
+        # Rows of one account apply in file order across chunk boundaries.
+        assert bank.account_holders["01"].cards["40001|01-checking-1"].account.balance == 100.00
+        assert bank.account_holders["11"].accounts.checking_accounts[
+            "11-checking-1"
+        ].balance == 1250.50
+        assert report.rows == 7 and report.applied == 4 and report.declined == 3
+        assert report.counts[TransactionStatus.MALFORMED] == 1
+        assert report.counts[TransactionStatus.INSUFFICIENT_BALANCE] == 1
+        assert report.rows_per_second > 0
+        lines = output.getvalue().splitlines()
+        assert lines[0] == "row,card_number,status"
+        assert lines[2] == "1,40001|01-checking-1,INSUFFICIENT_BALANCE"
+        assert lines[3] == "2,40001|11-checking-1,MALFORMED"
+        assert len(lines) == 8
+
+    def test_c_settle_jsonl_cents(self):
+        bank = open_bank(cents=True)
+        source = io.StringIO(
+            "\n".join(
+                [
+                    json.dumps(
+                        {
+                            "card_number": "40001|01-checking-1",
+                            "amount": "10.25",
+                            "kind": "withdraw",
+                        }
+                    ),
+                    "{broken",
+                    json.dumps({"card_number": "40001|11-checking-1", "amount": 5}),
+                ]
+            )
+        )
+        output = io.StringIO()
+        report = settle(bank, source, output, format="jsonl")
+        assert bank.bank_balance == 200000 - 1025
+        results = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert [result["status"] for result in results] == [
+            "OK",
+            "MALFORMED",
+            "INVALID_KIND",
+        ]
+        assert results[2]["row"] == 2
+        assert report.applied == 1
+
+    def test_d_invalid_amounts(self):
+        # Amounts that aren't finite and positive would credit money or poison balances.
+        for cents in (False, True):
+            bank = open_bank(cents=cents)
+            source = io.StringIO(
+                "40001|01-checking-1,-500.00,withdraw\n"
+                "40001|01-checking-1,nan,deposit\n"
+                "40001|01-checking-1,inf,deposit\n"
+                "40001|01-checking-1,0,deposit\n"
+                "40001|01-checking-1,1.00,deposit\n"
+            )
+            report = settle(bank, source)
+            assert report.counts[TransactionStatus.MALFORMED] == 4 and report.applied == 1
+            assert bank.bank_balance == (200100 if cents else 2001.00)
+
+
+if __name__ == "__main__":
+    unittest.main()
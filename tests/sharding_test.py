@@ -0,0 +1,117 @@
+import unittest
+import os, sys
+import pickle
+
+test_dir = os.path.dirname(__file__)
+src_dir = "../"
+sys.path.insert(0, os.path.abspath(os.path.join(test_dir, src_dir)))
+
+from bank.accounts import CheckingAccount
+from bank.account_holder import AccountHolder
+from bank.banks import Bank
+from bank.cards import Card
+from bank.exceptions import AccountNotExists, InsufficientBalance, ShardError
+from bank.sharding import HashRing, ShardedBank
+from bank.status import TransactionStatus
+
+
+def populate(n):
+    bank = Bank()
+    for i in range(n):
+        ah = AccountHolder(bank, f"{i}1", "Mathias", "Cormann")
+        ac = CheckingAccount(
+            f"{i}1-checking-1", "checking", ah.accounts, f"{i}1", opening_balance=1000.00
+        )
+        Card(
+            ah,
+            ac,
+            "Mathias",
+            "Cormann",
+            f"40001|{i}1-checking-1",
+            "0101",
+            "12-12-2024",
+            "432",
+            "active",
+        )
+    return bank
+
+
+class BasicTests(unittest.TestCase):
+    def test_a_hash_ring(self):
+        ring = HashRing(4)
+        keys = [f"{i}1" for i in range(4000)]
+        counts = [0] * 4
+        for key in keys:
+            counts[ring.shard(key)] += 1
+        assert min(counts) > 500
+        # Growing the ring only moves keys onto the new shard.
+        grown = HashRing(5)
+        assert all(
+            grown.shard(key) in (ring.shard(key), 4) for key in keys
+        )
+
+    def test_b_exceptions_pickle(self):
+        # Errors are returned across process boundaries.
+        e = pickle.loads(pickle.dumps(InsufficientBalance(100, 200)))
+        assert e.message == InsufficientBalance(100, 200).message
+
+    def test_c_sharded_bank(self):
+        bank = populate(50)
+        with ShardedBank.from_bank(bank, shards=3) as sharded:
+            assert sum(sharded.holders_per_shard) == 50
+            assert sharded.bank_balance == bank.bank_balance
+            trans = sharded.withdrawal_transaction("40001|71-checking-1", 100.00)
+            assert trans["status"] and trans["new_balance"] == 900.00
+            trans = sharded.withdrawal_transaction("40001|71-checking-1", 1000.00)
+            assert isinstance(trans["error"], InsufficientBalance)
+            with self.assertRaises(AccountNotExists):
+                sharded.deposit_transaction("40001|999-checking-1", 1.00)
+            rows = [(f"40001|{i % 50}1-checking-1", 10.00, "deposit") for i in range(200)]
+            rows.append(("40001|999-checking-1", 10.00, "deposit"))
+            rows.append(("bad card", 10.00, "deposit"))
+            result = sharded.process_batch(rows)
+            assert result.applied == 200
+            assert result[200] == TransactionStatus.ACCOUNT_NOT_EXISTS
+            assert result[201] == TransactionStatus.ACCOUNT_NOT_EXISTS
+            assert sharded.bank_balance == 50 * 1000.00 - 100.00 + 2000.00
+            # Onboarding straight onto the shards.
+            sharded.open_holder("5001", "Josh", "Frydenberg")
+            sharded.open_account("5001", "savings", "5001-savings-1", 250.00)
+            sharded.issue_card(
+                "5001",
+                "savings",
+                "5001-savings-1",
+                "Josh",
+                "Frydenberg",
+                "50001|5001-savings-1",
+                "4321",
+                "12-12-2024",
+                "342",
+                "active",
+            )
+            assert sharded.deposit_transaction("50001|5001-savings-1", 50.00)[
+                "new_balance"
+            ] == 300.00
+            assert sharded.account_type_balances["savings"] == 300.00
+            assert sharded.audit_balances() == []
+
+    def test_d_partial_batch(self):
+        # A shard whose sub-batch raises doesn't undo the other shards'.
+        bank = populate(50)
+        with ShardedBank.from_bank(bank, shards=3) as sharded:
+            bad = sharded.shard("01")
+            rows = [(f"40001|{i}1-checking-1", 10.00, "deposit") for i in range(50)]
+            rows.append(("40001|01-checking-1", "10", "deposit"))
+            with self.assertRaises(ShardError) as raised:
+                sharded.process_batch(rows)
+            error = raised.exception
+            assert list(error.errors) == [bad]
+            assert isinstance(error.errors[bad], TypeError)
+            assert sorted(error.results) == [s for s in range(3) if s != bad]
+            applied = sum(result.applied for result in error.results.values())
+            assert 0 < applied < 50
+            assert sharded.bank_balance == 50 * 1000.00 + applied * 10.00
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,163 @@
+import unittest
+import os, sys
+import tempfile
+import threading
+from unittest import mock
+
+test_dir = os.path.dirname(__file__)
+src_dir = "../"
+sys.path.insert(0, os.path.abspath(os.path.join(test_dir, src_dir)))
+
+from bank.accounts import CheckingAccount, CreditAccount
+from bank.account_holder import AccountHolder
+from bank.banks import Bank
+from bank.cards import Card
+from bank.journal import Journal
+from bank.ledger import LedgerStore, SavingsAccountView
+from bank import snapshot
+
+
+def open_holder(bank, i):
+    ah = AccountHolder(bank, f"{i}1", "Mathias", "Cormann")
+    ac = CheckingAccount(
+        f"{i}1-checking-1", "checking", ah.accounts, f"{i}1", opening_balance=1000.00
+    )
+    Card(
+        ah,
+        ac,
+        "Mathias",
+        "Cormann",
+        f"40001|{i}1-checking-1",
+        "0101",
+        "12-12-2024",
+        "432",
+        "active",
+    )
+    return ah
+
+
+class BasicTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.snapshot = os.path.join(self.tmp.name, "bank.snapshot")
+        self.journal = os.path.join(self.tmp.name, "bank.journal")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_a_lazy_load(self):
+        bank = Bank(ledger=LedgerStore())
+        for i in range(10):
+            open_holder(bank, i)
+        ah = bank.account_holders["01"]
+        SavingsAccountView("01-savings-1", "savings", ah.accounts, "01", 300.00)
+        credit = CreditAccount("01-credit-1", "credit", ah.accounts, "01")
+        credit.withdraw(250.00)
+        bank.withdrawal_transaction("40001|51-checking-1", 100.00)
+        bank.snapshot(self.snapshot)
+
+        bank2 = Bank.load(self.snapshot, ledger=LedgerStore())
+        # Nothing is materialized until touched.
+        assert dict.__len__(bank2.account_holders) == 0
+        assert len(bank2.account_holders) == 10
+        assert "51" in bank2.account_holders
+        assert bank2.bank_balance == bank.bank_balance
+        trans = bank2.withdrawal_transaction("40001|51-checking-1", 100.00)
+        assert trans["new_balance"] == 800.00
+        assert dict.__len__(bank2.account_holders) == 1
+        assert bank2.bank_balance == bank.bank_balance - 100.00
+        ah2 = bank2.account_holders["01"]
+        assert ah2.accounts.saving_accounts["01-savings-1"].balance == 300.00
+        assert ah2.accounts.credit_accounts["01-credit-1"].balance == -250.00
+        assert ah2.cards["40001|01-checking-1"]["card"].verify(
+            "0101", "12-12-2024", "432"
+        )
+        assert bank2.audit_balances() == []
+        assert dict.__len__(bank2.account_holders) == 10
+
+    def test_b_snapshot_and_journal_tail(self):
+        journal = Journal(self.journal)
+        bank = Bank(journal=journal)
+        for i in range(5):
+            open_holder(bank, i)
+        bank.withdrawal_transaction("40001|11-checking-1", 100.00)
+        bank.snapshot(self.snapshot)
+        # Tail: transactions on snapshotted and new holders.
+        bank.deposit_transaction("40001|11-checking-1", 25.00)
+        bank.process_batch([("40001|21-checking-1", 50.00, "withdraw")])
+        open_holder(bank, 7)
+        bank.withdrawal_transaction("40001|71-checking-1", 10.00)
+        journal.close()
+
+        journal2 = Journal(self.journal)
+        bank2 = Bank.load(self.snapshot, journal=journal2)
+        assert bank2.account_holders["11"].accounts.total_balance == 925.00
+        assert bank2.account_holders["21"].accounts.total_balance == 950.00
+        assert bank2.account_holders["71"].accounts.total_balance == 990.00
+        assert bank2.bank_balance == bank.bank_balance
+        # Keeps journaling from where it left off.
+        bank2.deposit_transaction("40001|31-checking-1", 5.00)
+        journal2.close()
+        bank3 = Journal(self.journal).replay()
+        assert bank3.bank_balance == bank.bank_balance + 5.00
+
+    def test_c_not_a_snapshot(self):
+        with open(self.snapshot, "wb") as f:
+            f.write(b"\0" * 64)
+        with self.assertRaises(ValueError):
+            Bank.load(self.snapshot)
+
+    def test_e_version_1(self):
+        # Version 1 snapshots had no billing fields, they load without them.
+        bank = Bank()
+        ah = open_holder(bank, 0)
+        CreditAccount("01-credit-1", "credit", ah.accounts, "01", credit_limit=500).withdraw(
+            100.00
+        )
+        dump_holder = snapshot.dump_holder
+
+        def dump_v1(holder, journal=None):
+            record = dump_holder(holder, journal)
+            return (*record[:3], [fields[:13] for fields in record[3]], record[4])
+
+        with mock.patch.object(snapshot, "VERSION", 1), mock.patch.object(
+            snapshot, "dump_holder", dump_v1
+        ):
+            bank.snapshot(self.snapshot)
+        bank2 = Bank.load(self.snapshot)
+        credit = bank2.account_holders["01"].accounts.credit_accounts["01-credit-1"]
+        assert credit.balance == -100.00 and credit.credit_limit == 500
+        assert bank2.bank_balance == bank.bank_balance
+        with mock.patch.object(snapshot, "VERSION", 3):
+            bank.snapshot(self.snapshot)
+        with self.assertRaises(ValueError):
+            Bank.load(self.snapshot)
+
+    def test_d_concurrent_snapshot(self):
+        # Transactions running during a snapshot are either in it or in the tail, once.
+        journal = Journal(self.journal)
+        bank = Bank(journal=journal, concurrent=True)
+        for i in range(50):
+            open_holder(bank, i)
+        stop = threading.Event()
+
+        def deposits():
+            while not stop.is_set():
+                for i in range(50):
+                    bank.deposit_transaction(f"40001|{i}1-checking-1", 1.00)
+
+        thread = threading.Thread(target=deposits)
+        thread.start()
+        try:
+            for _ in range(5):
+                bank.snapshot(self.snapshot)
+        finally:
+            stop.set()
+            thread.join()
+        journal.close()
+        bank2 = Bank.load(self.snapshot, journal=Journal(self.journal), lazy=False)
+        assert bank2.bank_balance == bank.bank_balance > 50000.00
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,278 @@
+import unittest
+import datetime
+import os, sys, tempfile
+import time
+
+test_dir = os.path.dirname(__file__)
+src_dir = "../"
+sys.path.insert(0, os.path.abspath(os.path.join(test_dir, src_dir)))
+
+from bank.accounts import CheckingAccount, CreditAccount, SavingsAccount
+from bank.account_holder import AccountHolder
+from bank.banks import Bank, WorkingSetRegistry
+from bank.cards import Card
+from bank.ledger import LedgerStore, SavingsAccountView
+from bank.storage import Persistence, SQLiteStore
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def populate(bank, holders=5):
+    for i in range(holders):
+        ah = AccountHolder(bank, f"{i}1", "Mathias", "Cormann")
+        ac = CheckingAccount(
+            f"{i}1-checking-1", "checking", ah.accounts, f"{i}1", opening_balance=1000.00
+        )
+        SavingsAccount(
+            f"{i}1-savings-1", "savings", ah.accounts, f"{i}1", opening_balance=500.00
+        )
+        Card(
+            ah,
+            ac,
+            "Mathias",
+            "Cormann",
+            f"40001|{i}1-checking-1",
+            "0101",
+            "12-12-2024",
+            "432",
+            "active",
+        )
+    return bank
+
+
+class BasicTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "bank.db")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_a_store(self):
+        bank = populate(Bank("Fintech"))
+        CreditAccount(
+            "01-credit-1", "credit", bank.account_holders["01"].accounts, "01"
+        ).withdraw(100.00)
+        store = SQLiteStore(self.path)
+        store.save(bank)
+        assert len(store) == 5
+        assert "01" in store and "99" not in store
+        assert store.meta == {"institution": "Fintech", "cents": 0}
+        assert store.totals() == {"checking": 5000.00, "savings": 2500.00, "credit": -100.00}
+        assert store.totals("01")["credit"] == -100.00
+        assert store.read("99") is None
+        _, first_name, _, accounts, cards = store.read("01")
+        assert first_name == "Mathias"
+        assert [fields[0] for fields in accounts] == ["checking", "savings", "credit"]
+        assert cards[0][0] == 0 and cards[0][3] == "40001|01-checking-1"
+        # A save that fails part way leaves the store as it was.
+        broken = populate(Bank("Broken"), holders=2)
+        dict.__setitem__(broken.account_holders, "99", None)
+        with self.assertRaises(AttributeError):
+            store.save(broken, batch=1)
+        assert len(store) == 5 and store.meta["institution"] == "Fintech"
+        with self.assertRaises(ValueError):
+            store.save(Bank.open(store))
+        store.delete(["01"])
+        assert len(store) == 4 and store.totals()["credit"] == 0
+        store.close()
+
+    def test_b_working_set(self):
+        store = SQLiteStore(self.path)
+        store.save(populate(Bank()))
+        bank = Bank.open(store, capacity=2, evict_batch=1)
+        registry = bank.account_holders
+        assert isinstance(registry, WorkingSetRegistry)
+        assert bank.bank_balance == 7500.00 and len(registry) == 5
+        assert dict.__len__(registry) == 0
+        # Faulted in through the card number on a card index miss.
+        for i in range(5):
+            assert bank.withdrawal_transaction(f"40001|{i}1-checking-1", 100.00)["status"]
+        assert dict.__len__(registry) == 2
+        assert registry.misses == 5 and registry.evictions == 3
+        assert registry.writebacks == 3
+        assert bank.bank_balance == 7000.00
+        assert bank.account_type_balances["checking"] == 4500.00
+        assert set(bank.card_index) == {"40001|31-checking-1", "40001|41-checking-1"}
+        # Evicted holders come back with the balances written back.
+        assert registry["01"].accounts.checking_accounts["01-checking-1"].balance == 900.00
+        assert registry.hit_rate > 0
+        stats = registry.stats()
+        assert stats["resident"] == 2 and stats["misses"] == 6
+        registry.flush()
+        assert not registry.dirty
+        assert store.totals()["checking"] == 4500.00
+        # Reopened, the bank picks up where it left off.
+        bank = Bank.open(store, capacity=10)
+        assert bank.bank_balance == 7000.00
+        assert bank.account_holders["41"].accounts.total_balance == 1400.00
+
+    def test_c_registration(self):
+        store = SQLiteStore(self.path)
+        store.save(populate(Bank(), holders=2))
+        bank = Bank.open(store, capacity=2, evict_batch=1)
+        ah = AccountHolder(bank, "91", "Penny", "Wong")
+        CheckingAccount("91-checking-1", "checking", ah.accounts, "91", 50.00)
+        assert len(bank.account_holders) == 3
+        assert bank.bank_balance == 3050.00
+        bank.account_holders["01"]
+        bank.account_holders["11"]
+        # The new holder was evicted, so written to the store.
+        assert "91" in store and not dict.__contains__(bank.account_holders, "91")
+        assert bank.account_holders["91"].accounts.total_balance == 50.00
+        del bank.account_holders["91"]
+        assert "91" not in store and "91" not in bank.account_holders
+        assert bank.bank_balance == 3000.00
+        # Removing a holder that isn't in memory backs out its stored totals.
+        del bank.account_holders["01"]
+        assert bank.bank_balance == 1500.00 and len(bank.account_holders) == 1
+        bank.account_holders.clear()
+        assert bank.bank_balance == 0 and len(store) == 0
+
+    def test_d_bulk_load_and_iteration(self):
+        store = SQLiteStore(self.path)
+        bank = Bank.open(store, capacity=3, evict_batch=1)
+        bank.bulk_load(
+            {
+                "accountholder_id": [f"{i}1" for i in range(6)],
+                "first_name": ["Mathias"] * 6,
+                "last_name": ["Cormann"] * 6,
+            },
+            {
+                "accountholder_id": [f"{i}1" for i in range(6)],
+                "account_id": [f"{i}1-checking-1" for i in range(6)],
+                "kind": ["checking"] * 6,
+                "balance": [100.00] * 6,
+            },
+        )
+        registry = bank.account_holders
+        assert dict.__len__(registry) == 3 and len(store) == 3
+        assert len(registry) == 6 and bank.bank_balance == 600.00
+        # Iterating writes back the dirty holders and walks the store.
+        assert sorted(registry) == [f"{i}1" for i in range(6)]
+        assert sum(holder.accounts.total_balance for holder in registry.values()) == 600.00
+        assert dict.__len__(registry) == 3
+        assert bank.audit_balances() == []
+
+    def test_e_persistence(self):
+        store = SQLiteStore(self.path)
+        bank = populate(Bank(), holders=3)
+        store.save(bank)
+        persistence = bank.persistence = Persistence(store, interval=None)
+        for _ in range(10):
+            bank.withdrawal_transaction("40001|01-checking-1", 10.00)
+        bank.deposit_transaction("40001|11-checking-1", 5.00)
+        persistence.flush()
+        # Ten withdrawals from one account are written as one row.
+        assert persistence.flushes == 1 and persistence.rows == 2
+        assert store.totals("01")["checking"] == 900.00
+        assert store.totals("11")["checking"] == 1005.00
+        # Definitions rewrite the holder, removals delete it.
+        ah = AccountHolder(bank, "91", "Penny", "Wong")
+        ac = CheckingAccount("91-checking-1", "checking", ah.accounts, "91", 50.00)
+        Card(ah, ac, "Penny", "Wong", "40001|91-checking-1", "0101", "12-12-2024", "432", "active")
+        bank.account_holders["11"].accounts.checking_accounts["11-checking-1"].status = "locked"
+        del bank.account_holders["21"]
+        persistence.flush()
+        assert "21" not in store and len(store) == 3
+        assert store.read("11")[3][0][7] == "locked"
+        assert store.read("91")[4][0][3] == "40001|91-checking-1"
+        reopened = Bank.open(store)
+        assert reopened.bank_balance == bank.bank_balance == 2955.00
+        assert reopened.withdrawal_transaction("40001|91-checking-1", 20.00)["status"]
+
+    def test_f_flush_triggers(self):
+        clock = Clock()
+        store = SQLiteStore(self.path)
+        persistence = Persistence(
+            store, batch_size=3, interval=5, clock=clock, background=False
+        )
+        # Registered through the constructors, straight into an empty store.
+        bank = populate(Bank(persistence=persistence), holders=1)
+        for i in range(2):
+            assert bank.deposit_transaction("40001|01-checking-1", 1.00)["status"]
+        assert persistence.flushes == 0
+        clock.now += 5
+        bank.deposit_transaction("40001|01-checking-1", 1.00)
+        assert persistence.flushes == 1 and store.totals()["checking"] == 1003.00
+        populate(bank, holders=4)
+        assert persistence.flushes >= 2
+        persistence.flush()
+        # Holder 01 was replaced by a new one.
+        assert len(store) == 4 and store.totals()["checking"] == 4000.00
+        # A failed flush keeps its changes for the next one.
+        bank.deposit_transaction("40001|11-checking-1", 1.00)
+        store.close()
+        with self.assertRaises(Exception):
+            persistence.flush()
+        persistence.store = SQLiteStore(self.path)
+        persistence.flush()
+        assert persistence.store.totals("11")["checking"] == 1001.00
+
+    def test_g_pinned_batches(self):
+        store = SQLiteStore(self.path)
+        store.save(populate(Bank(), holders=3))
+        bank = Bank.open(store, capacity=1, evict_batch=1)
+        # Resolving the third card would evict the first two mid batch.
+        result = bank.process_batch(
+            [(f"40001|{i}1-checking-1", 10.00, "withdraw") for i in range(3)]
+        )
+        assert list(result.statuses) == [0, 0, 0]
+        assert dict.__len__(bank.account_holders) == 1
+        assert bank.bank_balance == 4470.00 and bank.audit_balances() == []
+        bank.account_holders.flush()
+        assert store.totals()["checking"] == 2970.00
+        # Accrual faults every holder in before posting to any.
+        bank = Bank.open(store, capacity=2, evict_batch=1)
+        summary = bank.accrue_interest(datetime.date(2024, 1, 2))
+        assert dict.__len__(bank.account_holders) == 2
+        bank.account_holders.flush()
+        assert abs(store.totals()["savings"] - 1500.00 - summary["interest"]) < 1e-9
+        assert summary["interest"] > 0
+
+    def test_h_ledger_store_interest(self):
+        # Interest posted to LedgerStore columns reaches persistence too.
+        store = SQLiteStore(self.path)
+        bank = Bank(ledger=LedgerStore())
+        ah = AccountHolder(bank, "01", "Mathias", "Cormann")
+        SavingsAccountView(
+            "01-savings-1", "savings", ah.accounts, "01", opening_balance=1000.00
+        )
+        store.save(bank)
+        bank.persistence = Persistence(store, interval=None)
+        summary = bank.accrue_interest(datetime.date(2024, 1, 2))
+        bank.persistence.flush()
+        assert summary["interest"] > 0
+        assert store.totals("01")["savings"] == 1000.00 + summary["interest"]
+
+    def test_i_background_flush(self):
+        # Triggered flushes run on the persistence thread, failures are kept.
+        store = SQLiteStore(self.path)
+        bank = populate(Bank(), holders=3)
+        store.save(bank)
+        persistence = bank.persistence = Persistence(store, batch_size=2, interval=None)
+        bank.deposit_transaction("40001|01-checking-1", 1.00)
+        bank.deposit_transaction("40001|11-checking-1", 1.00)
+        deadline = time.monotonic() + 5
+        while not persistence.flushes and time.monotonic() < deadline:
+            time.sleep(0.001)
+        assert persistence.flushes == 1 and store.totals()["checking"] == 3002.00
+        store.close()
+        bank.deposit_transaction("40001|01-checking-1", 1.00)
+        bank.deposit_transaction("40001|21-checking-1", 1.00)
+        while persistence.error is None and time.monotonic() < deadline:
+            time.sleep(0.001)
+        assert persistence.error is not None
+        persistence.store = SQLiteStore(self.path)
+        persistence.close()
+        assert persistence.store.totals()["checking"] == 3004.00
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+import os, sys
+import tempfile
+import threading
+
+test_dir = os.path.dirname(__file__)
+src_dir = "../"
+sys.path.insert(0, os.path.abspath(os.path.join(test_dir, src_dir)))
+
+from bank.accounts import CheckingAccount
+from bank.account_holder import AccountHolder
+from bank.banks import Bank
+from bank.exceptions import AccountError, InsufficientBalance
+from bank.journal import Journal, RECORD_SIZE
+from bank.status import TransactionStatus
+
+
+def open_accounts(bank, n, opening_balance=1000.00):
+    accounts = []
+    for i in range(n):
+        ah = AccountHolder(bank, f"{i}1", "Mathias", "Cormann")
+        accounts.append(
+            CheckingAccount(
+                f"{i}1-checking-1",
+                "checking",
+                ah.accounts,
+                f"{i}1",
+                opening_balance=opening_balance,
+            )
+        )
+    return accounts
+
+
+class BasicTests(unittest.TestCase):
+    def test_a_transfer(self):
+        bank = Bank()
+        a, b = open_accounts(bank, 2)
+        trans = bank.electronic_transfer(a, b, 400.00)
+        assert trans["status"] and trans["new_balance"] == 600.00
+        assert b.balance == 1400.00
+        assert bank.bank_balance == 2000.00
+        # Declines leave both sides untouched.
+        trans = bank.electronic_transfer(a, b, 600.01)
+        assert isinstance(trans["error"], InsufficientBalance)
+        b.status = "closed"
+        trans = bank.electronic_transfer(a, b, 1.00)
+        assert isinstance(trans["error"], AccountError)
+        assert trans["error"].args[0] == b.account_id
+        assert (a.balance, b.balance) == (600.00, 1400.00)
+        assert isinstance(bank.electronic_transfer(a, a, 1.00)["error"], ValueError)
+        assert isinstance(bank.electronic_transfer(b, a, -1.00)["error"], ValueError)
+        (other,) = open_accounts(Bank(), 1)
+        assert not bank.electronic_transfer(a, other, 1.00)["status"]
+        assert other.balance == 1000.00 and a.balance == 600.00
+
+    def test_b_netting(self):
+        bank = Bank()
+        a, b, c = open_accounts(bank, 3)
+        result = bank.process_transfers(
+            [
+                (a, b, 600.00),
+                (b, a, 300.00),
+                (a, b, 600.00),
+                (a, c, 200.00),
+                (c, a, 1000.00),
+            ]
+        )
+        assert list(result.statuses) == [
+            TransactionStatus.OK,
+            TransactionStatus.OK,
+            TransactionStatus.OK,
+            TransactionStatus.INSUFFICIENT_BALANCE,
+            TransactionStatus.OK,
+        ]
+        assert (a.balance, b.balance, c.balance) == (1100.00, 1900.00, 0.00)
+        assert bank.bank_balance == 3000.00
+
+    def test_c_concurrent_opposite_transfers(self):
+        bank = Bank(concurrent=True, lock_stripes=8)
+        accounts = open_accounts(bank, 4, 10000.00)
+
+        def worker(source, target):
+            for _ in range(300):
+                bank.electronic_transfer(source, target, 1.00)
+                bank.process_transfers([(target, source, 1.00), (source, target, 1.00)])
+
+        threads = [
+            threading.Thread(target=worker, args=(accounts[i], accounts[j]))
+            for i, j in ((0, 1), (1, 0), (2, 3), (3, 2), (0, 3), (3, 0))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+            assert not thread.is_alive()
+        assert sum(account.balance for account in accounts) == 40000.00
+        assert bank.audit_balances() == []
+
+    def test_d_journal(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bank.journal")
+            journal = Journal(path)
+            bank = Bank(journal=journal)
+            a, b = open_accounts(bank, 2)
+            bank.electronic_transfer(a, b, 100.00)
+            bank.electronic_transfer(a, b, 5000.00)
+            bank.process_transfers([(b, a, 50.00), (a, b, 25.00)])
+            bank.electronic_transfer(a, b, 10.00)
+            journal.close()
+            bank2 = Journal(path).replay()
+            accounts = bank2.account_holders["01"].accounts.checking_accounts
+            assert accounts["01-checking-1"].balance == a.balance == 915.00
+            bank2.journal.close()
+            # A transfer torn after its debit record is not replayed.
+            with open(path, "r+b") as f:
+                f.truncate(os.path.getsize(path) - RECORD_SIZE)
+            bank3 = Journal(path).replay()
+            accounts = bank3.account_holders["01"].accounts.checking_accounts
+            assert accounts["01-checking-1"].balance == 925.00
+            assert bank3.bank_balance == 2000.00
+            bank3.journal.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
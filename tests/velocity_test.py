@@ -0,0 +1,176 @@
+import unittest
+import os, sys, tempfile
+
+test_dir = os.path.dirname(__file__)
+src_dir = "../"
+sys.path.insert(0, os.path.abspath(os.path.join(test_dir, src_dir)))
+
+from bank.accounts import CheckingAccount
+from bank.account_holder import AccountHolder
+from bank.banks import Bank
+from bank.cards import Card
+from bank.exceptions import InsufficientBalance, VelocityExceeded
+from bank.status import TransactionStatus
+from bank.storage import SQLiteStore
+from bank.velocity import VelocityLimit, VelocityLimits, DAY, HOUR, MINUTE
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000000.0
+
+    def __call__(self):
+        return self.now
+
+
+def open_bank(velocity, cards=1):
+    bank = Bank(velocity=velocity)
+    ah = AccountHolder(bank, "01", "Mathias", "Cormann")
+    ac = CheckingAccount(
+        "01-checking-1", "checking", ah.accounts, "01", opening_balance=10000.00
+    )
+    for i in range(cards):
+        Card(
+            ah,
+            ac,
+            "Mathias",
+            "Cormann",
+            f"40001|01-checking-{i + 1}",
+            "0101",
+            "12-12-2024",
+            "432",
+            "active",
+        )
+    return bank, ac
+
+
+class BasicTests(unittest.TestCase):
+    def test_a_card_limits(self):
+        clock = Clock()
+        velocity = VelocityLimits(
+            card=[VelocityLimit(DAY, max_amount=1000.00), VelocityLimit(HOUR, max_count=3)],
+            clock=clock,
+        )
+        bank, ac = open_bank(velocity)
+        card = "40001|01-checking-1"
+        for _ in range(3):
+            assert bank.withdrawal_transaction(card, 100.00)["status"]
+        trans = bank.withdrawal_transaction(card, 100.00)
+        assert isinstance(trans["error"], VelocityExceeded)
+        assert "3 withdrawals per 3600 seconds" in trans["error"].message
+        assert ac.balance == 9700.00
+        # The hourly count slides out, the daily amount doesn't.
+        clock.now += HOUR
+        assert bank.withdrawal_transaction(card, 600.00)["status"]
+        trans = bank.withdrawal_transaction(card, 200.00)
+        assert trans["error"].args[1].max_amount == 1000.00
+        # Declines for other reasons aren't counted.
+        trans = bank.withdrawal_transaction(card, 100.00)
+        assert trans["status"]
+        assert velocity.usage(card)[0][1:] == (1000.00, 5)
+        clock.now += DAY
+        assert velocity.usage(card)[0][1:] == (0, 0)
+        assert bank.withdrawal_transaction(card, 1000.00)["status"]
+        result = bank.withdrawal_result(card, 1.00)
+        assert result.code == TransactionStatus.VELOCITY_LIMIT
+        assert not result.status and "Velocity limit" in result.message
+
+    def test_b_account_limits_and_batches(self):
+        clock = Clock()
+        velocity = VelocityLimits(
+            account=[VelocityLimit(DAY, max_amount=500.00)], clock=clock
+        )
+        bank, ac = open_bank(velocity, cards=2)
+        # Both cards spend against the one account's cap.
+        result = bank.process_batch(
+            [
+                ("40001|01-checking-1", 300.00, "withdraw"),
+                ("40001|01-checking-2", 300.00, "withdraw"),
+                ("40001|01-checking-2", 200.00, "withdraw"),
+                ("40001|01-checking-1", 50.00, "deposit"),
+            ]
+        )
+        assert list(result.statuses) == [
+            TransactionStatus.OK,
+            TransactionStatus.VELOCITY_LIMIT,
+            TransactionStatus.OK,
+            TransactionStatus.OK,
+        ]
+        assert ac.balance == 9550.00
+        trans = bank.withdrawal_transaction("40001|01-checking-1", 0.01)
+        assert trans["error"].args[0] == "account"
+        ac.balance = 0
+        clock.now += DAY
+        trans = bank.withdrawal_transaction("40001|01-checking-1", 100.00)
+        assert isinstance(trans["error"], InsufficientBalance)
+        assert velocity.usage(account=ac)[0][1:] == (0, 0)
+
+    def test_c_bounded_entries(self):
+        clock = Clock()
+        velocity = VelocityLimits(
+            card=[VelocityLimit(HOUR, max_count=1)], max_entries=100, clock=clock
+        )
+        for i in range(100):
+            assert velocity.allow(str(i), None, 1, clock()) is None
+        assert velocity.allow("99", None, 1, clock()) is not None
+        velocity.release("99", None, 1)
+        assert velocity.allow("99", None, 1, clock()) is None
+        # Full of live entries, new cards fail closed rather than evict one at its cap.
+        assert velocity.allow("new", None, 1, clock()) == ("card", None)
+        assert len(velocity) == 100
+        # Idle entries are dropped as new cards arrive.
+        clock.now += HOUR
+        velocity.allow("new", None, 1, clock())
+        assert len(velocity) == 1
+        velocity.expire()
+        clock.now += HOUR
+        velocity.expire()
+        assert len(velocity) == 0
+        with self.assertRaises(ValueError):
+            VelocityLimit(DAY)
+
+    def test_d_least_recently_used(self):
+        # A card at its cap stays capped while other cards come and go.
+        clock = Clock()
+        velocity = VelocityLimits(
+            card=[VelocityLimit(HOUR, max_count=1)], max_entries=2, clock=clock
+        )
+        assert velocity.allow("a", None, 1, clock()) is None
+        clock.now += 30 * MINUTE
+        assert velocity.allow("b", None, 1, clock()) is None
+        assert velocity.allow("c", None, 1, clock()) == ("card", None)
+        clock.now += 31 * MINUTE
+        # a's hour is over and b's isn't, using a makes b the least recently used.
+        assert velocity.allow("a", None, 1, clock()) is None
+        assert velocity.allow("c", None, 1, clock()) == ("card", None)
+        clock.now += 30 * MINUTE
+        assert velocity.allow("c", None, 1, clock()) is None
+        # a is still capped, its count wasn't dropped.
+        assert velocity.allow("a", None, 1, clock())[1] is not None
+
+    def test_e_reloaded_accounts(self):
+        # Account counters follow the account when the working set reloads it.
+        clock = Clock()
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SQLiteStore(os.path.join(tmp, "bank.db"))
+            bank, _ = open_bank(None)
+            ah = AccountHolder(bank, "11", "Penny", "Wong")
+            ac = CheckingAccount("11-checking-1", "checking", ah.accounts, "11", 100.00)
+            Card(
+                ah, ac, "Penny", "Wong", "40001|11-checking-1", "0101", "12-12-2024", "432", "active"
+            )
+            store.save(bank)
+            bank = Bank.open(store, capacity=1, evict_batch=1)
+            bank.velocity = VelocityLimits(
+                account=[VelocityLimit(DAY, max_count=1)], clock=clock
+            )
+            assert bank.withdrawal_transaction("40001|01-checking-1", 10.00)["status"]
+            # Evicts holder 01, the next withdrawal loads a new account object.
+            assert bank.withdrawal_transaction("40001|11-checking-1", 10.00)["status"]
+            trans = bank.withdrawal_transaction("40001|01-checking-1", 10.00)
+            assert isinstance(trans["error"], VelocityExceeded)
+            store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
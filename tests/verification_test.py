@@ -0,0 +1,176 @@
+import unittest
+import os, sys
+import tempfile
+
+test_dir = os.path.dirname(__file__)
+src_dir = "../"
+sys.path.insert(0, os.path.abspath(os.path.join(test_dir, src_dir)))
+
+from bank.accounts import CheckingAccount
+from bank.account_holder import AccountHolder
+from bank.banks import Bank
+from bank.cards import Card
+from bank.exceptions import AccountNotExists, VerificationFailed
+from bank.journal import Journal
+from bank.storage import SQLiteStore
+from bank.verification import (
+    CardVerifier,
+    check_pin,
+    hash_pin,
+    hash_pins,
+    is_pin_hash,
+)
+
+CARD = "40001|01-checking-1"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def open_bank(pin="0101", cards=1, bank=None):
+    bank = bank if bank is not None else Bank()
+    ah = AccountHolder(bank, "01", "Mathias", "Cormann")
+    ac = CheckingAccount(
+        "01-checking-1", "checking", ah.accounts, "01", opening_balance=1000.00
+    )
+    for i in range(cards):
+        Card(
+            ah,
+            ac,
+            "Mathias",
+            "Cormann",
+            f"40001|01-checking-{i + 1}",
+            pin,
+            "12-12-2024",
+            "432",
+            "active",
+        )
+    return bank, ac
+
+
+class BasicTests(unittest.TestCase):
+    def test_a_hash_pin(self):
+        stored = hash_pin("0101", iterations=1000)
+        assert is_pin_hash(stored)
+        assert "0101" not in stored.split("$", 2)[2]
+        assert stored != hash_pin("0101", iterations=1000)
+        assert check_pin("0101", stored)
+        assert not check_pin("0102", stored)
+        assert not check_pin("0101", "pbkdf2_sha256$x$zz$zz")
+        # Plaintext PINs of cards that haven't been enrolled.
+        assert check_pin("0101", "0101")
+        assert not check_pin("0102", "0101")
+        assert all(check_pin("1234", pin) for pin in hash_pins(["1234"] * 2, 1000))
+
+    def test_b_enroll(self):
+        bank, ac = open_bank(cards=3)
+        verifier = CardVerifier(bank, processes=0, iterations=1000)
+        assert verifier.enroll() == 3
+        assert verifier.enroll() == 0
+        card = ac.linked_cards[CARD]
+        assert is_pin_hash(card._Card__pin)
+        assert card.verify("0101", "12-12-2024", "432")
+        assert not card.verify("0102", "12-12-2024", "432")
+        assert not card.verify("0101", "12-12-2025", "432")
+        # Cards can be issued with a hash and never hold the plaintext.
+        bank, ac = open_bank(pin=hash_pin("4321", iterations=1000))
+        assert ac.linked_cards[CARD].verify("4321", "12-12-2024", "432")
+
+    def test_c_sessions(self):
+        clock = Clock()
+        bank, ac = open_bank()
+        verifier = CardVerifier(
+            bank, processes=0, ttl=60, max_sessions=2, iterations=1000, clock=clock
+        )
+        verifier.enroll()
+        assert verifier.verify(CARD, "0101", "12-12-2024", "432", "t1")
+        assert verifier.verify(CARD, "0101", "12-12-2024", "432", "t1")
+        assert (verifier.kdf_checks, verifier.hits) == (1, 1)
+        # A wrong PIN goes to the KDF and ends the session.
+        assert not verifier.verify(CARD, "9999", "12-12-2024", "432", "t1")
+        assert len(verifier.sessions) == 0
+        assert verifier.verify(CARD, "0101", "12-12-2024", "432", "t1")
+        assert verifier.kdf_checks == 3
+        # Expiry and CVV are checked even within a session.
+        assert not verifier.verify(CARD, "0101", "12-12-2024", "999", "t1")
+        assert verifier.kdf_checks == 3
+        # Sessions expire after ttl.
+        clock.now += 61
+        assert verifier.verify(CARD, "0101", "12-12-2024", "432", "t1")
+        assert verifier.kdf_checks == 4
+        # Least recently used sessions are evicted past max_sessions.
+        verifier.verify(CARD, "0101", "12-12-2024", "432", "t2")
+        verifier.verify(CARD, "0101", "12-12-2024", "432", "t1")
+        verifier.verify(CARD, "0101", "12-12-2024", "432", "t3")
+        assert len(verifier.sessions) == 2
+        checks = verifier.kdf_checks
+        assert verifier.verify(CARD, "0101", "12-12-2024", "432", "t1")
+        assert verifier.kdf_checks == checks
+        assert verifier.verify(CARD, "0101", "12-12-2024", "432", "t2")
+        assert verifier.kdf_checks == checks + 1
+        # Locking the card ends its sessions.
+        ac.linked_cards[CARD].status = "locked"
+        assert not verifier.verify(CARD, "0101", "12-12-2024", "432", "t1")
+
+    def test_d_transactions(self):
+        bank, ac = open_bank()
+        verifier = CardVerifier(bank, processes=0, iterations=1000)
+        verifier.enroll()
+        trans = verifier.withdrawal_transaction(CARD, 100.00, "0101", "12-12-2024", "432")
+        assert trans["status"]
+        trans = verifier.withdrawal_transaction(CARD, 100.00, "0000", "12-12-2024", "432")
+        assert isinstance(trans["error"], VerificationFailed)
+        assert CARD in trans["error"].message
+        trans = verifier.deposit_transaction(CARD, 50.00, "0101", "12-12-2024", "432")
+        assert trans["status"]
+        assert ac.balance == 950.00
+        with self.assertRaises(AccountNotExists):
+            verifier.withdrawal_transaction(
+                "40001|99-checking-1", 1.00, "0101", "12-12-2024", "432"
+            )
+
+    def test_e_process_pool(self):
+        bank, ac = open_bank(cards=4)
+        with CardVerifier(bank, processes=2, iterations=1000) as verifier:
+            assert verifier.enroll(chunk_size=3) == 4
+            requests = [
+                (f"40001|01-checking-{i + 1}", pin, "12-12-2024", "432", None)
+                for i, pin in enumerate(["0101", "0101", "1111", "0101"])
+            ]
+            assert verifier.verify_many(requests) == [True, True, False, True]
+            assert verifier.submit(CARD, "0101", "12-12-2024", "432").result()
+            assert verifier.hits == 1
+            assert verifier.verify(CARD, "0101", "12-12-2024", "432", "t1")
+        assert ac.linked_cards[CARD].verify("0101", "12-12-2024", "432")
+
+    def test_f_enrolled_pins_are_kept(self):
+        # Hashes replace the plaintext in the journal's replay and in the store.
+        tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(tmp.name, "bank.journal")
+        bank, ac = open_bank(cards=2, bank=Bank(journal=Journal(path)))
+        store = SQLiteStore(os.path.join(tmp.name, "bank.db"))
+        store.save(bank)
+        assert CardVerifier(bank, processes=0, iterations=1000).enroll() == 2
+        stored = ac.linked_cards[CARD]._Card__pin
+        bank.journal.close()
+        replayed = Journal(path).replay()
+        card = replayed.account_holders["01"].cards[CARD]
+        assert card._Card__pin == stored
+        assert card.verify("0101", "12-12-2024", "432")
+        replayed.journal.close()
+        # Cards of a working set's store are enrolled and written back.
+        opened = Bank.open(store, capacity=1)
+        assert CardVerifier(opened, processes=0, iterations=1000).enroll() == 2
+        opened.account_holders.flush()
+        assert all(is_pin_hash(fields[4]) for fields in store.read("01")[4])
+        store.close()
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()